@@ -0,0 +1,253 @@
+"""
+Shared on-disk cache for immutable static assets (JS / CSS / fonts).
+
+Browser contexts don't share an HTTP cache, so every site re-downloads
+the same multi-megabyte Dutchie embed, Jane and Curaleaf bundles —
+hundreds of times per shard.  ``BaseScraper`` routes requests for
+*content-hashed* static files on the platform CDNs through this cache:
+the first context to fetch a bundle stores it, every later context (in
+this run and in later runs) is served from disk.
+
+Only URLs that are safe to treat as immutable are cached:
+  - the host belongs to a known platform CDN (``_ASSET_HOSTS``), and
+  - the path is a ``.js`` / ``.css`` / font file whose name carries a
+    content hash (``main.3f9a2c1b.js``, ``chunk-5f8e2a1d.css``) or lives
+    under Next.js' immutable ``/_next/static/`` tree.
+
+Bodies are stored content-addressed (sha256) under
+``SCRAPER_CACHE_DIR/assets/``; an index maps URL → digest.  When the
+total size exceeds ``ASSET_CACHE_MAX_MB`` (default 400) the least
+recently used entries are evicted.  ``stats()`` reports the run's hit
+rate and bytes saved; ``main.py`` logs them and adds them to the scrape
+summary.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger("asset_cache")
+
+ASSET_CACHE_DIR = Path(os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache")) / "assets"
+ASSET_CACHE_MAX_BYTES = int(float(os.getenv("ASSET_CACHE_MAX_MB", "400")) * 1024 * 1024)
+ASSET_CACHE_ENABLED = os.getenv("ASSET_CACHE", "true").lower() not in ("0", "false", "no")
+
+# Platform CDNs whose hashed bundles are shared across many dispensaries.
+# A URL's host must equal one of these or end in "." + one of them.
+_ASSET_HOSTS = (
+    "dutchie.com",
+    "dutchie-assets.s3.amazonaws.com",
+    "iheartjane.com",
+    "jane.com",
+    "curaleaf.com",
+    "cloudfront.net",
+    "goshango.com",
+)
+
+# Static-file extensions worth caching.
+_RE_STATIC_EXT = re.compile(r"\.(?:js|mjs|css|woff2?|ttf)$", re.IGNORECASE)
+# Content hash in the file name: 8+ hex chars delimited by . - _ or ~
+_RE_HASHED_NAME = re.compile(r"[.\-_~][0-9a-f]{8,}(?:[.\-_][0-9a-z]+)*\.[a-z0-9]+$", re.IGNORECASE)
+
+# Response headers replayed on a cache hit.  Content-Length / -Encoding
+# are dropped because the stored body is already decoded.
+_REPLAY_HEADERS = (
+    "content-type",
+    "access-control-allow-origin",
+    "timing-allow-origin",
+    "cache-control",
+)
+
+
+def _is_asset_host(host: str) -> bool:
+    host = host.lower().rstrip(".")
+    return any(host == h or host.endswith("." + h) for h in _ASSET_HOSTS)
+
+
+def is_cacheable_asset(url: str) -> bool:
+    """Return True if *url* is an immutable static asset on a platform CDN."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or parsed.query:
+        return False
+    if not _is_asset_host(parsed.hostname or ""):
+        return False
+    path = parsed.path
+    if not _RE_STATIC_EXT.search(path):
+        return False
+    filename = path.rsplit("/", 1)[-1]
+    return "/_next/static/" in path or bool(_RE_HASHED_NAME.search(filename))
+
+
+class AssetCache:
+    """Content-addressed LRU disk cache with per-run hit statistics.
+
+    Thread-safe: route handlers offload both body reads and writes with
+    ``asyncio.to_thread`` so a multi-MB bundle never blocks the event loop.
+    """
+
+    def __init__(self, root: Path = ASSET_CACHE_DIR, max_bytes: int = ASSET_CACHE_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._blobs = root / "blobs"
+        self._index_path = root / "index.json"
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, Any]] = {}
+        self._total_bytes = 0  # sum of the index's entry sizes
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_stored = 0
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Index persistence
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> None:
+        try:
+            data = json.loads(self._index_path.read_text())
+            if isinstance(data, dict):
+                self._index = {
+                    url: entry for url, entry in data.items()
+                    if isinstance(entry, dict) and (self._blobs / entry.get("digest", "")).is_file()
+                }
+                self._total_bytes = sum(e.get("size", 0) for e in self._index.values())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable asset index %s: %s", self._index_path, exc)
+
+    def flush(self) -> None:
+        """Write the index to disk (call once at end of run)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp = self._index_path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(self._index))
+                tmp.replace(self._index_path)
+                self._dirty = False
+            except OSError as exc:
+                logger.warning("Could not write asset index: %s", exc)
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get(self, url: str) -> tuple[bytes, dict[str, str]] | None:
+        """Return ``(body, headers)`` for *url*, or None on a miss."""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+        try:
+            body = (self._blobs / entry["digest"]).read_bytes()
+        except OSError:
+            with self._lock:
+                self._drop_locked(url)
+                self._dirty = True
+                self.misses += 1
+            return None
+        with self._lock:
+            entry["last_used"] = time.time()
+            self._dirty = True
+            self.hits += 1
+            self.bytes_saved += len(body)
+        return body, dict(entry.get("headers", {}))
+
+    def put(self, url: str, body: bytes, headers: dict[str, str]) -> None:
+        """Store *body* for *url* and evict LRU entries past the size cap."""
+        if not body or len(body) > self.max_bytes // 4:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self._blobs / digest
+        try:
+            if not blob.exists():
+                self._blobs.mkdir(parents=True, exist_ok=True)
+                tmp = blob.with_suffix(".tmp")
+                tmp.write_bytes(body)
+                tmp.replace(blob)
+                self.bytes_stored += len(body)
+        except OSError as exc:
+            logger.debug("Could not store asset %s: %s", url[:120], exc)
+            return
+        kept = {k: v for k, v in headers.items() if k.lower() in _REPLAY_HEADERS}
+        with self._lock:
+            self._drop_locked(url)
+            self._total_bytes += len(body)
+            self._index[url] = {
+                "digest": digest,
+                "size": len(body),
+                "headers": kept,
+                "last_used": time.time(),
+            }
+            self._dirty = True
+            self._evict_locked()
+
+    def _drop_locked(self, url: str) -> dict[str, Any] | None:
+        entry = self._index.pop(url, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+        return entry
+
+    def _evict_locked(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        live_digests: dict[str, int] = {}
+        for entry in self._index.values():
+            live_digests[entry["digest"]] = live_digests.get(entry["digest"], 0) + 1
+        for url, entry in sorted(self._index.items(), key=lambda kv: kv[1]["last_used"]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._drop_locked(url)
+            live_digests[entry["digest"]] -= 1
+            if live_digests[entry["digest"]] == 0:
+                try:
+                    (self._blobs / entry["digest"]).unlink()
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        requests = self.hits + self.misses
+        with self._lock:
+            entries = len(self._index)
+            size = self._total_bytes
+        return {
+            "requests": requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests * 100, 1) if requests else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_stored": self.bytes_stored,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+
+_shared: AssetCache | None = None
+
+
+def get_asset_cache() -> AssetCache | None:
+    """Return the process-wide cache, or None when disabled."""
+    global _shared
+    if not ASSET_CACHE_ENABLED:
+        return None
+    if _shared is None:
+        _shared = AssetCache()
+    return _shared
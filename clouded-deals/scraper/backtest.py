@@ -0,0 +1,499 @@
+"""
+Backtesting — replay deal detection over historical data under many
+parameter sets.
+
+Loads historical product observations — ``price_history`` joined to the
+dispensary's region and platform and the product's subtype, or a JSONL
+export of such rows — and groups them into site runs: one dispensary's
+products on one day, which is what a scrape hands ``run_deal_detection``.
+Every site run is then replayed under each parameter set in parallel
+worker processes, and the report compares deal counts, category mix,
+brand diversity and score distribution per configuration.
+
+Parameters are named after the ``deal_detector`` module constants
+behind ``DetectionConfig`` (``CONFIG_CONSTANTS``), set whole
+(``TARGET_DEAL_COUNT=200``) or one key deep (``HARD_FILTERS.min_discount_percent=20``,
+``CATEGORY_PRICE_CAPS.flower.3.5=30``).  Each parameter set becomes a
+``DetectionConfig``; the module itself is never patched.  Values are
+JSON; anything else is taken as a string.  The first configuration is
+always the baseline (no overrides).
+
+Usage:
+    python backtest.py --region southern-nv --days 30 \\
+        --grid TARGET_DEAL_COUNT=200,300 \\
+        --grid HARD_FILTERS.min_discount_percent=15,20,25
+    python backtest.py --observations history.jsonl --configs sweep.json
+    python backtest.py --region michigan --grid MAX_SAME_BRAND_TOTAL=5,7,9 --json out.json
+
+``--configs`` takes a JSON list of ``{"name": ..., "overrides": {...}}``.
+
+Environment:
+    SUPABASE_URL, SUPABASE_SERVICE_KEY — required unless --observations
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import logging
+import os
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Iterable
+
+import deal_detector as dd
+from config.dispensaries import DISPENSARIES
+from deal_detector import DetectionConfig, run_deal_detection
+
+logger = logging.getLogger("backtest")
+
+_PAGE_SIZE = 1000
+_ID_CHUNK = 50
+
+_HISTORY_COLUMNS = (
+    "dispensary_id, sale_price, original_price, discount_percent, name, brand, "
+    "category, weight_value, weight_unit, observed_date, "
+    "products(product_subtype, is_infused)"
+)
+
+SiteRun = tuple[str, str, list[dict[str, Any]]]
+
+
+# =====================================================================
+# Historical data
+# =====================================================================
+
+def _number(value: Any) -> float | None:
+    """NUMERIC columns arrive as numbers or strings; blanks become None."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def observation_to_product(
+    row: dict[str, Any],
+    dispensary: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """A ``price_history`` row as the product dict detection expects.
+
+    Region and platform come from the row when present, else from
+    *dispensary*; subtype and infused flag from the embedded
+    ``products`` row when the query joined it.
+    """
+    dispensary = dispensary or {}
+    joined = row.get("products") or {}
+    sale_price = _number(row.get("sale_price"))
+    return {
+        "name": row.get("name") or "",
+        "brand": row.get("brand"),
+        "category": row.get("category") or "other",
+        "sale_price": sale_price,
+        "current_price": sale_price,
+        "original_price": _number(row.get("original_price")),
+        "discount_percent": _number(row.get("discount_percent")),
+        "weight_value": _number(row.get("weight_value")),
+        "weight_unit": row.get("weight_unit"),
+        "product_subtype": row.get("product_subtype", joined.get("product_subtype")),
+        "is_infused": bool(row.get("is_infused", joined.get("is_infused"))),
+        "dispensary_id": row.get("dispensary_id"),
+        "region": row.get("region") or dispensary.get("region"),
+        "source_platform": row.get("source_platform") or dispensary.get("platform", ""),
+    }
+
+
+def group_site_runs(
+    rows: Iterable[dict[str, Any]],
+    dispensaries: dict[str, dict[str, Any]] | None = None,
+) -> list[SiteRun]:
+    """Observations grouped by (dispensary, observed date), sorted.
+
+    *dispensaries* maps dispensary id to a dict with ``region`` and
+    ``platform`` (default: the configured dispensary list).
+    """
+    if dispensaries is None:
+        dispensaries = {d["slug"]: d for d in DISPENSARIES}
+    runs: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        disp_id = row.get("dispensary_id") or ""
+        observed = str(row.get("observed_date") or "")[:10]
+        runs[(disp_id, observed)].append(
+            observation_to_product(row, dispensaries.get(disp_id))
+        )
+    return [(disp_id, observed, runs[(disp_id, observed)]) for disp_id, observed in sorted(runs)]
+
+
+def load_observations(path: str) -> list[dict[str, Any]]:
+    """Rows of a JSONL export (one ``price_history``-shaped object per line)."""
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def load_price_history(
+    db: Any,
+    region: str | None,
+    start: date,
+    end: date,
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]:
+    """Fetch ``price_history`` rows for *region* between *start* and *end*.
+
+    Returns the rows and the matching dispensaries keyed by id.  Pages
+    through the results (Supabase returns at most 1000 rows per query)
+    and filters dispensaries a chunk of ids at a time.
+    """
+    query = db.table("dispensaries").select("id, region, platform")
+    if region:
+        query = query.eq("region", region)
+    dispensaries = {row["id"]: row for row in query.execute().data}
+
+    rows: list[dict[str, Any]] = []
+    ids = sorted(dispensaries)
+    for i in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[i:i + _ID_CHUNK]
+        offset = 0
+        while True:
+            result = (
+                db.table("price_history")
+                .select(_HISTORY_COLUMNS)
+                .in_("dispensary_id", chunk)
+                .gte("observed_date", start.isoformat())
+                .lte("observed_date", end.isoformat())
+                .order("id")
+                .range(offset, offset + _PAGE_SIZE - 1)
+                .execute()
+            )
+            rows.extend(result.data)
+            if len(result.data) < _PAGE_SIZE:
+                break
+            offset += _PAGE_SIZE
+        logger.info("Loaded %d observations (%d/%d dispensaries)", len(rows), i + len(chunk), len(ids))
+    return rows, dispensaries
+
+
+# =====================================================================
+# Parameter sets
+# =====================================================================
+
+def _parse_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_grid(specs: list[str]) -> list[dict[str, Any]]:
+    """Every combination of ``PARAM=v1,v2,...`` specs, baseline first.
+
+    Each configuration is ``{"name": ..., "overrides": {param: value}}``.
+    """
+    axes: list[list[tuple[str, Any]]] = []
+    for spec in specs:
+        param, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"expected PARAM=v1,v2,..., got {spec!r}")
+        axes.append([(param.strip(), _parse_value(v.strip())) for v in values.split(",")])
+    configs = [{"name": "baseline", "overrides": {}}]
+    if axes:
+        for combo in itertools.product(*axes):
+            configs.append({
+                "name": " ".join(f"{param}={json.dumps(value)}" for param, value in combo),
+                "overrides": dict(combo),
+            })
+    return configs
+
+
+# Parameter name (the module constant) → DetectionConfig attribute.
+_CONFIG_ATTRS = {constant: attr for attr, constant in dd.CONFIG_CONSTANTS.items()}
+
+
+def build_config(
+    overrides: dict[str, Any],
+    dynamic_caps: dict[tuple[str, str, str], float] | None = None,
+) -> DetectionConfig:
+    """A ``DetectionConfig`` with *overrides* applied to the defaults.
+
+    Overridden tables are deep-copied first, so the module's tables are
+    never mutated; nothing on ``deal_detector`` changes, so configs can
+    be built and replayed side by side in one process.
+    """
+    tunables: dict[str, Any] = {}
+    defaults = DetectionConfig(dynamic_caps={})
+    for path, value in overrides.items():
+        name, *keys = path.split(".", 2)
+        attr = _CONFIG_ATTRS.get(name)
+        if attr is None:
+            raise KeyError(f"unknown deal_detector parameter: {name}")
+        if not keys:
+            tunables[attr] = value
+            continue
+        if attr not in tunables:
+            tunables[attr] = copy.deepcopy(getattr(defaults, attr))
+        target = tunables[attr]
+        for key in keys[:-1]:
+            if not isinstance(target.get(key), dict):
+                # A flat value (e.g. a single category cap) becomes a table.
+                target[key] = {}
+            target = target[key]
+        target[keys[-1]] = value
+    return DetectionConfig(dynamic_caps=dynamic_caps or {}, **tunables)
+
+
+# =====================================================================
+# Replay
+# =====================================================================
+
+class BacktestStats:
+    """What one configuration selected over a set of site runs.
+
+    Counters only, so shards replayed in different processes merge by
+    addition in any order.
+    """
+
+    __slots__ = (
+        "name", "overrides", "site_runs", "products", "passed_hard_filter",
+        "price_cap_rejects", "deals", "guaranteed", "empty_runs",
+        "categories", "brands", "scores",
+    )
+
+    def __init__(self, name: str, overrides: dict[str, Any]) -> None:
+        self.name = name
+        self.overrides = overrides
+        self.site_runs = 0
+        self.products = 0
+        self.passed_hard_filter = 0
+        self.price_cap_rejects = 0
+        self.deals = 0
+        self.guaranteed = 0
+        self.empty_runs = 0
+        self.categories: Counter[str] = Counter()
+        self.brands: Counter[str] = Counter()
+        self.scores: Counter[int] = Counter()
+
+    def add_run(self, result: dd.DetectionResult) -> None:
+        self.site_runs += 1
+        self.products += result.total_products
+        self.passed_hard_filter += result.passed_hard_filter
+        self.price_cap_rejects += result.price_cap_rejects
+        self.deals += result.selected
+        self.guaranteed += result.guaranteed
+        if not result.top_deals:
+            self.empty_runs += 1
+        for deal in result.top_deals:
+            self.categories[deal.get("category") or "other"] += 1
+            self.brands[(deal.get("brand") or "").lower()] += 1
+            self.scores[int(deal.get("deal_score") or 0)] += 1
+
+    def merge(self, other: BacktestStats) -> None:
+        self.site_runs += other.site_runs
+        self.products += other.products
+        self.passed_hard_filter += other.passed_hard_filter
+        self.price_cap_rejects += other.price_cap_rejects
+        self.deals += other.deals
+        self.guaranteed += other.guaranteed
+        self.empty_runs += other.empty_runs
+        self.categories.update(other.categories)
+        self.brands.update(other.brands)
+        self.scores.update(other.scores)
+
+    def score_percentile(self, fraction: float) -> int:
+        """Score at *fraction* of the selected deals, lowest first."""
+        if not self.deals:
+            return 0
+        rank = fraction * (self.deals - 1)
+        seen = 0
+        for score in sorted(self.scores):
+            seen += self.scores[score]
+            if seen > rank:
+                return score
+        return max(self.scores)
+
+    def summary(self) -> dict[str, Any]:
+        deals = self.deals or 1
+        branded = {b: n for b, n in self.brands.items() if b}
+        return {
+            "name": self.name,
+            "overrides": self.overrides,
+            "site_runs": self.site_runs,
+            "products": self.products,
+            "passed_hard_filter": self.passed_hard_filter,
+            "price_cap_rejects": self.price_cap_rejects,
+            "deals": self.deals,
+            "deals_per_run": self.deals / self.site_runs if self.site_runs else 0.0,
+            "guaranteed": self.guaranteed,
+            "empty_runs": self.empty_runs,
+            "category_mix": {c: n / deals for c, n in self.categories.most_common()},
+            "distinct_brands": len(branded),
+            "top_brand_share": max(branded.values(), default=0) / deals,
+            "unbranded_share": self.brands.get("", 0) / deals,
+            "score_mean": sum(s * n for s, n in self.scores.items()) / deals,
+            "score_p10": self.score_percentile(0.1),
+            "score_p50": self.score_percentile(0.5),
+            "score_p90": self.score_percentile(0.9),
+        }
+
+
+def replay(
+    site_runs: list[SiteRun],
+    name: str,
+    overrides: dict[str, Any],
+    dynamic_caps: dict[tuple[str, str, str], float] | None = None,
+) -> BacktestStats:
+    """Run detection over *site_runs* with *overrides* applied."""
+    stats = BacktestStats(name, overrides)
+    config = build_config(overrides, dynamic_caps)
+    for _, _, products in site_runs:
+        stats.add_run(run_deal_detection(products, config))
+    return stats
+
+
+_worker_runs: list[SiteRun] = []
+_worker_caps: dict[tuple[str, str, str], float] | None = None
+
+
+def _init_worker(
+    site_runs: list[SiteRun],
+    dynamic_caps: dict[tuple[str, str, str], float] | None,
+) -> None:
+    global _worker_runs, _worker_caps
+    _worker_runs = site_runs
+    _worker_caps = dynamic_caps
+    # Per-deal log lines from thousands of replays drown the report.
+    logging.getLogger("deal_detector").setLevel(logging.WARNING)
+
+
+def _replay_shard(name: str, overrides: dict[str, Any], shard: int, shards: int) -> BacktestStats:
+    return replay(_worker_runs[shard::shards], name, overrides, _worker_caps)
+
+
+def run_backtest(
+    site_runs: list[SiteRun],
+    configs: list[dict[str, Any]],
+    workers: int | None = None,
+    dynamic_caps: dict[tuple[str, str, str], float] | None = None,
+) -> list[BacktestStats]:
+    """Replay *site_runs* under every configuration, one stats per config.
+
+    Site runs are sent to each worker process once; tasks are
+    (configuration, shard) pairs, with enough shards to keep every
+    worker busy even when there are fewer configurations than cores.
+    ``workers=1`` replays in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or not site_runs:
+        return [replay(site_runs, c["name"], c["overrides"], dynamic_caps) for c in configs]
+
+    shards = max(1, min(len(site_runs), -(-2 * workers // len(configs))))
+    results = [BacktestStats(c["name"], c["overrides"]) for c in configs]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(site_runs, dynamic_caps),
+    ) as pool:
+        futures = [
+            (i, pool.submit(_replay_shard, c["name"], c["overrides"], shard, shards))
+            for i, c in enumerate(configs)
+            for shard in range(shards)
+        ]
+        for i, future in futures:
+            results[i].merge(future.result())
+    return results
+
+
+# =====================================================================
+# Report
+# =====================================================================
+
+def print_report(results: list[BacktestStats]) -> None:
+    """One row per configuration, deltas against the baseline."""
+    summaries = [r.summary() for r in results]
+    base = summaries[0] if summaries else None
+    print()
+    print(f"{'configuration':<48} {'deals/run':>9} {'Δ':>7} {'brands':>6} "
+          f"{'top%':>5} {'p10':>4} {'p50':>4} {'p90':>4} {'empty':>5}  category mix")
+    print("-" * 130)
+    for s in summaries:
+        delta = s["deals_per_run"] - base["deals_per_run"]
+        mix = " ".join(f"{c} {share:.0%}" for c, share in list(s["category_mix"].items())[:5])
+        print(
+            f"{s['name'][:48]:<48} {s['deals_per_run']:>9.1f} {delta:>+7.1f} "
+            f"{s['distinct_brands']:>6} {s['top_brand_share']:>5.1%} "
+            f"{s['score_p10']:>4} {s['score_p50']:>4} {s['score_p90']:>4} "
+            f"{s['empty_runs']:>5}  {mix}"
+        )
+    if base:
+        print()
+        print(f"{base['site_runs']} site runs, {base['products']} products; "
+              f"baseline passed hard filter {base['passed_hard_filter']}, "
+              f"{base['price_cap_rejects']} price-cap rejects")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    logging.getLogger("deal_detector").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Replay deal detection under many parameter sets")
+    parser.add_argument("--region", help="Only dispensaries in this region (e.g. southern-nv)")
+    parser.add_argument("--days", type=int, default=30, help="History window ending --end (default 30)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last day (default today)")
+    parser.add_argument("--observations", help="JSONL export of price_history rows instead of Supabase")
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=v1,v2",
+                        help="Parameter values to sweep; repeat for a cartesian grid")
+    parser.add_argument("--configs", help="JSON file listing {name, overrides} configurations")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--dynamic-caps", action="store_true",
+                        help="Apply ml_price_caps on top of the swept caps (Supabase only)")
+    parser.add_argument("--json", dest="json_path", help="Also write the summaries here")
+    args = parser.parse_args()
+
+    configs = parse_grid(args.grid)
+    if args.configs:
+        with open(args.configs) as fh:
+            configs.extend(json.load(fh))
+
+    dynamic_caps = None
+    if args.observations:
+        rows = load_observations(args.observations)
+        dispensaries = None
+    else:
+        from dotenv import load_dotenv
+        load_dotenv()
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_SERVICE_KEY")
+        if not url or not key:
+            print("ERROR: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in .env (or use --observations)")
+            sys.exit(1)
+
+        from supabase import create_client
+        db = create_client(url, key)
+        end = args.end or date.today()
+        rows, dispensaries = load_price_history(db, args.region, end - timedelta(days=args.days - 1), end)
+        if args.dynamic_caps:
+            dd.load_dynamic_caps(db)
+            dynamic_caps = dict(dd._dynamic_caps)
+
+    site_runs = group_site_runs(rows, dispensaries)
+    if args.observations and args.region:
+        site_runs = [r for r in site_runs if r[2] and r[2][0]["region"] == args.region]
+    logger.info(
+        "Replaying %d site runs (%d products) under %d configurations",
+        len(site_runs), sum(len(r[2]) for r in site_runs), len(configs),
+    )
+
+    results = run_backtest(site_runs, configs, workers=args.workers, dynamic_caps=dynamic_caps)
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump([r.summary() for r in results], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
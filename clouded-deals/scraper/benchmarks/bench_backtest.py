@@ -0,0 +1,136 @@
+"""
+Benchmark — backtest replay throughput, in-process vs worker processes.
+
+``backtest.run_backtest`` replays every site run of a history window
+under each parameter set.  This module builds a synthetic region-month
+of ``price_history`` rows (each dispensary's catalog observed daily with
+drifting prices), replays it under a small sweep in this process and
+across worker processes, asserts identical summaries, and reports site
+runs replayed per second and the projected time for a larger sweep.
+
+Run locally:
+    python -m benchmarks.bench_backtest
+    python -m benchmarks.bench_backtest --dispensaries 40 --days 30 --configs 6 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Any
+
+from backtest import group_site_runs, parse_grid, run_backtest
+from config.dispensaries import DISPENSARIES
+from deal_detector import BRAND_TIERS
+
+_FORMATS = (
+    ("flower", None, 3.5, (12, 15, 20, 25, 30, 35, 45)),
+    ("flower", None, 7, (25, 30, 40, 55)),
+    ("flower", None, 28, (60, 80, 100, 140)),
+    ("vape", "cartridge", 0.5, (12, 15, 18, 25)),
+    ("vape", "cartridge", 1, (18, 22, 28, 35)),
+    ("vape", "disposable", 1, (20, 25, 30, 40)),
+    ("vape", "pod", 0.5, (10, 15, 20)),
+    ("edible", None, 100, (8, 10, 12, 15, 20)),
+    ("concentrate", None, 1, (12, 15, 20, 25, 35)),
+    ("preroll", None, 1, (4, 6, 8, 10, 12)),
+    ("preroll", "infused_preroll", 1, (8, 10, 14, 18)),
+    ("preroll", "preroll_pack", 3.5, (15, 20, 25, 30)),
+)
+_STRAINS = (
+    "Blue Dream", "Kobe", "Wedding Cake", "Gelato", "Sour Diesel", "Runtz", "Zkittlez",
+    "Gorilla Glue", "Ice Cream Cake", "Purple Punch", "Jack Herer", "Tahoe OG", "Mimosa",
+)
+_BRANDS = tuple(b.title() for tier in BRAND_TIERS.values() for b in sorted(tier["brands"])[:25]) + (
+    "House Brand", "", "",
+)
+
+
+def make_history(
+    dispensaries: int,
+    days: int,
+    products: int,
+    seed: int,
+    region: str = "southern-nv",
+) -> list[dict[str, Any]]:
+    """``price_history`` rows: each store's catalog observed every day.
+
+    Region and platform are left to the dispensary config lookup; about
+    a third of the listings are on sale on any given day.
+    """
+    rng = random.Random(seed)
+    stores = [d["slug"] for d in DISPENSARIES if d.get("region") == region][:dispensaries]
+    start = date(2026, 9, 1)
+    rows: list[dict[str, Any]] = []
+    for slug in stores:
+        catalog = []
+        for i in range(products):
+            category, subtype, weight, prices = rng.choice(_FORMATS)
+            catalog.append({
+                "name": f"{rng.choice(_STRAINS)} #{i} {weight:g}g",
+                "brand": rng.choice(_BRANDS),
+                "category": category,
+                "weight_value": weight,
+                "weight_unit": "mg" if category == "edible" else "g",
+                "products": {"product_subtype": subtype, "is_infused": subtype == "infused_preroll"},
+                "list_price": rng.choice(prices) * 1.6,
+            })
+        for day in range(days):
+            observed = (start + timedelta(days=day)).isoformat()
+            for item in catalog:
+                original = round(item["list_price"] * rng.uniform(0.9, 1.1), 2)
+                discount = rng.choice((0, 0, 10, 15, 20, 25, 30, 40, 50)) if rng.random() < 0.35 else 0
+                row = {k: v for k, v in item.items() if k != "list_price"}
+                row.update(
+                    dispensary_id=slug,
+                    observed_date=observed,
+                    original_price=original if discount else None,
+                    sale_price=round(original * (1 - discount / 100), 2),
+                    discount_percent=discount or None,
+                )
+                rows.append(row)
+    return rows
+
+
+def _sweep(n: int) -> list[dict[str, Any]]:
+    values = [str(v) for v in range(15, 15 + 5 * n, 5)][: max(1, n - 1)]
+    return parse_grid([f"HARD_FILTERS.min_discount_percent={','.join(values)}"])[:n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dispensaries", type=int, default=20)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--products", type=int, default=400, help="Catalog size per dispensary")
+    parser.add_argument("--configs", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = make_history(args.dispensaries, args.days, args.products, args.seed)
+    site_runs = group_site_runs(rows)
+    configs = _sweep(args.configs)
+
+    start = time.perf_counter()
+    serial = run_backtest(site_runs, configs, workers=1)
+    serial_s = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = run_backtest(site_runs, configs, workers=args.workers)
+    parallel_s = time.perf_counter() - start
+    assert [r.summary() for r in parallel] == [r.summary() for r in serial], "parallel replay differs"
+
+    replays = len(site_runs) * len(configs)
+    rate = replays / parallel_s
+    print(
+        f"{len(site_runs)} site runs ({len(rows)} observations) x {len(configs)} configs: "
+        f"in-process {serial_s:.2f}s ({replays / serial_s:.0f} runs/s), "
+        f"workers {parallel_s:.2f}s ({rate:.0f} runs/s, {serial_s / parallel_s:.1f}x)"
+    )
+    # A region-month: ~60 stores x 30 days, swept under 36 configurations.
+    print(f"projected 60 stores x 30 days x 36 configs: {60 * 30 * 36 / rate / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
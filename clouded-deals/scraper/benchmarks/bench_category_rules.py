@@ -0,0 +1,339 @@
+"""
+Benchmark — compiled category rule tables vs the per-call keyword scans.
+
+``CloudedLogic.detect_category`` used to rebuild its keyword lists and
+compile its vape regex on every call, and ``classify_product`` rebuilt
+its edible / accessory / cone tuples and ran every indicator pattern
+separately.  Both now evaluate precompiled matchers in the same order.
+This module keeps the previous implementations as references, runs old
+and new over every string in ``tests/`` (plus brand / category
+combinations for ``classify_product``), asserts identical decisions and
+reports the per-call time.
+
+Run locally:
+    python -m benchmarks.bench_category_rules
+    python -m benchmarks.bench_category_rules --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import re
+import time
+from pathlib import Path
+
+import product_classifier as pc
+from clouded_logic import CloudedLogic
+from product_classifier import classify_product
+
+_TESTS_DIR = Path(__file__).resolve().parent.parent / "tests"
+
+
+# =====================================================================
+# Reference implementations (the per-call scans)
+# =====================================================================
+
+def reference_detect_category(text):
+    if not text:
+        return 'other'
+    t = text.lower()
+
+    skip_keywords = [
+        'rso', 'tincture', 'topical', 'capsule', 'cbd only', 'merch',
+        'balm', 'salve', 'ointment', 'lotion', 'transdermal', 'patch',
+        'roll-on', 'roll on', 'liniment', 'suppository',
+        'hemp wrap', 'hemp wraps',
+    ]
+    if any(s in t for s in skip_keywords):
+        return 'skip'
+
+    if re.search(r'\bcones?\b', t) and not re.search(r'\b(infused|thc|live resin)\b', t):
+        if (re.search(r'\b1\s*1/4\b|\b1\.25\b|\bking\s*size\b|\bslim\b', t)
+                or re.search(r'\b(raw|elements|ocb|zig.?zag|hemper|pop cones?)\b', t)
+                or re.search(r'\d+\s*-?\s*pack\b|\d+\s*pk\b', t)):
+            return 'skip'
+
+    if 'cream' in t and re.search(r'\bcream\b.*\d+:\d+', t):
+        return 'skip'
+
+    drink_keywords = ['drink', 'shot', 'elixir', 'mocktail', 'beverage',
+                      'seltzer', 'sparkling', 'tonic', 'soda']
+    if any(w in t for w in drink_keywords):
+        return 'edible'
+
+    preroll_keywords = ['preroll', 'pre-roll', 'joint', 'blunt', 'dogwalker']
+    if any(w in t for w in preroll_keywords):
+        return 'preroll'
+    if re.search(r"\bpr'?s?\b", t, re.IGNORECASE):
+        return 'preroll'
+    if re.search(r'\d+\.?\d*\s*g\s*/\s*\d+\s*pk\b', t):
+        return 'preroll'
+
+    concentrate_keywords = [
+        'badder', 'batter', 'budder', 'shatter', 'wax', 'sauce',
+        'diamonds', 'sugar', 'crumble', 'hash', 'rosin', 'dab',
+        'terp sauce', 'thca', 'crystals', 'isolate', 'live resin',
+        'cured resin', 'lr', 'cr', 'extract', 'nug run',
+    ]
+    _UNAMBIGUOUS_CONCENTRATE = {
+        'badder', 'batter', 'budder', 'shatter', 'crumble', 'rosin',
+        'diamonds', 'nug run',
+    }
+    vape_keywords_re = re.compile(r'\b(cart|cartridge|pod|disposable|vape|pen|all[- ]?in[- ]?one|aio|ready[- ]?to[- ]?use)\b')
+    has_concentrate = any(kw in t for kw in concentrate_keywords)
+    has_concentrate_weight = (
+        any(w in t for w in ['.5g', '1g', '1.0g', '2g', '0.5g', '0.3g', '0.35g', '0.85g', '0.9g'])
+        or bool(re.search(r'\b1/[248]\s*(?:oz)?\b', t))
+    )
+    has_vape_keyword = bool(vape_keywords_re.search(t))
+    if has_concentrate and not has_vape_keyword:
+        if has_concentrate_weight or any(kw in t for kw in _UNAMBIGUOUS_CONCENTRATE):
+            return 'concentrate'
+
+    if re.search(r'\b(3\.5|7|14|28)\s*g\b', t) and not has_vape_keyword:
+        return 'flower'
+
+    edible_keywords = ['gummies', 'gummy', 'gummes', 'gummis',
+                      'chocolate', 'candy', 'brownie',
+                      'chews', 'chew', 'taffy', 'lozenge', 'lozenges',
+                      'drops', 'tarts', 'bites', 'pieces', 'mints',
+                      'caramel', 'truffles', 'truffle', 'syrup',
+                      'pastille', 'pastilles', 'bonbon', 'bon bon']
+    if re.search(r'\b(cart|cartridge|pod|disposable|vape|pen|all[- ]?in[- ]?one|aio|ready[- ]?to[- ]?use)\b', t):
+        if not any(w in t for w in edible_keywords):
+            return 'vape'
+
+    flower_keywords = ['flower', 'bud', 'eighth', 'quarter', 'half', 'ounce', 'smalls', 'popcorn', 'shake']
+    if any(w in t for w in flower_keywords):
+        return 'flower'
+
+    if any(w in t for w in edible_keywords):
+        return 'edible'
+    if re.search(r'\b(?:bars?|mints?|chew|tabs?|tablets?|blocks?|cookies?|honey)\b', t):
+        if re.search(r'\b\d+\s*mg\b', t):
+            return 'edible'
+
+    if re.search(r'\b\d+\s*mg\b', t):
+        return 'edible'
+    if re.search(r'\b0\.[5-9]\s*g\b', t) and not has_vape_keyword:
+        return 'concentrate'
+
+    return 'other'
+
+
+def reference_classify_vape_subtype(name_lower: str, brand_lower: str) -> str | None:
+    has_not_disposable = any(p.search(name_lower) for p in pc._NOT_DISPOSABLE_INDICATORS)
+
+    if any(p.search(name_lower) for p in pc._VAPE_DISPOSABLE_INDICATORS):
+        return "disposable"
+
+    if brand_lower in pc._DISPOSABLE_BRAND_LINES:
+        if any(p.search(name_lower) for p in pc._DISPOSABLE_BRAND_LINES[brand_lower]):
+            if not has_not_disposable:
+                return "disposable"
+
+    if any(p.search(name_lower) for p in pc._VAPE_POD_INDICATORS):
+        return "pod"
+    if any(p.search(name_lower) for p in pc._VAPE_CARTRIDGE_INDICATORS):
+        return "cartridge"
+
+    if brand_lower in pc._POD_BRANDS:
+        return "pod"
+    if brand_lower in pc._CART_BRANDS:
+        return "cartridge"
+
+    if re.search(r"\bpen\b", name_lower):
+        if not has_not_disposable:
+            return "disposable"
+
+    return None
+
+
+def reference_classify_product(
+    name: str,
+    brand: str | None,
+    category: str | None,
+    weight_value: float | str | None = None,
+) -> dict:
+    name_lower = (name or "").lower()
+    brand_lower = (brand or "").lower()
+    cat = (category or "").lower()
+
+    is_infused = False
+    subtype: str | None = None
+    corrected_category: str | None = None
+
+    if any(pattern.search(name_lower) for pattern in pc._INFUSED_INDICATORS):
+        is_infused = True
+
+    if brand_lower in pc._INFUSED_BRAND_LINES:
+        patterns = pc._INFUSED_BRAND_LINES[brand_lower]
+        if any(p.search(name_lower) for p in patterns):
+            is_infused = True
+
+    if is_infused:
+        subtype = "infused_preroll"
+        if cat == "concentrate":
+            corrected_category = "preroll"
+
+    _EDIBLE_INDICATORS = ("edible", "gummy", "gummies", "chocolate", "candy",
+                          "brownie", "chew", "lozenge", "mint", "cookie",
+                          "beverage", "drink", "bar", "caramel", "tincture",
+                          "capsule", "tablet", "tea", "honey", "butter",
+                          "multipack", "pieces", "softgel", "melatonin")
+    _ACCESSORY_INDICATORS = ("screen", "screens", "papers", "rolling paper",
+                             "tips", "filter", "grinder", "lighter", "tray",
+                             "stash", "storage", "pipe", "bong", "rig",
+                             "torch", "dab tool", "nail",
+                             "hemp wrap", "hemp wraps", "wrapper")
+    _CONE_ACCESSORY_BRANDS = ("raw", "pop cones", "elements", "ocb", "zig zag",
+                              "zig-zag", "hemper", "king palm")
+    is_edible_context = (
+        cat in ("edible",)
+        or any(kw in name_lower for kw in _EDIBLE_INDICATORS)
+    )
+    _is_cone_accessory = (
+        "cone" in name_lower
+        and not any(kw in name_lower for kw in ("infused", "thc", "live resin"))
+        and (any(b in name_lower for b in _CONE_ACCESSORY_BRANDS)
+             or bool(re.search(r'\d+\s*-?\s*pack\b|\d+\s*pk\b', name_lower)))
+    )
+    is_accessory = (
+        any(kw in name_lower for kw in _ACCESSORY_INDICATORS)
+        or _is_cone_accessory
+    )
+    is_concentrate_context = cat in ("concentrate", "vape")
+    if not is_infused and not is_edible_context and not is_accessory and not is_concentrate_context:
+        is_pack = any(p.search(name_lower) for p in pc._PACK_INDICATORS)
+        is_pack_brand = brand_lower in pc._PACK_BRANDS
+
+        if is_pack or is_pack_brand:
+            subtype = "preroll_pack"
+            if cat and "preroll" not in cat and "pre-roll" not in cat:
+                corrected_category = "preroll"
+
+    if cat == "flower" and weight_value is not None:
+        try:
+            wv = float(weight_value)
+        except (ValueError, TypeError):
+            wv = None
+        if wv is not None and 0.5 <= wv <= 1.5:
+            corrected_category = "preroll"
+            if is_infused:
+                subtype = "infused_preroll"
+
+    if cat == "vape" and subtype is None:
+        vape_sub = reference_classify_vape_subtype(name_lower, brand_lower)
+        if vape_sub:
+            subtype = vape_sub
+
+    if cat == "concentrate" and subtype is None:
+        subtype = pc._classify_concentrate_subtype(name_lower)
+
+    if cat == "edible" and subtype is None:
+        subtype = pc._classify_edible_subtype(name_lower)
+
+    if cat not in ("vape",) and subtype is None:
+        if any(p.search(name_lower) for p in pc._VAPE_DISPOSABLE_INDICATORS):
+            corrected_category = "vape"
+            subtype = "disposable"
+
+    if cat not in ("vape",) and subtype is None and corrected_category != "vape":
+        if any(p.search(name_lower) for p in pc._VAPE_CARTRIDGE_INDICATORS):
+            corrected_category = "vape"
+            subtype = "cartridge"
+        elif any(p.search(name_lower) for p in pc._VAPE_POD_INDICATORS):
+            corrected_category = "vape"
+            subtype = "pod"
+
+    return {
+        "is_infused": is_infused,
+        "product_subtype": subtype,
+        "corrected_category": corrected_category,
+    }
+
+
+# =====================================================================
+# Fixtures
+# =====================================================================
+
+def fixture_texts() -> list[str]:
+    """Every distinct string literal in ``tests/`` — product names, raw
+    card text, URLs and plenty of noise."""
+    texts: set[str] = set()
+    for path in sorted(_TESTS_DIR.glob("test_*.py")):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value:
+                texts.add(node.value)
+    return sorted(texts)
+
+
+_CLASSIFY_BRANDS = (
+    None, "STIIIZY", "Rove", "Jeeter", "AMA", "Select", "Sundaze", "Dogwalkers",
+    "Raw Garden", "Heavy Hitters", "PAX", "Kingpen", "Matrix",
+)
+_CLASSIFY_CATEGORIES = (None, "flower", "preroll", "vape", "concentrate", "edible", "other")
+_CLASSIFY_WEIGHTS = (None, 1.0, 3.5, "0.5", "n/a")
+
+
+def classify_cases(texts: list[str]) -> list[tuple]:
+    """``(name, brand, category, weight)`` combinations over *texts*."""
+    cases = []
+    for i, text in enumerate(texts):
+        for j, category in enumerate(_CLASSIFY_CATEGORIES):
+            brand = _CLASSIFY_BRANDS[(i + j) % len(_CLASSIFY_BRANDS)]
+            weight = _CLASSIFY_WEIGHTS[(i + 2 * j) % len(_CLASSIFY_WEIGHTS)]
+            cases.append((text, brand, category, weight))
+    return cases
+
+
+# =====================================================================
+# Benchmarks
+# =====================================================================
+
+def _time(fn, items, repeat: int) -> tuple[list, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(*item) for item in items]
+    return results, (time.perf_counter() - start) / repeat
+
+
+def bench_detect_category(texts: list[str], repeat: int) -> None:
+    logic = CloudedLogic()
+    items = [(t,) for t in texts]
+    reference, reference_s = _time(reference_detect_category, items, repeat)
+    compiled, compiled_s = _time(logic.detect_category, items, repeat)
+    mismatches = [t for t, a, b in zip(texts, reference, compiled) if a != b]
+    assert not mismatches, f"detect_category differs for {mismatches[:5]}"
+    n = len(texts)
+    print(f"detect_category   {n} texts")
+    print(f"  per-call lists  {reference_s / n * 1e6:8.2f} us/call")
+    print(f"  compiled rules  {compiled_s / n * 1e6:8.2f} us/call   ({reference_s / compiled_s:.1f}x)")
+
+
+def bench_classify_product(cases: list[tuple], repeat: int) -> None:
+    reference, reference_s = _time(reference_classify_product, cases, repeat)
+    compiled, compiled_s = _time(classify_product, cases, repeat)
+    mismatches = [c for c, a, b in zip(cases, reference, compiled) if a != b]
+    assert not mismatches, f"classify_product differs for {mismatches[:5]}"
+    n = len(cases)
+    print(f"classify_product   {n} cases")
+    print(f"  per-call lists  {reference_s / n * 1e6:8.2f} us/call")
+    print(f"  compiled rules  {compiled_s / n * 1e6:8.2f} us/call   ({reference_s / compiled_s:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # classify_product logs every recategorization; keep the output readable.
+    pc.logger.disabled = True
+    texts = fixture_texts()
+    bench_detect_category(texts, args.repeat)
+    bench_classify_product(classify_cases(texts), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
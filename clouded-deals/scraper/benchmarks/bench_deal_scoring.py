@@ -0,0 +1,353 @@
+"""
+Benchmark — columnar hard filters and scoring vs one product at a time.
+
+``detect_deals`` used to call ``passes_hard_filters``,
+``failed_by_price_cap`` and ``calculate_deal_score`` per product dict,
+re-resolving the region's price caps and re-scoring the brand for
+every product.  It now reads the batch into ``ProductColumns`` once,
+resolves each distinct cap once through ``PriceCapTable`` and gets back
+qualifying indices and scores.  This module keeps the per-product
+implementations as references, runs both over a synthetic multi-region
+product set, asserts identical decisions and scores, and reports the
+time per product.
+
+Run locally:
+    python -m benchmarks.bench_deal_scoring
+    python -m benchmarks.bench_deal_scoring --products 100000 --seed 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any
+
+import deal_detector as dd
+from deal_detector import (
+    _LOOSE_QUAL_CAP_MULTIPLIER,
+    _NON_CANNABIS_KEYWORDS,
+    BRAND_TIERS,
+    CATEGORY_BOOST,
+    CATEGORY_MIN_DISCOUNT,
+    CATEGORY_PRICE_CAPS,
+    HARD_FILTERS,
+    ORIGINAL_PRICE_CEILINGS,
+    VAPE_SUBTYPE_PRICE_CAPS,
+    VAPE_SUBTYPE_PRICE_FLOORS,
+    DetectionConfig,
+    PriceCapTable,
+    ProductColumns,
+    deal_scores,
+    hard_filter_indices,
+    price_cap_failures,
+)
+
+
+# =====================================================================
+# Reference implementations (one product dict at a time)
+# =====================================================================
+
+def reference_caps_for_region(category: str, region: str | None) -> dict[str, float] | float | None:
+    state = dd._get_state_region(region)
+    if state and state in dd.STATE_PRICE_CAP_OVERRIDES:
+        overrides = dd.STATE_PRICE_CAP_OVERRIDES[state]
+        if category in overrides:
+            return overrides[category]
+    return CATEGORY_PRICE_CAPS.get(category)
+
+
+def reference_passes_price_cap(
+    sale_price: float,
+    category: str,
+    weight_value: float | None,
+    region: str | None = None,
+    cap_multiplier: float = 1.0,
+) -> bool:
+    dynamic = dd._get_dynamic_cap(category, weight_value, region)
+    if dynamic is not None:
+        return sale_price <= dynamic * cap_multiplier
+    caps = reference_caps_for_region(category, region)
+    if caps is None:
+        return sale_price <= 50 * cap_multiplier
+    if isinstance(caps, dict):
+        sorted_keys = sorted(caps.keys(), key=lambda k: float(k))
+        if weight_value:
+            weight_str = str(weight_value)
+            if float(weight_value) == int(float(weight_value)):
+                weight_str = str(int(float(weight_value)))
+            cap = caps.get(weight_str)
+            if cap is not None:
+                return sale_price <= cap * cap_multiplier
+            wv = float(weight_value)
+            best_cap = caps[sorted_keys[0]]
+            for k in sorted_keys:
+                if float(k) <= wv:
+                    best_cap = caps[k]
+            return sale_price <= best_cap * cap_multiplier
+        else:
+            return sale_price <= caps[sorted_keys[0]] * cap_multiplier
+    else:
+        return sale_price <= caps * cap_multiplier
+
+
+def reference_passes_hard_filters(product: dict[str, Any], region: str | None = None) -> bool:
+    subtype = product.get("product_subtype")
+    name_lower = (product.get("name") or "").lower()
+    raw_lower = (product.get("raw_text") or "").lower()
+    for keyword in _NON_CANNABIS_KEYWORDS:
+        if keyword in name_lower or keyword in raw_lower:
+            return False
+    sale_price = product.get("sale_price") or product.get("current_price") or 0
+    original_price = product.get("original_price") or 0
+    discount = product.get("discount_percent")
+    category = product.get("category", "other")
+    weight_value = product.get("weight_value")
+    source_platform = product.get("source_platform", "")
+    if not region:
+        region = product.get("region")
+    if not sale_price or sale_price < HARD_FILTERS["min_price"]:
+        return False
+    if sale_price > HARD_FILTERS["max_price_absolute"]:
+        return False
+    if category == "vape" and subtype in VAPE_SUBTYPE_PRICE_FLOORS:
+        floors = VAPE_SUBTYPE_PRICE_FLOORS[subtype]
+        try:
+            wv = float(weight_value) if weight_value else 0
+        except (ValueError, TypeError):
+            wv = 0
+        floor = floors.get("1", 0) if wv > 0.6 else floors.get("0.5", 0)
+        if sale_price < floor:
+            return False
+    if category == "vape" and subtype in VAPE_SUBTYPE_PRICE_CAPS:
+        caps = VAPE_SUBTYPE_PRICE_CAPS[subtype]
+        try:
+            wv = float(weight_value) if weight_value else 0
+        except (ValueError, TypeError):
+            wv = 0
+        if wv > 0.6:
+            cap = caps.get("1", 0)
+        elif wv == 0 and subtype == "disposable":
+            cap = caps.get("1", 0)
+        else:
+            cap = caps.get("0.5", 0)
+        if cap and sale_price > cap:
+            return False
+    if source_platform in ("jane", "carrot", "aiq"):
+        return reference_passes_price_cap(
+            sale_price, category, weight_value, region,
+            cap_multiplier=_LOOSE_QUAL_CAP_MULTIPLIER,
+        )
+    is_budget_edible_preroll = (
+        category in ("edible", "preroll") and sale_price <= 10
+    )
+    is_budget_disposable = (
+        category == "vape"
+        and subtype == "disposable"
+        and sale_price <= 25
+    )
+    is_budget_flower = (
+        category == "flower" and sale_price <= 15
+    )
+    if is_budget_disposable:
+        return reference_passes_price_cap(sale_price, category, weight_value, region)
+    if is_budget_edible_preroll or is_budget_flower:
+        min_disc = 1
+    else:
+        min_disc = CATEGORY_MIN_DISCOUNT.get(category, HARD_FILTERS["min_discount_percent"])
+    if discount is None or discount < min_disc:
+        return False
+    if discount > HARD_FILTERS["max_discount_percent"]:
+        return False
+    if HARD_FILTERS["require_original_price"]:
+        if not original_price or original_price <= sale_price:
+            return False
+    if category == "preroll" and subtype == "preroll_pack":
+        orig_ceiling = 50
+    else:
+        orig_ceiling = ORIGINAL_PRICE_CEILINGS.get(category)
+    if orig_ceiling and original_price > orig_ceiling:
+        return False
+    if category == "preroll" and subtype == "infused_preroll":
+        infused_cap = reference_caps_for_region("infused_preroll", region)
+        if isinstance(infused_cap, (int, float)):
+            return sale_price <= infused_cap
+        return sale_price <= CATEGORY_PRICE_CAPS.get("infused_preroll", 15)
+    if category == "preroll" and subtype == "preroll_pack":
+        pack_cap = reference_caps_for_region("preroll_pack", region)
+        if isinstance(pack_cap, (int, float)):
+            return sale_price <= pack_cap
+        return sale_price <= CATEGORY_PRICE_CAPS.get("preroll_pack", 20)
+    return reference_passes_price_cap(sale_price, category, weight_value, region)
+
+
+def reference_failed_by_price_cap(product: dict[str, Any], region: str | None = None) -> bool:
+    sale_price = product.get("sale_price") or product.get("current_price") or 0
+    category = product.get("category", "other")
+    weight_value = product.get("weight_value")
+    subtype = product.get("product_subtype")
+    if not region:
+        region = product.get("region")
+    if not sale_price or sale_price < HARD_FILTERS["min_price"]:
+        return False
+    if sale_price > HARD_FILTERS["max_price_absolute"]:
+        return False
+    if category == "preroll" and subtype == "infused_preroll":
+        infused_cap = reference_caps_for_region("infused_preroll", region)
+        if isinstance(infused_cap, (int, float)):
+            return sale_price > infused_cap
+        return sale_price > CATEGORY_PRICE_CAPS.get("infused_preroll", 15)
+    return not reference_passes_price_cap(sale_price, category, weight_value, region)
+
+
+def reference_calculate_deal_score(product: dict[str, Any]) -> int:
+    score = 0
+    discount = product.get("discount_percent") or 0
+    sale_price = product.get("sale_price") or product.get("current_price") or 0
+    original_price = product.get("original_price") or 0
+    category = product.get("category", "other")
+    weight_value = product.get("weight_value")
+    brand = product.get("brand") or ""
+    source_platform = product.get("source_platform", "")
+    discount = min(discount, 80)
+    if source_platform in ("jane", "carrot", "aiq"):
+        score += 15
+    else:
+        if discount >= 50:
+            score += 35
+        elif discount >= 40:
+            score += 28
+        elif discount >= 30:
+            score += 22
+        elif discount >= 25:
+            score += 17
+        elif discount >= 20:
+            score += 12
+        elif discount >= 15:
+            score += 7
+        if original_price > 0 and original_price > sale_price:
+            saved = original_price - sale_price
+            score += min(10, int(saved / 2.5))
+    score += dd._score_brand(brand)
+    score += dd._score_unit_value(category, sale_price, weight_value)
+    score += CATEGORY_BOOST.get(category, 3)
+    if 3 <= sale_price <= 8:
+        score += 15
+    elif 8 < sale_price <= 15:
+        score += 12
+    elif 15 < sale_price <= 25:
+        score += 8
+    elif 25 < sale_price <= 40:
+        score += 4
+    if (category in ("preroll", "edible") and sale_price <= 11) or (
+        category == "flower" and sale_price <= 15
+    ):
+        score += 5
+    if category == "vape" and product.get("product_subtype") == "disposable":
+        score += 12
+    return min(100, score)
+
+
+# =====================================================================
+# Synthetic products
+# =====================================================================
+
+_CATEGORIES = ("flower", "vape", "edible", "concentrate", "preroll", "other", None)
+_SUBTYPES = {
+    "vape": ("disposable", "cartridge", "pod", None),
+    "preroll": ("infused_preroll", "preroll_pack", None),
+}
+_WEIGHTS = (None, 0, 0.3, 0.5, 0.85, 1, 1.0, 2, 3.5, 5, 7, 14, 28, 100, "3.5", "1", "abc")
+_REGIONS = (None, "", "southern-nv", "michigan", "michigan-2", "new-jersey", "ohio", "missouri", "illinois")
+_PLATFORMS = ("dutchie", "curaleaf", "jane", "carrot", "aiq", "", None)
+_NAMES = ("Blue Dream 3.5g", "Gelato Cart 0.5g", "Hoodie - Black", "Rolling Paper 1 1/4", "Sour Gummies 100mg")
+_BRANDS = ("", "Unknown Farms", "campaign") + tuple(
+    b.title() for tier in BRAND_TIERS.values() for b in sorted(tier["brands"])[:6]
+)
+
+
+def make_products(n: int, seed: int) -> list[dict[str, Any]]:
+    """Products spanning every filter branch, in several regions."""
+    rng = random.Random(seed)
+    products = []
+    for _ in range(n):
+        category = rng.choice(_CATEGORIES)
+        original = rng.choice((0, None, 8, 12, 20, 25, 35, 40, 55, 80, 120))
+        sale = rng.choice((0, 2, 4, 6, 9, 10, 11, 14, 15, 18, 22, 25, 30, 45, 90, 110))
+        product: dict[str, Any] = {
+            "name": rng.choice(_NAMES),
+            "raw_text": rng.choice(("", "Indica", "Merch drop", None)),
+            "sale_price": sale,
+            "original_price": original,
+            "discount_percent": rng.choice((None, 0, 5, 12, 15, 20, 30, 45, 60, 82, 90)),
+            "category": category,
+            "product_subtype": rng.choice(_SUBTYPES.get(category, (None,))),
+            "weight_value": rng.choice(_WEIGHTS),
+            "brand": rng.choice(_BRANDS),
+            "region": rng.choice(_REGIONS),
+        }
+        platform = rng.choice(_PLATFORMS)
+        if platform is not None:
+            product["source_platform"] = platform
+        if rng.random() < 0.1:
+            product["current_price"] = product.pop("sale_price")
+        if category is None:
+            del product["category"]
+        products.append(product)
+    return products
+
+
+def reference_batch(products: list[dict[str, Any]]) -> tuple[list[int], list[int], list[int]]:
+    """``(passed, price-cap failures, scores)`` one product at a time."""
+    passed = [i for i, p in enumerate(products) if reference_passes_hard_filters(p)]
+    chosen = set(passed)
+    failed = [
+        i for i, p in enumerate(products)
+        if i not in chosen and reference_failed_by_price_cap(p)
+    ]
+    scores = [reference_calculate_deal_score(products[i]) for i in passed]
+    return passed, failed, scores
+
+
+def columnar_batch(products: list[dict[str, Any]]) -> tuple[list[int], list[int], list[int]]:
+    """The same triple from one ``ProductColumns`` pass."""
+    cols = ProductColumns(products)
+    config = DetectionConfig()
+    caps = PriceCapTable(config)
+    passed = hard_filter_indices(cols, caps)
+    chosen = set(passed)
+    failed = price_cap_failures(cols, [i for i in range(cols.size) if i not in chosen], caps)
+    return passed, failed, deal_scores(cols, passed, config)
+
+
+def _time(fn, products, repeat: int) -> tuple[Any, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(products)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # String weights raise in the cap lookup / unit scoring; keep them out of the timed batch.
+    products = [p for p in make_products(args.products, args.seed) if not isinstance(p["weight_value"], str)]
+    reference, reference_s = _time(reference_batch, products, args.repeat)
+    columnar, columnar_s = _time(columnar_batch, products, args.repeat)
+    assert columnar == reference, "columnar results differ from the per-product reference"
+
+    n = len(products)
+    passed, failed, _ = columnar
+    print(f"{n} products: {len(passed)} pass hard filters, {len(failed)} rejected by price cap")
+    print(f"  per product   {reference_s / n * 1e6:7.2f} us/product")
+    print(f"  columnar      {columnar_s / n * 1e6:7.2f} us/product  ({reference_s / columnar_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
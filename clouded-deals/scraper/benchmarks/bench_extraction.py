@@ -0,0 +1,168 @@
+"""
+Benchmark — offline extraction per platform over recorded-page fixtures.
+
+Runs each platform's scraper against the fixture bundles recorded with
+``page_fixtures.py``: every request is answered from the bundle by
+``PageReplayer`` and anything unrecorded is aborted, so the run needs a
+browser but no network.  For every site it reports the ``scrape()``
+wall time, the protocol calls the scraper made, and the products it
+extracted against the count recorded live (``DIFF`` when they differ),
+then the per-platform medians.
+
+Protocol calls are counted at Playwright's client → driver channel:
+one per API call (``evaluate``, ``query_selector_all``, ``click``,
+``wait_for_selector`` ...), each of which is at least one CDP command.
+The replayer's own ``route.fulfill`` / ``route.abort`` calls are left
+out, so the count is the scraper's alone.
+
+Run locally (needs ``playwright install chromium`` and recorded bundles):
+    python -m benchmarks.bench_extraction
+    python -m benchmarks.bench_extraction --platform dutchie --repeat 5
+    python -m benchmarks.bench_extraction --sites oasis-cannabis --json extraction.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import statistics
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Iterator
+
+from page_fixtures import (
+    PAGE_FIXTURE_DIR,
+    FixtureBundle,
+    PageReplayer,
+    isolate_caches,
+    list_bundles,
+    scrape_routed,
+)
+
+
+@contextlib.contextmanager
+def count_protocol_calls() -> Iterator[Counter[str]]:
+    """Count Playwright protocol calls by ``<Type>.<method>`` while active."""
+    from playwright._impl._connection import Connection
+
+    calls: Counter[str] = Counter()
+    original = Connection._send_message_to_server
+
+    def counted(self, object, method, params, *args, **kwargs):
+        calls[f"{object._type}.{method}"] += 1
+        return original(self, object, method, params, *args, **kwargs)
+
+    Connection._send_message_to_server = counted
+    try:
+        yield calls
+    finally:
+        Connection._send_message_to_server = original
+
+
+async def replay_site(browser: Any, bundle: FixtureBundle, repeat: int) -> dict[str, Any]:
+    runs = []
+    for _ in range(repeat):
+        replayer = PageReplayer(bundle)
+        with count_protocol_calls() as calls:
+            products, seconds = await scrape_routed(bundle.dispensary, browser, replayer)
+        scraper_calls = Counter({k: n for k, n in calls.items() if not k.startswith("Route.")})
+        runs.append({
+            "seconds": seconds,
+            "calls": sum(scraper_calls.values()),
+            "top_calls": scraper_calls.most_common(5),
+            "products": len(products),
+            **replayer.stats(),
+        })
+    best = min(runs, key=lambda r: r["seconds"])
+    return {
+        "slug": bundle.slug,
+        "platform": bundle.platform,
+        "recorded_products": len(bundle.products),
+        "seconds": statistics.median(r["seconds"] for r in runs),
+        "runs": runs,
+        **{k: best[k] for k in ("calls", "top_calls", "products", "matched", "loose", "missed")},
+    }
+
+
+async def run(bundle_dirs: list[Path], repeat: int) -> list[dict[str, Any]]:
+    from playwright.async_api import async_playwright
+
+    from platforms import launch_stealth_browser
+
+    results = []
+    async with async_playwright() as pw:
+        browser = await launch_stealth_browser(pw)
+        try:
+            for directory in bundle_dirs:
+                bundle = FixtureBundle.load(directory)
+                try:
+                    results.append(await replay_site(browser, bundle, repeat))
+                except Exception as exc:
+                    results.append({"slug": bundle.slug, "platform": bundle.platform, "error": str(exc)})
+        finally:
+            await browser.close()
+    return results
+
+
+def platform_summary(results: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    by_platform: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for r in results:
+        if "error" not in r:
+            by_platform[r["platform"]].append(r)
+    return {
+        platform: {
+            "sites": len(rows),
+            "median_seconds": statistics.median(r["seconds"] for r in rows),
+            "median_calls": statistics.median(r["calls"] for r in rows),
+            "products": sum(r["products"] for r in rows),
+            "products_per_second": sum(r["products"] for r in rows) / (sum(r["seconds"] for r in rows) or 1),
+            "diffs": sum(1 for r in rows if r["products"] != r["recorded_products"]),
+        }
+        for platform, rows in sorted(by_platform.items())
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--fixtures", type=Path, default=PAGE_FIXTURE_DIR)
+    parser.add_argument("--platform", action="append", default=[])
+    parser.add_argument("--sites", help="Comma-separated slugs")
+    parser.add_argument("--repeat", type=int, default=3, help="Scrapes per site (median time reported)")
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    bundle_dirs = list_bundles(
+        args.fixtures, platforms=args.platform, slugs=args.sites.split(",") if args.sites else (),
+    )
+    if not bundle_dirs:
+        parser.error(f"no fixture bundles under {args.fixtures} (record some with page_fixtures.py)")
+
+    isolate_caches()
+    results = asyncio.run(run(bundle_dirs, args.repeat))
+
+    for r in results:
+        if "error" in r:
+            print(f"{r['platform']:9s} {r['slug']:30s} FAILED {r['error']}")
+            continue
+        flag = "" if r["products"] == r["recorded_products"] else f"  DIFF (recorded {r['recorded_products']})"
+        print(
+            f"{r['platform']:9s} {r['slug']:30s} {r['seconds']:6.2f}s  {r['calls']:5d} calls  "
+            f"{r['products']:5d} products  requests {r['matched']}+{r['loose']} loose, "
+            f"{r['missed']} missed{flag}"
+        )
+    summary = platform_summary(results)
+    print()
+    for platform, s in summary.items():
+        print(
+            f"{platform:9s} {s['sites']:3d} sites  median {s['median_seconds']:6.2f}s / "
+            f"{s['median_calls']:6.0f} calls per site  {s['products_per_second']:7.0f} products/s"
+            + (f"  {s['diffs']} DIFF" if s["diffs"] else "")
+        )
+    if args.json:
+        args.json.write_text(json.dumps({"sites": results, "platforms": summary}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark — indexed fuzzy brand matching vs the linear SequenceMatcher scan.
+
+Generates misspelled brand names (drops, swaps, doubled and substituted
+letters) plus unrelated words, runs both ``fuzzy_brand_match`` and the
+original full scan over them, asserts identical outputs, and reports the
+per-query time and how many brands were actually scored.  The same is
+done for ``brand_learner._cluster_similar_names`` when its dependencies
+are installed.
+
+Run locally:
+    python -m benchmarks.bench_fuzzy_brand
+    python -m benchmarks.bench_fuzzy_brand --queries 5000 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+from difflib import SequenceMatcher
+
+import clouded_logic
+from clouded_logic import BRANDS, BRANDS_LOWER, fuzzy_brand_match
+
+
+# =====================================================================
+# Reference implementations (the pre-index linear scans)
+# =====================================================================
+
+def linear_fuzzy_brand_match(candidate: str, threshold: float = clouded_logic._FUZZY_THRESHOLD):
+    if not candidate or len(candidate) < clouded_logic._FUZZY_MIN_LENGTH:
+        return None, 0.0
+    candidate_lower = candidate.lower().strip()
+    if candidate_lower in BRANDS_LOWER:
+        return BRANDS_LOWER[candidate_lower], 1.0
+    best_match = None
+    best_score = 0.0
+    for brand_lower, brand_canonical in BRANDS_LOWER.items():
+        if abs(len(brand_lower) - len(candidate_lower)) > max(3, len(candidate_lower) * 0.4):
+            continue
+        score = SequenceMatcher(None, candidate_lower, brand_lower).ratio()
+        if score > best_score and score >= threshold:
+            best_score = score
+            best_match = brand_canonical
+    return best_match, best_score
+
+
+def linear_cluster_similar_names(names: list[str], threshold: float = 0.80) -> dict[str, list[str]]:
+    clusters: dict[str, list[str]] = {}
+    for name in sorted(names, key=len, reverse=True):
+        name_lower = name.lower()
+        matched_cluster = None
+        for canonical in clusters:
+            if SequenceMatcher(None, name_lower, canonical.lower()).ratio() >= threshold:
+                matched_cluster = canonical
+                break
+        if matched_cluster:
+            clusters[matched_cluster].append(name)
+        else:
+            clusters[name] = [name]
+    return clusters
+
+
+# =====================================================================
+# Query generation
+# =====================================================================
+
+def _misspell(rng: random.Random, word: str) -> str:
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    op = rng.choice(("drop", "swap", "double", "sub"))
+    if op == "drop":
+        return word[:i] + word[i + 1:]
+    if op == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if op == "double":
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def make_queries(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        if rng.random() < 0.6:
+            queries.append(_misspell(rng, rng.choice(BRANDS)))
+        else:
+            length = rng.randint(4, 18)
+            queries.append("".join(rng.choice(string.ascii_lowercase + "  ") for _ in range(length)))
+    return queries
+
+
+def _time(fn, items) -> tuple[list, float]:
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+# =====================================================================
+# Benchmarks
+# =====================================================================
+
+def bench_fuzzy_brand_match(queries: list[str]) -> None:
+    scored = 0
+    original_ratio = SequenceMatcher.ratio
+
+    def counting_ratio(self):
+        nonlocal scored
+        scored += 1
+        return original_ratio(self)
+
+    linear, linear_s = _time(linear_fuzzy_brand_match, queries)
+    SequenceMatcher.ratio = counting_ratio
+    try:
+        indexed, indexed_s = _time(fuzzy_brand_match, queries)
+    finally:
+        SequenceMatcher.ratio = original_ratio
+
+    mismatches = [q for q, a, b in zip(queries, linear, indexed) if a != b]
+    assert not mismatches, f"indexed results differ for {mismatches[:5]}"
+    n = len(queries)
+    print(f"fuzzy_brand_match   {n} queries, {len(BRANDS_LOWER)} brands")
+    print(f"  linear   {linear_s / n * 1e6:9.1f} us/query")
+    print(f"  indexed  {indexed_s / n * 1e6:9.1f} us/query   "
+          f"({linear_s / indexed_s:.1f}x, {scored / n:.1f} brands scored/query)")
+    print(f"  outputs identical: {n} / {n}")
+
+
+def bench_cluster_similar_names(queries: list[str]) -> None:
+    try:
+        from brand_learner import _cluster_similar_names
+    except ImportError as exc:
+        print(f"_cluster_similar_names skipped ({exc})")
+        return
+    names = sorted(set(queries))
+    linear, linear_s = _time(linear_cluster_similar_names, [names])
+    indexed, indexed_s = _time(_cluster_similar_names, [names])
+    assert linear == indexed, "indexed clustering differs from the linear scan"
+    print(f"_cluster_similar_names   {len(names)} names -> {len(indexed[0])} clusters")
+    print(f"  linear   {linear_s * 1e3:9.1f} ms")
+    print(f"  indexed  {indexed_s * 1e3:9.1f} ms   ({linear_s / indexed_s:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, args.seed)
+    bench_fuzzy_brand_match(queries)
+    bench_cluster_similar_names(queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Benchmark — parsing, classification and deal detection hot paths, 1k to 1M products.
+
+Times the per-product work every scrape does once the browser is done:
+
+  - ``CloudedLogic.parse_product`` on each card's raw text,
+  - ``CloudedLogic.detect_brand`` and ``detect_category`` on names,
+  - ``classify_product`` on normalized products,
+  - ``normalize_products`` — the normalization loop of
+    ``_scrape_site_inner`` / ``_process_site``, one call per site, no
+    parse cache,
+  - ``detect_deals`` — one call per site on the normalized products.
+
+Products are synthetic but built from the names in the parser,
+classifier and detector tests (the strings those tests were written
+against are the awkward ones: "Aspen OG" that must not read as a pen,
+"Live Resin" carts vs concentrates, packs, infused prerolls), crossed
+with brands, strains, weights, strike-through prices and bundle offers,
+and split into sites of ``--site-size`` products.
+
+For every case and size it records throughput (best of ``--repeat``)
+and peak traced memory (a separate ``tracemalloc`` run, so tracing
+does not skew the timing).  ``--save`` writes the results as JSON;
+``--baseline`` compares against a saved run and exits 1 when any case
+is more than ``--tolerance`` slower or hungrier than the baseline.
+Throughput is compared relative to a fixed pure-Python calibration
+loop interleaved with the timed runs, so a baseline recorded on one
+machine stays usable on a faster or slower (or busier) one.
+
+Run locally:
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --sizes 1000,10000,100000,1000000 --repeat 1
+    python -m benchmarks.bench_hot_paths --cases parse_product,detect_deals --sizes 50000
+    python -m benchmarks.bench_hot_paths --sizes 1000,10000 --save benchmarks/baselines/hot_paths.json
+    python -m benchmarks.bench_hot_paths --sizes 1000,10000 --baseline benchmarks/baselines/hot_paths.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.bench_normalize import _FORMATS, _OFFERS, _STRAINS
+from clouded_logic import BRANDS, CloudedLogic
+from deal_detector import detect_deals
+from product_classifier import classify_product
+from product_normalizer import normalize_products
+
+_TESTS_DIR = Path(__file__).resolve().parent.parent / "tests"
+_FIXTURE_TESTS = (
+    "test_clouded_logic.py", "test_parser.py", "test_product_classifier.py",
+    "test_deal_detector.py", "test_product_normalizer.py",
+)
+_WEIGHT_RE = re.compile(r"\b\d*\.?\d+\s?(?:g|mg|oz|ml)\b", re.IGNORECASE)
+_REGIONS = ("southern-nv", "southern-nv", "michigan", "illinois", "arizona", "new-jersey")
+_PLATFORMS = ("dutchie", "jane", "curaleaf", "carrot", "aiq")
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_TOLERANCE = 0.3
+
+
+# =====================================================================
+# Synthetic products
+# =====================================================================
+
+
+def fixture_names() -> list[str]:
+    """Product names the test suite asserts on, in file order.
+
+    Every string literal in the fixture test modules that reads like a
+    menu name: one line, no price, a weight, not a docstring.
+    """
+    names: dict[str, None] = {}
+    for filename in _FIXTURE_TESTS:
+        path = _TESTS_DIR / filename
+        if not path.exists():
+            continue
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        docstrings = {id(node.value) for node in ast.walk(tree) if isinstance(node, ast.Expr)}
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Constant) and isinstance(node.value, str)) or id(node) in docstrings:
+                continue
+            text = node.value.strip()
+            if 6 <= len(text) <= 80 and "\n" not in text and "$" not in text and "'" not in text \
+                    and _WEIGHT_RE.search(text):
+                names[text] = None
+    return list(names)
+
+
+def make_raw_products(n: int, seed: int, names: list[str] | None = None) -> list[dict[str, Any]]:
+    """*n* scraped cards: raw text lines as the scrapers join them."""
+    rng = random.Random(seed)
+    names = names or fixture_names()
+    products = []
+    for _ in range(n):
+        brand = rng.choice(BRANDS)
+        strain = rng.choice(_STRAINS)
+        weight, fmt = rng.choice(_FORMATS)
+        shape = rng.random()
+        if shape < 0.4:
+            name = rng.choice(names)
+        elif shape < 0.6:
+            name = f"{brand} | {rng.choice(names)}"
+        elif shape < 0.8:
+            name = f"{brand} | {strain} {fmt} {weight}"
+        else:
+            name = f"{strain} {fmt} {weight}"
+        original = rng.choice((15, 20, 25, 30, 35, 40, 50, 60, 80))
+        sale = round(original * rng.choice((0.5, 0.6, 0.7, 0.8, 1.0)), 2)
+        prices = [f"${original:.2f}"] + ([f"${sale:.2f}"] if sale != original else [])
+        raw_text = "\n".join(filter(None, (
+            brand, name, rng.choice(("Indica", "Sativa", "Hybrid", "")),
+            rng.choice((f"THC: {rng.uniform(15, 35):.1f}%", "")), *prices, rng.choice(_OFFERS),
+        )))
+        product = {"name": name, "raw_text": raw_text, "price": " ".join(prices)}
+        if rng.random() < 0.3:
+            slug = f"{brand} {strain}".lower().replace(" ", "-")
+            product["product_url"] = f"https://dutchie.com/dispensary/bench/product/{slug}"
+        products.append(product)
+    return products
+
+
+def make_sites(n_products: int, site_size: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "slug": f"bench-site-{i:05d}",
+            "name": f"Bench Site {i}",
+            "platform": _PLATFORMS[i % len(_PLATFORMS)],
+            "region": _REGIONS[i % len(_REGIONS)],
+        }
+        for i in range(-(-n_products // site_size))
+    ]
+
+
+class Workload:
+    """One size's inputs, built once and shared by every case."""
+
+    def __init__(self, n: int, seed: int, site_size: int, names: list[str] | None = None) -> None:
+        self.n = n
+        self.raw = make_raw_products(n, seed, names)
+        self.site_size = site_size
+        self.sites = make_sites(n, site_size)
+        self.names = [p["name"] for p in self.raw]
+        self.parsed: list[list[Any]] = []
+
+    def site_chunks(self) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        size = self.site_size
+        return [(site, self.raw[i * size:(i + 1) * size]) for i, site in enumerate(self.sites)]
+
+    def normalized(self) -> list[list[Any]]:
+        """Per-site normalized products (built on first use, untimed)."""
+        if not self.parsed:
+            self.parsed = [normalize_products(raw, site)[0] for site, raw in self.site_chunks()]
+        return self.parsed
+
+
+# =====================================================================
+# Cases
+# =====================================================================
+# Each returns how many items it processed.
+
+
+def case_parse_product(work: Workload) -> int:
+    logic = CloudedLogic()
+    for p in work.raw:
+        logic.parse_product(p["raw_text"], "Bench Dispensary")
+    return work.n
+
+
+def case_detect_brand(work: Workload) -> int:
+    logic = CloudedLogic()
+    for name in work.names:
+        logic.detect_brand(name)
+    return work.n
+
+
+def case_detect_category(work: Workload) -> int:
+    logic = CloudedLogic()
+    for name in work.names:
+        logic.detect_category(name)
+    return work.n
+
+
+def case_classify_product(work: Workload) -> int:
+    count = 0
+    for site in work.normalized():
+        for p in site:
+            classify_product(p.get("name", ""), p.get("brand"), p.get("category"), p.get("weight_value"))
+        count += len(site)
+    return count
+
+
+def case_normalize_products(work: Workload) -> int:
+    for site, raw in work.site_chunks():
+        normalize_products(raw, site)
+    return work.n
+
+
+def case_detect_deals(work: Workload) -> int:
+    count = 0
+    for site in work.normalized():
+        detect_deals(site)
+        count += len(site)
+    return count
+
+
+CASES: dict[str, Callable[[Workload], int]] = {
+    "parse_product": case_parse_product,
+    "detect_brand": case_detect_brand,
+    "detect_category": case_detect_category,
+    "classify_product": case_classify_product,
+    "normalize_products": case_normalize_products,
+    "detect_deals": case_detect_deals,
+}
+
+
+# =====================================================================
+# Measurement
+# =====================================================================
+
+
+_CALIBRATION_WORDS = [f"{s} {f} {w}" for s in _STRAINS for w, f in _FORMATS] * 20
+_CALIBRATION_RE = re.compile(r"(\d*\.?\d+)\s?(g|mg)\b")
+
+
+def _calibration_round() -> float:
+    """Seconds for one pass of a fixed string / regex / dict workload."""
+    start = time.perf_counter()
+    seen: dict[str, int] = {}
+    for text in _CALIBRATION_WORDS:
+        lower = text.lower()
+        match = _CALIBRATION_RE.search(lower)
+        key = lower.split()[0] + (match.group(2) if match else "")
+        seen[key] = seen.get(key, 0) + len(lower)
+    return time.perf_counter() - start
+
+
+def calibrate(rounds: int = 20) -> float:
+    """Calibration loops per second: how fast this interpreter is here, now."""
+    return len(_CALIBRATION_WORDS) / min(_calibration_round() for _ in range(rounds))
+
+
+def measure(
+    fn: Callable[[Workload], int],
+    work: Workload,
+    repeat: int,
+    memory: bool = True,
+    min_time: float = 1.0,
+) -> dict[str, Any]:
+    """Best-of-*repeat* throughput, then one traced run for peak memory.
+
+    Short cases keep repeating until they have run for *min_time* in
+    total, so small sizes are not timed on a single noisy pass.  Each
+    run is followed by calibration rounds of about the same length;
+    ``relative`` is the case's best throughput over the calibration's
+    best, which tracks a slower machine or a busy runner.
+    """
+    best = best_calibration = float("inf")
+    items = runs = 0
+    started = time.perf_counter()
+    while runs < repeat or (time.perf_counter() - started < min_time and runs < 100):
+        start = time.perf_counter()
+        items = fn(work)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        calibration_started = time.perf_counter()
+        while True:
+            best_calibration = min(best_calibration, _calibration_round())
+            if time.perf_counter() - calibration_started >= min(elapsed, 0.5):
+                break
+        runs += 1
+    per_second = items / best if best else 0.0
+    calibration = len(_CALIBRATION_WORDS) / best_calibration
+    result = {
+        "items": items,
+        "seconds": best,
+        "per_second": per_second,
+        "calibration": calibration,
+        "relative": per_second / calibration,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(work)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run(
+    sizes: list[int],
+    cases: list[str],
+    *,
+    seed: int = 42,
+    repeat: int = 3,
+    site_size: int = 500,
+    memory: bool = True,
+    min_time: float = 1.0,
+    log: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    names = fixture_names()
+    calibration = calibrate()
+    # Compile patterns and build the lazy lookup tables before timing.
+    warmup = Workload(200, seed, site_size, names)
+    for case in cases:
+        CASES[case](warmup)
+    results: dict[str, dict[str, Any]] = {}
+    for n in sizes:
+        work = Workload(n, seed, site_size, names)
+        if any(c in ("classify_product", "detect_deals") for c in cases):
+            work.normalized()
+        for case in cases:
+            r = measure(CASES[case], work, repeat, memory, min_time)
+            results[f"{case}/{n}"] = r
+            log(
+                f"{case:20s} {n:>9,d}  {r['seconds'] / r['items'] * 1e6 if r['items'] else 0:9.2f} us/item  "
+                f"{r['per_second']:>11,.0f} items/s"
+                + (f"  peak {r['peak_mb']:8.1f} MB" if "peak_mb" in r else "")
+            )
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "site_size": site_size,
+        "fixture_names": len(names),
+        "calibration": calibration,
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Regressions of *current* against *baseline*, one line each.
+
+    A case regresses when its calibrated throughput falls more than
+    *tolerance* below the baseline's, or its peak memory grows more than
+    *tolerance* (and by over 1 MB).  Cases missing from either side are
+    skipped.
+    """
+    regressions = []
+    for key, base in baseline["results"].items():
+        now = current["results"].get(key)
+        if now is None:
+            continue
+        if now["relative"] < base["relative"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {now['relative'] / base['relative'] - 1:+.0%} "
+                f"({now['per_second']:,.0f} items/s, baseline {base['per_second']:,.0f} items/s)"
+            )
+        if "peak_mb" in now and "peak_mb" in base \
+                and now["peak_mb"] > base["peak_mb"] * (1 + tolerance) and now["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append(
+                f"{key}: peak memory {now['peak_mb']:.1f} MB, baseline {base['peak_mb']:.1f} MB"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated product counts")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated cases")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--site-size", type=int, default=500, help="Products per site for the per-site cases")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds each case keeps repeating for")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--save", type=Path, help="Write the results here (e.g. as a new baseline)")
+    parser.add_argument("--baseline", type=Path, help="Fail when slower / hungrier than this saved run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    cases = args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (have {', '.join(CASES)})")
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    current = run(sizes, cases, seed=args.seed, repeat=args.repeat,
+                  site_size=args.site_size, memory=not args.no_memory, min_time=args.min_time)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=1, sort_keys=True) + "\n")
+    if args.baseline:
+        regressions = compare(current, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Benchmark — one lexer pass vs per-pattern scans for price / weight / THC.
+
+``parser.extract_prices`` / ``extract_weight`` / ``extract_cannabinoids``
+used to run a dozen regexes over the same text.  They now read the
+tokens from ``product_lexer.tokenize``.  This module keeps the previous
+implementations as references, runs old and new over every string in
+``tests/``, a synthetic menu and randomly assembled fragments that
+stress the edge cases (glued numbers, stray dots, case folding, Unicode
+digits), asserts identical results and reports the per-product time.
+
+``CloudedLogic.parse_product`` keeps its own regexes: it runs only four
+short scans, and reading them from tokens measured 0.8-0.9x here.
+
+Run locally:
+    python -m benchmarks.bench_lexer
+    python -m benchmarks.bench_lexer --fuzz 50000 --seed 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Any
+
+from benchmarks.bench_category_rules import fixture_texts
+from benchmarks.bench_normalize import make_menu
+from parser import (
+    _BEVERAGE_KEYWORDS_RE,
+    _FRAC_TO_GRAMS,
+    _WEIGHT_ALIASES,
+    _calc_discount,
+    extract_cannabinoids,
+    extract_prices,
+    extract_weight,
+)
+from product_lexer import tokenize
+
+
+# =====================================================================
+# Reference implementations (one regex scan per rule)
+# =====================================================================
+
+_RE_WAS_NOW = re.compile(
+    r"was\s+\$\s*(?P<original>[\d]+(?:\.[\d]{1,2})?)"
+    r"\s+now\s+\$\s*(?P<sale>[\d]+(?:\.[\d]{1,2})?)",
+    re.IGNORECASE,
+)
+
+_RE_WAS_NOW_OFF = re.compile(
+    r"was\s+\$\s*(?P<original>[\d]+(?:\.[\d]{1,2})?)"
+    r"\s+now\s+\$\s*(?P<discount>[\d]+(?:\.[\d]{1,2})?)"
+    r"\s*(?:off|save|discount)\b",
+    re.IGNORECASE,
+)
+
+_RE_DOLLAR = re.compile(r"\$\s*(?P<amt>[\d]+(?:\.[\d]{1,2})?)")
+
+_RE_DISCOUNT_LABEL = re.compile(
+    r"\$\s*[\d]+(?:\.[\d]{1,2})?\s*(?:off|save|discount)\b",
+    re.IGNORECASE,
+)
+
+_RE_FROM_PRICE = re.compile(
+    r"(?:from|starting\s+at)\s+\$\s*[\d]+(?:\.[\d]{1,2})?",
+    re.IGNORECASE,
+)
+
+_RE_BUNDLE_TIER = re.compile(
+    r"(?P<qty>[2-9])\s*/\s*\$\s*(?P<total>[\d]+(?:\.[\d]{1,2})?)"
+    r"\s+\$\s*(?P<tier>[\d]+(?:\.[\d]{1,2})?)",
+)
+
+_RE_BUNDLE = re.compile(
+    r"(?P<qty>[2-9])\s*/\s*\$\s*(?P<total>[\d]+(?:\.[\d]{1,2})?)",
+)
+
+_RE_BOGO = re.compile(r"\bBOGO\b", re.IGNORECASE)
+
+
+def reference_extract_prices(text: str) -> dict[str, Any]:
+    result: dict[str, Any] = {
+        "original_price": None,
+        "sale_price": None,
+        "discount_percent": None,
+    }
+
+    m = _RE_WAS_NOW_OFF.search(text)
+    if m:
+        orig = float(m.group("original"))
+        disc_amt = float(m.group("discount"))
+        inferred_sale = round(orig - disc_amt, 2)
+        if inferred_sale > 3:
+            result["original_price"] = orig
+            result["sale_price"] = inferred_sale
+            result["discount_percent"] = _calc_discount(orig, inferred_sale)
+            return result
+
+    m = _RE_WAS_NOW.search(text)
+    if m:
+        result["original_price"] = float(m.group("original"))
+        result["sale_price"] = float(m.group("sale"))
+        result["discount_percent"] = _calc_discount(
+            result["original_price"], result["sale_price"]
+        )
+        return result
+
+    m = _RE_BUNDLE_TIER.search(text)
+    if m:
+        bundle_total = float(m.group("total"))
+        tier_price = float(m.group("tier"))
+        original = max(bundle_total, tier_price)
+        sale = min(bundle_total, tier_price)
+        result["original_price"] = original
+        result["sale_price"] = sale
+        result["discount_percent"] = _calc_discount(original, sale)
+        return result
+
+    m = _RE_BUNDLE.search(text)
+    if m:
+        qty = int(m.group("qty"))
+        bundle_total = float(m.group("total"))
+        per_unit = round(bundle_total / qty, 2)
+
+        bundle_start = m.start()
+        bundle_end = m.end()
+        unit_prices = [
+            float(x.group("amt"))
+            for x in _RE_DOLLAR.finditer(text)
+            if not (bundle_start <= x.start() < bundle_end)
+        ]
+
+        if unit_prices:
+            unit_price = unit_prices[-1]
+            original = max(unit_price, per_unit)
+            sale = min(unit_price, per_unit)
+            result["original_price"] = original
+            result["sale_price"] = sale
+            result["discount_percent"] = _calc_discount(original, sale)
+        else:
+            result["sale_price"] = per_unit
+        return result
+
+    if _RE_BOGO.search(text):
+        amounts = [float(x.group("amt")) for x in _RE_DOLLAR.finditer(text)]
+        if amounts:
+            unit_price = amounts[-1]
+            result["original_price"] = unit_price
+            result["sale_price"] = round(unit_price / 2, 2)
+            result["discount_percent"] = 50.0
+        return result
+
+    discount_label_spans = [
+        (m.start(), m.end()) for m in _RE_DISCOUNT_LABEL.finditer(text)
+    ]
+    from_price_spans = [
+        (m.start(), m.end()) for m in _RE_FROM_PRICE.finditer(text)
+    ]
+    excluded_spans = discount_label_spans + from_price_spans
+    discount_label_amounts = [
+        float(dm.group("amt"))
+        for dm in _RE_DOLLAR.finditer(text)
+        if any(start <= dm.start() < end for start, end in discount_label_spans)
+    ]
+    amounts = []
+    for m in _RE_DOLLAR.finditer(text):
+        in_excluded = any(
+            start <= m.start() < end for start, end in excluded_spans
+        )
+        if not in_excluded:
+            amounts.append(float(m.group("amt")))
+
+    if len(amounts) >= 2:
+        original = max(amounts)
+        sale = min(amounts)
+        result["original_price"] = original
+        result["sale_price"] = sale
+        result["discount_percent"] = _calc_discount(original, sale)
+    elif len(amounts) == 1 and discount_label_amounts:
+        price = amounts[0]
+        disc_amt = discount_label_amounts[0]
+        inferred_sale = round(price - disc_amt, 2)
+        if inferred_sale > 3:
+            result["original_price"] = price
+            result["sale_price"] = inferred_sale
+            result["discount_percent"] = _calc_discount(price, inferred_sale)
+        else:
+            result["sale_price"] = price
+    elif len(amounts) == 1:
+        result["sale_price"] = amounts[0]
+
+    return result
+
+
+_RE_WEIGHT_METRIC = re.compile(
+    r"(?P<qty>\d*\.?\d+)\s*(?P<unit>mg|g|oz)\b", re.IGNORECASE,
+)
+
+
+_RE_FRAC_OZ = re.compile(r"\b(1/[248])\s*(?:oz)?\b", re.IGNORECASE)
+
+
+def reference_extract_weight(text: str) -> dict[str, Any]:
+    result: dict[str, Any] = {"weight_value": None, "weight_unit": None}
+
+    frac_m = _RE_FRAC_OZ.search(text)
+    if frac_m:
+        frac = frac_m.group(1)
+        grams = _FRAC_TO_GRAMS.get(frac)
+        if grams is not None:
+            result["weight_value"] = grams
+            result["weight_unit"] = "g"
+            return result
+
+    m = _RE_WEIGHT_METRIC.search(text)
+    if m:
+        value = float(m.group("qty"))
+        unit = m.group("unit").lower()
+
+        if unit == "oz" and _BEVERAGE_KEYWORDS_RE.search(text):
+            mg_match = re.search(
+                r"(?P<qty>\d*\.?\d+)\s*mg\b", text, re.IGNORECASE,
+            )
+            if mg_match:
+                result["weight_value"] = float(mg_match.group("qty"))
+                result["weight_unit"] = "mg"
+            return result
+
+        if unit == "oz":
+            value = round(value * 28, 1)
+            unit = "g"
+
+        if unit == "g" and value > 2:
+            lower_text = text.lower()
+            if any(kw in lower_text for kw in (
+                "vape", "cart", "cartridge", "pod", "disposable",
+                "stiizy", "stiiizy", "pax", "510",
+            )):
+                value = value / 10
+
+        result["weight_value"] = value
+        result["weight_unit"] = unit
+        return result
+
+    lower = text.lower()
+    for alias, grams in _WEIGHT_ALIASES.items():
+        if alias == "1/8":
+            continue  # already handled by _RE_FRAC_OZ above
+        if re.search(rf"\b{alias}\b", lower):
+            result["weight_value"] = grams
+            result["weight_unit"] = "g"
+            return result
+
+    return result
+
+
+_RE_THC = re.compile(
+    r"(?:(?P<pct1>[\d]+(?:\.[\d]+)?)\s*%\s*THC)"
+    r"|(?:THC\s*:?\s*(?P<pct2>[\d]+(?:\.[\d]+)?)\s*%)",
+    re.IGNORECASE,
+)
+
+_RE_CBD = re.compile(
+    r"(?:(?P<pct1>[\d]+(?:\.[\d]+)?)\s*%\s*CBD)"
+    r"|(?:CBD\s*:?\s*(?P<pct2>[\d]+(?:\.[\d]+)?)\s*%)",
+    re.IGNORECASE,
+)
+
+
+def reference_extract_cannabinoids(text: str) -> dict[str, float | None]:
+    result: dict[str, float | None] = {"thc_percent": None, "cbd_percent": None}
+
+    m = _RE_THC.search(text)
+    if m:
+        raw = m.group("pct1") or m.group("pct2")
+        result["thc_percent"] = float(raw)
+
+    m = _RE_CBD.search(text)
+    if m:
+        raw = m.group("pct1") or m.group("pct2")
+        result["cbd_percent"] = float(raw)
+
+    return result
+
+
+# =====================================================================
+# Fixtures
+# =====================================================================
+
+_FRAGMENTS = (
+    "$", "$", "$ ", "$45.00", "$30", "$7.5", "$0", "$1.234", "45", "3.5", ".5",
+    "0.5", "100", "28.5", "12", "1", "2", "5", "8", ".", "..", "1.2.5", "5.",
+    " ", " ", " ", "  ", "\n", "/", " / ", "1/8", "1/4", "1/2", "1/3", "2/", "3/$",
+    "was ", "Was", "now ", "NOW", "snow", "from ", "From", "starting at ",
+    "starting  at", "off", " off", "OFF", "offer", "save", "ſave", "discount",
+    "%", "% ", "THC", "thc:", "THC: ", "CBD", "cbd :", "THCA", "BOGO", "bogo",
+    "xBOGO", "g", "G", "mg", " mg", "MG", "oz", " oz", "Oz", "gm", "mgx",
+    "tea", "Vape", "cart", "eighth", "Half", "quarter", "x", "_", "a", "-",
+    "\u0661", "\u0663", "\u0130", "\u212a",
+)
+
+
+def fuzz_texts(n: int, seed: int) -> list[str]:
+    """*n* random concatenations of price / weight / potency fragments."""
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(1, 14)))
+        for _ in range(n)
+    ]
+
+
+def menu_texts(n: int, seed: int) -> list[str]:
+    """The ``name raw_text price`` strings ``parser.parse_product`` reads."""
+    return [
+        f"{p['name']} {p['raw_text']} {p['price']}" for p in make_menu(n, seed)
+    ]
+
+
+def extract_all(text: str) -> tuple[dict, dict, dict]:
+    tokens = tokenize(text)
+    return (
+        extract_prices(text, tokens),
+        extract_weight(text, tokens),
+        extract_cannabinoids(text, tokens),
+    )
+
+
+def reference_extract_all(text: str) -> tuple[dict, dict, dict]:
+    return (
+        reference_extract_prices(text),
+        reference_extract_weight(text),
+        reference_extract_cannabinoids(text),
+    )
+
+
+def _outcome(fn, *args) -> Any:
+    """Result of *fn*, or the type of the exception it raised."""
+    try:
+        return fn(*args)
+    except ValueError as exc:
+        return type(exc)
+
+
+# =====================================================================
+# Benchmarks
+# =====================================================================
+
+def _time(fn, items, repeat: int) -> tuple[list, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [_outcome(fn, *item) for item in items]
+    return results, (time.perf_counter() - start) / repeat
+
+
+def _report(label: str, texts: list[str], reference_s: float, lexer_s: float) -> None:
+    n = len(texts)
+    print(f"{label}   {n} texts")
+    print(f"  regex per rule  {reference_s / n * 1e6:8.2f} us/text")
+    print(f"  one lexer pass  {lexer_s / n * 1e6:8.2f} us/text   ({reference_s / lexer_s:.1f}x)")
+
+
+def bench_parser(label: str, texts: list[str], repeat: int) -> None:
+    items = [(t,) for t in texts]
+    reference, reference_s = _time(reference_extract_all, items, repeat)
+    lexed, lexer_s = _time(extract_all, items, repeat)
+    mismatches = [t for t, a, b in zip(texts, reference, lexed) if a != b]
+    assert not mismatches, f"parser extraction differs for {mismatches[:5]}"
+    _report(label, texts, reference_s, lexer_s)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--products", type=int, default=3000)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    menu = menu_texts(args.products, args.seed)
+    fuzz = fuzz_texts(args.fuzz, args.seed)
+    bench_parser("parser, menu    ", menu, args.repeat)
+    bench_parser("parser, tests/  ", fixture_texts(), args.repeat)
+    bench_parser("parser, fuzz    ", fuzz, 1)
+
+
+if __name__ == "__main__":
+    main()
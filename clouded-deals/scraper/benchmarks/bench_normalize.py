@@ -0,0 +1,96 @@
+"""
+Benchmark — batch product normalization without a browser or database.
+
+Builds a synthetic menu shaped like scraped Dutchie / Carrot cards
+(brand label lines, "Brand | Strain" names, weights, strike-through
+prices, product URLs, bundle offer text, repeated chain listings) and
+runs ``normalize_products`` over it: once cold, once more against a
+fresh parse cache (cold fill) and once warm.
+
+Run locally:
+    python -m benchmarks.bench_normalize
+    python -m benchmarks.bench_normalize --products 20000 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from clouded_logic import BRANDS
+from parse_cache import ParseCache
+from product_normalizer import normalize_products
+
+DISPENSARY = {"slug": "bench-dispensary", "name": "Bench Dispensary", "platform": "dutchie"}
+
+_STRAINS = (
+    "Blue Dream", "Gary Payton", "Runtz", "Wedding Cake", "Gelato 41",
+    "Sour Diesel", "Ice Cream Cake", "Super Lemon Haze", "GMO Cookies",
+    "Zkittlez", "Papaya", "Jealousy", "Headband", "Tropicana Cookies",
+)
+_FORMATS = (
+    ("3.5g", "Flower"), ("7g", "Flower"), ("1g", "Pre-Roll"),
+    ("0.5g", "Cartridge"), ("1g", "Live Resin Badder"), ("100mg", "Gummies"),
+    ("0.5g", "Disposable Vape"), ("1g", "Pod"),
+)
+_OFFERS = ("", "", "", "Special Offers (1)\n2/$40 Power Pack || KYND 3.5g", "3 for $50 select strains")
+
+
+def make_menu(n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    products = []
+    for _ in range(n):
+        brand = rng.choice(BRANDS)
+        strain = rng.choice(_STRAINS)
+        weight, fmt = rng.choice(_FORMATS)
+        original = rng.choice((20, 25, 35, 40, 50, 60))
+        sale = round(original * rng.choice((0.5, 0.6, 0.7, 0.8)), 2)
+        name = rng.choice((f"{brand} | {strain} {fmt} {weight}", f"{strain} {fmt} {weight}"))
+        raw_text = "\n".join(filter(None, (
+            brand, name, rng.choice(("Indica", "Sativa", "Hybrid")), weight,
+            f"${original:.2f}", f"${sale:.2f}", rng.choice(_OFFERS),
+        )))
+        product = {"name": name, "raw_text": raw_text, "price": f"${original:.2f} ${sale:.2f}"}
+        if rng.random() < 0.3:
+            slug = f"{brand} {strain}".lower().replace(" ", "-")
+            product["product_url"] = f"https://dutchie.com/dispensary/bench/product/{slug}"
+        products.append(product)
+    # Chain locations list much of the same menu.
+    return products + [dict(p) for p in rng.sample(products, n // 3)]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench_normalize(products: list[dict]) -> None:
+    n = len(products)
+    uncached, cold_s = _timed(lambda: normalize_products(products, DISPENSARY))
+    parsed, brand_nulls, _ = uncached
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(Path(tmp) / "parse_cache.json", version="bench")
+        fill, fill_s = _timed(lambda: normalize_products(products, DISPENSARY, cache=cache))
+        warm, warm_s = _timed(lambda: normalize_products(products, DISPENSARY, cache=cache))
+    assert fill == warm == uncached, "cached output differs from uncached"
+    print(f"normalize_products   {n} raw products -> {len(parsed)} parsed, {brand_nulls} without brand")
+    print(f"  uncached   {cold_s / n * 1e6:9.1f} us/product   ({n / cold_s:,.0f} products/s)")
+    print(f"  cache fill {fill_s / n * 1e6:9.1f} us/product")
+    print(f"  cache warm {warm_s / n * 1e6:9.1f} us/product   ({cold_s / warm_s:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    bench_normalize(make_menu(args.products, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Load test — the full ``main.run`` orchestrator against local mock menus.
+
+Generates a shard of mock Dutchie, Jane and Curaleaf stores, serves them
+from ``benchmarks.mock_menus`` and runs the real pipeline over them:
+shared browser, global and per-platform semaphores, the per-domain
+throttle (all mock Curaleaf stores share one host), retries, the job
+budget and browser crash recovery.  Crashes are injected by killing the
+shared Chromium process once the N-th store page has been requested.
+
+The run is a ``DRY_RUN`` with throwaway cache and raw-archive
+directories, so nothing is written to the database; products per site
+are read back from the raw archive.  It reports per-platform coverage
+against the catalog each store served, the peak number of stores of each
+platform in flight against its concurrency cap, site time percentiles,
+total wall time and the peak RSS of this process plus the browser.
+
+Run locally (needs ``playwright install chromium``):
+    python -m benchmarks.bench_orchestrator
+    python -m benchmarks.bench_orchestrator --sites 300 --latency-ms 150 --jitter-ms 300
+    python -m benchmarks.bench_orchestrator --down 0.05 --flaky 0.02 --hang 0.02 --crashes 2
+    python -m benchmarks.bench_orchestrator --job-budget 300 --site-timeout 90
+    python -m benchmarks.bench_orchestrator --serve        # just serve the menus
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from benchmarks.mock_menus import MOCK_PLATFORMS, MockMenuServer, MockProfile
+
+
+# =====================================================================
+# Process tree (Linux /proc)
+# =====================================================================
+
+
+def _children() -> dict[int, list[int]]:
+    tree: dict[int, list[int]] = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                ppid = int(fh.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        tree[ppid].append(int(entry))
+    return tree
+
+
+def process_tree(root: int | None = None) -> list[int]:
+    """*root* (default: this process) and all of its descendants."""
+    tree = _children()
+    pids, stack = [], [root or os.getpid()]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(tree.get(pid, ()))
+    return pids
+
+
+def tree_rss_mb(root: int | None = None) -> float:
+    total = 0
+    for pid in process_tree(root):
+        try:
+            with open(f"/proc/{pid}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total / 1024
+
+
+def kill_browser() -> list[int]:
+    """SIGKILL the top-level Chromium processes under this one.
+
+    Renderer and helper processes carry ``--type=``; the browser process
+    does not.  Returns the killed pids.
+    """
+    killed = []
+    for pid in process_tree():
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as fh:
+                cmdline = fh.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        if "chrom" in cmdline.lower() and "--type=" not in cmdline:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed.append(pid)
+            except OSError:
+                pass
+    return killed
+
+
+class RssSampler:
+    """Peak RSS of the process tree, sampled on a background thread."""
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def __enter__(self) -> RssSampler:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, tree_rss_mb())
+            self._stop.wait(self.interval)
+
+
+# =====================================================================
+# Orchestrator run
+# =====================================================================
+
+
+def prepare_env(args: argparse.Namespace) -> dict[str, str]:
+    """Environment for a DB-free ``main`` import; must run before it."""
+    scratch = tempfile.mkdtemp(prefix="bench-orchestrator-")
+    env = {
+        "DRY_RUN": "true",
+        "FORCE_RUN": "true",
+        "JOB_BUDGET_SEC": str(args.job_budget),
+        "SCRAPER_CACHE_DIR": os.path.join(scratch, "cache"),
+        "RAW_ARCHIVE": "true",
+        "RAW_ARCHIVE_DIR": os.path.join(scratch, "raw"),
+    }
+    if args.concurrency:
+        env["SCRAPE_CONCURRENCY"] = str(args.concurrency)
+    os.environ.update(env)
+    # main refuses to import without credentials; nothing is sent in a dry run.
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", "mock.mock.mock")
+    return env
+
+
+def archived_products(root: str) -> dict[str, int]:
+    from raw_archive import iter_sites, list_runs
+
+    counts: dict[str, int] = {}
+    for index_path in list_runs(root):
+        for entry, products in iter_sites(index_path):
+            counts[entry["slug"]] = len(products)
+    return counts
+
+
+def run(server: MockMenuServer, args: argparse.Namespace) -> dict[str, Any]:
+    import main
+
+    if args.site_timeout:
+        main._SITE_TIMEOUT_SEC = main._SITE_TIMEOUT_SEC_EXPANSION = args.site_timeout
+        main._RETRY_TIMEOUT_SEC = args.site_timeout
+    random.seed(args.seed)
+    dispensaries = server.dispensaries(args.region)
+
+    started = time.time()
+    with RssSampler() as rss:
+        asyncio.run(main.run(dispensaries=dispensaries))
+    wall = time.time() - started
+
+    scraped = archived_products(os.environ["RAW_ARCHIVE_DIR"])
+    site_seconds = [server.last_hit[s] - server.first_hit[s] for s in server.first_hit]
+    peaks = server.peak_concurrency()
+    platforms: dict[str, dict[str, Any]] = {}
+    for platform in MOCK_PLATFORMS:
+        sites = [s for s in server.sites.values() if s.platform == platform]
+        if not sites:
+            continue
+        catalog = sum(len(server.catalog(s.slug)) for s in sites)
+        got = sum(scraped.get(s.slug, 0) for s in sites)
+        platforms[platform] = {
+            "sites": len(sites),
+            "sites_with_products": sum(1 for s in sites if scraped.get(s.slug)),
+            "faulty_sites": sum(1 for s in sites if s.down or s.hang),
+            "catalog": catalog,
+            "products": got,
+            "coverage": got / catalog if catalog else 0.0,
+            "peak_in_flight": peaks.get(platform, 0),
+            "cap": main._PLATFORM_CONCURRENCY.get(platform, main.SCRAPE_CONCURRENCY),
+        }
+    return {
+        "sites": len(dispensaries),
+        "wall_seconds": wall,
+        "job_budget": main._JOB_BUDGET_SEC,
+        "global_cap": main.SCRAPE_CONCURRENCY,
+        "peak_in_flight": _overall_peak(server),
+        "site_seconds_p50": statistics.median(site_seconds) if site_seconds else 0.0,
+        "site_seconds_max": max(site_seconds, default=0.0),
+        "requests": server.requests,
+        "crashes": server.crashes,
+        "peak_rss_mb": rss.peak_mb,
+        "platforms": platforms,
+    }
+
+
+def _overall_peak(server: MockMenuServer) -> int:
+    points = [(t, 1) for t in server.first_hit.values()] + [(t, -1) for t in server.last_hit.values()]
+    live = peak = 0
+    for _, delta in sorted(points, key=lambda e: (e[0], -e[1])):
+        live += delta
+        peak = max(peak, live)
+    return peak
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(
+        f"{result['sites']} sites in {result['wall_seconds']:.0f}s "
+        f"(budget {result['job_budget']}s), {result['requests']} requests, "
+        f"{result['crashes']} browser crash(es) injected, peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+    print(
+        f"site time p50 {result['site_seconds_p50']:.1f}s max {result['site_seconds_max']:.1f}s  "
+        f"peak in flight {result['peak_in_flight']} (global cap {result['global_cap']})"
+    )
+    for platform, p in result["platforms"].items():
+        over = "  OVER CAP" if p["peak_in_flight"] > p["cap"] else ""
+        print(
+            f"{platform:9s} {p['sites_with_products']:4d}/{p['sites']:<4d} sites "
+            f"({p['faulty_sites']} faulty)  {p['products']:6d}/{p['catalog']:<6d} products "
+            f"({p['coverage']:6.1%})  peak {p['peak_in_flight']}/{p['cap']}{over}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sites", type=int, default=60)
+    parser.add_argument("--mix", default="dutchie=0.4,jane=0.3,curaleaf=0.3",
+                        help="Platform weights, e.g. dutchie=1,jane=1")
+    parser.add_argument("--products", default="40-400", help="Catalog size range per store")
+    parser.add_argument("--age-gate", type=float, default=0.7, help="Fraction of stores behind an age gate")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--down", type=float, default=0.0, help="Fraction of stores answering 503")
+    parser.add_argument("--flaky", type=float, default=0.0, help="Chance each menu API call fails")
+    parser.add_argument("--hang", type=float, default=0.0, help="Fraction of stores whose API never answers")
+    parser.add_argument("--crashes", type=int, default=0, help="Browser kills, spread over the run")
+    parser.add_argument("--concurrency", type=int, help="SCRAPE_CONCURRENCY for the run")
+    parser.add_argument("--job-budget", type=int, default=3600, help="JOB_BUDGET_SEC for the run")
+    parser.add_argument("--site-timeout", type=int, default=180, help="Per-site timeout (0 = production)")
+    parser.add_argument("--region", default="southern-nv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help="Serve the mock menus and print their URLs")
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    low, _, high = args.products.partition("-")
+    profile = MockProfile(
+        sites=args.sites,
+        mix={k: float(v) for k, v in (part.split("=") for part in args.mix.split(","))},
+        products=(int(low), int(high or low)),
+        age_gate=args.age_gate,
+        down=args.down,
+        flaky=args.flaky,
+        hang=args.hang,
+        region=args.region,
+        seed=args.seed,
+    )
+    sites = profile.make_sites()
+    # Crash points spread evenly over the store page loads (first attempts
+    # plus retries, so roughly a little over one load per site).
+    crash_after = [args.sites * (i + 1) // (args.crashes + 1) for i in range(args.crashes)]
+
+    server = MockMenuServer(
+        sites,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        crash_after=crash_after,
+        on_crash=kill_browser,
+        seed=args.seed,
+    )
+    with server:
+        if args.serve:
+            for d in server.dispensaries(args.region):
+                print(f"{d['platform']:9s} {d['slug']:22s} {d['url']}")
+            print("Serving — Ctrl-C to stop", file=sys.stderr)
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                return
+        prepare_env(args)
+        result = run(server, args)
+
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark — peak RSS of a scrape shard, product dicts vs ProductRecord.
+
+Replays the per-site pipeline of ``main._scrape_site_inner`` without a
+browser or database over a large Michigan-sized shard: normalize each
+site's menu, run deal detection, build the upsert rows, and keep the
+top and cut deals for the run report as ``main.run`` does until the end
+of the run.  The reference mode builds parsed products as the merged
+dicts the pipeline used to carry (raw scraper keys, the full
+``raw_text``) and keeps the raw text in the report; the record mode is
+the current pipeline.  Each mode runs in a fresh interpreter and
+reports its peak and final RSS.
+
+Menus are drawn from one catalog of cards carrying 1–6 KB of page
+text, parsed once up front into a shared parse cache (as a warm
+production run would find it) so the modes differ only in what they
+keep, not in parsing time.
+
+Run locally:
+    python -m benchmarks.bench_records
+    python -m benchmarks.bench_records --sites 120 --products 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.bench_normalize import make_menu
+from clouded_logic import CloudedLogic
+from config.dispensaries import DISPENSARIES
+from deal_detector import run_deal_detection
+from parse_cache import ParseCache, product_cache_key
+from product_normalizer import RAW_TEXT_MAX_CHARS, _normalize_product, normalize_products
+
+_DESCRIPTION = (
+    "Effects: relaxed, happy, euphoric. Terpenes: myrcene, limonene, caryophyllene. "
+    "Lab tested for potency and purity. Must be 21+ with valid ID. Prices include tax. "
+)
+
+
+def reference_normalize_products(raw_products, dispensary, cache):
+    logic = CloudedLogic()
+    parsed = []
+    for rp in raw_products:
+        found, cached = cache.get(product_cache_key(rp))
+        fields, _ = cached if found else _normalize_product(rp, logic, dispensary["name"])
+        if fields is None:
+            continue
+        parsed.append({
+            "source_platform": dispensary["platform"],
+            **rp,
+            **fields,
+            "raw_text": rp.get("raw_text", ""),
+            "dispensary_id": dispensary["slug"],
+        })
+    return parsed
+
+
+def _padded_menu(n: int, seed: int) -> list[dict[str, Any]]:
+    """Menu cards with the page text scrapers capture around them (1-6 KB)."""
+    rng = random.Random(seed)
+    menu = make_menu(n, seed)[:n]
+    for product in menu:
+        product["raw_text"] += "\n" + _DESCRIPTION * rng.randint(6, 36)
+    return menu
+
+
+def _db_rows(slug: str, parsed: list[Any]) -> list[dict[str, Any]]:
+    # The dicts main._upsert_products sends — the DB boundary.
+    return [
+        {
+            "dispensary_id": slug,
+            "name": p.get("name"),
+            "brand": p.get("brand"),
+            "category": p.get("category"),
+            "original_price": p.get("original_price"),
+            "sale_price": p.get("sale_price"),
+            "discount_percent": p.get("discount_percent"),
+            "weight_value": p.get("weight_value"),
+            "weight_unit": p.get("weight_unit"),
+            "raw_text": (p.get("raw_text") or "")[:RAW_TEXT_MAX_CHARS],
+            "deal_score": p.get("deal_score", 0),
+            "product_url": p.get("product_url"),
+        }
+        for p in parsed
+    ]
+
+
+def _rss_mb() -> tuple[float, float]:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open("/proc/self/statm") as fh:
+        current = int(fh.read().split()[1]) * resource.getpagesize() / 2**20
+    return peak, current
+
+
+def _stores(sites: int) -> list[dict[str, Any]]:
+    return [d for d in DISPENSARIES if d.get("region") == "michigan"][:sites]
+
+
+def _site_menu(catalog: list[dict[str, Any]], products: int, rng: random.Random) -> list[dict[str, Any]]:
+    # Each scrape returns its own strings, even for identical cards.
+    return [
+        dict(card, raw_text="".join(card["raw_text"].splitlines(keepends=True)))
+        for card in rng.sample(catalog, min(products, len(catalog)))
+    ]
+
+
+def run_shard(
+    mode: str, sites: int, products: int, catalog_size: int, seed: int, cache_path: Path,
+) -> dict[str, Any]:
+    catalog = _padded_menu(catalog_size, seed)
+    cache = ParseCache(cache_path, version="bench")
+    rng = random.Random(seed)
+    all_top_deals: list[Any] = []
+    all_cut_deals: list[Any] = []
+    parsed_total = 0
+    start = time.perf_counter()
+    for store in _stores(sites):
+        raw = _site_menu(catalog, products, rng)
+        if mode == "dict":
+            parsed = reference_normalize_products(raw, store, cache)
+        else:
+            parsed, _, _ = normalize_products(raw, store, cache=cache)
+        del raw
+        result = run_deal_detection(parsed)
+        _db_rows(store["slug"], parsed)
+        if mode == "record":
+            for d in result.top_deals:
+                d.pop("raw_text", None)
+            for d in result.cut_deals:
+                d.pop("raw_text", None)
+        all_top_deals.extend(result.top_deals)
+        all_cut_deals.extend(result.cut_deals)
+        parsed_total += len(parsed)
+    peak, current = _rss_mb()
+    return {
+        "mode": mode, "sites": sites, "parsed": parsed_total,
+        "kept": len(all_top_deals) + len(all_cut_deals),
+        "seconds": time.perf_counter() - start, "peak_mb": peak, "final_mb": current,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sites", type=int, default=60)
+    parser.add_argument("--products", type=int, default=1500, help="Menu size per site")
+    parser.add_argument("--catalog", type=int, default=2500, help="Distinct cards menus draw from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=("dict", "record"), help=argparse.SUPPRESS)
+    parser.add_argument("--cache", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        result = run_shard(args.mode, args.sites, args.products, args.catalog, args.seed, args.cache)
+        print(json.dumps(result))
+        return
+
+    tmp = tempfile.TemporaryDirectory()
+    cache_path = Path(tmp.name) / "parse_cache.json"
+    start = time.perf_counter()
+    cache = ParseCache(cache_path, version="bench")
+    normalize_products(_padded_menu(args.catalog, args.seed), _stores(1)[0], cache=cache)
+    cache.flush()
+    print(f"parsed the {args.catalog}-card catalog in {time.perf_counter() - start:.1f}s")
+
+    results = {}
+    for mode in ("dict", "record"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_records", "--mode", mode,
+             "--sites", str(args.sites), "--products", str(args.products),
+             "--catalog", str(args.catalog), "--seed", str(args.seed), "--cache", str(cache_path)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:>6}: {r['sites']} sites, {r['parsed']} parsed, {r['kept']} report deals kept — "
+            f"peak RSS {r['peak_mb']:.0f} MB, final {r['final_mb']:.0f} MB ({r['seconds']:.1f}s)"
+        )
+    base, new = results["dict"], results["record"]
+    print(f"peak RSS {base['peak_mb'] / new['peak_mb']:.2f}x lower, "
+          f"final {base['final_mb'] / new['final_mb']:.2f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Benchmark — memory of the end-of-run report, deal lists vs RunReport.
+
+Feeds a shard of synthetic site results (scraped menus run through
+``normalize_products`` and ``run_deal_detection``, as ``scrape_site``
+returns them) into the run report the way ``main.run`` does.  The
+reference mode keeps every site's report data and every top and cut
+deal until the end, then builds the deal report and scrape summary
+from those lists; the streaming mode folds each site into a
+``RunReport`` and drops its deal lists.  Each mode runs in a fresh
+interpreter per shard size, so the RSS columns show how memory grows
+with the number of sites.
+
+Run locally:
+    python -m benchmarks.bench_run_report
+    python -m benchmarks.bench_run_report --sites 100 1000 --products 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Iterator
+
+from benchmarks.bench_normalize import make_menu
+from deal_detector import CATEGORY_MINIMUMS, CATEGORY_TARGETS, run_deal_detection
+from metrics_collector import collect_daily_metrics
+from product_normalizer import normalize_products
+from run_report import RunReport, explain_zero_deals
+
+_PLATFORMS = ("dutchie", "curaleaf", "jane", "carrot", "aiq")
+_REGIONS = ("southern-nv", "michigan", "illinois")
+
+
+def reference_deal_report_lines(top_deals, cut_deals):
+    lines = []
+    if not top_deals and not cut_deals:
+        return lines
+    lines += ["", "=" * 60, "DEAL REPORT — Human Review Summary", "=" * 60]
+    by_cat = defaultdict(list)
+    for d in top_deals:
+        cat = d.get("category", "other")
+        if cat == "vape" and d.get("product_subtype") == "disposable":
+            cat = "disposable"
+        by_cat[cat].append(d)
+    for cat in ["flower", "vape", "disposable", "edible", "concentrate", "preroll", "other"]:
+        deals = by_cat.get(cat, [])
+        if not deals:
+            continue
+        deals.sort(key=lambda x: x.get("deal_score", 0), reverse=True)
+        lines.append("")
+        lines.append("  [%s] %d deals included — Top 3:" % (cat.upper(), len(deals)))
+        for i, d in enumerate(deals[:3], 1):
+            lines.append("    %d. [%d pts] %s — %s | $%.0f (was $%.0f, %d%% off) @ %s" % (
+                i, d.get("deal_score", 0), d.get("brand") or "?", d.get("name", "?")[:50],
+                d.get("sale_price") or 0, d.get("original_price") or 0,
+                d.get("discount_percent") or 0, d.get("dispensary_id") or d.get("dispensary") or "?",
+            ))
+    if cut_deals:
+        cut_deals = sorted(cut_deals, key=lambda x: x.get("deal_score", 0), reverse=True)
+        lines.append("")
+        lines.append("  CUT DEALS (scored but not shown) — Top 10 of %d:" % len(cut_deals))
+        for i, d in enumerate(cut_deals[:10], 1):
+            lines.append("    %d. [%d pts] %s — %s | $%.0f (%d%% off) [%s] @ %s" % (
+                i, d.get("deal_score", 0), d.get("brand") or "?", d.get("name", "?")[:50],
+                d.get("sale_price") or 0, d.get("discount_percent") or 0, d.get("category", "?"),
+                d.get("dispensary_id") or d.get("dispensary") or "?",
+            ))
+    else:
+        lines += ["", "  No cut deals (all scored deals were selected)"]
+    lines += ["", "=" * 60]
+    return lines
+
+
+def reference_summary_lines(
+    site_reports, all_top_deals, all_cut_deals, *, sites_failed, total_products, total_deals,
+    elapsed_sec, asset_stats=None, parse_stats=None,
+):
+    lines = []
+    _w = lines.append
+    _w("=" * 80)
+    _w("SCRAPE SUMMARY")
+    _w("=" * 80)
+    _w(f"  Sites scraped: {sum(1 for s in site_reports if not s.get('error'))}/{len(site_reports)}")
+    _w(f"  Total products: {total_products}")
+    _w(f"  Deals selected: {total_deals}")
+    _w(f"  Runtime: {elapsed_sec / 60:.1f} min")
+    if asset_stats and asset_stats["requests"]:
+        _w(f"  Asset cache: {asset_stats['hit_rate']:.1f}% hits "
+           f"({asset_stats['hits']}/{asset_stats['requests']}), "
+           f"{asset_stats['bytes_saved'] / 1_048_576:.1f} MB saved")
+    if parse_stats and parse_stats["lookups"]:
+        _w(f"  Parse cache: {parse_stats['hit_rate']:.1f}% hits "
+           f"({parse_stats['hits']}/{parse_stats['lookups']} products)")
+    _w("")
+    if sites_failed:
+        _w("-" * 80)
+        _w("FAILED SITES")
+        _w("-" * 80)
+        for f in sites_failed:
+            _w(f"  {f['slug']}: {f['error']}")
+        _w("")
+    _w("-" * 80)
+    _w("DEALS BY DISPENSARY")
+    _w("-" * 80)
+    deals_by_disp = defaultdict(list)
+    for d in all_top_deals:
+        deals_by_disp[d.get("dispensary_id") or "unknown"].append(d)
+    cut_by_disp = defaultdict(list)
+    for d in all_cut_deals:
+        cut_by_disp[d.get("dispensary_id") or "unknown"].append(d)
+    cat_order = ["flower", "vape", "disposable", "edible", "concentrate", "preroll"]
+    for sr in sorted(site_reports, key=lambda s: s["name"]):
+        slug, name, platform = sr["slug"], sr["name"], sr["platform"]
+        error = sr.get("error")
+        products = sr.get("products", 0)
+        rd = sr.get("_report_data", {})
+        selected_count = len(deals_by_disp.get(slug, []))
+        if error:
+            _w(f"  {name} ({platform}) — ERROR: {error}")
+            _w("")
+            continue
+        if selected_count == 0 and products == 0:
+            _w(f"  {name} ({platform}) — 0 products scraped (site may be down or blocked)")
+            _w("")
+            continue
+        site_cuts = sorted(cut_by_disp.get(slug, []), key=lambda x: x.get("deal_score", 0), reverse=True)
+        if selected_count == 0:
+            _w(f"  {name} ({platform}) — {products} products, 0 deals ({explain_zero_deals(rd, products)})")
+            if site_cuts:
+                best = site_cuts[0]
+                _w(f"    Best cut: ${best.get('sale_price', 0):.0f} "
+                   f"{best.get('brand', '?')} {best.get('name', '?')[:40]} "
+                   f"[{best.get('category', '?')}] score={best.get('deal_score', 0)}")
+            _w("")
+            continue
+        _w(f"  {name} ({platform}) — {products} products, {selected_count} deals:")
+        by_cat = defaultdict(list)
+        for d in deals_by_disp[slug]:
+            c = d.get("category", "other")
+            if c == "vape" and d.get("product_subtype") == "disposable":
+                c = "disposable"
+            by_cat[c].append(d)
+        for cat in cat_order:
+            cat_deals = by_cat.get(cat)
+            if not cat_deals:
+                continue
+            cat_deals.sort(key=lambda x: x.get("deal_score", 0), reverse=True)
+            top = cat_deals[0]
+            weight = top.get("weight_value") or ""
+            weight_str = f" {weight}{top.get('weight_unit') or ''}" if weight else ""
+            pct = top.get("discount_percent") or 0
+            pct_str = f" ({pct:.0f}% off)" if pct else (" (Deal)" if top.get("source_platform", "") == "jane" else "")
+            extra = f" +{len(cat_deals) - 1} more" if len(cat_deals) > 1 else ""
+            _w(f"    {cat:12s}: ${top.get('sale_price') or 0:<6.2f} {top.get('brand') or '?'} "
+               f"{weight_str}{pct_str}{extra}")
+        if site_cuts:
+            best = site_cuts[0]
+            _w(f"    (best cut): ${best.get('sale_price', 0):.0f} "
+               f"{best.get('brand', '?')} [{best.get('category', '?')}] "
+               f"score={best.get('deal_score', 0)}")
+        _w("")
+    _w("-" * 80)
+    _w("BRAND LEADERBOARD (top 15 by selected deals)")
+    _w("-" * 80)
+    brand_counter = Counter()
+    brand_disps = defaultdict(set)
+    for d in all_top_deals:
+        brand = d.get("brand") or "Unknown"
+        brand_counter[brand] += 1
+        brand_disps[brand].add(d.get("dispensary_id") or "?")
+    for brand, count in brand_counter.most_common(15):
+        _w(f"  {brand:25s}  {count:3d} deals across {len(brand_disps[brand])} stores")
+    _w("")
+    _w("-" * 80)
+    _w("CATEGORY DISTRIBUTION (selected vs target)")
+    _w("-" * 80)
+    cat_counter = Counter()
+    for d in all_top_deals:
+        c = d.get("category", "other")
+        if c == "vape" and d.get("product_subtype") == "disposable":
+            c = "disposable"
+        cat_counter[c] += 1
+    for cat in cat_order:
+        actual = cat_counter.get(cat, 0)
+        minimum = CATEGORY_MINIMUMS.get(cat, 0)
+        flag = " !! UNDER MIN" if actual < minimum else ""
+        _w(f"  {cat:12s}: {actual:3d}/{CATEGORY_TARGETS.get(cat, 0):3d} target  (min {minimum}){flag}  "
+           f"{'#' * min(actual, 60)}")
+    if cat_counter.get("other", 0):
+        _w(f"  {'other':12s}: {cat_counter['other']:3d}")
+    _w("")
+    if any(d.get("category") == "vape" for d in all_top_deals):
+        _w("  VAPE SUBTYPE BREAKDOWN:")
+        vape_sub_counter = Counter()
+        for d in all_top_deals:
+            if d.get("category") == "vape":
+                vape_sub_counter[d.get("product_subtype") or "unclassified"] += 1
+        for sub, cnt in vape_sub_counter.most_common():
+            _w(f"    {sub:20s}: {cnt:3d}")
+        _w(f"    disposable (selected): {cat_counter.get('disposable', 0):3d} "
+           f"(target: {CATEGORY_TARGETS.get('disposable', 0)})")
+        _w("")
+    if all_cut_deals:
+        all_cut_sorted = sorted(all_cut_deals, key=lambda x: x.get("deal_score", 0), reverse=True)
+        _w("-" * 80)
+        _w(f"TOP CUT DEALS ({len(all_cut_deals)} total scored but not shown)")
+        _w("-" * 80)
+        for i, d in enumerate(all_cut_sorted[:10], 1):
+            pct = d.get("discount_percent") or 0
+            pct_str = f" {pct:.0f}% off" if pct else ""
+            _w(f"  {i:2d}. [{d.get('deal_score', 0):2d} pts] ${d.get('sale_price') or 0:.0f}{pct_str} "
+               f"{d.get('brand') or '?'} — {d.get('name', '?')[:45]} [{d.get('category', '?')}] "
+               f"@ {d.get('dispensary_id') or '?'}")
+        _w("")
+    _w("-" * 80)
+    _w("PLATFORM SUMMARY")
+    _w("-" * 80)
+    platform_stats = defaultdict(lambda: {"sites": 0, "ok": 0, "products": 0, "deals": 0})
+    for sr in site_reports:
+        p = sr["platform"]
+        platform_stats[p]["sites"] += 1
+        if not sr.get("error"):
+            platform_stats[p]["ok"] += 1
+            platform_stats[p]["products"] += sr.get("products", 0)
+            platform_stats[p]["deals"] += sr.get("deals", 0)
+    for p, stats in sorted(platform_stats.items()):
+        _w(f"  {p:10s}: {stats['ok']}/{stats['sites']} sites OK, "
+           f"{stats['products']} products, {stats['deals']} deals")
+    _w("")
+    _w("=" * 80)
+    return lines
+
+
+def site_results(
+    sites: int, products: int, seed: int, menus: int = 12,
+) -> Iterator[tuple[dict[str, Any], dict[str, Any]]]:
+    """``(dispensary, result)`` pairs shaped like ``scrape_site``'s returns.
+
+    Detection runs once per distinct menu; each site gets its own copies
+    of the deals, as each real scrape does.  Roughly one site in twenty
+    fails and one in twenty comes back empty.
+    """
+    rng = random.Random(seed)
+    detected = []
+    for i in range(menus):
+        parsed, _, _ = normalize_products(
+            make_menu(products, seed + i), {"slug": "menu", "name": "Menu", "platform": "dutchie"},
+        )
+        for p in parsed:
+            p.pop("raw_text", None)
+        detected.append((len(parsed), run_deal_detection(parsed).report_data()))
+    for n in range(sites):
+        slug = f"store-{n:05d}"
+        disp = {
+            "slug": slug, "name": f"Store {rng.randrange(10**6):06d}",
+            "platform": rng.choice(_PLATFORMS), "region": rng.choice(_REGIONS),
+        }
+        roll = rng.random()
+        if roll < 0.05:
+            yield disp, {"slug": slug, "error": "Timeout after 600s"}
+            continue
+        if roll < 0.10:
+            yield disp, {"slug": slug, "products": 0, "deals": 0, "error": None, "_report_data": {}}
+            continue
+        count, rd = rng.choice(detected)
+        rd = dict(rd)
+        for key in ("top_deals", "cut_deals"):
+            rd[key] = [d.copy() for d in rd[key]]
+            for d in rd[key]:
+                d["dispensary_id"] = slug
+        yield disp, {
+            "slug": slug, "products": count, "deals": len(rd["top_deals"]), "error": None,
+            "_report_data": rd,
+        }
+
+
+def _report_kwargs(sites_failed: list[dict[str, str]], total_products: int, total_deals: int) -> dict[str, Any]:
+    return {
+        "sites_failed": sites_failed, "total_products": total_products,
+        "total_deals": total_deals, "elapsed_sec": 1800.0,
+    }
+
+
+def run_shard(mode: str, sites: int, products: int, seed: int) -> dict[str, Any]:
+    start = time.perf_counter()
+    sites_failed: list[dict[str, str]] = []
+    total_products = total_deals = 0
+    all_top: list[Any] = []
+    all_cut: list[Any] = []
+    site_reports: list[dict[str, Any]] = []
+    report = RunReport() if mode == "stream" else None
+    for disp, result in site_results(sites, products, seed):
+        if result.get("error"):
+            sites_failed.append({"slug": result["slug"], "error": result["error"]})
+        else:
+            total_products += result["products"]
+            total_deals += result["deals"]
+        if report is not None:
+            report.add_site(disp, result)
+            continue
+        rd = result.get("_report_data", {})
+        if not result.get("error"):
+            all_top.extend(rd.get("top_deals", []))
+            all_cut.extend(rd.get("cut_deals", []))
+        site_reports.append({
+            "slug": result["slug"], "name": disp["name"], "platform": disp["platform"],
+            "error": result.get("error"), "products": result.get("products", 0),
+            "deals": result.get("deals", 0), "_report_data": rd,
+        })
+    kwargs = _report_kwargs(sites_failed, total_products, total_deals)
+    chars = 0
+    if report is not None:
+        collect_daily_metrics(None, report.top, dry_run=True)
+        for line in report.deal_report_lines():
+            chars += len(line)
+        for line in report.summary_lines(**kwargs):
+            chars += len(line)
+        report.close()
+    else:
+        collect_daily_metrics(None, all_top, dry_run=True)
+        chars += sum(map(len, reference_deal_report_lines(all_top, all_cut)))
+        chars += sum(map(len, reference_summary_lines(site_reports, all_top, all_cut, **kwargs)))
+    return {
+        "mode": mode, "sites": sites, "chars": chars,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sites", type=int, nargs="+", default=[200, 800, 3200])
+    parser.add_argument("--products", type=int, default=600, help="Menu size per site")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=("lists", "stream"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_shard(args.mode, args.sites[0], args.products, args.seed)))
+        return
+
+    for sites in args.sites:
+        row = []
+        for mode in ("lists", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_run_report", "--mode", mode,
+                 "--sites", str(sites), "--products", str(args.products), "--seed", str(args.seed)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            row.append(json.loads(out.strip().splitlines()[-1]))
+        lists, stream = row
+        assert lists["chars"] == stream["chars"], "report text differs"
+        print(
+            f"{sites:5d} sites: lists peak RSS {lists['peak_mb']:6.0f} MB ({lists['seconds']:.1f}s), "
+            f"stream {stream['peak_mb']:6.0f} MB ({stream['seconds']:.1f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Benchmark — indexed diversity selection vs linear pool scans.
+
+``select_top_deals`` used to pick each category with three passes that
+walked the rest of a pool once its slots could no longer fill, checking
+every deal against counters keyed by ``f"{brand}|{cat}"`` strings, and
+the weight-tier leader pickers sorted every tier to take its cheapest
+deal.  Selection now takes a ``_SelectionIndex`` census of the brands
+and weight tiers in each pool once per call, so a pass stops as soon as
+no brand or tier it could still pick is left, and the leader pickers
+take minimums.  This module keeps the previous implementations as
+references, runs both over synthetic region-sized pools, asserts the
+identical feed (same deal objects, same order) and reports the time of
+the category picks (Steps 1–2b) and of the whole ``select_top_deals``
+call, whose later steps both sides share.
+
+Run locally:
+    python -m benchmarks.bench_selection
+    python -m benchmarks.bench_selection --sizes 10000 500000 --seed 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import deal_detector as dd
+from deal_detector import (
+    _BACKFILL_BRAND_PER_CATEGORY,
+    _BACKFILL_BRAND_TOTAL,
+    _BACKFILL_DISPENSARY_TOTAL,
+    _BACKFILL_THRESHOLD,
+    _BACKFILL_UNKNOWN_BRAND_TOTAL,
+    CATEGORY_TARGETS,
+    MAX_SAME_BRAND_PER_CATEGORY,
+    MAX_SAME_BRAND_TOTAL,
+    MAX_SAME_DISPENSARY_TOTAL,
+    MAX_UNKNOWN_BRAND_TOTAL,
+    TARGET_DEAL_COUNT,
+    _selection_bucket,
+    _weight_tier,
+    select_top_deals,
+)
+
+
+# =====================================================================
+# Reference implementations (linear scans, sorted leader tiers)
+# =====================================================================
+
+def _reference_weight_g(deal: dict) -> float:
+    w = deal.get("weight_value") or deal.get("weight") or 0
+    if isinstance(w, str):
+        try:
+            w = float(w.replace("g", "").strip())
+        except (ValueError, AttributeError):
+            w = 0
+    return float(w)
+
+
+def _reference_price(deal: dict) -> float:
+    return deal.get("sale_price") or deal.get("current_price") or 999
+
+
+def _reference_tier_leaders(pool: list[dict], tiers: list[list[dict]], n: int) -> list[dict]:
+    for tier in tiers:
+        tier.sort(key=_reference_price)
+    leaders = [tier[0] for tier in tiers if tier]
+    if len(leaders) < n:
+        picked_ids = set(id(d) for d in leaders)
+        remaining = [d for d in pool if id(d) not in picked_ids]
+        remaining.sort(key=_reference_price)
+        for d in remaining:
+            if len(leaders) >= n:
+                break
+            leaders.append(d)
+    leaders.sort(key=_reference_price)
+    return leaders
+
+
+def reference_pick_disposable_price_leaders(pool: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    small, medium, large = [], [], []
+    for d in pool:
+        w = _reference_weight_g(d)
+        if w <= 0:
+            continue
+        elif w <= 0.5:
+            small.append(d)
+        elif w < 0.8:
+            medium.append(d)
+        else:
+            large.append(d)
+    return _reference_tier_leaders(pool, [small, medium, large], 3)
+
+
+def reference_pick_flower_price_leaders(pool: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    eighth, quarter, half, oz = [], [], [], []
+    for d in pool:
+        w = _reference_weight_g(d)
+        if w <= 0:
+            continue
+        elif w <= 4:
+            eighth.append(d)
+        elif w <= 8:
+            quarter.append(d)
+        elif w <= 15:
+            half.append(d)
+        else:
+            oz.append(d)
+    return _reference_tier_leaders(pool, [eighth, quarter, half, oz], 4)
+
+
+def reference_pick_vape_price_leaders(pool: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    half, full = [], []
+    for d in pool:
+        w = _reference_weight_g(d)
+        if w <= 0:
+            continue
+        elif w <= 0.6:
+            half.append(d)
+        else:
+            full.append(d)
+    return _reference_tier_leaders(pool, [half, full], 2)
+
+
+def reference_pick_subtype_leaders(pool: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    by_subtype: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for d in pool:
+        st = d.get("product_subtype")
+        if st:
+            by_subtype[st].append(d)
+    leaders = []
+    for subtype_deals in by_subtype.values():
+        subtype_deals.sort(key=_reference_price)
+        leaders.append(subtype_deals[0])
+    leaders.sort(key=_reference_price)
+    return leaders
+
+
+def reference_pick_from_pools(
+    buckets: dict[str, list[dict[str, Any]]],
+    category_slots: dict[str, int],
+    brand_cap: int,
+    brand_cat_cap: int,
+    dispensary_cap: int,
+    unknown_cap: int,
+    already_picked: set[tuple],
+    brand_counts: dict[str, int],
+    brand_cat_counts: dict[str, int],
+    dispensary_counts: dict[str, int],
+) -> dict[str, list[dict[str, Any]]]:
+    category_picks: dict[str, list[dict[str, Any]]] = {}
+
+    def _brand_key(deal: dict[str, Any]) -> str:
+        b = deal.get("brand")
+        return b if b else "_unknown"
+
+    for cat, slots in category_slots.items():
+        pool = buckets.get(cat, [])
+        picks: list[dict[str, Any]] = []
+        picked_set: set[int] = set()
+
+        def _try_pick(deal: dict[str, Any], idx: int) -> bool:
+            deal_key = (deal.get("name", ""), deal.get("sale_price"))
+            if deal_key in already_picked:
+                return False
+            brand = _brand_key(deal)
+            disp_id = deal.get("dispensary_id") or ""
+            bc_key = f"{brand}|{cat}"
+            effective_cap = unknown_cap if brand == "_unknown" else brand_cap
+            if brand_counts[brand] >= effective_cap:
+                return False
+            if brand_cat_counts[bc_key] >= brand_cat_cap:
+                return False
+            if dispensary_counts[disp_id] >= dispensary_cap:
+                return False
+            brand_counts[brand] += 1
+            brand_cat_counts[bc_key] += 1
+            dispensary_counts[disp_id] += 1
+            picks.append(deal)
+            picked_set.add(idx)
+            already_picked.add(deal_key)
+            return True
+
+        tier_limit = 2 if slots >= 40 else 1
+        seen_brands: set[str] = set()
+        tier_counts: dict[str, int] = defaultdict(int)
+        for i, deal in enumerate(pool):
+            if len(picks) >= slots:
+                break
+            brand = _brand_key(deal)
+            tier = _weight_tier(deal)
+            if brand in seen_brands:
+                continue
+            if tier_counts[tier] >= tier_limit:
+                continue
+            if _try_pick(deal, i):
+                seen_brands.add(brand)
+                tier_counts[tier] += 1
+
+        if len(picks) < slots:
+            for i, deal in enumerate(pool):
+                if len(picks) >= slots:
+                    break
+                if i in picked_set:
+                    continue
+                brand = _brand_key(deal)
+                if brand in seen_brands:
+                    continue
+                if _try_pick(deal, i):
+                    seen_brands.add(brand)
+
+        if len(picks) < slots:
+            for i, deal in enumerate(pool):
+                if len(picks) >= slots:
+                    break
+                if i in picked_set:
+                    continue
+                _try_pick(deal, i)
+
+        category_picks[cat] = picks
+
+    return category_picks
+
+
+def _reference_order_bucket(cat: str, pool: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    leaders = None
+    if cat == "disposable" and len(pool) >= 3:
+        leaders = reference_pick_disposable_price_leaders(pool)
+    elif cat == "flower" and len(pool) >= 4:
+        leaders = reference_pick_flower_price_leaders(pool)
+    elif cat == "vape" and len(pool) >= 2:
+        leaders = reference_pick_vape_price_leaders(pool)
+    elif cat in ("concentrate", "edible", "preroll") and len(pool) >= 2:
+        leaders = reference_pick_subtype_leaders(pool) or None
+    if leaders is not None:
+        leader_set = set(id(d) for d in leaders)
+        rest = [d for d in pool if id(d) not in leader_set]
+        rest.sort(key=lambda d: d.get("deal_score", 0), reverse=True)
+        return leaders + rest
+    pool.sort(key=lambda d: d.get("sale_price") or d.get("current_price") or 999)
+    rest = pool[3:]
+    rest.sort(key=lambda d: d.get("deal_score", 0), reverse=True)
+    return pool[:3] + rest
+
+
+def reference_select_category_picks(
+    scored_deals: list[dict[str, Any]],
+    config: dd.DetectionConfig | None = None,
+) -> tuple[dict[str, list[dict[str, Any]]], int, int]:
+    buckets: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for deal in scored_deals:
+        buckets[_selection_bucket(deal)].append(deal)
+    for cat in buckets:
+        buckets[cat] = _reference_order_bucket(cat, buckets[cat])
+
+    total_available = sum(len(v) for v in buckets.values())
+    target = min(TARGET_DEAL_COUNT, total_available)
+    category_slots: dict[str, int] = {}
+    remaining_slots = target
+    for cat, cat_target in CATEGORY_TARGETS.items():
+        slots = min(cat_target, len(buckets.get(cat, [])))
+        category_slots[cat] = slots
+        remaining_slots -= slots
+    if remaining_slots > 0:
+        for cat in sorted(buckets.keys(), key=lambda c: CATEGORY_TARGETS.get(c, 0), reverse=True):
+            if cat == "other":
+                continue
+            current = category_slots.get(cat, 0)
+            max_for_cat = int(CATEGORY_TARGETS.get(cat, 10) * 1.5)
+            can_add = min(len(buckets.get(cat, [])) - current, max_for_cat - current)
+            if can_add > 0:
+                add = min(can_add, remaining_slots)
+                category_slots[cat] = current + add
+                remaining_slots -= add
+            if remaining_slots <= 0:
+                break
+        if remaining_slots > 0:
+            for cat in sorted(buckets.keys(), key=lambda c: len(buckets[c]), reverse=True):
+                current = category_slots.get(cat, 0)
+                cat_target = CATEGORY_TARGETS.get(cat, 10)
+                max_for_cat = int(cat_target * 1.5) if cat != "other" else cat_target
+                can_add = min(len(buckets.get(cat, [])) - current, max_for_cat - current)
+                if can_add > 0:
+                    add = min(can_add, remaining_slots)
+                    category_slots[cat] = current + add
+                    remaining_slots -= add
+                if remaining_slots <= 0:
+                    break
+
+    if (total_available / target if target > 0 else 1.0) < 1.5:
+        brand_cap = min(10, MAX_SAME_BRAND_TOTAL + 3)
+        brand_cat_cap = min(5, MAX_SAME_BRAND_PER_CATEGORY + 1)
+    else:
+        brand_cap = MAX_SAME_BRAND_TOTAL
+        brand_cat_cap = MAX_SAME_BRAND_PER_CATEGORY
+
+    brand_counts: dict[str, int] = defaultdict(int)
+    brand_cat_counts: dict[str, int] = defaultdict(int)
+    dispensary_counts: dict[str, int] = defaultdict(int)
+    already_picked: set[tuple] = set()
+    category_picks = reference_pick_from_pools(
+        buckets, category_slots, brand_cap, brand_cat_cap, MAX_SAME_DISPENSARY_TOTAL,
+        MAX_UNKNOWN_BRAND_TOTAL, already_picked, brand_counts, brand_cat_counts, dispensary_counts,
+    )
+    round1_total = sum(len(v) for v in category_picks.values())
+
+    if round1_total < target * _BACKFILL_THRESHOLD:
+        backfill_slots: dict[str, int] = {}
+        for cat in category_slots:
+            filled = len(category_picks.get(cat, []))
+            backfill_slots[cat] = min(category_slots[cat] - filled + 5, len(buckets.get(cat, [])) - filled)
+        backfill_picks = reference_pick_from_pools(
+            buckets, backfill_slots, _BACKFILL_BRAND_TOTAL, _BACKFILL_BRAND_PER_CATEGORY,
+            _BACKFILL_DISPENSARY_TOTAL, _BACKFILL_UNKNOWN_BRAND_TOTAL, already_picked,
+            brand_counts, brand_cat_counts, dispensary_counts,
+        )
+        for cat, picks in backfill_picks.items():
+            if picks:
+                category_picks.setdefault(cat, []).extend(picks)
+
+    return category_picks, target, round1_total
+
+
+@contextmanager
+def _reference_selection() -> Iterator[None]:
+    current = dd._select_category_picks
+    dd._select_category_picks = reference_select_category_picks
+    try:
+        yield
+    finally:
+        dd._select_category_picks = current
+
+
+def reference_select_top_deals(scored_deals: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    with _reference_selection():
+        return select_top_deals(scored_deals)
+
+
+# =====================================================================
+# Synthetic pools
+# =====================================================================
+
+_FORMATS = (
+    ("flower", None, (3.5, 7, 14, 28, None)),
+    ("vape", "cartridge", (0.5, 1, None)),
+    ("vape", "pod", (0.5, 1)),
+    ("vape", "disposable", (0.3, 0.5, 0.8, 1, 2, None)),
+    ("edible", "gummy", (100, None)),
+    ("edible", "chocolate", (100,)),
+    ("edible", None, (None,)),
+    ("concentrate", "live_resin", (0.5, 1)),
+    ("concentrate", "rosin", (1,)),
+    ("concentrate", None, (1, None)),
+    ("preroll", "infused_preroll", (1, None)),
+    ("preroll", "preroll_pack", (3.5,)),
+    ("preroll", None, (1,)),
+    ("other", None, (None,)),
+    ("topical", None, (None,)),
+)
+_CHAINS = ("td", "planet13", "curaleaf", "oasis", "thrive", "rise", "mint", "jardin")
+
+
+def make_deals(n: int, seed: int, brands: int = 400, dispensaries: int = 60) -> list[dict[str, Any]]:
+    """Scored deals across many brands, chains and formats, with repeats.
+
+    About one deal in twenty repeats an earlier (name, sale_price), and
+    a few have no brand, so every skip rule in the passes gets used.
+    """
+    rng = random.Random(seed)
+    brand_names = [f"Brand {i}" for i in range(brands)] + ["", ""]
+    disp_ids = [f"{_CHAINS[i % len(_CHAINS)]}-{i}" for i in range(dispensaries)]
+    deals: list[dict[str, Any]] = []
+    for i in range(n):
+        category, subtype, weights = rng.choice(_FORMATS)
+        if deals and rng.random() < 0.05:
+            earlier = rng.choice(deals)
+            name, sale = earlier["name"], earlier["sale_price"]
+        else:
+            name, sale = f"Product {i}", rng.choice((5, 8, 10, 12, 15, 18, 20, 25, 30, 35, 45))
+        deals.append({
+            "name": name,
+            "brand": rng.choice(brand_names),
+            "category": category,
+            "product_subtype": subtype,
+            "weight_value": rng.choice(weights),
+            "sale_price": sale,
+            "dispensary_id": rng.choice(disp_ids),
+            "deal_score": rng.randrange(20, 95),
+        })
+    return deals
+
+
+def _time(fn, deals, repeat: int) -> tuple[Any, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(deals)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000, 500000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    logging.getLogger("deal_detector").setLevel(logging.WARNING)
+
+    for n in args.sizes:
+        deals = make_deals(n, args.seed)
+        _, reference_picks_s = _time(reference_select_category_picks, deals, args.repeat)
+        config = dd.DetectionConfig()
+        _, picks_s = _time(lambda d: dd._select_category_picks(d, config), deals, args.repeat)
+        reference, reference_s = _time(reference_select_top_deals, deals, args.repeat)
+        indexed, indexed_s = _time(select_top_deals, deals, args.repeat)
+        assert [id(d) for d in indexed] == [id(d) for d in reference], "feed differs from the reference"
+        print(
+            f"{n:>7} deals -> {len(indexed)} picked: "
+            f"picks {reference_picks_s * 1e3:7.1f} -> {picks_s * 1e3:7.1f} ms "
+            f"({reference_picks_s / picks_s:.1f}x), "
+            f"feed {reference_s * 1e3:7.1f} -> {indexed_s * 1e3:7.1f} ms "
+            f"({reference_s / indexed_s:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
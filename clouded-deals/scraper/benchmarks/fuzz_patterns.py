@@ -0,0 +1,190 @@
+"""
+Fuzz — find regexes whose cost grows faster than their input.
+
+Feeds long, adversarial strings to every module-level pattern and every
+literal inline ``re.search`` / ``re.sub`` / … pattern in the modules
+that parse scraped product text (``regex_profile.PROFILED_MODULES``).
+For each pattern it times ``findall`` over repetitions of a few generic
+seeds (runs of spaces, digits, ``"$1"``, ``"1."`` …) and of the words the
+pattern itself looks for, at 250, 1k and 4k characters (up to
+``RAW_TEXT_MAX_CHARS``, the most of a card the parser sees), and
+estimates the growth exponent between successive sizes.  Patterns above
+``--max-exponent`` are reported with the seed and size that exposed them.
+
+``REWRITES`` records the fixes this harness prompted; tests check each
+rewritten pattern against its original on random text.
+
+Modules whose imports are not installed (``main`` needs playwright and
+supabase) are listed as skipped.
+
+Run locally:
+    python -m benchmarks.fuzz_patterns
+    python -m benchmarks.fuzz_patterns --max-chars 16000 --module product_normalizer
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import math
+import random
+import re
+import time
+
+from product_normalizer import RAW_TEXT_MAX_CHARS
+from regex_profile import PROFILED_MODULES, inline_patterns, module_patterns
+
+_GENERIC_SEEDS = (" ", "a", "1", "1.", "$1", "$1 ", "1 ", "a ", "a1", "-", "|", "%", "\n", ". ")
+_WORD_RE = re.compile(r"[A-Za-z]{2,}")
+_ESCAPE_RE = re.compile(r"\\[A-Za-z]")
+
+
+# Reference implementations: (current fragment, original fragment) for
+# the rewrites of super-linear patterns, applied in order to recover the
+# original pattern text.  The lookbehinds only skip start positions that
+# could not match; the rest spell the same language without ambiguity.
+REWRITES = (
+    (r"(?<!\s)", ""),
+    (r"(?<!\d)", ""),
+    (r"(?<![\d.])", ""),
+    (r"\s*(?:-\s*)?", r"\s*-?\s*"),
+    (r"(?:\[?(?:\d*:)?\d*(?<=[\[\d:])\s*)?", r"\[?\d*:?\d*\s*"),
+    (r"(?:\d+(?:\.\d+)?|\.\d+)", r"\d*\.?\d+"),
+    (r"\d+(?:\.\d*)?", r"\d+\.?\d*"),
+    (r"\s*(?:\|\s*)?", r"\s*\|?\s*"),
+    (r"\s*(?:\(\s*)?", r"\s*\(?\s*"),
+    (r"(?:\d*:)?\d*", r"\d*:?\d*"),
+)
+
+_TEXT_FRAGMENTS = (
+    "1", "25", "3.5", ".", " ", "   ", "\n", "|", ":", "[", "]", "(", ")", "/", "$", "-",
+    "g", "mg", "pk", "pack", "oz", "THC", "cbd", "Gold", "Label", "I", "S", "h",
+    "For", "Buy", "Get", "Indica", "Delivery", "Special Offer",
+)
+
+
+def reference_pattern(pattern: re.Pattern) -> re.Pattern | None:
+    """*pattern* as written before ``REWRITES``, or None if untouched."""
+    source = pattern.pattern
+    for current, original in REWRITES:
+        source = source.replace(current, original)
+    return re.compile(source, pattern.flags) if source != pattern.pattern else None
+
+
+def random_texts(n: int, seed: int, max_fragments: int = 12) -> list[str]:
+    """Short strings of digits, separators, units and label words.
+
+    Every other string repeats itself after some whitespace, so
+    back-to-back matches are common.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        text = "".join(rng.choices(_TEXT_FRAGMENTS, k=rng.randint(1, max_fragments)))
+        texts.append(text + rng.choice((" ", "  ", "\n")) + text if i % 2 else text)
+    return texts
+
+
+def pattern_inventory(module_names: tuple[str, ...]) -> tuple[list[tuple[str, re.Pattern]], dict[str, str]]:
+    """``(patterns, skipped)`` — unique patterns by name, and import errors by module."""
+    patterns: list[tuple[str, re.Pattern]] = []
+    skipped: dict[str, str] = {}
+    seen: set[tuple[str, int]] = set()
+    for name in module_names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as exc:
+            skipped[name] = str(exc)
+            continue
+        for label, pattern in module_patterns(module) + inline_patterns(module):
+            if (pattern.pattern, pattern.flags) not in seen:
+                seen.add((pattern.pattern, pattern.flags))
+                patterns.append((label, pattern))
+    return patterns, skipped
+
+
+def seeds_for(pattern: re.Pattern, words: int = 4) -> list[str]:
+    """Generic seeds plus the first few literal words of *pattern*."""
+    literal = _ESCAPE_RE.sub(" ", pattern.pattern)
+    found = list(dict.fromkeys(w.lower() for w in _WORD_RE.findall(literal)))[:words]
+    return list(_GENERIC_SEEDS) + [f"{w} " for w in found] + [f"{w} 1 " for w in found]
+
+
+def _time_findall(pattern: re.Pattern, text: str, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pattern.findall(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth(pattern: re.Pattern, seed: str, sizes: tuple[int, ...], repeat: int,
+           min_seconds: float, budget_s: float) -> tuple[float, int, float]:
+    """``(exponent, chars, seconds)`` for *seed* repeated to the given *sizes*.
+
+    Times each size in turn and estimates the exponent from the last
+    two.  Stops once the growth looks linear on timings of at least
+    *min_seconds*, or once one call takes *budget_s* — a pattern that
+    slow on the smallest size is reported with an infinite exponent.
+    """
+    timings: list[tuple[int, float]] = []
+    exponent = 1.0
+    for size in sizes:
+        seconds = _time_findall(pattern, (seed * (size // len(seed) + 1))[:size], repeat)
+        timings.append((size, seconds))
+        if len(timings) > 1:
+            (n0, t0), (n1, t1) = timings[-2:]
+            exponent = math.log(max(t1, 1e-9) / max(t0, 1e-9)) / math.log(n1 / n0)
+            if t1 >= min_seconds and exponent < 1.2:
+                break
+        if seconds >= budget_s:
+            break
+    if len(timings) == 1 and timings[0][1] >= budget_s:
+        exponent = math.inf
+    return exponent, *timings[-1]
+
+
+def fuzz(patterns: list[tuple[str, re.Pattern]], sizes: tuple[int, ...], repeat: int,
+         min_seconds: float, budget_s: float) -> list[tuple[str, str, float, int, float]]:
+    """Worst seed per pattern as ``(label, seed, exponent, chars, seconds)``."""
+    results = []
+    for label, pattern in patterns:
+        worst = (label, "", 1.0, 0, 0.0)
+        for seed in seeds_for(pattern):
+            exponent, chars, seconds = growth(pattern, seed, sizes, repeat, min_seconds, budget_s)
+            if seconds >= min_seconds and exponent > worst[2]:
+                worst = (label, seed, exponent, chars, seconds)
+        results.append(worst)
+    results.sort(key=lambda r: r[2], reverse=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--module", action="append", help="limit to these modules (repeatable)")
+    parser.add_argument("--max-chars", type=int, default=RAW_TEXT_MAX_CHARS)
+    parser.add_argument("--max-exponent", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore timings below this")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds per call before giving up on a seed")
+    args = parser.parse_args()
+
+    sizes, size = [], 250
+    while size <= args.max_chars:
+        sizes.append(size)
+        size *= 4
+    patterns, skipped = pattern_inventory(tuple(args.module or PROFILED_MODULES))
+    for name, error in skipped.items():
+        print(f"skipped {name}: {error}")
+    print(f"fuzzing {len(patterns)} patterns at {', '.join(map(str, sizes))} chars", flush=True)
+
+    results = fuzz(patterns, tuple(sizes), args.repeat, args.min_ms / 1e3, args.budget)
+    flagged = [r for r in results if r[2] > args.max_exponent]
+    for label, seed, exponent, chars, seconds in flagged:
+        print(f"  SUPER-LINEAR n^{exponent:.1f}  {seconds * 1e3:9.1f} ms at {chars} chars of {seed!r}  {label}")
+    print(f"{len(flagged)} of {len(patterns)} patterns grow faster than n^{args.max_exponent}")
+
+
+if __name__ == "__main__":
+    main()
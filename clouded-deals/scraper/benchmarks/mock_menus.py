@@ -0,0 +1,591 @@
+"""
+Local mock dispensary menus for orchestrator load tests.
+
+Serves menus shaped the way the real scrapers expect them, so
+``main.run`` can be driven at scale on one machine:
+
+  - **Dutchie** — a host page whose age-gate click injects an
+    ``embedded-menu`` iframe; the embed loads its cards from a JSON API
+    and paginates with ``aria-label="go to page N"`` buttons.
+  - **Jane** — cards on the page behind a ``Yes`` overlay and a
+    "View More" button that appends the next batch until the menu is
+    exhausted.
+  - **Curaleaf** — every store on one shared ``curaleaf.com`` host (so
+    the domain throttle applies as it does live), a redirect to
+    ``/age-gate?returnurl=...`` with a state picker until the age
+    cookie is set, and "Go to page N" pagination.
+
+Each store gets its own host name under ``.localhost`` (Chromium
+resolves those to loopback without DNS), e.g.
+``http://mock-dutchie-003.localhost:8765/menu``; requests are told
+apart by their ``Host`` header.  Per-site knobs — catalog size, age
+gate, whole-site 503s, flaky API calls, hung API calls — are drawn
+from a seeded ``MockProfile``; every response waits ``latency`` plus
+up to ``jitter`` seconds.  ``crash_after`` calls ``on_crash`` when the
+N-th store page is requested, which the load-test harness uses to kill
+the shared browser mid-run.
+
+The server also records when each store was first and last hit, so a
+run can be checked against the platform concurrency caps it was
+supposed to respect.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable
+from urllib.parse import parse_qs, quote, urlsplit
+
+from benchmarks.bench_normalize import make_menu
+
+MOCK_PLATFORMS = ("dutchie", "jane", "curaleaf")
+PAGE_SIZES = {"dutchie": 48, "jane": 36, "curaleaf": 24}
+
+_DUTCHIE_EMBED_HOST = "dutchie.localhost"
+_CURALEAF_HOST = "curaleaf.com.localhost"
+_STATES = ("Arizona", "Illinois", "Michigan", "Nevada", "New Jersey", "New York", "Ohio")
+
+
+# =====================================================================
+# Sites and catalogs
+# =====================================================================
+
+
+class MockSite:
+    """One mock store and the faults it was dealt."""
+
+    __slots__ = ("slug", "platform", "products", "seed", "age_gate", "down", "flaky", "hang")
+
+    def __init__(
+        self,
+        slug: str,
+        platform: str,
+        products: int,
+        *,
+        seed: int = 0,
+        age_gate: bool = True,
+        down: bool = False,
+        flaky: float = 0.0,
+        hang: bool = False,
+    ) -> None:
+        self.slug = slug
+        self.platform = platform
+        self.products = products
+        self.seed = seed
+        self.age_gate = age_gate
+        self.down = down
+        self.flaky = flaky
+        self.hang = hang
+
+    def catalog(self) -> list[dict[str, Any]]:
+        """Card data for the menu: brand, name, the remaining card lines."""
+        # make_menu repeats names; draw until there are enough distinct ones
+        # (the scrapers dedupe by name, so repeats would never be counted).
+        cards, seen, draw = [], set(), self.products
+        while len(cards) < self.products:
+            draw *= 2
+            for product in make_menu(draw, self.seed + draw):
+                if product["name"] in seen:
+                    continue
+                seen.add(product["name"])
+                brand, name, *lines = product["raw_text"].split("\n")
+                cards.append({"brand": brand, "name": name, "lines": lines, "url": product.get("product_url")})
+                if len(cards) == self.products:
+                    break
+        return cards
+
+
+class MockProfile:
+    """How a generated shard of mock stores is made up."""
+
+    def __init__(
+        self,
+        *,
+        sites: int = 60,
+        mix: dict[str, float] | None = None,
+        products: tuple[int, int] = (40, 400),
+        age_gate: float = 0.7,
+        down: float = 0.0,
+        flaky: float = 0.0,
+        hang: float = 0.0,
+        region: str = "southern-nv",
+        seed: int = 42,
+    ) -> None:
+        self.sites = sites
+        self.mix = mix or {"dutchie": 0.4, "jane": 0.3, "curaleaf": 0.3}
+        self.products = products
+        self.age_gate = age_gate
+        self.down = down
+        self.flaky = flaky
+        self.hang = hang
+        self.region = region
+        self.seed = seed
+
+    def make_sites(self) -> list[MockSite]:
+        rng = random.Random(self.seed)
+        platforms = [p for p in self.mix if p in MOCK_PLATFORMS]
+        weights = [self.mix[p] for p in platforms]
+        counts: dict[str, int] = defaultdict(int)
+        sites = []
+        for _ in range(self.sites):
+            platform = rng.choices(platforms, weights)[0]
+            counts[platform] += 1
+            sites.append(MockSite(
+                f"mock-{platform}-{counts[platform]:03d}",
+                platform,
+                rng.randint(*self.products),
+                seed=rng.randrange(1 << 30),
+                age_gate=rng.random() < self.age_gate,
+                down=rng.random() < self.down,
+                flaky=self.flaky,
+                hang=rng.random() < self.hang,
+            ))
+        return sites
+
+
+# =====================================================================
+# Pages
+# =====================================================================
+
+# Card rendering shared by every platform's page (built with textContent,
+# so catalog text is never parsed as HTML).
+_CARD_JS = """
+function card(p) {
+  const el = document.createElement('div');
+  el.setAttribute('data-testid', 'product-card');
+  el.className = 'product-card';
+  const a = document.createElement('a');
+  if (p.url) a.href = p.url;
+  const brand = document.createElement('span');
+  brand.className = 'brand';
+  brand.textContent = p.brand;
+  const name = document.createElement('h3');
+  name.textContent = p.name;
+  a.append(brand, name);
+  for (const line of p.lines) {
+    const div = document.createElement('div');
+    div.textContent = line;
+    a.append(div);
+  }
+  el.append(a);
+  return el;
+}
+async function getJSON(url) {
+  for (let attempt = 0; ; attempt++) {
+    const r = await fetch(url);
+    if (r.ok) return r.json();
+    if (attempt >= 2) return {products: [], pages: 0, more: false};
+    await new Promise(res => setTimeout(res, 1000));
+  }
+}
+"""
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:sans-serif}} .product-card{{border:1px solid #ccc;margin:4px;padding:4px}}
+.age-gate{{position:fixed;inset:0;background:rgba(0,0,0,.85);z-index:9999;color:#fff;
+display:flex;align-items:center;justify-content:center}}</style></head>
+<body>
+<header><h1>{title}</h1><p>Cannabis dispensary menu, daily specials and deals.</p></header>
+{body}
+<script>{card_js}
+{script}</script>
+</body></html>"""
+
+_AGE_GATE = """<div class="age-gate" id="age-gate"><div>
+<p>Are you 21 or older? You must be 21 to enter this site.</p>
+<button id="age-yes">{label}</button></div></div>"""
+
+_DUTCHIE_HOST_SCRIPT = """
+function loadMenu() {
+  if (document.querySelector('#menu-root iframe')) return;
+  const f = document.createElement('iframe');
+  f.src = %(embed)s;
+  f.style.width = '100%%';
+  f.style.height = '6000px';
+  document.getElementById('menu-root').append(f);
+}
+const gate = document.getElementById('age-gate');
+if (!gate) {
+  loadMenu();
+} else {
+  document.getElementById('age-yes').addEventListener('click', () => {
+    document.cookie = 'agc=1; path=/';
+    gate.remove();
+    loadMenu();
+  });
+}
+"""
+
+_DUTCHIE_EMBED_SCRIPT = """
+const API = %(api)s;
+async function show(page) {
+  const root = document.getElementById('products');
+  root.replaceChildren();
+  const data = await getJSON(API + '?page=' + page);
+  root.append(...data.products.map(card));
+  const nav = document.getElementById('pager');
+  nav.replaceChildren();
+  for (let n = 1; n <= data.pages; n++) {
+    const b = document.createElement('button');
+    b.setAttribute('aria-label', 'go to page ' + n);
+    b.textContent = n;
+    if (n === page) b.disabled = true;
+    b.addEventListener('click', () => show(n));
+    nav.append(b);
+  }
+}
+show(1);
+"""
+
+_JANE_SCRIPT = """
+const API = %(api)s;
+let offset = 0;
+async function more() {
+  const data = await getJSON(API + '?offset=' + offset);
+  offset += data.products.length;
+  document.getElementById('products').append(...data.products.map(card));
+  document.getElementById('view-more').hidden = !data.more;
+}
+document.getElementById('view-more').addEventListener('click', more);
+const gate = document.getElementById('age-gate');
+if (gate) document.getElementById('age-yes').addEventListener('click', () => gate.remove());
+more();
+"""
+
+_CURALEAF_STORE_SCRIPT = """
+const API = %(api)s;
+async function show(page) {
+  const root = document.getElementById('products');
+  root.replaceChildren();
+  const data = await getJSON(API + '?page=' + page);
+  root.append(...data.products.map(card));
+  const nav = document.getElementById('pager');
+  nav.replaceChildren();
+  for (let n = 1; n <= data.pages; n++) {
+    const b = document.createElement('button');
+    b.setAttribute('aria-label', 'Go to page ' + n);
+    b.textContent = n;
+    b.addEventListener('click', () => show(n));
+    nav.append(b);
+  }
+  const next = document.createElement('button');
+  next.setAttribute('aria-label', 'Next page');
+  next.textContent = 'Next';
+  next.disabled = page >= data.pages;
+  next.addEventListener('click', () => show(page + 1));
+  nav.append(next);
+}
+show(1);
+"""
+
+_CURALEAF_AGE_GATE_SCRIPT = """
+document.getElementById('enter').addEventListener('click', () => {
+  const state = document.getElementById('state').value;
+  if (!state) return;
+  document.cookie = 'age_verified=' + encodeURIComponent(state) + '; path=/';
+  location.href = %(returnurl)s;
+});
+"""
+
+
+def _page(title: str, body: str, script: str = "") -> str:
+    return _PAGE.format(title=title, body=body, card_js=_CARD_JS, script=script)
+
+
+def _dutchie_host(server: MockMenuServer, site: MockSite) -> str:
+    embed = f"http://{_DUTCHIE_EMBED_HOST}:{server.port}/embedded-menu/{site.slug}/specials"
+    gate = _AGE_GATE.format(label="I am 21 or older") if site.age_gate else ""
+    return _page(
+        f"{site.slug} | Menu",
+        f'<main id="menu-root"></main>{gate}',
+        _DUTCHIE_HOST_SCRIPT % {"embed": json.dumps(embed)},
+    )
+
+
+def _dutchie_embed(site: MockSite) -> str:
+    return _page(
+        "Dutchie embedded menu",
+        '<div id="products"></div><nav class="pagination" id="pager"></nav>',
+        _DUTCHIE_EMBED_SCRIPT % {"api": json.dumps(f"/api/menu/{site.slug}")},
+    )
+
+
+def _jane_menu(site: MockSite) -> str:
+    gate = _AGE_GATE.format(label="Yes") if site.age_gate else ""
+    return _page(
+        f"{site.slug} | Shop",
+        f'<div id="products"></div><button id="view-more" hidden>View More</button>{gate}',
+        _JANE_SCRIPT % {"api": "'/api/products'"},
+    )
+
+
+def _curaleaf_store(site: MockSite) -> str:
+    return _page(
+        f"Curaleaf {site.slug}",
+        '<div id="products" class="product-grid"></div><nav class="pagination" id="pager"></nav>',
+        _CURALEAF_STORE_SCRIPT % {"api": json.dumps(f"/api/stores/{site.slug}/products")},
+    )
+
+
+def _curaleaf_age_gate(returnurl: str) -> str:
+    options = "".join(f"<option>{s}</option>" for s in _STATES)
+    return _page(
+        "Curaleaf | Age verification",
+        '<form onsubmit="return false"><p>You must be 21 or older to enter. Select your state.</p>'
+        f'<select id="state" aria-label="state"><option value="">Select</option>{options}</select>'
+        '<button id="enter" type="submit">I\'m over 21</button></form>',
+        _CURALEAF_AGE_GATE_SCRIPT % {"returnurl": json.dumps(returnurl)},
+    )
+
+
+# =====================================================================
+# Server
+# =====================================================================
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _HTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        mock = self.server.mock
+        host = (self.headers.get("Host") or "").split(":")[0].lower()
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        mock.wait_latency()
+        try:
+            status, content_type, body, headers = mock.respond(
+                host, url.path, query, self.headers.get("Cookie") or "",
+            )
+        except KeyError:
+            status, content_type, body, headers = 404, "text/plain", "Not found", {}
+        if status == 0:  # hung API call: hold the request until shutdown
+            mock.stopping.wait(mock.hang_seconds)
+            status, content_type, body, headers = 504, "text/plain", "Gateway timeout", {}
+        payload = body.encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: MockMenuServer
+
+
+class MockMenuServer:
+    """Threaded HTTP server for a set of ``MockSite``s.
+
+    Use as a context manager, or ``start()`` / ``stop()``.  ``dispensaries()``
+    gives the dispensary configs pointing at it.
+    """
+
+    def __init__(
+        self,
+        sites: Iterable[MockSite],
+        *,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        crash_after: Iterable[int] = (),
+        on_crash: Callable[[], None] | None = None,
+        hang_seconds: float = 900.0,
+        seed: int = 0,
+    ) -> None:
+        self.sites = {s.slug: s for s in sites}
+        self.latency = latency
+        self.jitter = jitter
+        self.crash_after = sorted(crash_after)
+        self.on_crash = on_crash
+        self.hang_seconds = hang_seconds
+        self.stopping = threading.Event()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._catalogs: dict[str, list[dict[str, Any]]] = {}
+        self.requests = 0
+        self.store_loads = 0
+        self.crashes = 0
+        self.first_hit: dict[str, float] = {}
+        self.last_hit: dict[str, float] = {}
+        self.products_served: dict[str, int] = defaultdict(int)
+        self._httpd = _HTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.mock = self
+        self.port = self._httpd.server_address[1]
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> MockMenuServer:
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> MockMenuServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-menus", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # -- configs -----------------------------------------------------------
+
+    def site_url(self, site: MockSite) -> str:
+        if site.platform == "curaleaf":
+            return f"http://{_CURALEAF_HOST}:{self.port}/stores/{site.slug}"
+        return f"http://{site.slug}.localhost:{self.port}/menu"
+
+    def dispensaries(self, region: str = "southern-nv") -> list[dict[str, Any]]:
+        return [
+            {
+                "name": site.slug.replace("-", " ").title(),
+                "slug": site.slug,
+                "platform": site.platform,
+                "url": self.site_url(site),
+                "is_active": True,
+                "region": region,
+            }
+            for site in self.sites.values()
+        ]
+
+    def catalog(self, slug: str) -> list[dict[str, Any]]:
+        with self._lock:
+            catalog = self._catalogs.get(slug)
+        if catalog is None:
+            catalog = self.sites[slug].catalog()
+            with self._lock:
+                self._catalogs[slug] = catalog
+        return catalog
+
+    # -- request handling -------------------------------------------------
+
+    def wait_latency(self) -> None:
+        if self.latency or self.jitter:
+            with self._lock:
+                delay = self.latency + self._rng.uniform(0, self.jitter)
+            self.stopping.wait(delay)
+
+    def _hit(self, slug: str, *, store_page: bool = False) -> None:
+        now = time.time()
+        crash = False
+        with self._lock:
+            self.requests += 1
+            self.first_hit.setdefault(slug, now)
+            self.last_hit[slug] = now
+            if store_page:
+                self.store_loads += 1
+                if self.crashes < len(self.crash_after) and self.store_loads >= self.crash_after[self.crashes]:
+                    self.crashes += 1
+                    crash = True
+        if crash and self.on_crash is not None:
+            threading.Thread(target=self.on_crash, name="mock-crash", daemon=True).start()
+
+    def _api(self, site: MockSite, start: int, size: int) -> tuple[int, str, str, dict[str, str]]:
+        if site.hang:
+            return 0, "", "", {}
+        with self._lock:
+            failed = self._rng.random() < site.flaky
+        if failed:
+            return 500, "application/json", '{"error": "upstream"}', {}
+        catalog = self.catalog(site.slug)
+        products = catalog[start:start + size]
+        with self._lock:
+            self.products_served[site.slug] += len(products)
+        body = {
+            "products": products,
+            "pages": -(-len(catalog) // size),
+            "more": start + size < len(catalog),
+        }
+        return 200, "application/json", json.dumps(body), {}
+
+    def respond(
+        self,
+        host: str,
+        path: str,
+        query: dict[str, str],
+        cookies: str,
+    ) -> tuple[int, str, str, dict[str, str]]:
+        """``(status, content type, body, headers)``; status 0 means hang."""
+        parts = [p for p in path.split("/") if p]
+        if host == _DUTCHIE_EMBED_HOST:
+            if parts[:1] == ["embedded-menu"]:
+                site = self.sites[parts[1]]
+                self._hit(site.slug)
+                return 200, "text/html", _dutchie_embed(site), {}
+            if parts[:2] == ["api", "menu"]:
+                site = self.sites[parts[2]]
+                self._hit(site.slug)
+                size = PAGE_SIZES["dutchie"]
+                return self._api(site, (int(query.get("page", 1)) - 1) * size, size)
+            raise KeyError(path)
+
+        if host == _CURALEAF_HOST:
+            if parts[:1] == ["age-gate"]:
+                return 200, "text/html", _curaleaf_age_gate(query.get("returnurl", "/")), {}
+            if parts[:1] == ["stores"]:
+                site = self.sites[parts[1]]
+                self._hit(site.slug, store_page=True)
+                if site.down:
+                    return 503, "text/html", "<h1>503 Service Unavailable</h1>", {}
+                if site.age_gate and "age_verified=" not in cookies:
+                    return 302, "text/html", "", {"Location": f"/age-gate?returnurl={quote(path)}"}
+                return 200, "text/html", _curaleaf_store(site), {}
+            if parts[:1] == ["api"] and len(parts) >= 3:
+                site = self.sites[parts[2]]
+                self._hit(site.slug)
+                size = PAGE_SIZES["curaleaf"]
+                return self._api(site, (int(query.get("page", 1)) - 1) * size, size)
+            raise KeyError(path)
+
+        if not host.endswith(".localhost"):
+            raise KeyError(host)
+        site = self.sites[host[: -len(".localhost")]]
+        if parts == ["menu"]:
+            self._hit(site.slug, store_page=True)
+            if site.down:
+                return 503, "text/html", "<h1>503 Service Unavailable</h1>", {}
+            page = _dutchie_host(self, site) if site.platform == "dutchie" else _jane_menu(site)
+            return 200, "text/html", page, {}
+        if parts == ["api", "products"] and site.platform == "jane":
+            self._hit(site.slug)
+            return self._api(site, int(query.get("offset", 0)), PAGE_SIZES["jane"])
+        raise KeyError(path)
+
+    # -- reporting --------------------------------------------------------
+
+    def peak_concurrency(self) -> dict[str, int]:
+        """Most stores of each platform being served at once.
+
+        A store counts from its first request to its last, so this is
+        an upper bound on what the orchestrator had in flight.
+        """
+        events: dict[str, list[tuple[float, int]]] = defaultdict(list)
+        for slug, first in self.first_hit.items():
+            platform = self.sites[slug].platform
+            events[platform].append((first, 1))
+            events[platform].append((self.last_hit[slug], -1))
+        peaks = {}
+        for platform, points in events.items():
+            live = peak = 0
+            for _, delta in sorted(points, key=lambda e: (e[0], -e[1])):
+                live += delta
+                peak = max(peak, live)
+            peaks[platform] = peak
+        return peaks
@@ -0,0 +1,119 @@
+"""
+Single-pass brand matcher for ``CloudedLogic.detect_brand``.
+
+``detect_brand`` used to run one compiled regex per entry in ``BRANDS``
+(400+) plus one per brand variation, for every text it was given — and
+``_scrape_site_inner`` calls it up to five times per product.  This
+module replaces those scans with a character trie over the lowercased
+keys: one walk over the text finds every brand and variation with the
+position of its first match.
+
+Matches follow the regex semantics of ``_brand_pattern`` /
+``_variation_pattern`` exactly:
+  - keys starting with a word character need a ``\\b`` before them;
+    keys starting with anything else (``&Shine``) need ``^`` or a
+    whitespace character, and the match starts at that whitespace;
+  - every key needs a ``\\b`` after it (so ``Dazed!`` only matches when a
+    word character follows, just like the regex);
+  - only the first (leftmost) match of each key is reported.
+
+Texts that ``str.lower()`` would change in length, or that contain one
+of the four non-ASCII characters Python's ``re.IGNORECASE`` folds onto
+ASCII letters (U+0130, U+0131, U+017F, U+212A), are reported as
+unsupported so the caller can fall back to the regex scan.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Characters re.IGNORECASE matches against an ASCII letter although
+# str.lower() maps them elsewhere (found by brute force over Unicode).
+_SPECIAL_FOLDS = re.compile("[\u0130\u0131\u017f\u212a]")
+
+BRAND = 0
+VARIATION = 1
+
+
+class BrandAutomaton:
+    """Trie of brand / variation keys scanned in one pass per text.
+
+    Entries are reported in insertion order within their kind, which is
+    the order ``detect_brand`` used to evaluate its patterns — score ties
+    therefore resolve exactly as before.
+    """
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+        self._next_order = [0, 0]
+        self.size = 0
+
+    def add(self, key: str, name: str, kind: int = BRAND) -> None:
+        """Insert *key* (matched case-insensitively) reporting as *name*.
+
+        Safe to call after construction — ``load_approved_brands`` adds
+        new brands incrementally without rebuilding the trie.
+        """
+        if not key:
+            return
+        node = self._root
+        for ch in key.lower():
+            node = node.setdefault(ch, {})
+        space_prefixed = not key[0].isalnum() and key[0] != "_"
+        order = (kind, self._next_order[kind])
+        self._next_order[kind] += 1
+        # "" can never be a text character, so it marks terminal entries.
+        node.setdefault("", []).append((order, name, space_prefixed))
+        self.size += 1
+
+    def scan(self, text: str) -> list[tuple[tuple[int, int], str, int, int]] | None:
+        """Return ``[(order, name, pos, match_len), ...]`` sorted by order.
+
+        ``pos`` is where the equivalent regex match starts; ``match_len``
+        is the length of the matched text with surrounding whitespace
+        stripped.  Returns None when *text* needs the regex fallback.
+        """
+        lower = text.lower()
+        if len(lower) != len(text) or _SPECIAL_FOLDS.search(text):
+            return None
+        n = len(text)
+        word = [ch.isalnum() or ch == "_" for ch in text]
+        root = self._root
+        seen: set[tuple[int, int]] = set()
+        hits = []
+
+        for i in range(n):
+            # Every key needs a non-word character (or the start) before
+            # it: a \b for word-initial keys, whitespace for the others.
+            if i and word[i - 1]:
+                continue
+            node = root
+            j = i
+            while j < n:
+                node = node.get(lower[j])
+                if node is None:
+                    break
+                j += 1
+                entries = node.get("")
+                if not entries:
+                    continue
+                # Trailing \b between text[j-1] and text[j]
+                if word[j - 1] == (j < n and word[j]):
+                    continue
+                for order, name, space_prefixed in entries:
+                    if order in seen:
+                        continue
+                    if space_prefixed:
+                        if i == 0:
+                            pos = 0
+                        elif text[i - 1].isspace():
+                            pos = i - 1
+                        else:
+                            continue
+                    else:
+                        pos = i
+                    seen.add(order)
+                    hits.append((order, name, pos, len(text[i:j].strip())))
+
+        hits.sort()
+        return hits
@@ -31,6 +31,7 @@ from typing import Any
 from dotenv import load_dotenv
 
 from clouded_logic import BRANDS, BRANDS_LOWER, BRAND_ALIASES, fuzzy_brand_match
+from fuzzy_index import FuzzyIndex
 
 logger = logging.getLogger("brand_learner")
 
@@ -52,13 +53,16 @@ def _cluster_similar_names(names: list[str], threshold: float = 0.80) -> dict[st
     """
     clusters: dict[str, list[str]] = {}
     name_to_cluster: dict[str, str] = {}
+    # Canonicals in creation order; only those that can reach the
+    # threshold are scored (first match wins, as in a full scan).
+    index = FuzzyIndex()
 
     for name in sorted(names, key=len, reverse=True):
         name_lower = name.lower()
         matched_cluster = None
 
-        for canonical in clusters:
-            if SequenceMatcher(None, name_lower, canonical.lower()).ratio() >= threshold:
+        for canonical_lower, canonical, _ in index.candidates(name_lower, threshold):
+            if SequenceMatcher(None, name_lower, canonical_lower).ratio() >= threshold:
                 matched_cluster = canonical
                 break
 
@@ -68,6 +72,7 @@ def _cluster_similar_names(names: list[str], threshold: float = 0.80) -> dict[st
         else:
             clusters[name] = [name]
             name_to_cluster[name] = name
+            index.add(name_lower, name)
 
     return clusters
 
@@ -30,6 +30,9 @@ import re
 from difflib import SequenceMatcher
 from collections import defaultdict
 
+from brand_automaton import BRAND, VARIATION, BrandAutomaton
+from fuzzy_index import FuzzyIndex
+
 # ============================================================================
 # PRICE CAPS & GLOBAL RULES
 # ============================================================================
@@ -268,10 +271,13 @@ def load_approved_brands(db) -> int:
             continue
         name_lower = name.lower()
         if name_lower not in BRANDS_LOWER:
+            _brand_fuzzy_index().add(name_lower, name)
             BRANDS_LOWER[name_lower] = name
             BRANDS.append(name)
-            # Also add compiled regex pattern so detect_brand() works
+            # Also add compiled regex pattern + automaton entry so
+            # detect_brand() works
             _BRAND_PATTERNS[name] = _brand_pattern(name)
+            _BRAND_AUTOMATON.add(name, name, BRAND)
             added += 1
 
     if added:
@@ -311,9 +317,14 @@ def fuzzy_brand_match(candidate: str, threshold: float = _FUZZY_THRESHOLD) -> tu
     best_match = None
     best_score = 0.0
 
-    for brand_lower, brand_canonical in BRANDS_LOWER.items():
-        # Skip brands much shorter/longer than candidate (saves time)
-        if abs(len(brand_lower) - len(candidate_lower)) > max(3, len(candidate_lower) * 0.4):
+    # The index yields (in BRANDS_LOWER order) only brands whose ratio can
+    # reach the threshold, so ties resolve exactly as in a full scan.
+    # Skip brands much shorter/longer than candidate (saves time).
+    max_len_diff = max(3, len(candidate_lower) * 0.4)
+    for brand_lower, brand_canonical, bound in _brand_fuzzy_index().candidates(
+        candidate_lower, threshold, max_len_diff=max_len_diff,
+    ):
+        if bound <= best_score or BRANDS_LOWER.get(brand_lower) != brand_canonical:
             continue
         score = SequenceMatcher(None, candidate_lower, brand_lower).ratio()
         if score > best_score and score >= threshold:
@@ -323,6 +334,24 @@ def fuzzy_brand_match(candidate: str, threshold: float = _FUZZY_THRESHOLD) -> tu
     return best_match, best_score
 
 
+_BRAND_FUZZY_INDEX = FuzzyIndex()
+
+
+def _brand_fuzzy_index() -> FuzzyIndex:
+    """Return the fuzzy index over BRANDS_LOWER, rebuilt if it fell out of sync.
+
+    ``load_approved_brands`` appends to it directly; other code that adds
+    or removes BRANDS_LOWER entries (tests, ad-hoc scripts) triggers a
+    rebuild here.
+    """
+    global _BRAND_FUZZY_INDEX
+    if len(_BRAND_FUZZY_INDEX) != len(BRANDS_LOWER):
+        _BRAND_FUZZY_INDEX = FuzzyIndex()
+        for brand_lower, brand_canonical in BRANDS_LOWER.items():
+            _BRAND_FUZZY_INDEX.add(brand_lower, brand_canonical)
+    return _BRAND_FUZZY_INDEX
+
+
 # Pre-compile word-boundary regex for each brand (used in detect_brand)
 # Brands starting with non-word chars (like "&Shine") need special handling
 # since \b doesn't work before & — use (?:^|\s) instead.
@@ -531,11 +560,22 @@ def _variation_pattern(var: str) -> re.Pattern:
         return re.compile(r'(?:^|\s)' + escaped + r'\b', re.IGNORECASE)
     return re.compile(r'\b' + escaped + r'\b', re.IGNORECASE)
 
+_VARIATION_ITEMS = sorted(_BRAND_VARIATION_MAP.items(), key=lambda x: len(x[0]), reverse=True)
+
 _VARIATION_PATTERNS: list[tuple[re.Pattern, str]] = [
-    (_variation_pattern(var), canonical)
-    for var, canonical in sorted(_BRAND_VARIATION_MAP.items(), key=lambda x: len(x[0]), reverse=True)
+    (_variation_pattern(var), canonical) for var, canonical in _VARIATION_ITEMS
 ]
 
+# Single-pass matcher over every brand and variation (see brand_automaton).
+# Entries keep the order of BRANDS / _VARIATION_PATTERNS so scoring ties
+# resolve the same way as the per-pattern regex scan.
+_BRAND_AUTOMATON = BrandAutomaton()
+for _brand in BRANDS:
+    _BRAND_AUTOMATON.add(_brand, _brand, BRAND)
+for _var, _canonical in _VARIATION_ITEMS:
+    _BRAND_AUTOMATON.add(_var, _canonical, VARIATION)
+del _brand, _var, _canonical
+
 # ============================================================================
 # STRAIN NAMES THAT CONTAIN BRAND WORDS
 # ============================================================================
@@ -592,6 +632,35 @@ _STRAIN_BRAND_BLOCKERS = [
     (re.compile(r'\blab\s+(?:tested|results?|reports?|analysis|verified)\b', re.IGNORECASE), 'The Lab'),
 ]
 
+# Blockers grouped by the brand they block — detect_brand only evaluates
+# the patterns for brands that actually matched.
+_BLOCKERS_BY_BRAND: dict[str, list[re.Pattern]] = defaultdict(list)
+for _pattern, _blocked in _STRAIN_BRAND_BLOCKERS:
+    _BLOCKERS_BY_BRAND[_blocked].append(_pattern)
+_BLOCKERS_BY_BRAND = dict(_BLOCKERS_BY_BRAND)
+del _pattern, _blocked
+
+
+def _scan_brands_regex(text):
+    """Per-pattern regex scan with the same output as ``BrandAutomaton.scan``.
+
+    Fallback for the rare texts the automaton can't handle (case folds
+    that change string length); also the reference the automaton is
+    tested against.
+    """
+    hits = []
+    for i, brand in enumerate(BRANDS):
+        pat = _BRAND_PATTERNS.get(brand)
+        m = pat.search(text) if pat else None
+        if m:
+            hits.append(((BRAND, i), brand, m.start(), len(m.group(0).strip())))
+    for i, (var_pat, canonical) in enumerate(_VARIATION_PATTERNS):
+        m = var_pat.search(text)
+        if m:
+            hits.append(((VARIATION, i), canonical, m.start(), len(m.group(0).strip())))
+    return hits
+
+
 # ============================================================================
 # DISPENSARY CONFIGURATIONS (ALL 27)
 # ============================================================================
@@ -893,6 +962,90 @@ PRODUCT_SELECTORS = [
 ]
 
 
+# ============================================================================
+# CATEGORY RULE TABLES (compiled once, used by detect_category)
+# ============================================================================
+# Each keyword group is a single alternation: ``pattern.search(t)`` is
+# true exactly when ``any(k in t for k in group)`` is.  The lists stay
+# readable here; detect_category only ever sees the compiled patterns.
+# ============================================================================
+
+def _keyword_pattern(words):
+    """Compile *words* into one pattern that finds any of them as a substring."""
+    return re.compile('|'.join(re.escape(w) for w in words))
+
+
+_SKIP_KEYWORDS = (
+    'rso', 'tincture', 'topical', 'capsule', 'cbd only', 'merch',
+    'balm', 'salve', 'ointment', 'lotion', 'transdermal', 'patch',
+    'roll-on', 'roll on', 'liniment', 'suppository',
+    'hemp wrap', 'hemp wraps',
+)
+_DRINK_KEYWORDS = (
+    'drink', 'shot', 'elixir', 'mocktail', 'beverage',
+    'seltzer', 'sparkling', 'tonic', 'soda',
+)
+_PREROLL_KEYWORDS = ('preroll', 'pre-roll', 'joint', 'blunt', 'dogwalker')
+_CONCENTRATE_KEYWORDS = (
+    'badder', 'batter', 'budder', 'shatter', 'wax', 'sauce',
+    'diamonds', 'sugar', 'crumble', 'hash', 'rosin', 'dab',
+    'terp sauce', 'thca', 'crystals', 'isolate', 'live resin',
+    'cured resin', 'lr', 'cr', 'extract', 'nug run',
+)
+# These keywords are unambiguously concentrates even without weight.
+# NOTE: "live resin" / "cured resin" are NOT here because they also
+# appear in vape names ("Live Resin Cart").
+_UNAMBIGUOUS_CONCENTRATE = (
+    'badder', 'batter', 'budder', 'shatter', 'crumble', 'rosin',
+    'diamonds', 'nug run',
+)
+_CONCENTRATE_WEIGHTS = ('.5g', '1g', '1.0g', '2g', '0.5g', '0.3g', '0.35g', '0.85g', '0.9g')
+_EDIBLE_KEYWORDS = (
+    'gummies', 'gummy', 'gummes', 'gummis',
+    'chocolate', 'candy', 'brownie',
+    'chews', 'chew', 'taffy', 'lozenge', 'lozenges',
+    'drops', 'tarts', 'bites', 'pieces', 'mints',
+    'caramel', 'truffles', 'truffle', 'syrup',
+    'pastille', 'pastilles', 'bonbon', 'bon bon',
+)
+_FLOWER_KEYWORDS = ('flower', 'bud', 'eighth', 'quarter', 'half', 'ounce', 'smalls', 'popcorn', 'shake')
+
+_SKIP_RE = _keyword_pattern(_SKIP_KEYWORDS)
+_CONE_RE = re.compile(r'\bcones?\b')
+_CONE_INFUSED_RE = re.compile(r'\b(infused|thc|live resin)\b')
+# Cone accessory signals: size ("1 1/4", king size, slim), paper brand
+# (RAW/Elements/...), or a pack count ("6 pack", "3pk").
+_CONE_ACCESSORY_RE = re.compile(
+    r'\b1\s*1/4\b|\b1\.25\b|\bking\s*size\b|\bslim\b'
+    r'|\b(raw|elements|ocb|zig.?zag|hemper|pop cones?)\b'
+    r'|\d+\s*-?\s*pack\b|\d+\s*pk\b'
+)
+_CREAM_RATIO_RE = re.compile(r'\bcream\b.*\d+:\d+')
+_DRINK_RE = _keyword_pattern(_DRINK_KEYWORDS)
+# Preroll keywords, "PR" / "PR's" / "PRs" abbreviations and "Xg/Npk" packs
+# (written as in product_classifier._PACK_INDICATORS)
+_PREROLL_RE = re.compile(
+    _keyword_pattern(_PREROLL_KEYWORDS).pattern
+    + r"|(?i:\bpr'?s?\b)"
+    + r'|(?<!\d)\d+(?:\.\d*)?\s*g\s*/\s*\d+\s*pk\b'
+)
+_CONCENTRATE_RE = _keyword_pattern(_CONCENTRATE_KEYWORDS)
+_UNAMBIGUOUS_CONCENTRATE_RE = _keyword_pattern(_UNAMBIGUOUS_CONCENTRATE)
+# Concentrate weights, or a fractional oz ("1/8", "1/4 oz")
+_CONCENTRATE_WEIGHT_RE = re.compile(
+    _keyword_pattern(_CONCENTRATE_WEIGHTS).pattern + r'|\b1/[248]\s*(?:oz)?\b'
+)
+_VAPE_KEYWORD_RE = re.compile(
+    r'\b(cart|cartridge|pod|disposable|vape|pen|all[- ]?in[- ]?one|aio|ready[- ]?to[- ]?use)\b'
+)
+_FLOWER_WEIGHT_RE = re.compile(r'\b(3\.5|7|14|28)\s*g\b')
+_EDIBLE_RE = _keyword_pattern(_EDIBLE_KEYWORDS)
+_FLOWER_RE = _keyword_pattern(_FLOWER_KEYWORDS)
+_EDIBLE_WORD_RE = re.compile(r'\b(?:bars?|mints?|chew|tabs?|tablets?|blocks?|cookies?|honey)\b')
+_MG_RE = re.compile(r'\b\d+\s*mg\b')
+_SUBGRAM_RE = re.compile(r'\b0\.[5-9]\s*g\b')
+
+
 # ============================================================================
 # CORE LOGIC CLASS
 # ============================================================================
@@ -919,54 +1072,42 @@ class CloudedLogic:
     # ────────────────────────────────────────────────────────────────
 
     def detect_category(self, text):
-        """Detect product category from raw text. Order is critical."""
+        """Detect product category from raw text. Order is critical.
+
+        Every rule is a precompiled pattern from the CATEGORY RULE TABLES
+        above, evaluated in the order listed.
+        """
         if not text:
             return 'other'
         t = text.lower()
 
         # 1. SKIP non-qualifying products
-        skip_keywords = [
-            'rso', 'tincture', 'topical', 'capsule', 'cbd only', 'merch',
-            'balm', 'salve', 'ointment', 'lotion', 'transdermal', 'patch',
-            'roll-on', 'roll on', 'liniment', 'suppository',
-            'hemp wrap', 'hemp wraps',
-        ]
-        if any(s in t for s in skip_keywords):
+        if _SKIP_RE.search(t):
             return 'skip'
 
         # Rolling-paper cones are accessories, not cannabis prerolls.
         # Match "cone" / "cones" only when NOT preceded by infused/thc
         # indicators (infused cones ARE cannabis products).
-        if re.search(r'\bcones?\b', t) and not re.search(r'\b(infused|thc|live resin)\b', t):
-            # Only skip if the name looks like a cone accessory
-            # (has size like "1 1/4", brand like RAW/Elements, or "pack"/"pk")
-            if (re.search(r'\b1\s*1/4\b|\b1\.25\b|\bking\s*size\b|\bslim\b', t)
-                    or re.search(r'\b(raw|elements|ocb|zig.?zag|hemper|pop cones?)\b', t)
-                    or re.search(r'\d+\s*-?\s*pack\b|\d+\s*pk\b', t)):
-                return 'skip'
+        # Only skip if the name looks like a cone accessory
+        # (has size like "1 1/4", brand like RAW/Elements, or "pack"/"pk")
+        if _CONE_RE.search(t) and not _CONE_INFUSED_RE.search(t) and _CONE_ACCESSORY_RE.search(t):
+            return 'skip'
 
         # Topical cream detection: "cream" + CBD:THC ratio (e.g. "Cream 3:1")
         # This catches products like "Medizin Cream 3:1 (125mg)" which are
         # topical ointments, NOT flower/edible.  Plain "cream" alone is too
         # broad (Ice Cream Cake is a popular strain).
-        if 'cream' in t and re.search(r'\bcream\b.*\d+:\d+', t):
+        if 'cream' in t and _CREAM_RATIO_RE.search(t):
             return 'skip'
 
         # 2. DRINKS → edible (check early, before preroll "shot" overlap)
-        drink_keywords = ['drink', 'shot', 'elixir', 'mocktail', 'beverage',
-                          'seltzer', 'sparkling', 'tonic', 'soda']
-        if any(w in t for w in drink_keywords):
+        if _DRINK_RE.search(t):
             return 'edible'
 
         # 3. PREROLL (check before concentrate - infused prerolls have resin keywords)
-        preroll_keywords = ['preroll', 'pre-roll', 'joint', 'blunt', 'dogwalker']
-        if any(w in t for w in preroll_keywords):
-            return 'preroll'
-        # "PR" / "PR's" / "PRs" is a common abbreviation for pre-rolls
-        if re.search(r"\bpr'?s?\b", t, re.IGNORECASE):
-            return 'preroll'
-        # "Xg/Npk" pattern (e.g. "2g/4pk", "2.5g/5pk") = preroll pack
-        if re.search(r'\d+\.?\d*\s*g\s*/\s*\d+\s*pk\b', t):
+        # Includes "PR" / "PR's" / "PRs" (a common abbreviation for
+        # pre-rolls) and "Xg/Npk" (e.g. "2g/4pk", "2.5g/5pk") preroll packs.
+        if _PREROLL_RE.search(t):
             return 'preroll'
 
         # 4. CONCENTRATE (requires keyword; weight strongly preferred but
@@ -974,28 +1115,9 @@ class CloudedLogic:
         #    without weight — the deal detector still validates weight later)
         # IMPORTANT: If the product also has vape keywords (cart, pod, etc.),
         # it's a vape — not a concentrate.  "Live Resin Cart 0.5g" = vape.
-        concentrate_keywords = [
-            'badder', 'batter', 'budder', 'shatter', 'wax', 'sauce',
-            'diamonds', 'sugar', 'crumble', 'hash', 'rosin', 'dab',
-            'terp sauce', 'thca', 'crystals', 'isolate', 'live resin',
-            'cured resin', 'lr', 'cr', 'extract', 'nug run',
-        ]
-        # These keywords are unambiguously concentrates even without weight.
-        # NOTE: "live resin" / "cured resin" are NOT here because they also
-        # appear in vape names ("Live Resin Cart").
-        _UNAMBIGUOUS_CONCENTRATE = {
-            'badder', 'batter', 'budder', 'shatter', 'crumble', 'rosin',
-            'diamonds', 'nug run',
-        }
-        vape_keywords_re = re.compile(r'\b(cart|cartridge|pod|disposable|vape|pen|all[- ]?in[- ]?one|aio|ready[- ]?to[- ]?use)\b')
-        has_concentrate = any(kw in t for kw in concentrate_keywords)
-        has_concentrate_weight = (
-            any(w in t for w in ['.5g', '1g', '1.0g', '2g', '0.5g', '0.3g', '0.35g', '0.85g', '0.9g'])
-            or bool(re.search(r'\b1/[248]\s*(?:oz)?\b', t))  # fractional oz
-        )
-        has_vape_keyword = bool(vape_keywords_re.search(t))
-        if has_concentrate and not has_vape_keyword:
-            if has_concentrate_weight or any(kw in t for kw in _UNAMBIGUOUS_CONCENTRATE):
+        has_vape_keyword = bool(_VAPE_KEYWORD_RE.search(t))
+        if not has_vape_keyword and _CONCENTRATE_RE.search(t):
+            if _CONCENTRATE_WEIGHT_RE.search(t) or _UNAMBIGUOUS_CONCENTRATE_RE.search(t):
                 self.stats['concentrates_found'] += 1
                 return 'concentrate'
 
@@ -1008,7 +1130,7 @@ class CloudedLogic:
         # EXCEPTION: If the product has explicit vape keywords (cart,
         # cartridge, pod, disposable), it's a vape even at 3.5g.
         # Example: "Trendi Cartridges 3.5g" should be vape, not flower.
-        if re.search(r'\b(3\.5|7|14|28)\s*g\b', t) and not has_vape_keyword:
+        if not has_vape_keyword and _FLOWER_WEIGHT_RE.search(t):
             return 'flower'
 
         # 6. VAPE
@@ -1018,37 +1140,30 @@ class CloudedLogic:
         # (hyphens, spaces, no separator) — same as the vape exclusion
         # in step 4.  Without this, "All In One 0.5g" falls through to
         # step 9 (weight-based inference) and gets classified as concentrate.
-        edible_keywords = ['gummies', 'gummy', 'gummes', 'gummis',
-                          'chocolate', 'candy', 'brownie',
-                          'chews', 'chew', 'taffy', 'lozenge', 'lozenges',
-                          'drops', 'tarts', 'bites', 'pieces', 'mints',
-                          'caramel', 'truffles', 'truffle', 'syrup',
-                          'pastille', 'pastilles', 'bonbon', 'bon bon']
-        if re.search(r'\b(cart|cartridge|pod|disposable|vape|pen|all[- ]?in[- ]?one|aio|ready[- ]?to[- ]?use)\b', t):
-            if not any(w in t for w in edible_keywords):
-                return 'vape'
+        has_edible_keyword = bool(_EDIBLE_RE.search(t))
+        if has_vape_keyword and not has_edible_keyword:
+            return 'vape'
 
         # 7. FLOWER by keyword
-        flower_keywords = ['flower', 'bud', 'eighth', 'quarter', 'half', 'ounce', 'smalls', 'popcorn', 'shake']
-        if any(w in t for w in flower_keywords):
+        if _FLOWER_RE.search(t):
             return 'flower'
 
         # 8. EDIBLE — expanded keywords including common product formats
-        if any(w in t for w in edible_keywords):
+        if has_edible_keyword:
             return 'edible'
         # Word-boundary match for short/ambiguous edible words.
         # These words appear in strain names ("Thin Mint", "Honey Boo Boo")
         # so we require a mg weight to confirm it's truly an edible.
-        if re.search(r'\b(?:bars?|mints?|chew|tabs?|tablets?|blocks?|cookies?|honey)\b', t):
-            if re.search(r'\b\d+\s*mg\b', t):
+        if _EDIBLE_WORD_RE.search(t):
+            if _MG_RE.search(t):
                 return 'edible'
 
         # 9. WEIGHT-BASED INFERENCE — last chance before "other"
         # Products with mg content (e.g. "100mg") are almost always edibles
-        if re.search(r'\b\d+\s*mg\b', t):
+        if _MG_RE.search(t):
             return 'edible'
         # Sub-gram weights without vape keywords → likely concentrate
-        if re.search(r'\b0\.[5-9]\s*g\b', t) and not has_vape_keyword:
+        if not has_vape_keyword and _SUBGRAM_RE.search(t):
             return 'concentrate'
 
         # 10. Other
@@ -1076,7 +1191,7 @@ class CloudedLogic:
         if not weight_str:
             return None
 
-        match = re.search(r'([\d.]+)\s*([gG]|[mM][gG])', str(weight_str))
+        match = re.search(r'(?<![\d.])([\d.]+)\s*([gG]|[mM][gG])', str(weight_str))
         if not match:
             return None
 
@@ -1209,46 +1324,51 @@ class CloudedLogic:
         if text_lower.startswith('none '):
             return None
 
-        # Check which brands are blocked by known strain-name patterns
-        blocked_brands = set()
-        for pattern, brand_to_block in _STRAIN_BRAND_BLOCKERS:
-            if pattern.search(text):
-                blocked_brands.add(brand_to_block)
-
+        # One pass over the text finds every brand / variation hit.
+        hits = _BRAND_AUTOMATON.scan(text)
+        if hits is None:
+            hits = _scan_brands_regex(text)
+
+        # Known strain-name patterns block the brand word they contain;
+        # only the blockers for brands that actually matched are run.
+        blocked_cache = {}
+
+        def is_blocked(brand):
+            if brand not in blocked_cache:
+                blocked_cache[brand] = any(
+                    p.search(text) for p in _BLOCKERS_BY_BRAND.get(brand, ())
+                )
+            return blocked_cache[brand]
+
+        # Score: longer brand name is better; brand at start gets bonus.
+        # Variations (full names, misspellings) compete with exact brand
+        # matches using the same scoring so that "Alternative Medical
+        # Association" (→ AMA, 35 chars) outscores "Runtz" (5 chars) when
+        # both appear in the same text.  A variation is skipped when its
+        # canonical brand already matched.
         found_brands = []
-        for brand in BRANDS:
-            if brand in blocked_brands:
-                continue
-            pat = _BRAND_PATTERNS[brand]
-            m = pat.search(text)
-            if m:
-                # Score: longer brand name is better; brand at start gets bonus
-                pos = m.start()
-                start_bonus = 100 if pos < 3 else (50 if pos < 10 else 0)
-                found_brands.append((brand, len(brand) + start_bonus))
-
-        # Also check brand variation patterns (full names, misspellings).
-        # These compete with exact brand matches using the same scoring
-        # so that "Alternative Medical Association" (→ AMA, 35 chars)
-        # outscores "Runtz" (5 chars) when both appear in the same text.
-        seen_canonicals = {b for b, _ in found_brands}
-        for var_pat, canonical in _VARIATION_PATTERNS:
-            if canonical in blocked_brands or canonical in seen_canonicals:
-                continue
-            m = var_pat.search(text)
-            if m:
-                pos = m.start()
-                start_bonus = 100 if pos < 3 else (50 if pos < 10 else 0)
+        seen_canonicals = set()
+        for (kind, _), name, pos, match_len in hits:
+            start_bonus = 100 if pos < 3 else (50 if pos < 10 else 0)
+            if kind == BRAND:
+                # Brands removed from the runtime lookups are ignored
+                if name not in _BRAND_PATTERNS or is_blocked(name):
+                    continue
+                found_brands.append((name, len(name) + start_bonus))
+                seen_canonicals.add(name)
+            else:
+                if name in seen_canonicals or is_blocked(name):
+                    continue
                 # Use the variation string length for scoring (longer = better)
-                found_brands.append((canonical, len(m.group(0).strip()) + start_bonus))
-                seen_canonicals.add(canonical)
+                found_brands.append((name, match_len + start_bonus))
+                seen_canonicals.add(name)
 
         if not found_brands:
             # Fallback: fuzzy match the first segment of the product name
             # (before dash/pipe), which is often the brand name.
-            candidate = re.split(r'\s*[-|–—]\s*', text, maxsplit=1)[0].strip()
+            candidate = re.split(r'[-|–—]', text, maxsplit=1)[0].strip()
             matched, score = fuzzy_brand_match(candidate)
-            if matched and matched not in blocked_brands:
+            if matched and not is_blocked(matched):
                 return BRAND_ALIASES.get(matched, matched)
             return None
 
@@ -1290,7 +1410,7 @@ class CloudedLogic:
         product = re.sub(r'(Indica|Sativa|Hybrid|Add to cart|Add to bag)', '', product, flags=re.IGNORECASE)
 
         # Strip marketing tier labels (e.g. STIIIZY "Black Label", "Gold Label")
-        product = re.sub(r'\s*\|\s*(Black|Gold|Silver|Blue|White|Red|Green|Purple|Diamond|Platinum)\s+Label\b', '', product, flags=re.IGNORECASE)
+        product = re.sub(r'(?<!\s)\s*\|\s*(Black|Gold|Silver|Blue|White|Red|Green|Purple|Diamond|Platinum)\s+Label\b', '', product, flags=re.IGNORECASE)
         product = re.sub(r'\b(Black|Gold|Silver|Platinum|Diamond)\s+Label\b', '', product, flags=re.IGNORECASE)
 
         # Strip "Prepack", "Whole Flower", "Flower Prepack" — marketing fluff
@@ -1479,7 +1599,7 @@ class CloudedLogic:
         thc_percent = None
         thc_mg = None
         if category == 'edible' and weight:
-            mg_match = re.search(r'(\d+\.?\d*)\s*mg', weight, re.IGNORECASE)
+            mg_match = re.search(r'(?<!\d)(\d+(?:\.\d*)?)\s*mg', weight, re.IGNORECASE)
             if mg_match:
                 thc_mg = float(mg_match.group(1))
         else:
@@ -10,23 +10,36 @@ Pipeline:
   3. **Quality gate** (``passes_quality_gate``) — rejects deals with
      incomplete/garbage data (missing name, strain-only names, missing
      weight for categories that need it).
-  4. **Similarity dedup** (``remove_similar_deals``) — prevents the same
-     brand+category from flooding a single dispensary's slots.
+  4. **Dedup** (``dedup_deals``) — prevents the same brand+category from
+     flooding a single dispensary's slots (``remove_similar_deals``) and
+     keeps one listing per product across a chain's locations
+     (``remove_cross_chain_duplicates``) and across the region
+     (``remove_global_name_duplicates``), in one grouping pass; near-
+     identical names optionally merge too (``near_duplicates``).
   5. **Top-200 selection** (``select_top_deals``) — stratified pick with
      brand, dispensary, and category diversity constraints.
 
 Only the ~200 deals returned by ``select_top_deals`` should have
 ``deal_score > 0`` and ``is_active = True`` in the database.
+
+``detect_deals`` runs steps 1 and 2 over the whole batch at once
+(``ProductColumns``, ``hard_filter_indices``, ``deal_scores``); the
+per-product functions above are the one-product case.
 """
 
 from __future__ import annotations
 
+import heapq
 import logging
+import os
 import re
 from collections import defaultdict
+from functools import lru_cache
 from itertools import cycle
 from typing import Any
 
+from near_duplicates import NearDuplicateIndex
+
 logger = logging.getLogger("deal_detector")
 
 # =====================================================================
@@ -517,6 +530,12 @@ MAX_DEALS_PER_CHAIN = 24  # was 16 — scaled for 300 feed
 # guarantees are applied as post-processing (Step 5e).
 ANCHOR_DISPENSARIES = {"td-gibson", "td-eastern", "td-decatur", "oasis"}
 
+# Near-duplicate dedup — optional MinHash/LSH layer after the exact dedup
+# passes (see ``near_duplicates``): same brand, category and weight with
+# names at least this Jaccard-similar keep only the best-scored listing.
+NEAR_DUPLICATE_DEDUP = os.getenv("NEAR_DUPLICATE_DEDUP", "false").lower() in ("1", "true", "yes")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
 # =====================================================================
 # Phase 4: Badge thresholds
 # =====================================================================
@@ -602,12 +621,21 @@ def load_dynamic_caps(db: Any) -> int:
     return len(_dynamic_caps)
 
 
-def _get_dynamic_cap(category: str, weight_value: float | None, region: str | None) -> float | None:
+def _get_dynamic_cap(
+    category: str,
+    weight_value: float | None,
+    region: str | None,
+    dynamic_caps: dict[tuple[str, str, str], float] | None = None,
+) -> float | None:
     """Look up a dynamic cap for the given product attributes.
 
-    Returns None if no dynamic cap exists (caller should fall back to hardcoded).
+    Reads *dynamic_caps* (a ``DetectionConfig``'s) when given, else the
+    caps ``load_dynamic_caps`` loaded.  Returns None if no dynamic cap
+    exists (caller should fall back to hardcoded).
     """
-    if not _dynamic_caps or not region:
+    if dynamic_caps is None:
+        dynamic_caps = _dynamic_caps
+    if not dynamic_caps or not region:
         return None
 
     # Determine weight tier from raw weight value
@@ -617,65 +645,129 @@ def _get_dynamic_cap(category: str, weight_value: float | None, region: str | No
         return None
 
     # Try exact region match first
-    cap = _dynamic_caps.get((region, category, wt))
+    cap = dynamic_caps.get((region, category, wt))
     if cap is not None:
         return cap
 
     # Try normalized state (e.g. "michigan-2" → "michigan")
     state = _get_state_region(region)
     if state and state != region:
-        cap = _dynamic_caps.get((state, category, wt))
+        cap = dynamic_caps.get((state, category, wt))
         if cap is not None:
             return cap
 
     return None
 
 
-def _get_caps_for_region(category: str, region: str | None) -> dict[str, float] | float | None:
+# DetectionConfig attribute → the module constant it defaults to.
+CONFIG_CONSTANTS: dict[str, str] = {
+    "price_caps": "CATEGORY_PRICE_CAPS",
+    "state_price_caps": "STATE_PRICE_CAP_OVERRIDES",
+    "brand_tiers": "BRAND_TIERS",
+    "hard_filters": "HARD_FILTERS",
+    "loose_qual_cap_multiplier": "_LOOSE_QUAL_CAP_MULTIPLIER",
+    "vape_subtype_price_floors": "VAPE_SUBTYPE_PRICE_FLOORS",
+    "vape_subtype_price_caps": "VAPE_SUBTYPE_PRICE_CAPS",
+    "category_min_discount": "CATEGORY_MIN_DISCOUNT",
+    "original_price_ceilings": "ORIGINAL_PRICE_CEILINGS",
+    "category_boost": "CATEGORY_BOOST",
+    "target_deal_count": "TARGET_DEAL_COUNT",
+    "min_products_for_guarantee": "MIN_PRODUCTS_FOR_GUARANTEE",
+    "guaranteed_deal_score_cap": "GUARANTEED_DEAL_SCORE_CAP",
+    "category_targets": "CATEGORY_TARGETS",
+    "max_same_brand_total": "MAX_SAME_BRAND_TOTAL",
+    "max_same_dispensary_total": "MAX_SAME_DISPENSARY_TOTAL",
+    "max_consecutive_same_category": "MAX_CONSECUTIVE_SAME_CATEGORY",
+    "max_consecutive_same_brand": "MAX_CONSECUTIVE_SAME_BRAND",
+    "max_same_brand_per_dispensary": "MAX_SAME_BRAND_PER_DISPENSARY",
+    "max_same_brand_per_category": "MAX_SAME_BRAND_PER_CATEGORY",
+    "max_unknown_brand_total": "MAX_UNKNOWN_BRAND_TOTAL",
+    "backfill_brand_total": "_BACKFILL_BRAND_TOTAL",
+    "backfill_brand_per_category": "_BACKFILL_BRAND_PER_CATEGORY",
+    "backfill_dispensary_total": "_BACKFILL_DISPENSARY_TOTAL",
+    "backfill_unknown_brand_total": "_BACKFILL_UNKNOWN_BRAND_TOTAL",
+    "backfill_threshold": "_BACKFILL_THRESHOLD",
+    "min_deals_per_dispensary": "MIN_DEALS_PER_DISPENSARY",
+    "max_disposables_per_chain": "MAX_DISPOSABLES_PER_CHAIN",
+    "max_deals_per_chain": "MAX_DEALS_PER_CHAIN",
+    "anchor_dispensaries": "ANCHOR_DISPENSARIES",
+    "near_duplicate_dedup": "NEAR_DUPLICATE_DEDUP",
+    "near_duplicate_threshold": "NEAR_DUPLICATE_THRESHOLD",
+}
+
+
+class DetectionConfig:
+    """Every tunable ``run_deal_detection`` reads: caps, filters, selection.
+
+    Built once and shared: a run only reads it, so one config can serve
+    concurrent runs in threads, and it pickles for worker processes.
+    Each attribute in ``CONFIG_CONSTANTS`` defaults to its module
+    constant as it is when the config is built (tables are shared, not
+    copied — replace one rather than editing it).  *dynamic_caps*
+    defaults to the caps loaded so far; a later ``load_dynamic_caps``
+    does not change an existing config.
+    """
+
+    __slots__ = ("dynamic_caps", *CONFIG_CONSTANTS)
+
+    def __init__(
+        self,
+        dynamic_caps: dict[tuple[str, str, str], float] | None = None,
+        **tunables: Any,
+    ) -> None:
+        unknown = sorted(set(tunables).difference(CONFIG_CONSTANTS))
+        if unknown:
+            raise TypeError(f"Unknown DetectionConfig tunable(s): {', '.join(unknown)}")
+        self.dynamic_caps = dict(_dynamic_caps if dynamic_caps is None else dynamic_caps)
+        defaults = globals()
+        for attr, constant in CONFIG_CONSTANTS.items():
+            setattr(self, attr, tunables[attr] if attr in tunables else defaults[constant])
+
+
+def _get_caps_for_region(
+    category: str,
+    region: str | None,
+    config: DetectionConfig,
+) -> dict[str, float] | float | None:
     """Return the price cap config for *category* in *region*.
 
-    Uses state-specific overrides when available, falling back to the
-    base NV-calibrated ``CATEGORY_PRICE_CAPS``.
+    Uses *config*'s state-specific overrides when available, falling
+    back to its base NV-calibrated price caps.
 
     Note: Dynamic caps are checked at a higher level (_get_dynamic_cap)
     and take priority when available. This function returns the hardcoded
     caps used as fallback.
     """
     state = _get_state_region(region)
-    if state and state in STATE_PRICE_CAP_OVERRIDES:
-        overrides = STATE_PRICE_CAP_OVERRIDES[state]
+    if state and state in config.state_price_caps:
+        overrides = config.state_price_caps[state]
         if category in overrides:
             return overrides[category]
-    return CATEGORY_PRICE_CAPS.get(category)
+    return config.price_caps.get(category)
 
 
-def _passes_price_cap(
-    sale_price: float,
+def _resolve_price_cap(
     category: str,
     weight_value: float | None,
-    region: str | None = None,
-    cap_multiplier: float = 1.0,
-) -> bool:
-    """Check whether *sale_price* is within the category price cap.
-
-    Extracted so it can be reused by both the full and loose filter paths.
-    When *region* is provided, state-specific cap overrides are applied.
-    When *cap_multiplier* > 1.0, all caps are scaled up (used for
-    Jane/Carrot/AIQ platforms where displayed prices are retail, not sale).
+    region: str | None,
+    config: DetectionConfig,
+) -> float:
+    """Return the sale-price cap for *category* / *weight_value* in *region*.
 
     Dynamic caps (from ml_price_caps table) take priority when available.
-    Falls back to hardcoded caps when dynamic caps aren't loaded or don't
-    cover this (region, category, weight_tier) combination.
+    Otherwise the hardcoded (state-overridden) cap: the exact weight tier,
+    else the largest tier at or below the weight, else the smallest tier.
+    Categories without a cap get $50.  All caps come from *config*.
     """
     # Try dynamic cap first (data-driven from enrichment snapshots)
-    dynamic = _get_dynamic_cap(category, weight_value, region)
+    dynamic = _get_dynamic_cap(category, weight_value, region, config.dynamic_caps)
     if dynamic is not None:
-        return sale_price <= dynamic * cap_multiplier
+        return dynamic
 
     # Fall back to hardcoded caps
-    caps = _get_caps_for_region(category, region)
+    caps = _get_caps_for_region(category, region, config)
     if caps is None:
-        return sale_price <= 50 * cap_multiplier
+        return 50
 
     if isinstance(caps, dict):
         sorted_keys = sorted(caps.keys(), key=lambda k: float(k))
@@ -685,186 +777,332 @@ def _passes_price_cap(
                 weight_str = str(int(float(weight_value)))
             cap = caps.get(weight_str)
             if cap is not None:
-                return sale_price <= cap * cap_multiplier
+                return cap
             wv = float(weight_value)
             best_cap = caps[sorted_keys[0]]
             for k in sorted_keys:
                 if float(k) <= wv:
                     best_cap = caps[k]
-            return sale_price <= best_cap * cap_multiplier
+            return best_cap
         else:
-            return sale_price <= caps[sorted_keys[0]] * cap_multiplier
+            return caps[sorted_keys[0]]
     else:
-        return sale_price <= caps * cap_multiplier
+        return caps
 
 
-def passes_hard_filters(product: dict[str, Any], region: str | None = None) -> bool:
-    """Return ``False`` if the product should be completely excluded.
+def _passes_price_cap(
+    sale_price: float,
+    category: str,
+    weight_value: float | None,
+    region: str | None = None,
+    cap_multiplier: float = 1.0,
+) -> bool:
+    """Check whether *sale_price* is within the category price cap.
 
-    Checks global price bounds, minimum discount, original price
-    presence, category-specific price caps, and non-cannabis keywords.
+    Extracted so it can be reused by both the full and loose filter paths.
+    When *region* is provided, state-specific cap overrides are applied.
+    When *cap_multiplier* > 1.0, all caps are scaled up (used for
+    Jane/Carrot/AIQ platforms where displayed prices are retail, not sale).
 
-    When *region* is provided, state-specific price cap overrides are
-    used instead of the NV-calibrated defaults.
+    Dynamic caps (from ml_price_caps table) take priority when available.
+    Falls back to hardcoded caps when dynamic caps aren't loaded or don't
+    cover this (region, category, weight_tier) combination.
+    """
+    cap = _resolve_price_cap(category, weight_value, region, DetectionConfig())
+    return sale_price <= cap * cap_multiplier
 
-    **Jane platform exception**: Jane sites do not display original
-    prices — only the current/deal price is available.  For Jane
-    products we use *loose* qualification: price cap + brand match
-    only, skipping discount and original-price checks.
 
-    Infused pre-rolls are now ALLOWED (they're popular products).
-    Preroll multi-packs are now ALLOWED with a $20 price cap.
+# =====================================================================
+# Columnar hard filters and scoring
+# =====================================================================
+#
+# ``detect_deals`` filters and scores a whole menu (or a whole region)
+# in one call.  ``ProductColumns`` reads each product dict once into
+# per-field lists, ``PriceCapTable`` resolves each distinct (region,
+# category, weight) cap once instead of once per product, and the
+# filter returns indices into the input list instead of copies.
+# ``passes_hard_filters``, ``failed_by_price_cap`` and
+# ``calculate_deal_score`` are the one-product case of the same code.
+
+_NON_CANNABIS_RE = re.compile("|".join(re.escape(k) for k in sorted(_NON_CANNABIS_KEYWORDS)))
+
+
+class ProductColumns:
+    """The fields hard filters and scoring read, one list per field.
+
+    Lists are aligned with the *products* passed in.  *region* applies
+    to every product; when it is not given each product's own
+    ``region`` is used.
     """
-    subtype = product.get("product_subtype")
 
-    # Exclude non-cannabis products (apparel, accessories, merch, etc.)
-    name_lower = (product.get("name") or "").lower()
-    raw_lower = (product.get("raw_text") or "").lower()
-    for keyword in _NON_CANNABIS_KEYWORDS:
-        if keyword in name_lower or keyword in raw_lower:
-            return False
+    def __init__(self, products: list[dict[str, Any]], region: str | None = None) -> None:
+        self.size = len(products)
+        self.name = [p.get("name") for p in products]
+        self.raw_text = [p.get("raw_text") for p in products]
+        self.sale_price = [p.get("sale_price") or p.get("current_price") or 0 for p in products]
+        self.original_price = [p.get("original_price") or 0 for p in products]
+        self.discount = [p.get("discount_percent") for p in products]
+        self.category = [p.get("category", "other") for p in products]
+        self.subtype = [p.get("product_subtype") for p in products]
+        self.weight_value = [p.get("weight_value") for p in products]
+        self.source_platform = [p.get("source_platform", "") for p in products]
+        self.brand = [p.get("brand") or "" for p in products]
+        self.region = [region or p.get("region") for p in products]
+
+
+class PriceCapTable:
+    """Sale-price caps resolved once per distinct lookup.
+
+    Keyed by (region, category, weight_value) for ``_resolve_price_cap``
+    and by (region, subtype) for the flat preroll subtype caps.  Build
+    one per batch.  Caps, and the hard-filter tunables, come from
+    *config*.
+    """
 
-    sale_price = product.get("sale_price") or product.get("current_price") or 0
-    original_price = product.get("original_price") or 0
-    discount = product.get("discount_percent")
-    category = product.get("category", "other")
-    weight_value = product.get("weight_value")
-    source_platform = product.get("source_platform", "")
+    def __init__(self, config: DetectionConfig) -> None:
+        self.config = config
+        self._caps: dict[tuple[Any, ...], float] = {}
+        self._subtype_caps: dict[tuple[Any, ...], float] = {}
 
-    # Use region from product if not passed explicitly (supports both
-    # per-product region tagging and caller-supplied region).
-    if not region:
-        region = product.get("region")
+    def cap(self, category: str, weight_value: float | None, region: str | None) -> float:
+        key = (region, category, weight_value)
+        cap = self._caps.get(key)
+        if cap is None:
+            cap = self._caps[key] = _resolve_price_cap(category, weight_value, region, self.config)
+        return cap
 
-    # --- Global price floor / ceiling (applies to ALL platforms) ---
-    if not sale_price or sale_price < HARD_FILTERS["min_price"]:
-        return False
-    if sale_price > HARD_FILTERS["max_price_absolute"]:
-        return False
+    def subtype_cap(self, subtype: str, region: str | None, default: float) -> float:
+        """Cap for ``infused_preroll`` / ``preroll_pack`` in *region*."""
+        key = (region, subtype)
+        cap = self._subtype_caps.get(key)
+        if cap is None:
+            caps = _get_caps_for_region(subtype, region, self.config)
+            if isinstance(caps, (int, float)):
+                cap = caps
+            else:
+                cap = self.config.price_caps.get(subtype, default)
+            self._subtype_caps[key] = cap
+        return cap
 
-    # --- Vape subtype price floors (catches listing errors) ---
-    # A $10 1g disposable is almost certainly a mislisted price when the
-    # real market floor is $20-22.  Reject vapes priced below believable
-    # minimums for their subtype and weight.  Applies to ALL platforms.
-    if category == "vape" and subtype in VAPE_SUBTYPE_PRICE_FLOORS:
-        floors = VAPE_SUBTYPE_PRICE_FLOORS[subtype]
-        try:
-            wv = float(weight_value) if weight_value else 0
-        except (ValueError, TypeError):
-            wv = 0
-        # ≤0.6g → half-gram floor; >0.6g → full-gram floor
-        floor = floors.get("1", 0) if wv > 0.6 else floors.get("0.5", 0)
-        if sale_price < floor:
-            return False
 
-    # --- Vape subtype price CAPS (catches non-deals by subtype) ---
-    # Disposable vapes should be cheaper than carts/pods.  Half-gram
-    # disposables cap at $15; full-gram (0.8g-1g) cap at $25.  Applies to ALL platforms.
-    if category == "vape" and subtype in VAPE_SUBTYPE_PRICE_CAPS:
-        caps = VAPE_SUBTYPE_PRICE_CAPS[subtype]
-        try:
-            wv = float(weight_value) if weight_value else 0
-        except (ValueError, TypeError):
-            wv = 0
-        # ≤0.6g → half-gram cap; >0.6g → full-gram cap.
-        # For disposables with unknown weight (wv=0), use the more permissive
-        # full-gram cap — the $15 half-gram cap is too tight as a fallback
-        # and silently kills most disposable vapes without weight in the name.
-        if wv > 0.6:
-            cap = caps.get("1", 0)
-        elif wv == 0 and subtype == "disposable":
-            cap = caps.get("1", 0)
-        else:
-            cap = caps.get("0.5", 0)
-        if cap and sale_price > cap:
-            return False
+def _vape_weight(weight_value: Any) -> float:
+    try:
+        return float(weight_value) if weight_value else 0
+    except (ValueError, TypeError):
+        return 0
 
-    # ------------------------------------------------------------------
-    # LOOSE QUALIFICATION — platforms without original price data
-    # Jane, Carrot, and AIQ do NOT display original prices — only the
-    # current/deal price.  We cannot calculate discount_percent, so we
-    # skip the discount and original-price checks.  Qualification is
-    # price cap only (with a 1.3x multiplier since the displayed price
-    # is the retail price, not a sale price).  Brand is NOT required
-    # here — many of these sites have unreliable brand extraction.
-    # Products with recognized brands score higher in Phase 2; brandless
-    # products get a lower score but aren't excluded.
-    # ------------------------------------------------------------------
-    if source_platform in ("jane", "carrot", "aiq"):
-        return _passes_price_cap(
-            sale_price, category, weight_value, region,
-            cap_multiplier=_LOOSE_QUAL_CAP_MULTIPLIER,
+
+def hard_filter_indices(
+    cols: ProductColumns,
+    caps: PriceCapTable | None = None,
+) -> list[int]:
+    """Return the indices of products that pass the hard filters, in order.
+
+    See ``passes_hard_filters`` for the rules.  Filter thresholds come
+    from the config of *caps* (default: a ``DetectionConfig()``).
+    """
+    if caps is None:
+        caps = PriceCapTable(DetectionConfig())
+    config = caps.config
+    blocked = _NON_CANNABIS_RE.search
+    hard_filters = config.hard_filters
+    min_price = hard_filters["min_price"]
+    max_price = hard_filters["max_price_absolute"]
+    max_discount = hard_filters["max_discount_percent"]
+    require_original = hard_filters["require_original_price"]
+    vape_floors = config.vape_subtype_price_floors
+    vape_caps = config.vape_subtype_price_caps
+    loose_multiplier = config.loose_qual_cap_multiplier
+
+    passed: list[int] = []
+    for i in range(cols.size):
+        # Exclude non-cannabis products (apparel, accessories, merch, etc.)
+        if blocked((cols.name[i] or "").lower()) or blocked((cols.raw_text[i] or "").lower()):
+            continue
+
+        sale_price = cols.sale_price[i]
+        original_price = cols.original_price[i]
+        discount = cols.discount[i]
+        category = cols.category[i]
+        subtype = cols.subtype[i]
+        weight_value = cols.weight_value[i]
+        region = cols.region[i]
+
+        # --- Global price floor / ceiling (applies to ALL platforms) ---
+        if not sale_price or sale_price < min_price:
+            continue
+        if sale_price > max_price:
+            continue
+
+        if category == "vape":
+            # --- Vape subtype price floors (catches listing errors) ---
+            # A $10 1g disposable is almost certainly a mislisted price when the
+            # real market floor is $20-22.  Reject vapes priced below believable
+            # minimums for their subtype and weight.  Applies to ALL platforms.
+            if subtype in vape_floors:
+                floors = vape_floors[subtype]
+                wv = _vape_weight(weight_value)
+                # ≤0.6g → half-gram floor; >0.6g → full-gram floor
+                floor = floors.get("1", 0) if wv > 0.6 else floors.get("0.5", 0)
+                if sale_price < floor:
+                    continue
+
+            # --- Vape subtype price CAPS (catches non-deals by subtype) ---
+            # Disposable vapes should be cheaper than carts/pods.  Half-gram
+            # disposables cap at $15; full-gram (0.8g-1g) cap at $25.  Applies to ALL platforms.
+            if subtype in vape_caps:
+                subtype_caps = vape_caps[subtype]
+                wv = _vape_weight(weight_value)
+                # ≤0.6g → half-gram cap; >0.6g → full-gram cap.
+                # For disposables with unknown weight (wv=0), use the more permissive
+                # full-gram cap — the $15 half-gram cap is too tight as a fallback
+                # and silently kills most disposable vapes without weight in the name.
+                if wv > 0.6:
+                    cap = subtype_caps.get("1", 0)
+                elif wv == 0 and subtype == "disposable":
+                    cap = subtype_caps.get("1", 0)
+                else:
+                    cap = subtype_caps.get("0.5", 0)
+                if cap and sale_price > cap:
+                    continue
+
+        # ------------------------------------------------------------------
+        # LOOSE QUALIFICATION — platforms without original price data
+        # Jane, Carrot, and AIQ do NOT display original prices — only the
+        # current/deal price.  We cannot calculate discount_percent, so we
+        # skip the discount and original-price checks.  Qualification is
+        # price cap only (with a 1.3x multiplier since the displayed price
+        # is the retail price, not a sale price).  Brand is NOT required
+        # here — many of these sites have unreliable brand extraction.
+        # Products with recognized brands score higher in Phase 2; brandless
+        # products get a lower score but aren't excluded.
+        # ------------------------------------------------------------------
+        if cols.source_platform[i] in ("jane", "carrot", "aiq"):
+            if sale_price <= caps.cap(category, weight_value, region) * loose_multiplier:
+                passed.append(i)
+            continue
+
+        # --- Standard filters (non-Jane platforms) ---
+        # Budget bypass: certain product types at accessible price points are
+        # genuine deals where the absolute price IS the value proposition.
+        is_budget_edible_preroll = (
+            category in ("edible", "preroll") and sale_price <= 10
+        )
+        is_budget_disposable = (
+            category == "vape"
+            and subtype == "disposable"
+            and sale_price <= 25
+        )
+        # Budget flower: cheap eighths (≤$15) are genuine steals where the
+        # absolute price is the value proposition.  The 15% discount minimum
+        # blocks many of these (e.g. $14→$12 = 14.3%) because dispensaries
+        # don't heavily mark down already-cheap product.
+        is_budget_flower = (
+            category == "flower" and sale_price <= 15
         )
 
-    # --- Standard filters (non-Jane platforms) ---
-    # Budget bypass: certain product types at accessible price points are
-    # genuine deals where the absolute price IS the value proposition.
-    is_budget_edible_preroll = (
-        category in ("edible", "preroll") and sale_price <= 10
-    )
-    is_budget_disposable = (
-        category == "vape"
-        and subtype == "disposable"
-        and sale_price <= 25
-    )
-    # Budget flower: cheap eighths (≤$15) are genuine steals where the
-    # absolute price is the value proposition.  The 15% discount minimum
-    # blocks many of these (e.g. $14→$12 = 14.3%) because dispensaries
-    # don't heavily mark down already-cheap product.
-    is_budget_flower = (
-        category == "flower" and sale_price <= 15
-    )
+        # Budget disposables (≤$25) skip discount AND original_price checks.
+        # Most Dutchie disposables only show a retail price without a was-price
+        # or meaningful discount.  The $25 price ceiling is a sufficient quality
+        # gate — the absolute price IS the value proposition.
+        if is_budget_disposable:
+            if sale_price <= caps.cap(category, weight_value, region):
+                passed.append(i)
+            continue
 
-    # Budget disposables (≤$25) skip discount AND original_price checks.
-    # Most Dutchie disposables only show a retail price without a was-price
-    # or meaningful discount.  The $25 price ceiling is a sufficient quality
-    # gate — the absolute price IS the value proposition.
-    if is_budget_disposable:
-        return _passes_price_cap(sale_price, category, weight_value, region)
-
-    # Budget edibles/prerolls/flower still require *any* discount (>0%) but
-    # bypass the full minimum discount floors.
-    if is_budget_edible_preroll or is_budget_flower:
-        min_disc = 1
-    else:
-        min_disc = CATEGORY_MIN_DISCOUNT.get(category, HARD_FILTERS["min_discount_percent"])
-    if discount is None or discount < min_disc:
-        return False
-    if discount > HARD_FILTERS["max_discount_percent"]:
-        return False  # fake discount / data error
+        # Budget edibles/prerolls/flower still require *any* discount (>0%) but
+        # bypass the full minimum discount floors.
+        if is_budget_edible_preroll or is_budget_flower:
+            min_disc = 1
+        else:
+            min_disc = config.category_min_discount.get(category, hard_filters["min_discount_percent"])
+        if discount is None or discount < min_disc:
+            continue
+        if discount > max_discount:
+            continue  # fake discount / data error
 
-    if HARD_FILTERS["require_original_price"]:
-        if not original_price or original_price <= sale_price:
-            return False
+        if require_original:
+            if not original_price or original_price <= sale_price:
+                continue
 
-    # Reject products with unreasonably high original prices — almost always
-    # a parsing artifact from bundle/promo text leaking into the price parser.
-    # Preroll packs use a higher ceiling ($50) than single prerolls ($30).
-    if category == "preroll" and subtype == "preroll_pack":
-        orig_ceiling = 50
-    else:
-        orig_ceiling = ORIGINAL_PRICE_CEILINGS.get(category)
-    if orig_ceiling and original_price > orig_ceiling:
-        return False
+        # Reject products with unreasonably high original prices — almost always
+        # a parsing artifact from bundle/promo text leaking into the price parser.
+        # Preroll packs use a higher ceiling ($50) than single prerolls ($30).
+        if category == "preroll" and subtype == "preroll_pack":
+            orig_ceiling = 50
+        else:
+            orig_ceiling = config.original_price_ceilings.get(category)
+        if orig_ceiling and original_price > orig_ceiling:
+            continue
+
+        # --- Category-specific price caps ---
+        # Preroll-specific: infused prerolls use a higher cap than regular flower
+        # prerolls.  Regular 1g flower prerolls should be $5-9 (never $10-12),
+        # but infused prerolls are premium products and legitimately cost more.
+        if category == "preroll" and subtype == "infused_preroll":
+            cap = caps.subtype_cap("infused_preroll", region, 15)
+        # Preroll packs use their own cap ($20) instead of the regular preroll cap ($9).
+        elif category == "preroll" and subtype == "preroll_pack":
+            cap = caps.subtype_cap("preroll_pack", region, 20)
+        else:
+            cap = caps.cap(category, weight_value, region)
+        if sale_price <= cap:
+            passed.append(i)
 
-    # --- Category-specific price caps ---
-    # Preroll-specific: infused prerolls use a higher cap than regular flower
-    # prerolls.  Regular 1g flower prerolls should be $5-9 (never $10-12),
-    # but infused prerolls are premium products and legitimately cost more.
-    if category == "preroll" and subtype == "infused_preroll":
-        infused_cap = _get_caps_for_region("infused_preroll", region)
-        if isinstance(infused_cap, (int, float)):
-            return sale_price <= infused_cap
-        return sale_price <= CATEGORY_PRICE_CAPS.get("infused_preroll", 15)
+    return passed
 
-    # Preroll packs use their own cap ($20) instead of the regular preroll cap ($9).
-    if category == "preroll" and subtype == "preroll_pack":
-        pack_cap = _get_caps_for_region("preroll_pack", region)
-        if isinstance(pack_cap, (int, float)):
-            return sale_price <= pack_cap
-        return sale_price <= CATEGORY_PRICE_CAPS.get("preroll_pack", 20)
 
-    return _passes_price_cap(sale_price, category, weight_value, region)
+def price_cap_failures(
+    cols: ProductColumns,
+    indices: list[int],
+    caps: PriceCapTable | None = None,
+) -> list[int]:
+    """Return those of *indices* whose product fails on the price cap alone.
+
+    See ``failed_by_price_cap``.
+    """
+    if caps is None:
+        caps = PriceCapTable(DetectionConfig())
+    min_price = caps.config.hard_filters["min_price"]
+    max_price = caps.config.hard_filters["max_price_absolute"]
+
+    failed: list[int] = []
+    for i in indices:
+        sale_price = cols.sale_price[i]
+        if not sale_price or sale_price < min_price:
+            continue  # rejected by global floor, not price cap
+        if sale_price > max_price:
+            continue  # rejected by global ceiling, not price cap
+
+        if cols.category[i] == "preroll" and cols.subtype[i] == "infused_preroll":
+            cap = caps.subtype_cap("infused_preroll", cols.region[i], 15)
+        else:
+            cap = caps.cap(cols.category[i], cols.weight_value[i], cols.region[i])
+        if sale_price > cap:
+            failed.append(i)
+    return failed
+
+
+def passes_hard_filters(product: dict[str, Any], region: str | None = None) -> bool:
+    """Return ``False`` if the product should be completely excluded.
+
+    Checks global price bounds, minimum discount, original price
+    presence, category-specific price caps, and non-cannabis keywords.
+
+    When *region* is provided, state-specific price cap overrides are
+    used instead of the NV-calibrated defaults.  Otherwise the product's
+    own ``region`` is used (supports both per-product region tagging and
+    caller-supplied region).
+
+    **Jane platform exception**: Jane sites do not display original
+    prices — only the current/deal price is available.  For Jane
+    products we use *loose* qualification: price cap + brand match
+    only, skipping discount and original-price checks.
+
+    Infused pre-rolls are now ALLOWED (they're popular products).
+    Preroll multi-packs are now ALLOWED with a $20 price cap.
+    """
+    return bool(hard_filter_indices(ProductColumns([product], region)))
 
 
 def failed_by_price_cap(product: dict[str, Any], region: str | None = None) -> bool:
@@ -875,26 +1113,7 @@ def failed_by_price_cap(product: dict[str, Any], region: str | None = None) -> b
     are being rejected by price caps, which signals when state-specific
     caps need tuning.
     """
-    sale_price = product.get("sale_price") or product.get("current_price") or 0
-    category = product.get("category", "other")
-    weight_value = product.get("weight_value")
-    subtype = product.get("product_subtype")
-
-    if not region:
-        region = product.get("region")
-
-    if not sale_price or sale_price < HARD_FILTERS["min_price"]:
-        return False  # rejected by global floor, not price cap
-    if sale_price > HARD_FILTERS["max_price_absolute"]:
-        return False  # rejected by global ceiling, not price cap
-
-    if category == "preroll" and subtype == "infused_preroll":
-        infused_cap = _get_caps_for_region("infused_preroll", region)
-        if isinstance(infused_cap, (int, float)):
-            return sale_price > infused_cap
-        return sale_price > CATEGORY_PRICE_CAPS.get("infused_preroll", 15)
-
-    return not _passes_price_cap(sale_price, category, weight_value, region)
+    return bool(price_cap_failures(ProductColumns([product], region), [0]))
 
 
 # =====================================================================
@@ -1112,16 +1331,17 @@ def _score_unit_value(category: str, price: float, weight_value: float | None) -
     return 0
 
 
-def _score_brand(brand: str) -> int:
+def _score_brand(brand: str, brand_tiers: dict[str, dict[str, Any]] | None = None) -> int:
     """Score brand recognition. Up to 20 points.
 
     Premium hype brands = 20, popular known brands = 12, any brand = 5.
+    Tiers come from *brand_tiers* when given, else ``BRAND_TIERS``.
     """
     if not brand:
         return 0
 
     brand_lower = brand.lower()
-    for tier_data in BRAND_TIERS.values():
+    for tier_data in (BRAND_TIERS if brand_tiers is None else brand_tiers).values():
         if brand_lower in tier_data["brands"]:
             return tier_data["points"]
         # Prefix match for compound brand names (e.g. "Alien Labs Cannabis Co"
@@ -1188,25 +1408,17 @@ def _pick_disposable_price_leaders(
         else:
             large.append(d)
 
-    # Sort each tier by price ascending
-    for tier in (small, medium, large, unknown):
-        tier.sort(key=_price)
-
-    # Pick cheapest from each tier
+    # Pick cheapest from each tier (first listed wins price ties)
     leaders: list[dict] = []
     for tier in (small, medium, large):
         if tier:
-            leaders.append(tier[0])
+            leaders.append(min(tier, key=_price))
 
     # If we have fewer than 3 leaders, backfill from unknown or remaining
     if len(leaders) < 3:
         picked_ids = set(id(d) for d in leaders)
         remaining = [d for d in pool if id(d) not in picked_ids]
-        remaining.sort(key=_price)
-        for d in remaining:
-            if len(leaders) >= 3:
-                break
-            leaders.append(d)
+        leaders.extend(heapq.nsmallest(3 - len(leaders), remaining, key=_price))
 
     # Sort final leaders by price ascending
     leaders.sort(key=_price)
@@ -1259,24 +1471,17 @@ def _pick_flower_price_leaders(
         else:
             oz.append(d)
 
-    for tier in (eighth, quarter, half, oz, unknown):
-        tier.sort(key=_price)
-
-    # Pick cheapest from each tier
+    # Pick cheapest from each tier (first listed wins price ties)
     leaders: list[dict] = []
     for tier in (eighth, quarter, half, oz):
         if tier:
-            leaders.append(tier[0])
+            leaders.append(min(tier, key=_price))
 
     # Backfill from remaining pool if fewer than 4 tiers have inventory
     if len(leaders) < 4:
         picked_ids = set(id(d) for d in leaders)
         remaining = [d for d in pool if id(d) not in picked_ids]
-        remaining.sort(key=_price)
-        for d in remaining:
-            if len(leaders) >= 4:
-                break
-            leaders.append(d)
+        leaders.extend(heapq.nsmallest(4 - len(leaders), remaining, key=_price))
 
     leaders.sort(key=_price)
     return leaders
@@ -1319,23 +1524,16 @@ def _pick_vape_price_leaders(
         else:
             full.append(d)
 
-    for tier in (half, full, unknown):
-        tier.sort(key=_price)
-
     leaders: list[dict] = []
     for tier in (half, full):
         if tier:
-            leaders.append(tier[0])
+            leaders.append(min(tier, key=_price))
 
     # Backfill from remaining if fewer than 2 tiers have inventory
     if len(leaders) < 2:
         picked_ids = set(id(d) for d in leaders)
         remaining = [d for d in pool if id(d) not in picked_ids]
-        remaining.sort(key=_price)
-        for d in remaining:
-            if len(leaders) >= 2:
-                break
-            leaders.append(d)
+        leaders.extend(heapq.nsmallest(2 - len(leaders), remaining, key=_price))
 
     leaders.sort(key=_price)
     return leaders
@@ -1365,16 +1563,29 @@ def _pick_subtype_leaders(
 
     leaders: list[dict[str, Any]] = []
     for subtype_deals in by_subtype.values():
-        subtype_deals.sort(key=_price)
-        leaders.append(subtype_deals[0])
+        leaders.append(min(subtype_deals, key=_price))
 
     leaders.sort(key=_price)
     return leaders
 
 
+def _scored_copy(product: dict[str, Any], score: int, guaranteed: bool = False) -> dict[str, Any]:
+    """Shallow copy of *product* with ``deal_score`` set.
+
+    Uses the product's own ``copy`` so a ``ProductRecord`` stays a
+    record (sharing its field values) rather than becoming a dict.
+    """
+    scored = product.copy()
+    scored["deal_score"] = score
+    if guaranteed:
+        scored["_guaranteed"] = True
+    return scored
+
+
 def _pick_guaranteed_deals(
     products: list[dict[str, Any]],
     max_picks: int = 1,
+    config: DetectionConfig | None = None,
 ) -> list[dict[str, Any]]:
     """Pick the best available product(s) when the normal pipeline yields 0.
 
@@ -1383,14 +1594,20 @@ def _pick_guaranteed_deals(
     whose products don't match the brand detection database.
 
     Returns up to *max_picks* products with a capped ``deal_score``.
+    Price bounds, brand tiers and the score cap come from *config*.
     """
+    if config is None:
+        config = DetectionConfig()
+    min_price = config.hard_filters["min_price"]
+    max_price = config.hard_filters["max_price_absolute"]
+    score_cap = config.guaranteed_deal_score_cap
     candidates: list[tuple[int, dict[str, Any]]] = []
 
     for p in products:
         sale_price = p.get("sale_price") or p.get("current_price") or 0
-        if not sale_price or sale_price < HARD_FILTERS["min_price"]:
+        if not sale_price or sale_price < min_price:
             continue
-        if sale_price > HARD_FILTERS["max_price_absolute"]:
+        if sale_price > max_price:
             continue
 
         name = p.get("name") or ""
@@ -1406,7 +1623,7 @@ def _pick_guaranteed_deals(
         # Simplified scoring: brand + price attractiveness + category
         score = 0
         brand = p.get("brand") or ""
-        score += _score_brand(brand)
+        score += _score_brand(brand, config.brand_tiers)
 
         if 8 <= sale_price <= 15:
             score += 12
@@ -1418,7 +1635,7 @@ def _pick_guaranteed_deals(
             score += 6
 
         category = p.get("category", "other")
-        score += CATEGORY_BOOST.get(category, 3)
+        score += config.category_boost.get(category, 3)
 
         score = max(score, 15)
         candidates.append((score, p))
@@ -1437,8 +1654,8 @@ def _pick_guaranteed_deals(
             break
         cat = p.get("category", "other")
         if cat not in seen_categories:
-            capped = min(raw_score, GUARANTEED_DEAL_SCORE_CAP)
-            result.append({**p, "deal_score": capped, "_guaranteed": True})
+            capped = min(raw_score, score_cap)
+            result.append(_scored_copy(p, capped, guaranteed=True))
             seen_categories.add(cat)
 
     # Second pass: fill remaining slots by score
@@ -1447,12 +1664,115 @@ def _pick_guaranteed_deals(
             break
         deal_key = (p.get("name", ""), p.get("sale_price"))
         if deal_key not in {(r.get("name", ""), r.get("sale_price")) for r in result}:
-            capped = min(raw_score, GUARANTEED_DEAL_SCORE_CAP)
-            result.append({**p, "deal_score": capped, "_guaranteed": True})
+            capped = min(raw_score, score_cap)
+            result.append(_scored_copy(p, capped, guaranteed=True))
 
     return result
 
 
+def deal_scores(
+    cols: ProductColumns,
+    indices: list[int],
+    config: DetectionConfig | None = None,
+) -> list[int]:
+    """Return ``calculate_deal_score`` for each of *indices*, in order.
+
+    Brand points are looked up once per distinct brand, in *config*'s
+    brand tiers; category boosts also come from *config* (default: a
+    ``DetectionConfig()``).
+    """
+    if config is None:
+        config = DetectionConfig()
+    brand_tiers = config.brand_tiers
+    category_boost = config.category_boost
+    brand_points: dict[str, int] = {}
+    scores: list[int] = []
+    for i in indices:
+        score = 0
+        sale_price = cols.sale_price[i]
+        original_price = cols.original_price[i]
+        category = cols.category[i]
+
+        # Cap discount at 80% for scoring purposes.  Hard filter already
+        # rejects >85%, but values between 80-85% are almost always parsing
+        # artifacts.  Prevents inflated scores from slipping into top 20.
+        discount = min(cols.discount[i] or 0, 80)
+
+        # Platforms without original price / discount data (Jane, Carrot, AIQ).
+        # Give them a flat baseline so they can compete with other platforms on
+        # brand/value/category alone.  Non-loose platforms get up to 45 pts
+        # (35 discount depth + 10 dollars saved); 15 roughly equals a 20%
+        # discount — keeps these products visible without inflating the feed.
+        if cols.source_platform[i] in ("jane", "carrot", "aiq"):
+            score += 15  # baseline in lieu of discount depth + dollars saved
+        else:
+            # 1. DISCOUNT DEPTH (up to 35 points)
+            if discount >= 50:
+                score += 35
+            elif discount >= 40:
+                score += 28
+            elif discount >= 30:
+                score += 22
+            elif discount >= 25:
+                score += 17
+            elif discount >= 20:
+                score += 12
+            elif discount >= 15:
+                score += 7
+
+            # 2. DOLLARS SAVED (up to 10 points)
+            if original_price > 0 and original_price > sale_price:
+                saved = original_price - sale_price
+                score += min(10, int(saved / 2.5))
+
+        # 3. BRAND RECOGNITION (up to 20 points)
+        brand = cols.brand[i]
+        points = brand_points.get(brand)
+        if points is None:
+            points = brand_points[brand] = _score_brand(brand, brand_tiers)
+        score += points
+
+        # 4. UNIT VALUE (up to 15 points)
+        score += _score_unit_value(category, sale_price, cols.weight_value[i])
+
+        # 5. CATEGORY BOOST (up to 8 points)
+        score += category_boost.get(category, 3)
+
+        # 6. PRICE ATTRACTIVENESS (up to 15 points)
+        # Consumers love the lowest-priced deals — prioritize genuine steals.
+        # The $3-8 range gets the highest boost to ensure the cheapest real
+        # deals float to the top instead of being outscored by mid-priced items.
+        if 3 <= sale_price <= 8:
+            score += 15
+        elif 8 < sale_price <= 15:
+            score += 12
+        elif 15 < sale_price <= 25:
+            score += 8
+        elif 25 < sale_price <= 40:
+            score += 4
+
+        # 7. BUDGET DEAL BONUS (up to 5 points)
+        # Prerolls and edibles at $11 or less, and flower at $15 or less, are
+        # accessible price points that consumers actively seek out.  Give them a
+        # scoring boost so more appear in the feed instead of being outscored by
+        # higher-priced categories.
+        if (category in ("preroll", "edible") and sale_price <= 11) or (
+            category == "flower" and sale_price <= 15
+        ):
+            score += 5
+
+        # 8. DISPOSABLE BOOST (up to 12 points)
+        # Disposables are underrepresented because the raw inventory pool is
+        # dominated by 510 carts.  A 12pt boost helps disposables compete
+        # without making a mediocre disposable beat a great cart deal.
+        # 25% of users are exclusively disposable vape users — P0 retention.
+        if category == "vape" and cols.subtype[i] == "disposable":
+            score += 12
+
+        scores.append(min(100, score))
+    return scores
+
+
 def calculate_deal_score(product: dict[str, Any]) -> int:
     """Score a qualifying deal on a 0-100 scale.
 
@@ -1467,89 +1787,7 @@ def calculate_deal_score(product: dict[str, Any]) -> int:
       6. Price attractiveness  — up to 12 pts
       7. Budget deal bonus     — up to 5 pts (prerolls/edibles ≤$11, flower ≤$15)
     """
-    score = 0
-    discount = product.get("discount_percent") or 0
-    sale_price = product.get("sale_price") or product.get("current_price") or 0
-    original_price = product.get("original_price") or 0
-    category = product.get("category", "other")
-    weight_value = product.get("weight_value")
-    brand = product.get("brand") or ""
-
-    source_platform = product.get("source_platform", "")
-
-    # Cap discount at 80% for scoring purposes.  Hard filter already
-    # rejects >85%, but values between 80-85% are almost always parsing
-    # artifacts.  Prevents inflated scores from slipping into top 20.
-    discount = min(discount, 80)
-
-    # Platforms without original price / discount data (Jane, Carrot, AIQ).
-    # Give them a flat baseline so they can compete with other platforms on
-    # brand/value/category alone.  Non-loose platforms get up to 45 pts
-    # (35 discount depth + 10 dollars saved); 15 roughly equals a 20%
-    # discount — keeps these products visible without inflating the feed.
-    if source_platform in ("jane", "carrot", "aiq"):
-        score += 15  # baseline in lieu of discount depth + dollars saved
-    else:
-        # 1. DISCOUNT DEPTH (up to 35 points)
-        if discount >= 50:
-            score += 35
-        elif discount >= 40:
-            score += 28
-        elif discount >= 30:
-            score += 22
-        elif discount >= 25:
-            score += 17
-        elif discount >= 20:
-            score += 12
-        elif discount >= 15:
-            score += 7
-
-        # 2. DOLLARS SAVED (up to 10 points)
-        if original_price > 0 and original_price > sale_price:
-            saved = original_price - sale_price
-            score += min(10, int(saved / 2.5))
-
-    # 3. BRAND RECOGNITION (up to 20 points)
-    score += _score_brand(brand)
-
-    # 4. UNIT VALUE (up to 15 points)
-    score += _score_unit_value(category, sale_price, weight_value)
-
-    # 5. CATEGORY BOOST (up to 8 points)
-    score += CATEGORY_BOOST.get(category, 3)
-
-    # 6. PRICE ATTRACTIVENESS (up to 15 points)
-    # Consumers love the lowest-priced deals — prioritize genuine steals.
-    # The $3-8 range gets the highest boost to ensure the cheapest real
-    # deals float to the top instead of being outscored by mid-priced items.
-    if 3 <= sale_price <= 8:
-        score += 15
-    elif 8 < sale_price <= 15:
-        score += 12
-    elif 15 < sale_price <= 25:
-        score += 8
-    elif 25 < sale_price <= 40:
-        score += 4
-
-    # 7. BUDGET DEAL BONUS (up to 5 points)
-    # Prerolls and edibles at $11 or less, and flower at $15 or less, are
-    # accessible price points that consumers actively seek out.  Give them a
-    # scoring boost so more appear in the feed instead of being outscored by
-    # higher-priced categories.
-    if (category in ("preroll", "edible") and sale_price <= 11) or (
-        category == "flower" and sale_price <= 15
-    ):
-        score += 5
-
-    # 8. DISPOSABLE BOOST (up to 12 points)
-    # Disposables are underrepresented because the raw inventory pool is
-    # dominated by 510 carts.  A 12pt boost helps disposables compete
-    # without making a mediocre disposable beat a great cart deal.
-    # 25% of users are exclusively disposable vape users — P0 retention.
-    if category == "vape" and product.get("product_subtype") == "disposable":
-        score += 12
-
-    return min(100, score)
+    return deal_scores(ProductColumns([product]), [0])[0]
 
 
 # =====================================================================
@@ -1593,30 +1831,52 @@ def _weight_tier(deal: dict[str, Any]) -> str:
     return f"{cat}_default"
 
 
+_DEDUP_STRAIN_RE = re.compile(r'\b(?:indica|sativa|hybrid|indica-hybrid|sativa-hybrid)\b')
+_DEDUP_WEIGHT_PREFIX_RE = re.compile(r'^\.?\d+(?:\.\d*)?\s*g\s*\|\s*')
+_DEDUP_TYPE_WORD_RE = re.compile(r'\b(?:cartridge|cart|disposable|badder|pre-?roll|gummy|gummies)\b')
+_DEDUP_PUNCT_RE = re.compile(r'[^a-z0-9\s]')
+_DEDUP_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def _dedup_brand_re(brand: str) -> re.Pattern[str]:
+    return re.compile(r'\b' + re.escape(brand) + r'\b')
+
+
+@lru_cache(maxsize=65536)
 def _normalize_dedup_name(name: str, brand: str) -> str:
     """Normalize product name for dedup matching.
 
     Strips brand name, strain types, weight prefixes, punctuation, and
     whitespace so garbled variants match their clean counterparts.
     E.g. "CSF Cartridge Kobe Circle S Farms Indica-Hybrid" → "kobe"
+
+    Cached: the same product is listed at many dispensaries.
     """
-    import re
     n = (name or "").lower().strip()
     # Strip brand name from product name
     if brand:
-        n = re.sub(r'\b' + re.escape(brand.lower()) + r'\b', '', n)
+        n = _dedup_brand_re(brand.lower()).sub('', n)
     # Strip strain types
-    n = re.sub(r'\b(?:indica|sativa|hybrid|indica-hybrid|sativa-hybrid)\b', '', n)
+    n = _DEDUP_STRAIN_RE.sub('', n)
     # Strip weight prefixes: "3.5g |", "1g |"
-    n = re.sub(r'^\.?\d+\.?\d*\s*g\s*\|\s*', '', n)
+    n = _DEDUP_WEIGHT_PREFIX_RE.sub('', n)
     # Strip common product type words
-    n = re.sub(r'\b(?:cartridge|cart|disposable|badder|pre-?roll|gummy|gummies)\b', '', n)
+    n = _DEDUP_TYPE_WORD_RE.sub('', n)
     # Strip all punctuation, collapse whitespace
-    n = re.sub(r'[^a-z0-9\s]', '', n)
-    n = re.sub(r'\s+', ' ', n).strip()
+    n = _DEDUP_PUNCT_RE.sub('', n)
+    n = _DEDUP_SPACE_RE.sub(' ', n).strip()
     return n
 
 
+def _global_name_key(deal: dict[str, Any]) -> str:
+    """Normalized name + brand + category: one product across dispensaries."""
+    brand = (deal.get("brand") or "").lower()
+    cat = deal.get("category", "other")
+    norm_name = _normalize_dedup_name(deal.get("name", ""), brand)
+    return f"{norm_name}|{brand}|{cat}"
+
+
 def remove_global_name_duplicates(
     deals: list[dict[str, Any]],
 ) -> list[dict[str, Any]]:
@@ -1630,11 +1890,7 @@ def remove_global_name_duplicates(
     """
     groups: dict[str, list[dict[str, Any]]] = defaultdict(list)
     for deal in deals:
-        brand = (deal.get("brand") or "").lower()
-        cat = deal.get("category", "other")
-        norm_name = _normalize_dedup_name(deal.get("name", ""), brand)
-        key = f"{norm_name}|{brand}|{cat}"
-        groups[key].append(deal)
+        groups[_global_name_key(deal)].append(deal)
 
     result: list[dict[str, Any]] = []
     for group in groups.values():
@@ -1644,13 +1900,20 @@ def remove_global_name_duplicates(
     return result
 
 
-def remove_similar_deals(deals: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def remove_similar_deals(
+    deals: list[dict[str, Any]],
+    config: DetectionConfig | None = None,
+) -> list[dict[str, Any]]:
     """Keep at most MAX_SAME_BRAND_PER_DISPENSARY deals per
     brand+category from the same dispensary.
 
     Prevents "15 Stiiizy pods from Planet 13" dominating the feed.
-    Keeps the highest-scored entries from each group.
+    Keeps the highest-scored entries from each group.  The cap comes
+    from *config* (default: a ``DetectionConfig()``).
     """
+    if config is None:
+        config = DetectionConfig()
+    per_group = config.max_same_brand_per_dispensary
     groups: dict[str, list[dict[str, Any]]] = defaultdict(list)
     for deal in deals:
         brand = (deal.get("brand") or "unknown").lower()
@@ -1662,7 +1925,7 @@ def remove_similar_deals(deals: list[dict[str, Any]]) -> list[dict[str, Any]]:
     result: list[dict[str, Any]] = []
     for group in groups.values():
         group.sort(key=lambda d: d.get("deal_score", 0), reverse=True)
-        result.extend(group[:MAX_SAME_BRAND_PER_DISPENSARY])
+        result.extend(group[:per_group])
 
     return result
 
@@ -1715,72 +1978,266 @@ def remove_cross_chain_duplicates(
     return result
 
 
+def dedup_deals(
+    deals: list[dict[str, Any]],
+    near_duplicates: bool | None = None,
+    config: DetectionConfig | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Similarity, cross-chain and global name dedup in one grouping pass.
+
+    Returns exactly what ``remove_global_name_duplicates(
+    remove_cross_chain_duplicates(remove_similar_deals(deals)))`` does —
+    same deals, same order — and how many deals each policy removed,
+    as ``{"similar", "chain", "global", "near"}`` counts.
+
+    The three functions regroup and re-sort the whole list in turn.
+    Here each deal's score and keys are computed once, the deals are
+    ranked by score once, and each later policy runs over the winners of
+    the one before, ordered the way its input list would have been: a
+    group's place is the place of its first member, within-group ties go
+    to the earlier deal.  The normalized name is only computed for deals
+    that survive the first two policies.
+
+    With *near_duplicates* (default *config*'s ``near_duplicate_dedup``)
+    the survivors then go through a ``NearDuplicateIndex``, best score
+    first: a deal whose normalized name is ``near_duplicate_threshold``
+    similar to a better one with the same brand, category and weight is
+    dropped.  Caps come from *config* (default: a ``DetectionConfig()``).
+    """
+    if config is None:
+        config = DetectionConfig()
+    if near_duplicates is None:
+        near_duplicates = config.near_duplicate_dedup
+    per_group = config.max_same_brand_per_dispensary
+    n = len(deals)
+    scores = [d.get("deal_score", 0) for d in deals]
+
+    # Similarity: at most MAX_SAME_BRAND_PER_DISPENSARY per
+    # dispensary+brand+category, best scores first.  A group sits where
+    # its first deal was.
+    group_of: list[int] = []
+    group_ids: dict[str, int] = {}
+    for deal in deals:
+        brand = (deal.get("brand") or "unknown").lower()
+        key = f"{deal.get('dispensary_id') or ''}|{brand}|{deal.get('category', 'other')}"
+        group_of.append(group_ids.setdefault(key, len(group_ids)))
+    taken = [0] * len(group_ids)
+    kept: list[int] = []
+    for i in sorted(range(n), key=scores.__getitem__, reverse=True):
+        g = group_of[i]
+        if taken[g] < per_group:
+            taken[g] += 1
+            kept.append(i)
+    # Position each survivor would have in remove_similar_deals' output.
+    similar_pos = {i: (group_of[i], -scores[i], i) for i in kept}
+
+    # Cross-chain: best per chain+name+brand+category.
+    chain_best: dict[str, tuple] = {}
+    chain_first: dict[str, tuple] = {}
+    for i in kept:
+        deal = deals[i]
+        key = (
+            f"{_chain_prefix(deal.get('dispensary_id') or '')}|"
+            f"{(deal.get('name') or '').lower().strip()}|"
+            f"{(deal.get('brand') or '').lower()}|{deal.get('category', 'other')}"
+        )
+        pos = similar_pos[i]
+        rank = (-scores[i], pos, i)
+        best = chain_best.get(key)
+        if best is None:
+            chain_best[key] = rank
+            chain_first[key] = pos
+        else:
+            if rank < best:
+                chain_best[key] = rank
+            if pos < chain_first[key]:
+                chain_first[key] = pos
+
+    # Global name: best per normalized name+brand+category, over the
+    # cross-chain winners placed where their group was.
+    global_best: dict[str, tuple] = {}
+    global_first: dict[str, tuple] = {}
+    for key, (_, _, i) in chain_best.items():
+        name_key = _global_name_key(deals[i])
+        pos = chain_first[key]
+        rank = (-scores[i], pos, i)
+        best = global_best.get(name_key)
+        if best is None:
+            global_best[name_key] = rank
+            global_first[name_key] = pos
+        else:
+            if rank < best:
+                global_best[name_key] = rank
+            if pos < global_first[name_key]:
+                global_first[name_key] = pos
+
+    winners = sorted(global_best, key=global_first.__getitem__)
+    result = [deals[global_best[key][2]] for key in winners]
+    removed = {
+        "similar": n - len(kept),
+        "chain": len(kept) - len(chain_best),
+        "global": len(chain_best) - len(result),
+        "near": 0,
+    }
+
+    if near_duplicates and result:
+        index = NearDuplicateIndex(threshold=config.near_duplicate_threshold)
+        dropped: set[int] = set()
+        for pos in sorted(range(len(result)), key=lambda p: -scores[global_best[winners[p]][2]]):
+            deal = result[pos]
+            block = (
+                (deal.get("brand") or "").lower(),
+                deal.get("category", "other"),
+                deal.get("weight_value"),
+            )
+            # The global key starts with the normalized name.
+            if index.add(block, winners[pos].split("|", 1)[0], pos) is not None:
+                dropped.add(pos)
+        if dropped:
+            result = [d for pos, d in enumerate(result) if pos not in dropped]
+            removed["near"] = len(dropped)
+
+    return result, removed
+
+
 # =====================================================================
 # Phase 3: Top-200 Selection with Variety
 # =====================================================================
 
 
+class _SelectionIndex:
+    """Diversity counters and pool census for one ``select_top_deals`` call.
+
+    The passes of ``_pick_from_pools`` walk a category pool in order and
+    skip every deal whose brand was already picked in the pass, whose
+    weight tier is full, or whose brand, brand+category or dispensary
+    count has reached its cap.  All but the dispensary cap are
+    properties of the deal's brand or tier, and once one holds it holds
+    for the rest of the pass.  So each pass counts the brands and tiers
+    still open — from the census of distinct brands and tiers in each
+    pool, taken once — and stops as soon as none is, instead of walking
+    the rest of the pool only to skip it.  Picks are exactly those of a
+    full scan.
+
+    The counters and the (name, sale_price) keys already picked carry
+    over from the primary round to the backfill round.
+    """
+
+    def __init__(
+        self,
+        buckets: dict[str, list[dict[str, Any]]],
+        shapes: dict[str, set[tuple]],
+    ) -> None:
+        # *shapes* holds each pool's distinct (brand, category,
+        # weight_value) triples, collected while bucketing.  The passes
+        # read the pools from *buckets* itself, so Step 1 can reorder
+        # them after the index is built.
+        self.buckets = buckets
+        self.brands: dict[str, set[str]] = {}
+        self.tiers: dict[str, set[str]] = {}
+        for cat, triples in shapes.items():
+            self.brands[cat] = {b or "_unknown" for b, _, _ in triples}
+            # _weight_tier depends only on category and weight.
+            self.tiers[cat] = {
+                _weight_tier({"category": c, "weight_value": w})
+                for c, w in {(c, w) for _, c, w in triples}
+            }
+
+        self.brand_counts: dict[str, int] = {}
+        self.brand_cat_counts: dict[str, dict[str, int]] = defaultdict(dict)
+        self.dispensary_counts: dict[str, int] = defaultdict(int)
+        self.picked: set[tuple] = set()
+
+    def run_pass(
+        self,
+        cat: str,
+        slots: int,
+        picks: list[dict[str, Any]],
+        caps: tuple[int, int, int, int],
+        seen_brands: set[str] | None = None,
+        tier_limit: int = 0,
+    ) -> None:
+        """One pass over *cat*'s pool, appending to *picks* up to *slots*.
+
+        With *seen_brands*, brands in it are skipped and brands picked are
+        added; with *tier_limit*, at most that many picks per weight tier.
+        """
+        brand_cap, brand_cat_cap, dispensary_cap, unknown_cap = caps
+        brand_counts = self.brand_counts
+        cat_counts = self.brand_cat_counts[cat]
+        dispensary_counts = self.dispensary_counts
+        picked = self.picked
+
+        # Brands this pass skips outright.  Only brands picked before can
+        # be at a cap, so this starts from the counters, not the census.
+        closed = {brand for brand, n in brand_counts.items() if n >= brand_cap}
+        closed.update(brand for brand, n in cat_counts.items() if n >= brand_cat_cap)
+        if brand_counts.get("_unknown", 0) >= unknown_cap:
+            closed.add("_unknown")
+        if seen_brands:
+            closed |= seen_brands
+        open_brands = len(self.brands[cat] - closed)
+        open_tiers = len(self.tiers[cat]) if tier_limit else 1
+        tier_counts: dict[str, int] = defaultdict(int)
+        tier = ""
+        for deal in self.buckets[cat]:
+            if len(picks) >= slots or not open_brands or not open_tiers:
+                break
+            brand = deal.get("brand") or "_unknown"
+            if brand in closed:
+                continue
+            if tier_limit:
+                tier = _weight_tier(deal)
+                if tier_counts[tier] >= tier_limit:
+                    continue
+            disp_id = deal.get("dispensary_id") or ""
+            deal_key = (deal.get("name", ""), deal.get("sale_price"))
+            if dispensary_counts[disp_id] >= dispensary_cap or deal_key in picked:
+                continue
+            picked.add(deal_key)
+            dispensary_counts[disp_id] += 1
+            picks.append(deal)
+            n = brand_counts[brand] = brand_counts.get(brand, 0) + 1
+            m = cat_counts[brand] = cat_counts.get(brand, 0) + 1
+            if seen_brands is not None:
+                seen_brands.add(brand)
+            if (
+                seen_brands is not None
+                or n >= (unknown_cap if brand == "_unknown" else brand_cap)
+                or m >= brand_cat_cap
+            ):
+                closed.add(brand)
+                open_brands -= 1
+            if tier_limit:
+                tier_counts[tier] += 1
+                if tier_counts[tier] == tier_limit:
+                    open_tiers -= 1
+
+
 def _pick_from_pools(
-    buckets: dict[str, list[dict[str, Any]]],
+    index: _SelectionIndex,
     category_slots: dict[str, int],
     brand_cap: int,
     brand_cat_cap: int,
     dispensary_cap: int,
     unknown_cap: int,
-    already_picked: set[tuple] | None = None,
-    brand_counts: dict[str, int] | None = None,
-    brand_cat_counts: dict[str, int] | None = None,
-    dispensary_counts: dict[str, int] | None = None,
 ) -> dict[str, list[dict[str, Any]]]:
     """Pick deals from category pools with brand/dispensary diversity.
 
     Extracted so the same 3-pass logic can be reused in both the primary
     diversity round and the backfill round with different cap values.
-
-    ``already_picked`` is a set of (name, sale_price) keys for deals
-    already selected in a previous round — they will be skipped.
+    Brand, brand+category and dispensary counts, and the (name,
+    sale_price) keys already selected, live on *index* and carry over
+    from one round to the next — deals picked earlier are skipped.
     """
-    if brand_counts is None:
-        brand_counts = defaultdict(int)
-    if brand_cat_counts is None:
-        brand_cat_counts = defaultdict(int)
-    if dispensary_counts is None:
-        dispensary_counts = defaultdict(int)
-    if already_picked is None:
-        already_picked = set()
-
+    caps = (brand_cap, brand_cat_cap, dispensary_cap, unknown_cap)
     category_picks: dict[str, list[dict[str, Any]]] = {}
 
-    def _brand_key(deal: dict[str, Any]) -> str:
-        b = deal.get("brand")
-        return b if b else "_unknown"
-
     for cat, slots in category_slots.items():
-        pool = buckets.get(cat, [])
         picks: list[dict[str, Any]] = []
-        picked_set: set[int] = set()  # indices into pool
-
-        def _try_pick(deal: dict[str, Any], idx: int) -> bool:
-            deal_key = (deal.get("name", ""), deal.get("sale_price"))
-            if deal_key in already_picked:
-                return False
-            brand = _brand_key(deal)
-            disp_id = deal.get("dispensary_id") or ""
-            bc_key = f"{brand}|{cat}"
-            effective_cap = unknown_cap if brand == "_unknown" else brand_cap
-            if brand_counts[brand] >= effective_cap:
-                return False
-            if brand_cat_counts[bc_key] >= brand_cat_cap:
-                return False
-            if dispensary_counts[disp_id] >= dispensary_cap:
-                return False
-            brand_counts[brand] += 1
-            brand_cat_counts[bc_key] += 1
-            dispensary_counts[disp_id] += 1
-            picks.append(deal)
-            picked_set.add(idx)
-            already_picked.add(deal_key)
-            return True
+        category_picks[cat] = picks
+        if cat not in index.buckets:
+            continue
 
         # First pass: one deal per brand AND limited per weight tier.
         # For large categories (flower, 58 slots), allow up to 2 deals per
@@ -1788,77 +2245,59 @@ def _pick_from_pools(
         # sizes.  All other categories keep the original 1-per-tier limit.
         tier_limit = 2 if slots >= 40 else 1
         seen_brands: set[str] = set()
-        tier_counts: dict[str, int] = defaultdict(int)
-        for i, deal in enumerate(pool):
-            if len(picks) >= slots:
-                break
-            brand = _brand_key(deal)
-            tier = _weight_tier(deal)
-            if brand in seen_brands:
-                continue
-            if tier_counts[tier] >= tier_limit:
-                continue
-            if _try_pick(deal, i):
-                seen_brands.add(brand)
-                tier_counts[tier] += 1
+        index.run_pass(cat, slots, picks, caps, seen_brands=seen_brands, tier_limit=tier_limit)
 
         # Second pass: one per brand (allow repeat weight tiers)
-        if len(picks) < slots:
-            for i, deal in enumerate(pool):
-                if len(picks) >= slots:
-                    break
-                if i in picked_set:
-                    continue
-                brand = _brand_key(deal)
-                if brand in seen_brands:
-                    continue
-                if _try_pick(deal, i):
-                    seen_brands.add(brand)
+        index.run_pass(cat, slots, picks, caps, seen_brands=seen_brands)
 
         # Third pass: fill remaining slots (allow repeat brands)
-        if len(picks) < slots:
-            for i, deal in enumerate(pool):
-                if len(picks) >= slots:
-                    break
-                if i in picked_set:
-                    continue
-                _try_pick(deal, i)
-
-        category_picks[cat] = picks
+        index.run_pass(cat, slots, picks, caps)
 
     return category_picks
 
 
-def select_top_deals(
-    scored_deals: list[dict[str, Any]],
-) -> list[dict[str, Any]]:
-    """Select the best ~200 deals with category, brand, and dispensary diversity.
+def _selection_bucket(
+    deal: dict[str, Any],
+    category_targets: dict[str, int] = CATEGORY_TARGETS,
+) -> str:
+    """The *category_targets* bucket *deal* competes in."""
+    cat = deal.get("category", "other")
+    # Virtual category: disposable vapes get their own selection bucket
+    # so they receive dedicated slots instead of competing with carts/pods.
+    if cat == "vape" and deal.get("product_subtype") == "disposable":
+        return "disposable"
+    if cat not in category_targets:
+        return "other"
+    return cat
 
-    Uses a two-round approach:
-      Round 1 — tight diversity caps for a high-variety core selection.
-      Round 2 (backfill) — if round 1 filled < 85% of target, relax caps
-        and pick additional deals to fill empty slots.
 
-    ``scored_deals`` must already have ``deal_score`` set (from
-    ``calculate_deal_score``).  Returns a list of up to
-    ``TARGET_DEAL_COUNT`` deals ordered for display.
+def _select_category_picks(
+    scored_deals: list[dict[str, Any]],
+    config: DetectionConfig,
+) -> tuple[dict[str, list[dict[str, Any]]], int, int]:
+    """Steps 1–2 of ``select_top_deals``: per-category picks under the caps.
+
+    Returns ``(category_picks, target, round1_total)`` — the picks by
+    selection bucket, the feed size aimed for, and how many the first
+    (tight-cap) round filled before any backfill.  Targets and caps come
+    from *config*.
     """
-    if not scored_deals:
-        return []
-
+    category_targets = config.category_targets
     # ------------------------------------------------------------------
     # Step 1: Bucket by category, sorted by deal_score DESC within each
     # ------------------------------------------------------------------
     buckets: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    shapes: dict[str, set[tuple]] = defaultdict(set)
     for deal in scored_deals:
-        cat = deal.get("category", "other")
-        # Virtual category: disposable vapes get their own selection bucket
-        # so they receive dedicated slots instead of competing with carts/pods.
-        if cat == "vape" and deal.get("product_subtype") == "disposable":
-            cat = "disposable"
-        elif cat not in CATEGORY_TARGETS:
-            cat = "other"
-        buckets[cat].append(deal)
+        bucket = _selection_bucket(deal, category_targets)
+        buckets[bucket].append(deal)
+        brand, weight = deal.get("brand"), deal.get("weight_value")
+        try:
+            shapes[bucket].add((brand, deal.get("category", "other"), weight))
+        except TypeError:
+            # Unhashable weight: _weight_tier files it as no weight.
+            shapes[bucket].add((brand, deal.get("category", "other"), None))
+    index = _SelectionIndex(buckets, shapes)
 
     # Sort each category bucket: lowest-price steals first (top N per
     # category), then by deal_score for the rest.  This ensures the
@@ -1928,11 +2367,11 @@ def select_top_deals(
     # Step 2: Calculate category slot allocation
     # ------------------------------------------------------------------
     total_available = sum(len(v) for v in buckets.values())
-    target = min(TARGET_DEAL_COUNT, total_available)
+    target = min(config.target_deal_count, total_available)
 
     category_slots: dict[str, int] = {}
     remaining_slots = target
-    for cat, cat_target in CATEGORY_TARGETS.items():
+    for cat, cat_target in category_targets.items():
         pool_size = len(buckets.get(cat, []))
         slots = min(cat_target, pool_size)
         category_slots[cat] = slots
@@ -1944,12 +2383,12 @@ def select_top_deals(
     # (vape, edible, concentrate) could use.
     if remaining_slots > 0:
         # Priority 1: underfilled real categories (below their target)
-        for cat in sorted(buckets.keys(), key=lambda c: CATEGORY_TARGETS.get(c, 0), reverse=True):
+        for cat in sorted(buckets.keys(), key=lambda c: category_targets.get(c, 0), reverse=True):
             if cat == "other":
                 continue  # don't overflow into "other" — keep it tight
             pool_size = len(buckets.get(cat, []))
             current = category_slots.get(cat, 0)
-            cat_target = CATEGORY_TARGETS.get(cat, 10)
+            cat_target = category_targets.get(cat, 10)
             max_for_cat = int(cat_target * 1.5)
             can_add = min(pool_size - current, max_for_cat - current)
             if can_add > 0:
@@ -1963,7 +2402,7 @@ def select_top_deals(
             for cat in sorted(buckets.keys(), key=lambda c: len(buckets[c]), reverse=True):
                 pool_size = len(buckets.get(cat, []))
                 current = category_slots.get(cat, 0)
-                cat_target = CATEGORY_TARGETS.get(cat, 10)
+                cat_target = category_targets.get(cat, 10)
                 max_for_cat = int(cat_target * 1.5) if cat != "other" else cat_target
                 can_add = min(pool_size - current, max_for_cat - current)
                 if can_add > 0:
@@ -1981,32 +2420,23 @@ def select_top_deals(
     # When supply is abundant, use tight caps for maximum variety.
     supply_ratio = total_available / target if target > 0 else 1.0
     if supply_ratio < 1.5:
-        effective_brand_cap = min(10, MAX_SAME_BRAND_TOTAL + 3)
-        effective_brand_cat_cap = min(5, MAX_SAME_BRAND_PER_CATEGORY + 1)
+        effective_brand_cap = min(10, config.max_same_brand_total + 3)
+        effective_brand_cat_cap = min(5, config.max_same_brand_per_category + 1)
         logger.info(
             "Low supply (%.1fx target): relaxed brand caps %d→%d, cat caps %d→%d",
-            supply_ratio, MAX_SAME_BRAND_TOTAL, effective_brand_cap,
-            MAX_SAME_BRAND_PER_CATEGORY, effective_brand_cat_cap,
+            supply_ratio, config.max_same_brand_total, effective_brand_cap,
+            config.max_same_brand_per_category, effective_brand_cat_cap,
         )
     else:
-        effective_brand_cap = MAX_SAME_BRAND_TOTAL
-        effective_brand_cat_cap = MAX_SAME_BRAND_PER_CATEGORY
-
-    brand_counts: dict[str, int] = defaultdict(int)
-    brand_cat_counts: dict[str, int] = defaultdict(int)
-    dispensary_counts: dict[str, int] = defaultdict(int)
-    already_picked: set[tuple] = set()
+        effective_brand_cap = config.max_same_brand_total
+        effective_brand_cat_cap = config.max_same_brand_per_category
 
     category_picks = _pick_from_pools(
-        buckets, category_slots,
+        index, category_slots,
         brand_cap=effective_brand_cap,
         brand_cat_cap=effective_brand_cat_cap,
-        dispensary_cap=MAX_SAME_DISPENSARY_TOTAL,
-        unknown_cap=MAX_UNKNOWN_BRAND_TOTAL,
-        already_picked=already_picked,
-        brand_counts=brand_counts,
-        brand_cat_counts=brand_cat_counts,
-        dispensary_counts=dispensary_counts,
+        dispensary_cap=config.max_same_dispensary_total,
+        unknown_cap=config.max_unknown_brand_total,
     )
 
     round1_total = sum(len(v) for v in category_picks.values())
@@ -2014,7 +2444,7 @@ def select_top_deals(
     # ------------------------------------------------------------------
     # Step 2b: Round 2 (backfill) — relaxed caps if under-filled
     # ------------------------------------------------------------------
-    if round1_total < target * _BACKFILL_THRESHOLD:
+    if round1_total < target * config.backfill_threshold:
         # Calculate remaining slots per category
         backfill_slots: dict[str, int] = {}
         for cat in category_slots:
@@ -2026,15 +2456,11 @@ def select_top_deals(
             backfill_slots[cat] = min(remaining + 5, pool_remaining)
 
         backfill_picks = _pick_from_pools(
-            buckets, backfill_slots,
-            brand_cap=_BACKFILL_BRAND_TOTAL,
-            brand_cat_cap=_BACKFILL_BRAND_PER_CATEGORY,
-            dispensary_cap=_BACKFILL_DISPENSARY_TOTAL,
-            unknown_cap=_BACKFILL_UNKNOWN_BRAND_TOTAL,
-            already_picked=already_picked,
-            brand_counts=brand_counts,
-            brand_cat_counts=brand_cat_counts,
-            dispensary_counts=dispensary_counts,
+            index, backfill_slots,
+            brand_cap=config.backfill_brand_total,
+            brand_cat_cap=config.backfill_brand_per_category,
+            dispensary_cap=config.backfill_dispensary_total,
+            unknown_cap=config.backfill_unknown_brand_total,
         )
 
         # Merge backfill into category_picks
@@ -2048,13 +2474,44 @@ def select_top_deals(
             round1_total, round2_total, round1_total / target * 100, target,
         )
 
+    return category_picks, target, round1_total
+
+
+def select_top_deals(
+    scored_deals: list[dict[str, Any]],
+    config: DetectionConfig | None = None,
+) -> list[dict[str, Any]]:
+    """Select the best ~200 deals with category, brand, and dispensary diversity.
+
+    Uses a two-round approach:
+      Round 1 — tight diversity caps for a high-variety core selection.
+      Round 2 (backfill) — if round 1 filled < 85% of target, relax caps
+        and pick additional deals to fill empty slots.
+
+    ``scored_deals`` must already have ``deal_score`` set (from
+    ``calculate_deal_score``).  Returns a list of up to
+    ``TARGET_DEAL_COUNT`` deals ordered for display.  Targets and caps
+    come from *config* (default: a ``DetectionConfig()``).
+    """
+    if not scored_deals:
+        return []
+    if config is None:
+        config = DetectionConfig()
+
+    category_picks, target, round1_total = _select_category_picks(scored_deals, config)
+    max_consecutive_cat = config.max_consecutive_same_category
+    max_consecutive_brand = config.max_consecutive_same_brand
+    min_per_dispensary = config.min_deals_per_dispensary
+    backfill_brand_total = config.backfill_brand_total
+    max_disposables_per_chain = config.max_disposables_per_chain
+
     # ------------------------------------------------------------------
     # Step 3: Interleave categories for feed variety
     # ------------------------------------------------------------------
     result: list[dict[str, Any]] = []
     cat_order = sorted(
         category_picks.keys(),
-        key=lambda c: CATEGORY_TARGETS.get(c, 0),
+        key=lambda c: config.category_targets.get(c, 0),
         reverse=True,
     )
     cat_iters: dict[str, list[dict[str, Any]]] = {
@@ -2072,8 +2529,8 @@ def select_top_deals(
             tried += 1
 
             if (
-                len(last_cats) >= MAX_CONSECUTIVE_SAME_CATEGORY
-                and all(c == cat for c in last_cats[-MAX_CONSECUTIVE_SAME_CATEGORY:])
+                len(last_cats) >= max_consecutive_cat
+                and all(c == cat for c in last_cats[-max_consecutive_cat:])
             ):
                 continue
 
@@ -2083,8 +2540,8 @@ def select_top_deals(
 
                 if (
                     deal_brand
-                    and len(last_brands) >= MAX_CONSECUTIVE_SAME_BRAND
-                    and all(b == deal_brand for b in last_brands[-MAX_CONSECUTIVE_SAME_BRAND:])
+                    and len(last_brands) >= max_consecutive_brand
+                    and all(b == deal_brand for b in last_brands[-max_consecutive_brand:])
                 ):
                     swapped = False
                     for j in range(1, len(cat_iters[cat])):
@@ -2148,8 +2605,8 @@ def select_top_deals(
                 disp_min_brand_counts[b] += 1
         added = 0
         for disp_id in missing_disps:
-            pool = all_disp_pools[disp_id]
-            pool.sort(key=lambda d: d.get("deal_score", 0), reverse=True)
+            # Sorted copy: Step 5e reads the pools in input order.
+            pool = sorted(all_disp_pools[disp_id], key=lambda d: d.get("deal_score", 0), reverse=True)
 
             # --- Category-aware backfill ---
             # Pick the best deal from each distinct category first to
@@ -2165,7 +2622,7 @@ def select_top_deals(
 
             # First pass: one deal per category (highest-scored)
             for cat in ("flower", "vape", "edible", "concentrate", "preroll", "other"):
-                if count >= MIN_DEALS_PER_DISPENSARY:
+                if count >= min_per_dispensary:
                     break
                 for deal in by_cat.get(cat, []):
                     deal_key = (deal.get("name", ""), deal.get("sale_price"))
@@ -2173,7 +2630,7 @@ def select_top_deals(
                     if (
                         deal_key not in result_keys
                         and deal.get("brand")
-                        and disp_min_brand_counts[brand_lower] < _BACKFILL_BRAND_TOTAL
+                        and disp_min_brand_counts[brand_lower] < backfill_brand_total
                     ):
                         result.append(deal)
                         result_keys.add(deal_key)
@@ -2184,9 +2641,9 @@ def select_top_deals(
                         break  # one per category
 
             # Second pass: fill remaining floor slots by score
-            if count < MIN_DEALS_PER_DISPENSARY:
+            if count < min_per_dispensary:
                 for deal in pool:
-                    if count >= MIN_DEALS_PER_DISPENSARY:
+                    if count >= min_per_dispensary:
                         break
                     deal_key = (deal.get("name", ""), deal.get("sale_price"))
                     if deal_key in added_keys_this_disp:
@@ -2195,7 +2652,7 @@ def select_top_deals(
                     if (
                         deal_key not in result_keys
                         and deal.get("brand")
-                        and disp_min_brand_counts[brand_lower] < _BACKFILL_BRAND_TOTAL
+                        and disp_min_brand_counts[brand_lower] < backfill_brand_total
                     ):
                         result.append(deal)
                         result_keys.add(deal_key)
@@ -2212,9 +2669,9 @@ def select_top_deals(
     # Step 5: Dispensary cap enforcement (uses backfill cap if active)
     # ------------------------------------------------------------------
     effective_disp_cap = (
-        _BACKFILL_DISPENSARY_TOTAL
-        if round1_total < target * _BACKFILL_THRESHOLD
-        else MAX_SAME_DISPENSARY_TOTAL
+        config.backfill_dispensary_total
+        if round1_total < target * config.backfill_threshold
+        else config.max_same_dispensary_total
     )
     final_disp_counts: dict[str, int] = defaultdict(int)
     for deal in result:
@@ -2253,9 +2710,9 @@ def select_top_deals(
 
     trim_indices: set[int] = set()
     for chain, entries in chain_dv_groups.items():
-        if len(entries) > MAX_DISPOSABLES_PER_CHAIN:
+        if len(entries) > max_disposables_per_chain:
             entries.sort(key=lambda x: x[1].get("deal_score", 0), reverse=True)
-            for idx, _ in entries[MAX_DISPOSABLES_PER_CHAIN:]:
+            for idx, _ in entries[max_disposables_per_chain:]:
                 trim_indices.add(idx)
     if trim_indices:
         result = [d for i, d in enumerate(result) if i not in trim_indices]
@@ -2278,7 +2735,7 @@ def select_top_deals(
 
     chain_trim_indices: set[int] = set()
     for chain, entries in chain_all_groups.items():
-        if len(entries) > MAX_DEALS_PER_CHAIN:
+        if len(entries) > config.max_deals_per_chain:
             # Category-aware trimming: keep at least 1 per category,
             # then fill remaining slots with highest-scored deals.
             # This prevents the trim from disproportionately removing
@@ -2295,7 +2752,7 @@ def select_top_deals(
             for cat_entries in by_cat.values():
                 keep_indices.add(cat_entries[0][0])
             # Fill remaining slots with highest-scored across all categories
-            remaining_slots = MAX_DEALS_PER_CHAIN - len(keep_indices)
+            remaining_slots = config.max_deals_per_chain - len(keep_indices)
             all_remaining = [
                 (idx, deal) for idx, deal in entries
                 if idx not in keep_indices
@@ -2366,7 +2823,7 @@ def select_top_deals(
     for disp_id, pool in all_disposables_by_disp.items():
         # Respect chain cap — don't add more disposables to a chain at its cap
         chain = _chain_prefix(disp_id)
-        if chain and chain_disp_counts.get(chain, 0) >= MAX_DISPOSABLES_PER_CHAIN:
+        if chain and chain_disp_counts.get(chain, 0) >= max_disposables_per_chain:
             continue
 
         # Sort pool by deal_score descending for picking
@@ -2381,7 +2838,7 @@ def select_top_deals(
             """Add a disposable deal, respecting chain cap."""
             nonlocal disp_additions
             c = _chain_prefix(deal.get("dispensary_id") or "")
-            if c and chain_disp_counts.get(c, 0) >= MAX_DISPOSABLES_PER_CHAIN:
+            if c and chain_disp_counts.get(c, 0) >= max_disposables_per_chain:
                 return False
             if id(deal) not in result_ids:
                 result.append(deal)
@@ -2454,11 +2911,11 @@ def select_top_deals(
 
     # Build pool of all qualifying deals per anchor dispensary
     anchor_additions = 0
-    for anchor_id in ANCHOR_DISPENSARIES:
-        # All scored deals for this anchor dispensary
+    for anchor_id in config.anchor_dispensaries:
+        # All scored deals for this anchor dispensary (Step 4's pool)
         anchor_pool: dict[str, list[dict]] = defaultdict(list)
-        for deal in scored_deals:
-            if (deal.get("dispensary_id") or "") == anchor_id and deal.get("deal_score", 0) > 0:
+        for deal in all_disp_pools.get(anchor_id, ()):
+            if deal.get("deal_score", 0) > 0:
                 tier = _cat_weight_tier(deal)
                 anchor_pool[tier].append(deal)
 
@@ -2484,10 +2941,10 @@ def select_top_deals(
     if anchor_additions > 0:
         logger.info(
             "Anchor guarantee: added %d deals for per-category-per-weight coverage at %s",
-            anchor_additions, ", ".join(sorted(ANCHOR_DISPENSARIES)),
+            anchor_additions, ", ".join(sorted(config.anchor_dispensaries)),
         )
 
-    return result[:TARGET_DEAL_COUNT]
+    return result[:config.target_deal_count]
 
 
 # =====================================================================
@@ -2495,21 +2952,69 @@ def select_top_deals(
 # =====================================================================
 
 
-def detect_deals(
-    products: list[dict[str, Any]],
-) -> list[dict[str, Any]]:
-    """Full pipeline: filter -> score -> dedup -> select top 200.
+class DetectionResult:
+    """What one ``run_deal_detection`` call selected, cut and counted.
 
-    Returns only the curated top deals with ``deal_score`` set.
-    All other products should get ``deal_score = 0``.
-
-    Also stores reporting data on the module for the scrape report
-    (accessible via ``get_last_report_data()``).
+    ``candidates`` are the scored, quality-gated and deduplicated deals
+    selection picked from, best first: the selected ones as well as the
+    cut ones, before any of the per-site diversity caps.
     """
-    global _last_report_data
 
-    # Step 0: Correct 1g flower → preroll (no 1g flower exists in retail;
-    # it's always a preroll or infused preroll that was miscategorized).
+    __slots__ = (
+        "top_deals", "cut_deals", "candidates", "total_products",
+        "passed_hard_filter", "price_cap_rejects", "scored", "guaranteed", "removed",
+    )
+
+    def __init__(
+        self,
+        top_deals: list[dict[str, Any]],
+        cut_deals: list[dict[str, Any]],
+        candidates: list[dict[str, Any]],
+        total_products: int,
+        passed_hard_filter: int,
+        price_cap_rejects: int,
+        scored: int,
+        guaranteed: int,
+        removed: dict[str, int],
+    ) -> None:
+        self.top_deals = top_deals
+        self.cut_deals = cut_deals
+        self.candidates = candidates
+        self.total_products = total_products
+        self.passed_hard_filter = passed_hard_filter
+        self.price_cap_rejects = price_cap_rejects
+        self.scored = scored
+        self.guaranteed = guaranteed
+        self.removed = removed
+
+    @property
+    def selected(self) -> int:
+        return len(self.top_deals)
+
+    def report_data(self) -> dict[str, Any]:
+        """The scrape-report dict ``get_last_report_data`` returns."""
+        return {
+            "total_products": self.total_products,
+            "passed_hard_filter": self.passed_hard_filter,
+            "scored": self.scored,
+            "selected": self.selected,
+            "guaranteed": self.guaranteed,
+            "top_deals": self.top_deals,
+            "cut_deals": self.cut_deals,
+            "candidates": self.candidates,
+            "price_cap_rejects": self.price_cap_rejects,
+        }
+
+
+def correct_preroll_categories(products: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return *products* with 1g "flower" recategorized as preroll.
+
+    No 1g flower exists in retail; it's always a preroll or infused
+    preroll that was miscategorized.  Corrected products are copies
+    (``copy()``, so a ``ProductRecord`` stays one) — the products passed
+    in are not modified.
+    """
+    corrected: list[dict[str, Any]] = []
     for product in products:
         if (
             product.get("category") == "flower"
@@ -2520,17 +3025,38 @@ def detect_deals(
             except (ValueError, TypeError):
                 wv = None
             if wv is not None and 0.5 <= wv <= 1.5:
+                product = product.copy()
                 product["category"] = "preroll"
+        corrected.append(product)
+    return corrected
+
+
+def run_deal_detection(
+    products: list[dict[str, Any]],
+    config: DetectionConfig | None = None,
+) -> DetectionResult:
+    """Full pipeline: filter -> score -> dedup -> select top 200.
+
+    The result's ``top_deals`` are the curated deals with ``deal_score``
+    set; all other products should get ``deal_score = 0``.  Nothing is
+    kept on the module, so concurrent calls (threads, worker processes)
+    do not interfere, and *products* are not modified.  Every tunable
+    comes from *config* (default: a snapshot of the module constants
+    and loaded dynamic caps).
+    """
+    if config is None:
+        config = DetectionConfig()
+
+    # Step 0: Correct 1g flower → preroll.
+    products = correct_preroll_categories(products)
 
     # Step 1: Hard filter (with price-cap rejection counting)
-    # Step 1: Hard filter
-    qualifying: list[dict[str, Any]] = []
-    price_cap_rejects = 0
-    for product in products:
-        if passes_hard_filters(product):
-            qualifying.append(product)
-        elif failed_by_price_cap(product):
-            price_cap_rejects += 1
+    cols = ProductColumns(products)
+    caps = PriceCapTable(config)
+    passed = hard_filter_indices(cols, caps)
+    rejected = set(range(len(products))).difference(passed)
+    price_cap_rejects = len(price_cap_failures(cols, sorted(rejected), caps))
+    qualifying = [products[i] for i in passed]
 
     logger.info(
         "Hard filter: %d/%d products passed (%d rejected by price cap)",
@@ -2538,10 +3064,10 @@ def detect_deals(
     )
 
     # Step 2: Score qualifying deals
-    scored: list[dict[str, Any]] = []
-    for product in qualifying:
-        score = calculate_deal_score(product)
-        scored.append({**product, "deal_score": score})
+    scored: list[dict[str, Any]] = [
+        _scored_copy(products[i], score)
+        for i, score in zip(passed, deal_scores(cols, passed, config))
+    ]
 
     scored.sort(key=lambda d: d["deal_score"], reverse=True)
     logger.info(
@@ -2587,42 +3113,44 @@ def detect_deals(
 
     scored = strict_passed
 
-    # Step 4: Similarity dedup — max 3 per brand+category per dispensary
+    # Step 4: Dedup in one grouping pass —
+    #   4.  similarity: max 3 per brand+category per dispensary;
+    #   4b. cross-chain: same product at different locations of a chain
+    #       (e.g., Curaleaf Western vs Strip) keeps only the best one;
+    #   4c. global name: same brand+name product sold at different
+    #       dispensary chains keeps only the best-scored instance;
+    #   4d. near-duplicate names (optional, NEAR_DUPLICATE_DEDUP).
     dedup_before = len(scored)
-    scored = remove_similar_deals(scored)
-    dedup_removed = dedup_before - len(scored)
+    scored, removed = dedup_deals(scored, config=config)
+    dedup_removed = removed["similar"]
+    chain_removed = removed["chain"]
+    global_removed = removed["global"]
     if dedup_removed > 0:
         logger.info(
             "Similarity dedup: %d/%d deals removed (same brand+cat+dispo)",
             dedup_removed, dedup_before,
         )
-    # Step 4b: Cross-chain dedup — same product at different locations of
-    # a chain (e.g., Curaleaf Western vs Strip) keeps only the best one.
-    chain_before = len(scored)
-    scored = remove_cross_chain_duplicates(scored)
-    chain_removed = chain_before - len(scored)
     if chain_removed > 0:
         logger.info(
             "Cross-chain dedup: %d/%d deals removed (same product across chain locations)",
-            chain_removed, chain_before,
+            chain_removed, dedup_before - dedup_removed,
         )
-
-    # Step 4c: Global name dedup — same brand+name product sold at
-    # different dispensary chains keeps only the best-scored instance.
-    global_before = len(scored)
-    scored = remove_global_name_duplicates(scored)
-    global_removed = global_before - len(scored)
     if global_removed > 0:
         logger.info(
             "Global name dedup: %d/%d deals removed (same product across dispensaries)",
-            global_removed, global_before,
+            global_removed, dedup_before - dedup_removed - chain_removed,
+        )
+    if removed["near"] > 0:
+        logger.info(
+            "Near-duplicate dedup: %d/%d deals removed (similar names, same brand+cat+weight)",
+            removed["near"], len(scored) + removed["near"],
         )
 
     # Re-sort after dedup
     scored.sort(key=lambda d: d["deal_score"], reverse=True)
 
     # Step 5: Select top ~200 with diversity
-    top_deals = select_top_deals(scored)
+    top_deals = select_top_deals(scored, config)
     logger.info("Selected %d top deals for display", len(top_deals))
 
     # Step 6: Guaranteed minimum exposure
@@ -2631,7 +3159,7 @@ def detect_deals(
     # so every store gets fair representation.
     guaranteed_count = 0
     floor = _dispensary_deal_floor(len(products))
-    if len(products) >= MIN_PRODUCTS_FOR_GUARANTEE and len(top_deals) < max(floor, 1):
+    if len(products) >= config.min_products_for_guarantee and len(top_deals) < max(floor, 1):
         needed = max(floor, 1) - len(top_deals)
         # Exclude products already selected
         selected_keys = {
@@ -2641,7 +3169,9 @@ def detect_deals(
             p for p in products
             if (p.get("name", ""), p.get("sale_price")) not in selected_keys
         ]
-        guaranteed = _pick_guaranteed_deals(remaining, max_picks=needed)
+        guaranteed = _pick_guaranteed_deals(
+            remaining, max_picks=needed, config=config,
+        )
         if guaranteed:
             top_deals.extend(guaranteed)
             guaranteed_count = len(guaranteed)
@@ -2659,24 +3189,38 @@ def detect_deals(
         d for d in scored
         if (d.get("name", ""), d.get("sale_price")) not in selected_keys
     ]
-    _last_report_data = {
-        "total_products": len(products),
-        "passed_hard_filter": len(qualifying),
-        "scored": len(scored),
-        "selected": len(top_deals),
-        "guaranteed": guaranteed_count,
-        "top_deals": top_deals,
-        "cut_deals": cut_deals,
-        "price_cap_rejects": price_cap_rejects,
-    }
-
-    return top_deals
+    return DetectionResult(
+        top_deals=top_deals,
+        cut_deals=cut_deals,
+        candidates=scored,
+        total_products=len(products),
+        passed_hard_filter=len(qualifying),
+        price_cap_rejects=price_cap_rejects,
+        scored=len(scored),
+        guaranteed=guaranteed_count,
+        removed=removed,
+    )
 
 
-# Module-level storage for the last run's report data
+# Report data of the last detect_deals call, for get_last_report_data.
+# Not safe across threads or interleaved sites — use run_deal_detection.
 _last_report_data: dict[str, Any] = {}
 
 
+def detect_deals(
+    products: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """``run_deal_detection(products).top_deals``, with module-level caps.
+
+    Also stores reporting data on the module for the scrape report
+    (accessible via ``get_last_report_data()``).
+    """
+    global _last_report_data
+    result = run_deal_detection(products, DetectionConfig())
+    _last_report_data = result.report_data()
+    return result.top_deals
+
+
 def get_last_report_data() -> dict[str, Any]:
     """Return the report data from the most recent ``detect_deals`` call."""
     return _last_report_data
@@ -0,0 +1,182 @@
+"""
+Learned embed-URL cache — skip heavy host pages on later runs.
+
+Many Dutchie and Jane dispensaries embed their menu in an iframe on a
+marketing site.  Loading that host page, clicking its age gate, and
+waiting for the embed script to inject the iframe costs 30-90 s per
+site before any product work starts.  Once a scrape has found the
+iframe and extracted products from it, the iframe's URL is recorded
+here keyed by dispensary slug.  Later runs navigate straight to that
+URL as a top-level page, verify it still renders the same store, and
+fall back to the host page only if it doesn't.
+
+Entries are dropped when:
+  - the dispensary's configured host URL changes,
+  - they are older than ``EMBED_CACHE_TTL_DAYS`` (default 14), or
+  - a direct-navigation attempt fails (``invalidate``).
+
+Storage is a single JSON file under ``SCRAPER_CACHE_DIR`` (default
+``.scraper_cache/``), persisted between CI runs via ``actions/cache``.
+All functions are synchronous and safe to call from the asyncio event
+loop — the file is tiny and written atomically.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger("embed_cache")
+
+SCRAPER_CACHE_DIR = Path(os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache"))
+EMBED_CACHE_PATH = SCRAPER_CACHE_DIR / "embed_urls.json"
+EMBED_CACHE_TTL_DAYS = float(os.getenv("EMBED_CACHE_TTL_DAYS", "14"))
+
+# Only URLs that look like a real menu embed are worth caching — a
+# tracking pixel or the host page itself would just waste a navigation.
+_EMBED_URL_KEYWORDS = (
+    "dutchie", "embedded-menu", "goshango", "iheartjane", "jane.com",
+)
+
+# Path segments that are immediately followed by the store identifier,
+# e.g. ``dutchie.com/embedded-menu/<store>/specials`` or
+# ``iheartjane.com/embed/stores/<id>/menu``.
+_STORE_KEY_MARKERS = ("embedded-menu", "dispensary", "stores", "store")
+
+# slug -> entry dict.  ``None`` means "not loaded from disk yet".
+_entries: dict[str, dict[str, Any]] | None = None
+
+
+def _load() -> dict[str, dict[str, Any]]:
+    global _entries
+    if _entries is not None:
+        return _entries
+    _entries = {}
+    try:
+        data = json.loads(EMBED_CACHE_PATH.read_text())
+        if isinstance(data, dict):
+            _entries = {k: v for k, v in data.items() if isinstance(v, dict)}
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable embed cache %s: %s", EMBED_CACHE_PATH, exc)
+    return _entries
+
+
+def _save() -> None:
+    if _entries is None:
+        return
+    try:
+        EMBED_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = EMBED_CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(_entries, indent=2, sort_keys=True))
+        tmp.replace(EMBED_CACHE_PATH)
+    except OSError as exc:
+        logger.warning("Could not write embed cache %s: %s", EMBED_CACHE_PATH, exc)
+
+
+def reset() -> None:
+    """Forget the in-memory copy so the next call re-reads the file."""
+    global _entries
+    _entries = None
+
+
+def is_cacheable_embed_url(url: str | None, host_url: str | None = None) -> bool:
+    """Return True if *url* looks like a standalone menu embed.
+
+    Rejects empty / ``about:blank`` URLs, non-HTTP schemes, and URLs on
+    the same host as *host_url* (navigating there saves nothing).
+    """
+    if not url or url == "about:blank":
+        return False
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return False
+    if not any(kw in url.lower() for kw in _EMBED_URL_KEYWORDS):
+        return False
+    if host_url and _bare_host(urlparse(host_url).netloc) == _bare_host(parsed.netloc):
+        return False
+    return True
+
+
+def embed_store_key(url: str) -> str | None:
+    """Extract the store identifier from an embed URL, if recognisable."""
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    for i, part in enumerate(parts[:-1]):
+        if part.lower() in _STORE_KEY_MARKERS:
+            return parts[i + 1].lower()
+    return None
+
+
+def verify_embed_page(embed_url: str, current_url: str | None) -> bool:
+    """Return True if *current_url* still renders the store in *embed_url*.
+
+    Guards against the embed redirecting to a store chooser, a different
+    location of the same chain, or a generic landing page.
+    """
+    if not current_url:
+        return False
+    expected, actual = urlparse(embed_url), urlparse(current_url)
+    if _bare_host(expected.netloc) != _bare_host(actual.netloc):
+        return False
+    store_key = embed_store_key(embed_url)
+    if store_key is None:
+        return True
+    return embed_store_key(current_url) == store_key
+
+
+def _bare_host(netloc: str) -> str:
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def get_embed_url(slug: str, host_url: str) -> str | None:
+    """Return the learned embed URL for *slug*, or None.
+
+    Entries recorded for a different host URL or older than the TTL are
+    discarded.
+    """
+    entries = _load()
+    entry = entries.get(slug)
+    if not entry:
+        return None
+    age_days = (time.time() - entry.get("learned_at", 0)) / 86400
+    if entry.get("host_url") != host_url or age_days > EMBED_CACHE_TTL_DAYS:
+        logger.info("[%s] Dropping stale embed URL (age %.1fd)", slug, age_days)
+        entries.pop(slug, None)
+        _save()
+        return None
+    return entry.get("embed_url")
+
+
+def record_embed_url(slug: str, host_url: str, embed_url: str) -> bool:
+    """Remember *embed_url* as the menu for *slug*.  Returns True if stored."""
+    if not is_cacheable_embed_url(embed_url, host_url):
+        return False
+    entries = _load()
+    previous = entries.get(slug, {})
+    if previous.get("embed_url") == embed_url and previous.get("host_url") == host_url:
+        # Refresh the timestamp so actively-used entries never expire.
+        previous["learned_at"] = time.time()
+    else:
+        entries[slug] = {
+            "host_url": host_url,
+            "embed_url": embed_url,
+            "learned_at": time.time(),
+        }
+        logger.info("[%s] Learned embed URL: %s", slug, embed_url[:120])
+    _save()
+    return True
+
+
+def invalidate(slug: str, reason: str = "") -> None:
+    """Drop the learned embed URL for *slug* (direct navigation failed)."""
+    entries = _load()
+    if entries.pop(slug, None) is not None:
+        logger.warning("[%s] Invalidated learned embed URL%s", slug, f" — {reason}" if reason else "")
+        _save()
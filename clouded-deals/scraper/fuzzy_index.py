@@ -0,0 +1,106 @@
+"""
+Candidate index for ``SequenceMatcher``-based fuzzy matching.
+
+``fuzzy_brand_match`` and ``brand_learner._cluster_similar_names`` used
+to compute ``SequenceMatcher.ratio()`` against every key.  ``FuzzyIndex``
+keeps a character-bigram inverted index plus per-key character counts
+and returns only the keys whose ratio *could* reach the threshold, each
+with an upper bound on that ratio.  Callers still compute the real
+``ratio()`` for those few keys, so results are identical to the linear
+scan — the index only skips keys that provably cannot match.
+
+The bounds, for query ``a`` and key ``b`` with ``T = len(a) + len(b)``
+and ``M`` matched characters (``ratio = 2M / T``):
+  - unigram: ``M`` is at most the multiset intersection of characters
+    (this is ``SequenceMatcher.quick_ratio``);
+  - bigram: every matching block of length ``L`` contributes ``L - 1``
+    shared bigrams, and consecutive blocks are separated by at least one
+    unmatched character, so with ``S`` shared bigrams and ``k`` blocks
+    ``M <= S + k`` and ``k - 1 <= T - 2M``, i.e. ``M <= (S + T + 1) / 3``.
+The bigram bound lets keys sharing too few bigrams with the query be
+skipped without being looked at at all.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Any, Iterator
+
+
+def _bigrams(text: str) -> Counter:
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+class FuzzyIndex:
+    """Insertion-ordered keys with exact candidate pruning for ``ratio()``.
+
+    Keys are compared as given — callers lowercase both sides, as the
+    linear scans did.
+    """
+
+    def __init__(self, keys=()) -> None:
+        self._keys: list[str] = []
+        self._payloads: list[Any] = []
+        self._chars: list[Counter] = []
+        self._by_len: dict[int, list[int]] = defaultdict(list)
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, payload: Any = None) -> None:
+        """Append *key* (returned with *payload*) after all existing keys."""
+        key_id = len(self._keys)
+        self._keys.append(key)
+        self._payloads.append(key if payload is None else payload)
+        self._chars.append(Counter(key))
+        self._by_len[len(key)].append(key_id)
+        for gram, count in _bigrams(key).items():
+            self._postings[gram].append((key_id, count))
+
+    def candidates(
+        self,
+        query: str,
+        threshold: float,
+        *,
+        max_len_diff: float | None = None,
+    ) -> Iterator[tuple[str, Any, float]]:
+        """Yield ``(key, payload, bound)`` in insertion order.
+
+        Every key whose ``SequenceMatcher(None, query, key).ratio()`` can
+        be ``>= threshold`` is yielded; ``bound`` is an upper limit on
+        that ratio.  *max_len_diff* applies the callers' length filter
+        (keys whose length differs from the query's by more are skipped).
+        """
+        lq = len(query)
+        shared: dict[int, int] = defaultdict(int)
+        for gram, q_count in _bigrams(query).items():
+            for key_id, k_count in self._postings.get(gram, ()):
+                shared[key_id] += min(q_count, k_count)
+
+        slack = 1.5 * threshold - 1
+        ids: list[int] = []
+        for length, key_ids in self._by_len.items():
+            if max_len_diff is not None and abs(length - lq) > max_len_diff:
+                continue
+            # Minimum shared bigrams needed: from M <= (S + T + 1) / 3
+            # and 2M / T >= threshold (epsilon guards float rounding).
+            need = (lq + length) * slack - 1 - 1e-9
+            if need <= 0:
+                ids.extend(key_ids)
+            else:
+                ids.extend(k for k in key_ids if shared.get(k, 0) >= need)
+
+        q_chars = Counter(query)
+        for key_id in sorted(ids):
+            key = self._keys[key_id]
+            total = lq + len(key)
+            if not total:
+                continue
+            common = sum((q_chars & self._chars[key_id]).values())
+            matched = min(common, (shared.get(key_id, 0) + total + 1) // 3)
+            bound = 2.0 * matched / total
+            if bound >= threshold:
+                yield key, self._payloads[key_id], bound
@@ -5,6 +5,7 @@ from .pagination import (
     navigate_curaleaf_page,
     handle_jane_view_more,
 )
+from .selector_race import race_selectors
 
 __all__ = [
     "dismiss_age_gate",
@@ -14,4 +15,5 @@ __all__ = [
     "navigate_dutchie_page",
     "navigate_curaleaf_page",
     "handle_jane_view_more",
+    "race_selectors",
 ]
@@ -1,7 +1,8 @@
 """
 Universal age-gate dismissal handler.
 
-Tries a sequence of common selectors found across dispensary sites.
+Races a set of common selectors found across dispensary sites (see
+``selector_race``) and clicks the highest-priority one that shows up.
 Falls back to JavaScript overlay removal when no clickable button is found.
 
 The JS fallback explicitly targets TD's ``<aside id="agc_form">`` overlay
@@ -12,7 +13,9 @@ on pagination controls.
 import asyncio
 import logging
 
-from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout
+from playwright.async_api import Page, Frame
+
+from .selector_race import race_selectors
 
 logger = logging.getLogger(__name__)
 
@@ -265,34 +268,44 @@ async def dismiss_age_gate(
             (s, 2_000) for s in PRIMARY_AGE_GATE_SELECTORS
         ]
 
+    # Fast check: keep only selectors whose element exists in the DOM.
+    present: list[tuple[str, int]] = []
     for selector, timeout in all_selectors:
         try:
-            locator = target.locator(selector).first
+            if await target.locator(selector).count() > 0:
+                present.append((selector, timeout))
+        except Exception:
+            continue
 
-            # Fast check: skip immediately if element doesn't exist in DOM
-            try:
-                count = await target.locator(selector).count()
-            except Exception:
-                continue
-            if count == 0:
-                continue
+    # Race the present candidates for visibility under ONE timeout (the
+    # longest of their individual budgets) instead of waiting on each in
+    # turn.  An already-visible button wins instantly; list order still
+    # decides between several visible buttons.
+    if present:
+        selectors = [s for s, _ in present]
+        try:
+            winner, elapsed = await race_selectors(
+                target, selectors,
+                timeout_ms=max(t for _, t in present),
+                state="visible",
+            )
+        except Exception:
+            logger.debug("Age gate selector race failed", exc_info=True)
+            winner, elapsed = None, 0.0
 
-            # Element exists — check if already visible
-            try:
-                is_visible = await locator.is_visible()
-            except Exception:
-                is_visible = False
+        if winner is None:
+            logger.debug("Age gate: %d selector(s) exist but none became visible", len(present))
 
-            if is_visible:
-                # Click immediately — no need to wait
-                await locator.click()
-                logger.info("Age gate CLICKED via: %s (immediate)", selector)
-            else:
-                # Element exists but not visible — wait briefly for it
-                logger.debug("Age gate: %s exists (%d) but not visible — waiting %dms", selector, count, timeout)
-                await locator.wait_for(state="visible", timeout=timeout)
+        for selector in (selectors[selectors.index(winner):] if winner else []):
+            try:
+                locator = target.locator(selector).first
+                if not await locator.is_visible():
+                    continue
                 await locator.click()
-                logger.info("Age gate CLICKED via: %s (after wait, timeout=%dms)", selector, timeout)
+                logger.info("Age gate CLICKED via: %s (after %.1fs)", selector, elapsed)
+            except Exception:
+                logger.debug("Selector %s raised unexpected error", selector, exc_info=True)
+                continue
 
             if post_dismiss_wait_sec > 0:
                 logger.info(
@@ -306,11 +319,6 @@ async def dismiss_age_gate(
             await force_remove_age_gate(target)
 
             return True
-        except PlaywrightTimeout:
-            continue
-        except Exception:
-            logger.debug("Selector %s raised unexpected error", selector, exc_info=True)
-            continue
 
     # ---------------------------------------------------------------
     # Fallback: nuke the overlay via JavaScript
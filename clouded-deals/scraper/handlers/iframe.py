@@ -20,6 +20,8 @@ from typing import Literal
 
 from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout
 
+from .selector_race import race_selectors
+
 logger = logging.getLogger(__name__)
 
 # Selectors tried in order — the first match wins.
@@ -184,20 +186,16 @@ async def _probe_js_embed(page: Page, timeout_sec: float = 60) -> bool:
     if matched_container is None:
         return False
 
-    # Phase 2: wait for product cards INSIDE the container (up to 30 s)
-    for probe in JS_EMBED_PRODUCT_PROBES:
-        scoped = f"{matched_container} {probe}"
-        try:
-            await page.locator(scoped).first.wait_for(
-                state="attached", timeout=30_000,
-            )
-            product_count = await page.locator(scoped).count()
-            logger.info(
-                "JS embed confirmed — %d product cards via %r", product_count, scoped
-            )
-            return True
-        except PlaywrightTimeout:
-            continue
+    # Phase 2: wait for product cards INSIDE the container (up to 30 s,
+    # all probes raced together)
+    scoped_probes = [f"{matched_container} {probe}" for probe in JS_EMBED_PRODUCT_PROBES]
+    scoped, _ = await race_selectors(page, scoped_probes, timeout_ms=30_000)
+    if scoped is not None:
+        product_count = await page.locator(scoped).count()
+        logger.info(
+            "JS embed confirmed — %d product cards via %r", product_count, scoped
+        )
+        return True
 
     # Container exists but no product cards loaded — not a real embed
     logger.warning(
@@ -229,23 +227,22 @@ async def _probe_direct_page(page: Page, timeout_sec: float = 30) -> bool:
     menu is rendered directly into the page DOM rather than inside an iframe
     or a ``#dutchie--embed`` wrapper.
     """
-    for probe in DIRECT_PAGE_PRODUCT_PROBES:
-        try:
-            await page.locator(probe).first.wait_for(
-                state="attached", timeout=int(timeout_sec * 1000),
-            )
-            count = await page.locator(probe).count()
-            if count >= _MIN_DIRECT_PRODUCTS:
-                logger.info(
-                    "Direct page products found — %d cards via %r", count, probe,
-                )
-                return True
-            logger.debug(
-                "Direct page probe %r matched %d (need >= %d)",
-                probe, count, _MIN_DIRECT_PRODUCTS,
+    winner, _ = await race_selectors(
+        page, DIRECT_PAGE_PRODUCT_PROBES, timeout_ms=int(timeout_sec * 1000),
+    )
+    if winner is None:
+        return False
+    for probe in DIRECT_PAGE_PRODUCT_PROBES[DIRECT_PAGE_PRODUCT_PROBES.index(winner):]:
+        count = await page.locator(probe).count()
+        if count >= _MIN_DIRECT_PRODUCTS:
+            logger.info(
+                "Direct page products found — %d cards via %r", count, probe,
             )
-        except PlaywrightTimeout:
-            continue
+            return True
+        logger.debug(
+            "Direct page probe %r matched %d (need >= %d)",
+            probe, count, _MIN_DIRECT_PRODUCTS,
+        )
     return False
 
 
@@ -0,0 +1,127 @@
+"""
+Concurrent selector racing.
+
+Waiting on candidate selectors one at a time is the slowest path on a
+broken or empty page: five selectors at 10 s each is 50 s before giving
+up.  ``race_selectors`` waits on all candidates (CSS selectors and
+optional JS predicates) at once and returns as soon as any of them
+matches, so the worst case is a single timeout instead of N.
+
+Priority is preserved: when a candidate wins, earlier selectors in the
+list that are *also* present at that moment take precedence.  Callers
+that relied on list order (specific selectors before generic ones)
+therefore get the same answer, just sooner.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Iterable, Literal
+
+from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout
+
+logger = logging.getLogger(__name__)
+
+WaitState = Literal["attached", "visible"]
+
+
+async def _is_present(target: Page | Frame, selector: str, state: WaitState) -> bool:
+    """Non-waiting check that *selector* currently satisfies *state*."""
+    try:
+        if state == "visible":
+            return await target.locator(selector).first.is_visible()
+        return await target.locator(selector).count() > 0
+    except Exception:
+        return False
+
+
+async def race_selectors(
+    target: Page | Frame,
+    selectors: Iterable[str],
+    *,
+    js_predicates: Iterable[str] = (),
+    timeout_ms: int = 10_000,
+    state: WaitState = "attached",
+    prefer_order: bool = True,
+) -> tuple[str | None, float]:
+    """Wait for the first of *selectors* / *js_predicates* to match.
+
+    Parameters
+    ----------
+    target:
+        The ``Page`` or ``Frame`` to wait on.
+    selectors:
+        CSS / Playwright selectors, in priority order.
+    js_predicates:
+        JS function sources for ``wait_for_function`` (truthy = match).
+        Raced alongside the selectors; ranked after them for priority.
+    timeout_ms:
+        One overall timeout shared by every candidate.
+    state:
+        Locator state to wait for (``"attached"`` or ``"visible"``).
+    prefer_order:
+        When a candidate wins, return the earliest selector in
+        *selectors* that is also present right now instead.
+
+    Returns
+    -------
+    (winner, elapsed_sec)
+        *winner* is the matching selector or predicate source, or
+        ``None`` if nothing matched within *timeout_ms*.
+
+    Raises the underlying error if every candidate failed with something
+    other than a timeout (e.g. the page or browser was closed).
+    """
+    selectors = list(selectors)
+    candidates = selectors + list(js_predicates)
+    start = time.monotonic()
+    if not candidates:
+        return None, 0.0
+
+    tasks: dict[asyncio.Task, int] = {}
+    for idx, selector in enumerate(selectors):
+        waiter = target.locator(selector).first.wait_for(state=state, timeout=timeout_ms)
+        tasks[asyncio.ensure_future(waiter)] = idx
+    for idx, predicate in enumerate(candidates[len(selectors):], start=len(selectors)):
+        waiter = target.wait_for_function(predicate, timeout=timeout_ms)
+        tasks[asyncio.ensure_future(waiter)] = idx
+
+    winner_idx: int | None = None
+    first_error: BaseException | None = None
+    pending = set(tasks)
+    try:
+        while pending and winner_idx is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Several candidates can finish in the same tick — rank them
+            # by input position, not by set iteration order.
+            for task in sorted(done, key=tasks.__getitem__):
+                exc = task.exception()
+                if exc is None:
+                    winner_idx = tasks[task]
+                    break
+                if not isinstance(exc, PlaywrightTimeout) and first_error is None:
+                    first_error = exc
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    elapsed = time.monotonic() - start
+    if winner_idx is None:
+        if first_error is not None:
+            raise first_error
+        logger.debug("Selector race: no match among %d candidates after %.1fs", len(candidates), elapsed)
+        return None, elapsed
+
+    if prefer_order:
+        for idx in range(min(winner_idx, len(selectors))):
+            if await _is_present(target, selectors[idx], state):
+                winner_idx = idx
+                break
+
+    winner = candidates[winner_idx]
+    logger.debug("Selector race: %r matched after %.2fs", winner[:80], elapsed)
+    return winner, elapsed
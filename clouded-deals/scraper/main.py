@@ -9,6 +9,8 @@ scrape_runs for the admin dashboard.
 Usage:
     python main.py                # scrape all active dispensaries
     python main.py td-gibson      # scrape a single site by slug
+    python main.py --replay       # reprocess today's raw archive, no browser
+                                  # (see replay.py; --help for options)
 
 Environment variables (for CI):
     DRY_RUN=true              # scrape only, skip all DB writes
@@ -24,6 +26,10 @@ Environment variables (for CI):
     REGION=new-jersey         # scrape only New Jersey dispensaries
     REGION=ohio               # scrape only Ohio dispensaries
     REGION=all                # scrape all regions (default)
+    REGEX_PROFILE=true        # log the most expensive regex patterns in the summary
+    REGION_FEED_POOL_FACTOR=4 # region feed candidates held per category slot
+    REGION_FEED_PATH=region_feed.json # where the region feed is written ("" = off)
+    NEAR_DUPLICATE_DEDUP=true # also merge near-identical product names (MinHash/LSH)
 """
 
 from __future__ import annotations
@@ -35,8 +41,8 @@ import random
 import re
 import sys
 import time
+from collections import Counter
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse as _urlparse
 
@@ -52,14 +58,36 @@ from config.dispensaries import (
     get_platforms_for_group, get_dispensaries_by_group,
     get_dispensaries_by_region, is_expansion_region,
 )
-from clouded_logic import CloudedLogic, BRANDS_LOWER, load_approved_brands
-from deal_detector import detect_deals, get_last_report_data, load_dynamic_caps
+from asset_cache import get_asset_cache
+from parse_cache import get_parse_cache
+from clouded_logic import load_approved_brands
+from deal_detector import (
+    DetectionConfig,
+    correct_preroll_categories,
+    load_dynamic_caps,
+    run_deal_detection,
+)
 from metrics_collector import collect_daily_metrics
 from product_classifier import classify_product
+from product_normalizer import RAW_TEXT_MAX_CHARS, _clean_product_name, normalize_products
+from raw_archive import RAW_ARCHIVE_ENABLED, RawArchive, read_member
+from regex_profile import REGEX_PROFILE_TOP, get_regex_profile
+from region_feed import RegionFeed
+from replay import (
+    OutputSnapshot,
+    ReplayDiff,
+    build_parser as build_replay_parser,
+    replay_tasks,
+    run_tasks,
+    select_runs,
+    site_outputs,
+)
+from run_report import RunReport
 from platforms import (
-    AIQScraper, CarrotScraper, CuraleafScraper, DutchieScraper,
-    JaneScraper, RiseScraper, launch_stealth_browser,
+    AIQScraper, CarrotScraper, ContextPool, CuraleafScraper, DutchieScraper,
+    JaneScraper, RiseScraper, launch_stealth_browser, new_stealth_context,
 )
+from platforms.context_pool import CONTEXT_POOL_ENABLED
 
 # Concurrency limit for parallel scraping.
 # SCRAPE_CONCURRENCY controls total browser contexts at once (default 6).
@@ -124,6 +152,10 @@ PLATFORM_GROUP = os.getenv("PLATFORM_GROUP", "all").lower()
 # Sharded regions (e.g. "michigan-1") split a large region into parallel jobs.
 REGION = os.getenv("REGION", "all").lower()
 
+# Region feed (top deals across every site of the run), written as JSON
+# and uploaded with the run's artifacts.  Empty disables the file.
+REGION_FEED_PATH = os.getenv("REGION_FEED_PATH", "region_feed.json")
+
 # Regions that are split across multiple cron jobs via round-robin sharding.
 # Key = base region name, value = total number of shards.
 REGION_SHARDS: dict[str, int] = {
@@ -310,133 +342,6 @@ def _deactivate_old_deals(group_slugs: list[str] | None = None) -> None:
 
 _UPSERT_CHUNK_SIZE = 500  # max rows per Supabase upsert call
 
-# Regex to strip junk from product names before storing / dedup
-_RE_NAME_JUNK = re.compile(
-    r"(Add to (cart|bag)|Remove|View details|Out of stock|"
-    r"Sale!|New!|Limited|Sold out|In stock|"
-    r"\bQty\b.*$|\bQuantity\b.*$)",
-    re.IGNORECASE | re.MULTILINE,
-)
-
-# Strip inline bundle/promo text that bleeds into product names from Dutchie
-# "Special Offers" DOM.  Matches patterns like "3 For $50 …", "2/$60 …",
-# "Buy 2 Get 1 …" and removes everything from the match to end of string.
-_RE_BUNDLE_PROMO = re.compile(
-    r"\s*\b\d+\s+[Ff]or\s+\$\d+.*$"    # "3 For $50 …"
-    r"|\s*\b\d+/\$\d+.*$"               # "2/$60 …"
-    r"|\s*\bBuy\s+\d+\s+Get\s.*$"       # "Buy 2 Get 1 …"
-    r"|\s*\bSpecial Offers?\b.*$"        # "Special Offers (1) …"
-    r"|\s*\b\d+\s+(?:Half\s+)?(?:Ounces?|OZ)\s*[-–]?\s*\$\d+.*$"  # "2 Half Ounces - $99 …"
-    r"|\s*\b\d+\s+PR'?s?\s*[-–]?\s*\$\d+.*$"  # "10 PR's - $50 …"
-    r"|\s*[-–]\s*Delivery\s*$",          # "- Delivery" trailing text
-    re.IGNORECASE,
-)
-
-# Marketing tier labels that brands use (e.g., STIIIZY Black/Gold/Silver Label)
-_RE_MARKETING_TIER = re.compile(
-    r"\s*\|?\s*\b(Black|Gold|Silver|Blue|White|Red|Green|Purple|Diamond|Platinum)\s+Label\b",
-    re.IGNORECASE,
-)
-
-# "Prepack", "Whole Flower", "Flower Prepack" — dispensary marketing terms
-_RE_PREPACK = re.compile(
-    r"\b(?:Flower\s+)?Prepack\b|\bWhole\s+Flower\b",
-    re.IGNORECASE,
-)
-_RE_TRAILING_STRAIN = re.compile(r"\s*(Indica|Sativa|Hybrid)\s*$", re.IGNORECASE)
-
-# Brand abbreviations that appear in product names instead of the full brand
-_BRAND_ABBREVIATIONS: dict[str, list[str]] = {
-    "Circle S Farms": ["CSF"],
-    "Sauce Essentials": ["Sauce"],
-    "Vlasic Labs": ["Vlasic"],
-    "Tyson 2.0": ["Tyson"],
-    "Tsunami Labs": ["Tsunami"],
-    # NV abbreviation brands — full names appear in product text
-    "AMA": ["Alternative Medicine Association", "Alternative Medical Association"],
-    "HSH": ["High Sierra Holistics"],
-}
-
-# Weight prefix patterns: "3.5g |", "1g |", ".5g |"
-_RE_WEIGHT_PREFIX = re.compile(r"^\.?\d+\.?\d*\s*g\s*\|\s*", re.IGNORECASE)
-
-# Bundle quantity text: "3 Eighths", "5 Pack", "2 Quarters"
-_RE_BUNDLE_QTY = re.compile(
-    r"\b\d+\s+(?:Eighths?|Quarters?|Halves|Half)\b\s*",
-    re.IGNORECASE,
-)
-
-# Strain type anywhere in name (not just trailing)
-_RE_STRAIN_TYPE = re.compile(r"\b(?:Indica|Sativa|Hybrid)\b", re.IGNORECASE)
-
-# Redundant vape category words in display name.
-# NOTE: "Disposable" is intentionally excluded — it's the primary signal for
-# disposable subtype classification in product_classifier.py.  Stripping it
-# here destroyed the keyword before classify_product() could see it, causing
-# disposable vapes to fall into the generic "vape" bucket (2/30 target).
-_RE_VAPE_WORDS = re.compile(
-    r"\b(?:Cartridges?|Carts?|Distillate|Pod|Vape)\b",
-    re.IGNORECASE,
-)
-
-# Marketing junk names that don't add useful info to a product name
-_RE_MARKETING_JUNK = re.compile(
-    r"\bHigh\s+Octane\b|\bX(?:treme|XX)\b",
-    re.IGNORECASE,
-)
-
-# Concentrate format descriptors — redundant when category is already "concentrate"
-_RE_CONCENTRATE_FORMAT = re.compile(
-    r"\b(?:(?:Diamond|Live|Cured)\s+)?(?:Badder|Batter|Budder|Shatter|Wax|"
-    r"Sauce|Sugar|Crumble|Rosin|Resin|Diamonds?)\b",
-    re.IGNORECASE,
-)
-
-# Concentrate keywords for raw_name–based category correction
-_CONCENTRATE_NAME_KEYWORDS = re.compile(
-    r"\b(?:badder|batter|budder|shatter|wax|sauce|sugar|crumble|"
-    r"rosin|diamonds?|live\s+resin|cured\s+resin)\b",
-    re.IGNORECASE,
-)
-_VAPE_NAME_KEYWORDS = re.compile(
-    r"\b(?:cart|cartridge|pod|disposable|vape|pen|all-in-one)\b",
-    re.IGNORECASE,
-)
-
-# Standalone weight values redundant with the weight field
-_RE_INLINE_WEIGHT = re.compile(
-    r"\b\d*\.?\d+\s*g\b",
-    re.IGNORECASE,
-)
-
-# Bracket-enclosed weight: "[.95g]", "[1g]", "[3.5g]"
-_RE_BRACKET_WEIGHT = re.compile(
-    r"\s*\[\.?\d+\.?\d*\s*g\]\s*",
-    re.IGNORECASE,
-)
-
-# Promotional bundle text embedded in product names:
-# "Gummies 2 For $35 All Dispensary", "Elixir 3 For $20 Sips, HaHa, "
-_RE_PROMO_BUNDLE = re.compile(
-    r"\s*\d+\s+For\s+\$\d+\.?\d*\b.*$",
-    re.IGNORECASE,
-)
-
-# Trailing pipe-delimited weight/metadata for edibles:
-# "Drink Loud | Cucumber Haze | 100mg" → keep up to the strain segment
-# "Blue Razz | 100mg" → strip "| 100mg"
-# "Dreamberry | 100mg 2:1 [THC:CBN]" → strip "| 100mg 2:1 [THC:CBN]"
-_RE_TRAILING_PIPE_WEIGHT = re.compile(
-    r"\s*\|\s*\d+\.?\d*\s*m?g\b.*$",
-    re.IGNORECASE,
-)
-
-# THC:CBD ratio brackets: "[THC:CBN]", "[1:1]", "[2:1]"
-_RE_RATIO_BRACKET = re.compile(
-    r"\s*\[?\d*:?\d*\s*(?:THC|CBD|CBN|CBG)\s*(?::\s*(?:THC|CBD|CBN|CBG))?\]?",
-    re.IGNORECASE,
-)
-
 # Patterns that indicate promotional / sale copy rather than a real product name
 _SALE_COPY_PATTERNS = [
     re.compile(r"^\d+%\s*off", re.IGNORECASE),
@@ -469,204 +374,6 @@ _STRAIN_ONLY_NAMES = {
     "cartridge", "cart", "badder", "shatter", "wax", "gummy", "gummies",
 }
 
-# ── Offer/bundle text isolation for brand detection ──────────────────
-# When Dutchie product cards include "Special Offers" sections, those
-# sections mention OTHER brands from bundle deals (e.g. "2/$40 Power
-# Pack || KYND 3.5g Flower & HAZE 1g Live Resin ||").  Running brand
-# detection on this text causes brand contamination — the wrong brand
-# gets picked up.  We strip offer text BEFORE brand detection fallback.
-_RE_OFFER_SECTION = re.compile(
-    r"(?:Special Offers?\s*\(?.*$)"            # "Special Offers (1) …" to end
-    r"|(?:\d+/\$\d+\s+.*(?:Power Pack|Bundle).*$)"  # "2/$40 Power Pack || …"
-    r"|(?:\bShop Offer\b.*$)"                  # "Shop Offer" link text
-    r"|(?:\bOffer\b.*\bShop\b.*$)"             # variant "Offer … Shop"
-    r"|(?:\bselect\s+\$\d+.*$)"               # "select $20 eighths 2/$30 …" promo
-    r"|(?:\bIncluded?\s+(?:in|with)\b.*$)"     # "Included in: 2/$40 Concentrates…"
-    r"|(?:\bPart\s+of\b.*$)"                   # "Part of: Mix & Match…"
-    r"|(?:\bMix\s*(?:&|and|n)\s*Match\b.*$)"   # "Mix & Match 2/$40…"
-    r"|(?:\d+\s+for\s+\$\d+.*$)"              # "2 for $40 Rove, AMA…"
-    r"|(?:\bBOGO\b.*$)"                        # "BOGO on select brands…"
-    r"|(?:\bBundle\b.*$)"                       # "Bundle deal: …"
-    r"|(?:\bDeal\s*:.*$)"                       # "Deal: 2/$60 …"
-    r"|(?:\bPromo\s*:.*$)"                      # "Promo: …"
-    r"|(?:\bAlso\s+(?:included?|available)\b.*$)"  # "Also included: Rove, Reserve…"
-    # Bundle pricing with fractional oz — "$35 1/4 oz", "$55 1/2 oz (Select Strains)"
-    # This is deal copy describing a bundle promotion, NOT the product's own weight.
-    # Without stripping, "1/4" is parsed as 7g and "$35" as the price.
-    r"|(?:\$\d+\.?\d*\s+1/[248]\s*(?:oz\.?)?\b.*$)"  # "$35 1/4 oz …" to end
-    r"|(?:any\s+(?:two|2|three|3)\b.*$)"       # "any two 3.5g for $35 …"
-    r"|(?:\bget\s+any\b.*$)",                   # "get any 2 eighths …"
-    re.IGNORECASE | re.MULTILINE,
-)
-
-
-def _strip_offer_text(raw_text: str) -> str:
-    """Remove Special Offers / bundle deal sections from raw_text.
-
-    This prevents brand names mentioned in offer text (e.g. "KYND 3.5g
-    Flower & HAZE 1g Live Resin") from contaminating brand detection,
-    AND prevents bundle deal pricing/weight (e.g. "$35 1/4 oz Select
-    Strains") from polluting the weight and price parsers.
-    """
-    if not raw_text:
-        return ""
-    return _RE_OFFER_SECTION.sub("", raw_text).strip()
-
-
-# ── URL-based brand extraction ─────────────────────────────────────────
-# Product URLs often contain the brand slug (e.g. "/brands/rove/...",
-# "/rove-featured-farms-1g", "brand=rove").  This is a high-confidence
-# signal that avoids false positives from product name parsing.
-#
-# IMPORTANT: Only search in product-identifying URL segments to avoid
-# matching dispensary names in the store path.  For example, Curaleaf URLs
-# always contain "/curaleaf-las-vegas-western/" — without this guard,
-# every product at every Curaleaf location would be tagged as brand
-# "Curaleaf" regardless of the actual brand (AMA, Matrix, etc.).
-
-def _extract_brand_from_url(url: str) -> str | None:
-    """Return canonical brand name if found in the product URL.
-
-    Only searches product-identifying URL segments:
-      - After /product/ or /products/ (the product slug)
-      - After /brands/ (brand directory pages)
-      - Query parameters (brand=rove)
-    """
-    if not url:
-        return None
-    url_lower = url.lower()
-
-    # Build the search text from product-identifying segments only.
-    # This prevents matching dispensary names in the store path
-    # (e.g. "/curaleaf-las-vegas-western/" → NOT brand "Curaleaf").
-    search_parts: list[str] = []
-
-    for marker in ("/product/", "/products/"):
-        idx = url_lower.find(marker)
-        if idx >= 0:
-            search_parts.append(url_lower[idx:])
-
-    brands_idx = url_lower.find("/brands/")
-    if brands_idx >= 0:
-        search_parts.append(url_lower[brands_idx:])
-
-    query_idx = url_lower.find("?")
-    if query_idx >= 0:
-        search_parts.append(url_lower[query_idx:])
-
-    if not search_parts:
-        return None
-
-    search_text = " ".join(search_parts)
-
-    # Check each known brand against the search text (longest brands first
-    # to avoid partial matches — e.g. "raw garden" before "raw")
-    for brand_lower, canonical in sorted(
-        BRANDS_LOWER.items(), key=lambda x: len(x[0]), reverse=True
-    ):
-        # Match brand as a path segment or query param value
-        if (
-            f"/{brand_lower}/" in search_text
-            or f"/{brand_lower}?" in search_text
-            or f"brand={brand_lower}" in search_text
-            or f"/{brand_lower.replace(' ', '-')}/" in search_text
-            or f"/{brand_lower.replace(' ', '-')}-" in search_text
-            or f"-{brand_lower.replace(' ', '-')}-" in search_text
-        ):
-            return canonical
-    return None
-
-
-def _detect_brand_from_raw_text_lines(
-    raw_text: str, current_brand: str | None, logic,
-) -> str | None:
-    """Check raw_text lines for a standalone brand label.
-
-    Returns a brand if found on its own line in raw_text AND it differs
-    from *current_brand*.  This catches DOM structures where the brand is
-    a separate element (e.g. ``<span>AMA</span>``) distinct from the
-    product name heading.  Only matches lines where the ENTIRE line
-    (after stripping punctuation) equals a known brand name.
-    """
-    if not raw_text:
-        return None
-    current_lower = current_brand.lower() if current_brand else ""
-    for line in raw_text.split("\n"):
-        candidate = line.strip().strip(".,;:-|")
-        if not candidate or len(candidate) > 30:
-            continue
-        if candidate.lower() == current_lower:
-            continue
-        detected = logic.detect_brand(candidate)
-        if detected and detected.lower() != current_lower and candidate.lower() == detected.lower():
-            return detected
-    return None
-
-
-# Leading strain-type prefix (e.g. "Indica OG Kush" → "OG Kush")
-_RE_LEADING_STRAIN = re.compile(
-    r"^(Indica|Sativa|Hybrid)\s*[-:|]?\s*", re.IGNORECASE,
-)
-
-
-# Lines in raw_text that are NOT useful strain/product names.
-_JUNK_LINE_PATTERNS = re.compile(
-    r"^(?:"
-    r"\$[\d.]+"                              # price line
-    r"|[\d.]+\s*(?:g|mg|oz)\b"               # weight line
-    r"|(?:Indica|Sativa|Hybrid)$"            # strain type
-    r"|(?:THC|CBD|CBN)\s*:?\s*[\d.]+\s*%?"   # cannabinoid
-    r"|Add to (?:cart|bag)"                   # CTA
-    r"|(?:Pre[-\s]?Rolls?|Prerolls?|Flower|Vapes?|Cartridges?|Concentrates?|Edibles?)$"  # category label
-    r"|(?:Sale!?|New!?|Limited|Sold out|In stock|Staff Pick|Local Love|New Arrival)"
-    r"|\d+%\s*off"
-    r"|Special Offers?"
-    r"|\s*$"
-    r")",
-    re.IGNORECASE,
-)
-
-
-def _extract_strain_from_raw_text(
-    raw_text: str, brand: str, fallback: str,
-) -> str:
-    """Try to find a meaningful strain/product name in raw_text lines.
-
-    When the scraped product name equals the brand (e.g. a Dutchie card
-    whose heading is just "Cookies"), the real strain name often appears
-    as a separate line in the card text (e.g. "Headband", "Gary Payton").
-    This function scans those lines and returns the first candidate that
-    isn't the brand, a price, a weight, a category label, or junk text.
-
-    Falls back to *fallback* (usually the raw_name) if nothing better
-    is found.
-    """
-    if not raw_text:
-        return fallback
-    brand_lower = brand.lower() if brand else ""
-    for line in raw_text.split("\n"):
-        candidate = line.strip()
-        if not candidate or len(candidate) < 3:
-            continue
-        # Skip if it's the brand name itself
-        if candidate.lower() == brand_lower:
-            continue
-        # Skip if it starts with the brand (e.g. "Cookies | Flower")
-        if brand_lower and candidate.lower().startswith(brand_lower):
-            continue
-        # Skip junk lines (prices, weights, strain types, category labels, etc.)
-        if _JUNK_LINE_PATTERNS.match(candidate):
-            continue
-        # Good candidate — strip brand prefix if present
-        result = re.sub(
-            rf'\b{re.escape(brand)}\b\s*[-:|]?\s*',
-            '', candidate, flags=re.IGNORECASE,
-        ).strip()
-        if len(result) >= 3:
-            return result
-    return fallback
-
-
 def _is_junk_deal(name: str, price: float | None) -> bool:
     """Return True if this scraped entry is promotional junk rather than a real product."""
     if not price or price <= 0:
@@ -685,99 +392,6 @@ def _is_junk_deal(name: str, price: float | None) -> bool:
     return False
 
 
-def _deduplicate_name(name: str) -> str:
-    """Remove repeated word sequences in a product name.
-
-    Example: "Big Dogs Casino Kush Preroll Big Dogs Casino Kush"
-           → "Big Dogs Casino Kush Preroll"
-    """
-    words = name.split()
-    if len(words) < 4:
-        return name
-
-    # Try chunk sizes from half the word count downward
-    for chunk_size in range(len(words) // 2, 1, -1):
-        first_chunk = " ".join(words[:chunk_size])
-        remaining = " ".join(words[chunk_size:])
-        if remaining.startswith(first_chunk):
-            unique_trailing = remaining[len(first_chunk):].strip()
-            return f"{first_chunk} {unique_trailing}".strip() if unique_trailing else first_chunk
-        if first_chunk.endswith(remaining) and len(remaining) > 8:
-            return first_chunk
-
-    return name
-
-
-def _clean_product_name(name: str) -> str:
-    """Strip junk text, deduplicate, and normalize whitespace in a product name."""
-    if not name:
-        return "Unknown"
-    cleaned = _RE_NAME_JUNK.sub("", name)
-    # Strip bundle/promo text ("3 For $50 …", "2/$60 …") before further cleaning
-    cleaned = _RE_BUNDLE_PROMO.sub("", cleaned)
-    cleaned = _RE_TRAILING_STRAIN.sub("", cleaned)
-    # Strip leading strain-type prefix ("Indica OG Kush" → "OG Kush")
-    cleaned = _RE_LEADING_STRAIN.sub("", cleaned)
-
-    # Strip marketing tier labels ("Black Label", "Gold Label", etc.)
-    cleaned = _RE_MARKETING_TIER.sub("", cleaned)
-
-    # Strip "Prepack", "Whole Flower", "Flower Prepack"
-    cleaned = _RE_PREPACK.sub("", cleaned)
-
-    # Strip inline cannabinoid content that leaks from Dutchie product cards
-    # e.g. "THC: 101.52 mg", "CBD: 25.0 mg", "CBN: 5 mg"
-    cleaned = re.sub(r"\b(?:THC|CBD|CBN|CBG|CBC)\s*:\s*[\d.]+\s*(?:mg|%)", "", cleaned, flags=re.IGNORECASE)
-
-    # Fix "mgmg" doubling artifact — "100mgmg" → "100mg"
-    cleaned = re.sub(r"(\d+\s*mg)\s*mg\b", r"\1", cleaned, flags=re.IGNORECASE)
-
-    # Strip standalone "mg" that remains after cannabinoid cleanup
-    # e.g. "Sativamg" → "Sativa", "Hybridmg" → "Hybrid"
-    cleaned = re.sub(r"(Indica|Sativa|Hybrid)\s*mg\b", r"\1", cleaned, flags=re.IGNORECASE)
-
-    # Strip promotional taglines that leak from Dutchie product badges/ribbons
-    cleaned = re.sub(r"\bLocal Love!?", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\bNew Arrival!?", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\bLimited Time!?", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\bStaff Pick!?", "", cleaned, flags=re.IGNORECASE)
-    # Day-of-week promo labels: "Remedy Wednesday", "Mojo Monday"
-    cleaned = re.sub(r"\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\b", "", cleaned, flags=re.IGNORECASE)
-
-    # Strip parenthetical strain codes: "(SH)", "(I)", "(S)", "(H)", "(IH)", "(SH)"
-    cleaned = re.sub(r"\s*\(\s*(?:SH?|IH?|H)\s*\)", "", cleaned, flags=re.IGNORECASE)
-
-    # Strip leading price prefix from product names that begin with "$XX"
-    # e.g. "$55 VYBZ Pre-packaged" → "VYBZ Pre-packaged"
-    #       "$23 Dab Oil Applicators" → "Dab Oil Applicators"
-    cleaned = re.sub(r"^\$\d+\.?\d*\s+", "", cleaned)
-
-    # Strip inline price/deal text fragments that slip into product names
-    # e.g. "$99 $45 1/2 OZ" or "1/2 OZ" at end of name
-    cleaned = re.sub(r"\s*\$\d+\.?\d*(?:\s+\$\d+\.?\d*)*\s*(?:1/2\s+OZ)?.*$", "", cleaned, flags=re.IGNORECASE)
-
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
-    cleaned = cleaned.strip(".,;:-|")
-
-    # Remove common scraped artifacts
-    cleaned = re.sub(r"\s*\(each\)\s*", " ", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s*\(tax included\)\s*", " ", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'^["\']+(.*?)["\']+$', r"\1", cleaned)  # surrounding quotes
-
-    # Strip bracketed weight artifacts: "[1g]", "[3.5g]", "[100mg]"
-    cleaned = re.sub(r"\s*\[\s*\d+\.?\d*\s*(?:mg|g|oz)\s*\]", "", cleaned, flags=re.IGNORECASE)
-
-    # Strip redundant weight+category suffixes that repeat weight info already
-    # captured separately (e.g. ".5g Shatter (.5g)" → ".5g Shatter")
-    cleaned = re.sub(r"\s*\(\s*\.?\d+\.?\d*\s*g\s*\)\s*$", "", cleaned, flags=re.IGNORECASE)
-
-    # Deduplicate repeated word sequences
-    cleaned = _deduplicate_name(cleaned)
-
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
-    return cleaned if len(cleaned) >= 3 else name.strip()
-
-
 def _normalize_for_dedup(name: str) -> str:
     """Normalize a product name into a dedup key (lowercase, no punctuation)."""
     n = name.lower().strip()
@@ -828,7 +442,7 @@ def _upsert_products(
                 "weight_unit": p.get("weight_unit"),
                 "thc_percent": p.get("thc_percent"),
                 "cbd_percent": p.get("cbd_percent"),
-                "raw_text": (p.get("raw_text") or "")[:4000],
+                "raw_text": (p.get("raw_text") or "")[:RAW_TEXT_MAX_CHARS],
                 "deal_score": p.get("deal_score", 0),
                 "product_url": p.get("product_url"),
                 "is_active": True,
@@ -1138,31 +752,22 @@ _LOW_PRODUCT_THRESHOLD = 25  # Sites returning fewer products get a retry
 _JOB_BUDGET_SEC = int(os.getenv("JOB_BUDGET_SEC", "9900"))  # 165 min
 
 
-def _split_weight(weight_str: str | None) -> tuple[float | None, str | None]:
-    """Split CloudedLogic weight string into (value, unit) for DB schema.
-
-    '3.5g' → (3.5, 'g'),  '100mg' → (100.0, 'mg'),  None → (None, None)
-    """
-    if not weight_str:
-        return None, None
-    for unit in ("mg", "g"):
-        if weight_str.lower().endswith(unit):
-            try:
-                return float(weight_str[: -len(unit)]), unit
-            except ValueError:
-                pass
-    return None, None
-
-
 async def _scrape_site_inner(
     dispensary: dict[str, Any],
     *,
     browser: Any = None,
+    context_pool: ContextPool | None = None,
+    detection: DetectionConfig | None = None,
+    archive: RawArchive | None = None,
 ) -> dict[str, Any]:
     """Core scrape logic for a single site (no timeout wrapper).
 
     If *browser* is provided, passes it to the scraper so it reuses the
-    shared Chromium instance instead of launching a new one.
+    shared Chromium instance instead of launching a new one; with
+    *context_pool* the scraper also takes a pre-warmed context.
+    *detection* is the run's shared price-cap / brand-tier snapshot
+    (default: the module tables as they are now).  With *archive* the
+    raw products are queued for the run's raw capture archive.
     """
     slug = dispensary["slug"]
     platform = dispensary["platform"]
@@ -1171,346 +776,52 @@ async def _scrape_site_inner(
     if scraper_cls is None:
         return {"slug": slug, "error": f"Unknown platform: {platform}"}
 
-    async with scraper_cls(dispensary, browser=browser) as scraper:
+    scrape_start = time.time()
+    async with scraper_cls(dispensary, browser=browser, context_pool=context_pool) as scraper:
         raw_products = await scraper.scrape()
+        await scraper.persist_session(success=bool(raw_products))
+        if archive is not None:
+            # Queued only — serialising and compression run off the loop.
+            archive.add(
+                dispensary, raw_products,
+                page_url=scraper.page.url,
+                session_restored=scraper.session_restored,
+                scrape_seconds=round(time.time() - scrape_start, 1),
+            )
 
-    # Parse all raw products using CloudedLogic (single source of truth)
-    logic = CloudedLogic()
-    parsed: list[dict[str, Any]] = []
-    brand_null_count = 0
-    unmatched_brand_names: list[str] = []
-
-    for rp in raw_products:
-        # Ensure source_platform is always set (Jane scraper sets it;
-        # other scrapers rely on the dispensary config).
-        if "source_platform" not in rp:
-            rp["source_platform"] = platform
-
-        # Clean raw inputs before CloudedLogic parsing
-        raw_name = _clean_product_name(rp.get("name", ""))
-        raw_text = rp.get("raw_text", "")
-        price_text = rp.get("price", "")
-
-        # ── OFFER-CLEAN TEXT for brand & category detection ─────────
-        # Bundle/offer text in raw_text and price_text can mention OTHER
-        # brands (e.g. "3/$60 grassroots, &shine, haze") and OTHER
-        # category keywords (e.g. "3/$60 1g Carts & Wax" — "Carts"
-        # triggers vape detection, blocking concentrates).
-        # We detect brand and category on CLEAN text first, then let
-        # parse_product handle price/weight on the full text.
-        stripped_raw = _strip_offer_text(raw_text)
-        clean_text = f"{raw_name} {stripped_raw}"
-
-        # Brand priority: scraped element > URL > raw_text label > product name > clean text
-        # Some scrapers (Dutchie) extract brand from a dedicated card element
-        # (e.g. "ROVE" label above the product title) — highest confidence.
-        scraped_brand = rp.get("scraped_brand", "")
-        brand = logic.detect_brand(scraped_brand) if scraped_brand else None
-        if not brand:
-            product_url = rp.get("product_url", "")
-            brand = _extract_brand_from_url(product_url)
-        if not brand:
-            # Check for a standalone brand label in raw_text lines FIRST.
-            # Many platforms (Carrot/ShowGrow) put the brand in a separate
-            # DOM element (<span>AMA</span>) — the full line equals the
-            # brand name.  This is higher-confidence than name-based
-            # detection because it avoids brand/strain confusion (e.g.
-            # "Runtz" is a strain in "AMA Runtz Cured Resin", not the
-            # Runtz brand).
-            label_brand = _detect_brand_from_raw_text_lines(raw_text, None, logic)
-            if label_brand:
-                brand = label_brand
-        if not brand:
-            brand = logic.detect_brand(raw_name)
-        if not brand:
-            brand = logic.detect_brand(clean_text)
-        # Brand conflict resolution: if brand was detected from the product
-        # name and a DIFFERENT brand appears as a standalone label in the
-        # raw_text, prefer the raw_text brand.  This handles the case where
-        # the product name starts with a strain that's also a brand name
-        # (e.g. "Runtz Cured Resin" where Runtz is a strain sold by AMA).
-        if brand and not scraped_brand:
-            label_brand = _detect_brand_from_raw_text_lines(raw_text, brand, logic)
-            if label_brand:
-                brand = label_brand
-
-        # Track unmatched brands for data enrichment metrics
-        if not brand:
-            brand_null_count += 1
-            # Capture the raw name for frequency analysis — the first
-            # word(s) before a dash/pipe are often the brand name that
-            # our brand DB is missing.
-            candidate = re.split(r'\s*[-|–—]\s*', raw_name, maxsplit=1)[0].strip()
-            if candidate and len(candidate) > 2:
-                unmatched_brand_names.append(candidate)
-
-        # Category: detect from clean text (no offer keyword pollution)
-        category = logic.detect_category(clean_text)
-
-        # Scraped category override: when the platform scraper extracted
-        # a category label directly from the product card (e.g. Dutchie
-        # cards show "Pre-Roll", "Flower", etc.), trust it over text-based
-        # detection — it's the dispensary's own classification.
-        # Only override when text detection gave a DIFFERENT answer or
-        # landed on "other" (meaning no keywords matched).
-        scraped_category = rp.get("scraped_category", "")
-        if scraped_category and scraped_category != category:
-            # If text detection found a specific category AND the scraped
-            # category disagrees, the scraped label wins — it's directly
-            # from the dispensary's structured data.
-            if category in ("other", "skip"):
-                category = scraped_category
-            elif scraped_category == "preroll" and category == "flower":
-                # Common misclassification: dispensary lists a preroll
-                # product but text detection picks up "flower" from
-                # stray text.  Trust the scraped label.
-                category = "preroll"
-            elif scraped_category != "other":
-                category = scraped_category
-
-        # Concentrate correction: if category landed on "vape" but the
-        # product text has concentrate format keywords (badder, wax, live
-        # resin…) and no vape keywords (cart, pod…), it's a concentrate.
-        # Check both raw_name and clean_text so surrounding scraped text
-        # with concentrate keywords also triggers reclassification.
-        if category == "vape":
-            check_text = clean_text or raw_name or ""
-            if (
-                _CONCENTRATE_NAME_KEYWORDS.search(check_text)
-                and not _VAPE_NAME_KEYWORDS.search(check_text)
-            ):
-                category = "concentrate"
-            # If the product name itself has NO vape keywords, the "vape"
-            # classification likely came from page-context text (navigation,
-            # other products on the page, etc.).  Re-detect category from
-            # just the product name for a more accurate result.
-            elif not _VAPE_NAME_KEYWORDS.search(raw_name):
-                name_category = logic.detect_category(raw_name)
-                if name_category not in ("other", "vape"):
-                    category = name_category
-
-
-        # Parse combined text for price, weight, THC.
-        # IMPORTANT: Strip offer/bundle text from raw_text to prevent deal
-        # copy (e.g. "$35 1/4 oz. Select Strains") from polluting weight
-        # and price parsing.  The offer text mentions bundle pricing and
-        # fractional-oz weights that belong to the PROMOTION, not the
-        # actual product.  Without stripping, "1/4" gets parsed as 7g
-        # and "$35" gets parsed as the original price — both wrong.
-        stripped_raw_for_parse = _strip_offer_text(raw_text)
-        text = f"{raw_name} {stripped_raw_for_parse} {price_text}"
-        product = logic.parse_product(text, dispensary["name"])
-        if product is None:
-            continue
-
-        # Override parse_product's brand and category with our clean results
-        if brand:
-            product["brand"] = brand
-        if category and category != 'other':
-            product["category"] = category
-
-        weight_value, weight_unit = _split_weight(product.get("weight"))
+    return _process_site(dispensary, raw_products, detection=detection)
 
-        # "Other" → flower fallback: products with flower-typical weights
-        # (3.5g, 7g, 14g, 28g) that didn't match any category keyword are
-        # almost certainly flower.  "Golden State Banana 3.5g" has no
-        # keyword but the weight is unambiguously flower.
-        if category == "other" and weight_value is not None:
-            try:
-                wv = float(weight_value)
-                if wv in (3.5, 7.0, 14.0, 28.0):
-                    category = "flower"
-                    product["category"] = "flower"
-            except (ValueError, TypeError):
-                pass
 
-        # ── Flower @ 1g → preroll heuristic ────────────────────────
-        # In cannabis retail, 1g flower is almost never sold — it's
-        # the standard weight for a single preroll.  When category
-        # is "flower" and weight is exactly 1g, reclassify as preroll
-        # UNLESS the product name explicitly contains "flower" or
-        # "bud" (confirming it really is flower).
-        if category == "flower" and weight_unit == "g":
-            try:
-                wv = float(weight_value) if weight_value is not None else None
-                if wv == 1.0 and not re.search(r"\b(?:flower|bud)\b", raw_name, re.IGNORECASE):
-                    category = "preroll"
-                    product["category"] = "preroll"
-            except (ValueError, TypeError):
-                pass
-
-        # Normalize mg → g for vape/concentrate (physical weight, not THC)
-        # "1000mg" vape cart → 1.0g, "850mg" pod → 0.85g
-        effective_cat = category if (category and category != 'other') else product.get("category")
-        if (
-            weight_unit == "mg"
-            and weight_value is not None
-            and effective_cat in ("vape", "concentrate")
-        ):
-            weight_value = round(weight_value / 1000, 3)
-            weight_unit = "g"
-
-        # --- Build a clean display name from the scraper's raw_name ------
-        # CloudedLogic's product_name is derived from the full combined text
-        # blob (name + raw_text + price), which is often messy and causes
-        # brand name duplication.  Instead, use raw_name as the base and
-        # strip clutter (brand, weight prefix, strain type, bundle text,
-        # redundant category words, marketing junk) to leave just the
-        # strain/product name.
-        brand = product.get("brand")
-        display_name = raw_name
-
-        # 1. Strip weight prefix: "3.5g | Blue Maui" → "Blue Maui"
-        if display_name:
-            display_name = _RE_WEIGHT_PREFIX.sub("", display_name).strip()
-
-        # 2. Strip brand name from ANYWHERE in the name (not just prefix)
-        if brand and display_name:
-            display_name = re.sub(
-                rf'\b{re.escape(brand)}\b\s*[-:|]?\s*',
-                '', display_name, flags=re.IGNORECASE,
-            ).strip()
-            # Also strip known abbreviations for this brand
-            for abbr in _BRAND_ABBREVIATIONS.get(brand, []):
-                display_name = re.sub(
-                    rf'\b{re.escape(abbr)}\b\s*[-:|]?\s*',
-                    '', display_name, flags=re.IGNORECASE,
-                ).strip()
-            if len(display_name) < 3:
-                # The product name was essentially just the brand (e.g.
-                # "Cookies" when the card heading is the brand label).
-                # Try to extract a meaningful strain/product name from
-                # the raw_text lines instead of falling back to the brand.
-                display_name = _extract_strain_from_raw_text(
-                    raw_text, brand, raw_name,
-                )
+def _process_site(
+    dispensary: dict[str, Any],
+    raw_products: list[dict[str, Any]],
+    *,
+    detection: DetectionConfig | None = None,
+    keep_outputs: bool = False,
+) -> dict[str, Any]:
+    """Parse, classify, score and upsert one site's raw products.
 
-        display_name = display_name or raw_name or "Unknown"
-
-        # 3. Strip strain type from anywhere: "Blue Maui Sativa" → "Blue Maui"
-        display_name = _RE_STRAIN_TYPE.sub("", display_name).strip()
-
-        # 4. Strip bundle quantity text: "3 Eighths" → ""
-        display_name = _RE_BUNDLE_QTY.sub("", display_name).strip()
-
-        # 5. Strip redundant category words from display name
-        effective_cat = category if (category and category != 'other') else product.get("category")
-        if effective_cat == "preroll":
-            display_name = re.sub(
-                r"\s*\b(?:Pre[-\s]?Rolls?|Prerolls?)\b", "",
-                display_name, flags=re.IGNORECASE,
-            ).strip()
-        if effective_cat == "vape":
-            display_name = _RE_VAPE_WORDS.sub("", display_name).strip()
-        if effective_cat == "concentrate":
-            display_name = _RE_CONCENTRATE_FORMAT.sub("", display_name).strip()
-        if effective_cat == "flower":
-            display_name = re.sub(
-                r"\b(?:Flower|Bud)\b", "", display_name, flags=re.IGNORECASE,
-            ).strip()
-
-        # 6. Strip promotional bundle text: "Gummies 2 For $35 All Dis…"
-        display_name = _RE_PROMO_BUNDLE.sub("", display_name).strip()
-
-        # 7. Strip trailing pipe + weight for edibles: "Drink Loud | Cucumber Haze | 100mg"
-        display_name = _RE_TRAILING_PIPE_WEIGHT.sub("", display_name).strip()
-
-        # 8. Strip inline weight values redundant with the weight field
-        display_name = _RE_BRACKET_WEIGHT.sub("", display_name).strip()
-        display_name = _RE_INLINE_WEIGHT.sub("", display_name).strip()
-
-        # 9. Strip marketing junk: "High Octane Xtreme" etc.
-        display_name = _RE_MARKETING_JUNK.sub("", display_name).strip()
-
-        # 10. Strip parenthetical weight and strain-type indicators
-        # "(100mg)" duplicates the weight field; "(I)"/"(S)"/"(H)" are
-        # strain-type shorthand already captured in the strain_type field.
-        display_name = re.sub(
-            r"\s*\(\s*\d+\s*mg\s*\)", "", display_name, flags=re.IGNORECASE,
-        )
-        display_name = re.sub(
-            r"\s*\(\s*[ISH]\s*\)", "", display_name, flags=re.IGNORECASE,
-        )
+    Everything after the browser: shared by the live scrape and
+    ``--replay``.  With *keep_outputs* the result also carries the
+    site's product rows and deals as a replay snapshot.
+    """
+    slug = dispensary["slug"]
 
-        # 11. Strip standalone "mg" weight: "100mg", "200mg"
-        display_name = re.sub(
-            r"\b\d+\.?\d*\s*mg\b", "", display_name, flags=re.IGNORECASE,
-        ).strip()
-
-        # 12. Strip THC:CBD ratio text: "2:1", "[THC:CBN]"
-        display_name = _RE_RATIO_BRACKET.sub("", display_name).strip()
-
-        # 13. Strip inline strain-type indicators: "I/H", "I/S", "S/H",
-        # "(I/H)", standalone "I", "S", "H" at end of name.  These are
-        # abbreviations for Indica/Sativa/Hybrid that leak from product
-        # card DOM elements (common on Carrot/ShowGrow menus).
-        display_name = re.sub(
-            r"\s*\(?\s*[ISH]\s*/\s*[ISH]\s*\)?\s*", " ",
-            display_name,
-        ).strip()
-
-        # 14. Strip empty parentheses "()" left after weight/content stripping
-        display_name = re.sub(r"\s*\(\s*\)\s*", " ", display_name).strip()
-
-        display_name = re.sub(r"\s{2,}", " ", display_name).strip()
-        display_name = display_name.strip(" -–—|/") or raw_name or "Unknown"
-
-        # Run product classifier early so category corrections (e.g.
-        # "All-In-One" reclassified from concentrate → vape) are applied
-        # BEFORE deal detection scoring.  Without this, the deal detector
-        # uses the wrong category for price caps and scoring.
-        classification = classify_product(display_name, brand, effective_cat, weight_value=weight_value)
-        if classification["corrected_category"]:
-            category = classification["corrected_category"]
-            effective_cat = category
-
-        # Disposable subtype fallback: if the product is "vape" but no subtype
-        # was detected from the cleaned display_name, check the original
-        # raw_name and raw_text for disposable signals.  This catches products
-        # listed under "Disposable" tabs whose cleaned names are generic
-        # (e.g. "Brand Strain 0.5g" from a Dutchie "Disposable" category).
-        if (
-            effective_cat == "vape"
-            and classification["product_subtype"] is None
-        ):
-            _raw_check = f"{raw_name} {raw_text}".lower()
-            if re.search(
-                r"\b(?:disposable|all[- ]?in[- ]?one|aio|rtu|"
-                r"ready[- ]?to[- ]?use|draw[- ]?activated|"
-                r"built[- ]?in[- ]?battery)\b",
-                _raw_check,
-            ):
-                classification["product_subtype"] = "disposable"
-            elif re.search(r"\bcartridges?\b|\bcarts?\b|\b510\b", _raw_check):
-                classification["product_subtype"] = "cartridge"
-            elif re.search(r"\bpods?\b", _raw_check):
-                classification["product_subtype"] = "pod"
-
-        # Map CloudedLogic output to the DB schema expected by _upsert_products
-        enriched: dict[str, Any] = {
-            **rp,
-            "name": display_name,
-            "brand": brand,
-            "category": category if category and category != "other" else product.get("category"),
-            "original_price": product.get("original_price"),
-            "sale_price": product.get("deal_price"),
-            "discount_percent": product.get("discount_percent"),
-            "weight_value": weight_value,
-            "weight_unit": weight_unit,
-            "thc_percent": product.get("thc_percent"),
-            "cbd_percent": None,
-            "raw_text": rp.get("raw_text", ""),
-            "dispensary_id": slug,
-            "is_infused": classification["is_infused"],
-            "product_subtype": classification["product_subtype"],
-        }
-        parsed.append(enriched)
+    # Parse all raw products using CloudedLogic (single source of truth).
+    # Products seen before (same text, same rules) come from the parse cache.
+    parsed, brand_null_count, unmatched_brand_names = normalize_products(
+        raw_products, dispensary, cache=get_parse_cache(),
+    )
 
     # --- Deal detection pipeline (hard filter → score → top-100 select) ---
-    # detect_deals returns only the curated top deals with deal_score set.
-    # All other products default to deal_score = 0.
-    deals = detect_deals(parsed)
-    report_data = get_last_report_data()
+    # top_deals holds only the curated deals with deal_score set.
+    # All other products default to deal_score = 0.  Detection leaves
+    # its input alone, so the 1g flower → preroll fix is applied here
+    # for the upserted rows too.
+    parsed = correct_preroll_categories(parsed)
+    detection_result = run_deal_detection(parsed, detection)
+    deals = detection_result.top_deals
+    report_data = detection_result.report_data()
 
     # Write deal_score back onto parsed products so it's upserted into the
     # products table (the frontend reads deal_score from products directly).
@@ -1526,6 +837,14 @@ async def _scrape_site_inner(
     product_rows = _upsert_products(slug, parsed)
     deal_count = _insert_deals(slug, deals, product_rows)
 
+    # The run report keeps a few scored deals (its top-K sections) until
+    # the end of the run; the raw text was only needed for filtering and
+    # the DB row.
+    for d in detection_result.top_deals:
+        d.pop("raw_text", None)
+    for d in detection_result.cut_deals:
+        d.pop("raw_text", None)
+
     logger.info(
         "[%s] %d products, %d deals", slug, len(parsed), deal_count
     )
@@ -1536,7 +855,7 @@ async def _scrape_site_inner(
         unmatched_freq[key] = unmatched_freq.get(key, 0) + 1
     top_unmatched = sorted(unmatched_freq.keys(), key=lambda k: unmatched_freq[k], reverse=True)[:10]
 
-    return {
+    result = {
         "slug": slug,
         "products": len(parsed),
         "deals": deal_count,
@@ -1545,13 +864,19 @@ async def _scrape_site_inner(
         "_brand_null_count": brand_null_count,
         "_top_unmatched_brands": top_unmatched,
     }
+    if keep_outputs:
+        result["_outputs"] = site_outputs(product_rows, deals)
+    return result
 
 
 async def scrape_site(
     dispensary: dict[str, Any],
     *,
     browser: Any = None,
+    context_pool: ContextPool | None = None,
     deadline: float = 0,
+    detection: DetectionConfig | None = None,
+    archive: RawArchive | None = None,
 ) -> dict[str, Any]:
     """Scrape a single dispensary with timeout and retry.
 
@@ -1563,6 +888,7 @@ async def scrape_site(
     When *deadline* is set (epoch timestamp), retries are skipped if
     the job is running low on time and per-attempt timeouts are capped
     to the remaining budget so individual sites can't overrun the job.
+    *detection* and *archive* are handed to every attempt unchanged.
     """
     slug = dispensary["slug"]
     best_result = None
@@ -1600,7 +926,10 @@ async def scrape_site(
         )
         try:
             result = await asyncio.wait_for(
-                _scrape_site_inner(dispensary, browser=browser),
+                _scrape_site_inner(
+                    dispensary, browser=browser, context_pool=context_pool,
+                    detection=detection, archive=archive,
+                ),
                 timeout=timeout,
             )
             product_count = result.get("products", 0)
@@ -1771,8 +1100,16 @@ def _already_scraped_today() -> bool:
     return bool(result.data)
 
 
-async def run(slug_filter: str | None = None) -> None:
-    """Run the full scrape pipeline."""
+async def run(
+    slug_filter: str | None = None,
+    *,
+    dispensaries: list[dict[str, Any]] | None = None,
+) -> None:
+    """Run the full scrape pipeline.
+
+    ``dispensaries`` replaces the configured site list (the orchestrator
+    load test points a generated list at a local mock server).
+    """
     start = time.time()
 
     # Idempotency: skip if already scraped today (unless FORCE_RUN is set).
@@ -1817,7 +1154,15 @@ async def run(slug_filter: str | None = None) -> None:
     except Exception as exc:
         logger.debug("Approved brand loading skipped: %s", exc)
 
-    dispensaries = _get_active_dispensaries(slug_filter)
+    # One read-only snapshot of caps and brand tiers, shared by every site.
+    detection = DetectionConfig()
+
+    # Per-pattern regex timing — installed once the brand patterns are final.
+    if get_regex_profile() is not None:
+        logger.info("Regex profiling enabled (REGEX_PROFILE)")
+
+    if dispensaries is None:
+        dispensaries = _get_active_dispensaries(slug_filter)
 
     # ── Platform interleaving ──────────────────────────────────────────
     # Without this, dispensaries are processed in config order (all Dutchie
@@ -1865,6 +1210,8 @@ async def run(slug_filter: str | None = None) -> None:
     )
     run_id = _create_run()
     deadline = start + _JOB_BUDGET_SEC
+    # Raw scraper output for offline investigation and replay.
+    archive = RawArchive(run_id) if RAW_ARCHIVE_ENABLED else None
     logger.info("  DEADLINE:     %.0f min from now", _JOB_BUDGET_SEC / 60)
 
     # Initialize ALL result trackers upfront so the finally block can
@@ -1875,10 +1222,14 @@ async def run(slug_filter: str | None = None) -> None:
     total_deals = 0
     total_brand_null = 0
     total_price_cap_rejects = 0
-    all_unmatched_brands: list[str] = []
-    all_top_deals: list[dict[str, Any]] = []
-    all_cut_deals: list[dict[str, Any]] = []
-    site_reports: list[dict[str, Any]] = []
+    unmatched_brands: Counter[str] = Counter()
+    # Report sections, folded in as each site finishes (deal lists are
+    # dropped once counted; per-site detail spills to disk).
+    report = RunReport()
+    # Region-wide top deals, fed each site's scored candidates as it
+    # finishes and selected under the same detection config.
+    region_feed = RegionFeed(config=detection)
+    region_deals: list[dict[str, Any]] | None = None
     status = "failed"
 
     try:
@@ -1909,7 +1260,9 @@ async def run(slug_filter: str | None = None) -> None:
                     len(pending_dispensaries),
                 )
                 for d in pending_dispensaries:
-                    all_results.append((d, {"slug": d["slug"], "error": "Skipped — job deadline reached"}))
+                    skipped = {"slug": d["slug"], "error": "Skipped — job deadline reached"}
+                    report.add_site(d, skipped)
+                    all_results.append((d, skipped))
                 break
 
             # Launch (or relaunch) the shared browser
@@ -1930,6 +1283,13 @@ async def run(slug_filter: str | None = None) -> None:
                     browser_attempt, _MAX_BROWSER_RECOVERIES, len(pending_dispensaries),
                 )
 
+            # Contexts for the pending regions are built in the background
+            # while the first sites scrape, so later sites skip setup.
+            context_pool = None
+            if CONTEXT_POOL_ENABLED:
+                context_pool = ContextPool(browser, new_stealth_context)
+                context_pool.prewarm(d.get("region") for d in pending_dispensaries)
+
             # Semaphores are re-created per attempt (old ones may be in
             # inconsistent state after a crash cancelled their waiters).
             global_semaphore = asyncio.Semaphore(concurrency)
@@ -1965,7 +1325,9 @@ async def run(slug_filter: str | None = None) -> None:
                         site_start = time.time()
                         logger.info("[START] %s (%s)", dispensary["name"], plat)
                         result = await scrape_site(
-                            dispensary, browser=browser, deadline=deadline,
+                            dispensary, browser=browser,
+                            context_pool=context_pool, deadline=deadline,
+                            detection=detection, archive=archive,
                         )
                         elapsed_s = time.time() - site_start
                         label = "DONE" if not result.get("error") else "FAIL"
@@ -1974,6 +1336,13 @@ async def run(slug_filter: str | None = None) -> None:
                             label, dispensary["name"], elapsed_s,
                             result.get("products", 0),
                         )
+                        rd = result.get("_report_data", {})
+                        if not result.get("error"):
+                            region_feed.add(rd.get("candidates", []))
+                        report.add_site(dispensary, result)
+                        rd.pop("top_deals", None)
+                        rd.pop("cut_deals", None)
+                        rd.pop("candidates", None)
                         return result
 
             # Run pending sites concurrently (bounded by semaphore)
@@ -1982,6 +1351,15 @@ async def run(slug_filter: str | None = None) -> None:
                 return_exceptions=True,
             )
 
+            if context_pool is not None:
+                await context_pool.close()
+                pool_stats = context_pool.stats()
+                logger.info(
+                    "Context pool: %d created, %d warm / %d cold hand-outs, %d reused, %d destroyed",
+                    pool_stats["created"], pool_stats["warm_hits"], pool_stats["cold_misses"],
+                    pool_stats["reused"], pool_stats["destroyed"],
+                )
+
             # Close browser (may already be dead after a crash — ignore errors)
             try:
                 await browser.close()
@@ -2026,10 +1404,9 @@ async def run(slug_filter: str | None = None) -> None:
                         crash_count,
                     )
                     for disp in next_pending:
-                        all_results.append((
-                            disp,
-                            {"slug": disp["slug"], "error": "Browser crashed — recovery attempts exhausted"},
-                        ))
+                        crashed = {"slug": disp["slug"], "error": "Browser crashed — recovery attempts exhausted"}
+                        report.add_site(disp, crashed)
+                        all_results.append((disp, crashed))
                 break
 
         # Process results (from all browser attempts, merged)
@@ -2037,15 +1414,7 @@ async def run(slug_filter: str | None = None) -> None:
             if isinstance(result, Exception):
                 logger.error("Unhandled exception: %s", result)
                 sites_failed.append({"slug": "unknown", "error": str(result)})
-                site_reports.append({
-                    "slug": disp["slug"],
-                    "name": disp["name"],
-                    "platform": disp["platform"],
-                    "error": str(result),
-                    "products": 0,
-                    "deals": 0,
-                    "_report_data": {},
-                })
+                report.add_site(disp, {"error": str(result)})
                 continue
             slug = result.get("slug", disp["slug"])
             rd = result.get("_report_data", {})
@@ -2057,20 +1426,9 @@ async def run(slug_filter: str | None = None) -> None:
                 sites_scraped.append(slug)
                 total_products += result.get("products", 0)
                 total_deals += result.get("deals", 0)
-                all_top_deals.extend(rd.get("top_deals", []))
-                all_cut_deals.extend(rd.get("cut_deals", []))
                 total_brand_null += result.get("_brand_null_count", 0)
-                all_unmatched_brands.extend(result.get("_top_unmatched_brands", []))
+                unmatched_brands.update(result.get("_top_unmatched_brands", []))
                 total_price_cap_rejects += rd.get("price_cap_rejects", 0)
-            site_reports.append({
-                "slug": slug,
-                "name": disp["name"],
-                "platform": disp["platform"],
-                "error": result.get("error"),
-                "products": result.get("products", 0),
-                "deals": result.get("deals", 0),
-                "_report_data": rd,
-            })
 
         # Determine final status
         if not sites_failed:
@@ -2117,7 +1475,6 @@ async def run(slug_filter: str | None = None) -> None:
         logger.info("  Duration:    %.1f min", elapsed / 60)
 
         # Per-platform breakdown
-        from collections import Counter
         platform_ok: Counter[str] = Counter()
         platform_products: Counter[str] = Counter()
         for d in dispensaries:
@@ -2144,16 +1501,8 @@ async def run(slug_filter: str | None = None) -> None:
         logger.info("  └─────────────────────────────────────────────┘")
 
         # Per-region product breakdown (expansion state tracking)
-        region_products: Counter[str] = Counter()
-        region_sites: Counter[str] = Counter()
-        for sr in site_reports:
-            disp_region = "unknown"
-            for d in dispensaries:
-                if d["slug"] == sr["slug"]:
-                    disp_region = d.get("region", "unknown")
-                    break
-            region_products[disp_region] += sr.get("products", 0)
-            region_sites[disp_region] += 1
+        region_products = report.region_products
+        region_sites = report.region_sites
 
         if len(region_products) > 1:
             logger.info("")
@@ -2171,18 +1520,14 @@ async def run(slug_filter: str | None = None) -> None:
                 )
 
         # Top 10 sites by product count (helps identify high-yield dispensaries)
-        sorted_sites = sorted(
-            [sr for sr in site_reports if sr.get("products", 0) > 0],
-            key=lambda x: x.get("products", 0),
-            reverse=True,
-        )[:10]
+        sorted_sites = report.top_sites()
         if sorted_sites:
             logger.info("")
             logger.info("  Top 10 sites by product count:")
-            for sr in sorted_sites:
+            for site_slug, site_products, site_platform in sorted_sites:
                 logger.info(
                     "    %-30s %4d products  (%s)",
-                    sr["slug"][:30], sr.get("products", 0), sr["platform"],
+                    site_slug[:30], site_products, site_platform,
                 )
 
         if sites_failed:
@@ -2211,6 +1556,67 @@ async def run(slug_filter: str | None = None) -> None:
         if deadline_skips:
             logger.info("  Deadline:   %d sites skipped (budget exhausted)", deadline_skips)
         logger.info("  Duration:   %.1f min", elapsed / 60)
+
+        # ─── Shared static-asset cache (hit rate + bandwidth saved) ───
+        asset_stats = None
+        asset_cache = get_asset_cache()
+        if asset_cache is not None:
+            asset_cache.flush()
+            asset_stats = asset_cache.stats()
+            logger.info(
+                "  Assets:     %d/%d cache hits (%.1f%%), %.1f MB saved, %.1f MB cached",
+                asset_stats["hits"], asset_stats["requests"], asset_stats["hit_rate"],
+                asset_stats["bytes_saved"] / 1_048_576, asset_stats["size_bytes"] / 1_048_576,
+            )
+
+        # ─── Parse cache (products normalized without re-parsing) ─────
+        parse_stats = None
+        parse_cache = get_parse_cache()
+        if parse_cache is not None:
+            parse_cache.flush()
+            parse_stats = parse_cache.stats()
+            logger.info(
+                "  Parsing:    %d/%d products from parse cache (%.1f%%), %d entries",
+                parse_stats["hits"], parse_stats["lookups"], parse_stats["hit_rate"],
+                parse_stats["entries"],
+            )
+
+        # ─── Raw capture archive (drained off the hot path) ───────────
+        if archive is not None:
+            archive_stats = archive.close()
+            logger.info(
+                "  Archive:    %d sites, %d raw products, %.1f MB → %.1f MB gzip%s",
+                archive_stats["sites"], archive_stats["products"],
+                archive_stats["bytes_raw"] / 1_048_576, archive_stats["bytes_written"] / 1_048_576,
+                f", {archive_stats['errors']} write errors" if archive_stats["errors"] else "",
+            )
+
+        # ─── Regex profile (REGEX_PROFILE=true) ───────────────────────
+        regex_profile = get_regex_profile()
+        if regex_profile is not None:
+            calls, seconds, n_patterns = regex_profile.totals()
+            logger.info("  Regex:      %.1fs in %d calls across %d patterns", seconds, calls, n_patterns)
+            for name, n_calls, secs, chars in regex_profile.top(REGEX_PROFILE_TOP):
+                logger.info("    %8.3fs %9d calls %12d chars  %s", secs, n_calls, chars, name)
+
+        # ─── Region feed (top deals across every site) ────────────────
+        feed_stats = region_feed.stats()
+        if feed_stats["sites"]:
+            try:
+                if REGION_FEED_PATH:
+                    region_deals = region_feed.save(REGION_FEED_PATH, REGION)
+                else:
+                    region_deals = region_feed.feed()
+            except Exception as exc:
+                logger.warning("Failed to write region feed: %s", exc)
+            else:
+                logger.info(
+                    "  Region:     %d feed deals from %d candidates (%d sites, %d duplicates, %d evicted)%s",
+                    len(region_deals), feed_stats["candidates"], feed_stats["sites"],
+                    feed_stats["duplicates"], feed_stats["evicted"],
+                    f" → {REGION_FEED_PATH}" if REGION_FEED_PATH else "",
+                )
+
         if sites_failed:
             logger.info("  Failed:")
             for f in sites_failed:
@@ -2255,20 +1661,13 @@ async def run(slug_filter: str | None = None) -> None:
                 logger.debug("Shard coverage check failed: %s", exc)
 
         # ─── Aggregate unmatched brand candidates across all sites ────
-        _unmatched_freq: dict[str, int] = {}
-        for name in all_unmatched_brands:
-            _unmatched_freq[name] = _unmatched_freq.get(name, 0) + 1
-        top_unmatched = sorted(
-            _unmatched_freq.keys(),
-            key=lambda k: _unmatched_freq[k],
-            reverse=True,
-        )[:20]
+        top_unmatched = [name for name, _ in unmatched_brands.most_common(20)]
 
         # ─── Daily Metrics (pipeline quality tracking) ───────────────
         try:
             collect_daily_metrics(
                 db,
-                all_top_deals,
+                report.top,
                 run_id=run_id,
                 region=REGION,
                 total_products=total_products,
@@ -2305,104 +1704,157 @@ async def run(slug_filter: str | None = None) -> None:
 
         # ─── Detailed Deal Report ─────────────────────────────────────
         try:
-            _log_deal_report(all_top_deals, all_cut_deals)
+            _log_deal_report(report)
         except Exception as exc:
             logger.warning("Failed to log deal report: %s", exc)
 
         # ─── Enhanced Scrape Summary (GitHub Actions readable) ─────
         try:
             _log_scrape_summary(
-                site_reports,
-                all_top_deals,
-                all_cut_deals,
+                report,
                 sites_failed=sites_failed,
                 total_products=total_products,
                 total_deals=total_deals,
                 elapsed_sec=elapsed,
+                asset_stats=asset_stats,
+                parse_stats=parse_stats,
+                region_feed=region_deals,
             )
         except Exception as exc:
             logger.warning("Failed to write scrape summary: %s", exc)
+        report.close()
 
 
-def _log_deal_report(
-    top_deals: list[dict[str, Any]],
-    cut_deals: list[dict[str, Any]],
-) -> None:
-    """Log a detailed deal report: top 3 per category + 10 cut deals."""
-    if not top_deals and not cut_deals:
-        return
+# ---------------------------------------------------------------------------
+# Offline replay (python main.py --replay)
+# ---------------------------------------------------------------------------
 
-    logger.info("")
-    logger.info("=" * 60)
-    logger.info("DEAL REPORT — Human Review Summary")
-    logger.info("=" * 60)
+_replay_detection: DetectionConfig | None = None
 
-    # --- Top 3 included deals per category ---
-    from collections import defaultdict
-
-    by_cat: dict[str, list[dict[str, Any]]] = defaultdict(list)
-    for d in top_deals:
-        cat = d.get("category", "other")
-        # Split vape into vape (carts/pods) and disposable for reporting
-        if cat == "vape" and d.get("product_subtype") == "disposable":
-            cat = "disposable"
-        by_cat[cat].append(d)
-
-    cat_order = ["flower", "vape", "disposable", "edible", "concentrate", "preroll", "other"]
-    for cat in cat_order:
-        deals = by_cat.get(cat, [])
-        if not deals:
-            continue
-        deals.sort(key=lambda x: x.get("deal_score", 0), reverse=True)
-        logger.info("")
-        logger.info("  [%s] %d deals included — Top 3:", cat.upper(), len(deals))
-        for i, d in enumerate(deals[:3], 1):
-            name = d.get("name", "?")[:50]
-            brand = d.get("brand") or "?"
-            price = d.get("sale_price") or 0
-            orig = d.get("original_price") or 0
-            score = d.get("deal_score", 0)
-            disp = d.get("dispensary_id") or d.get("dispensary") or "?"
-            pct = d.get("discount_percent") or 0
-            logger.info(
-                "    %d. [%d pts] %s — %s | $%.0f (was $%.0f, %d%% off) @ %s",
-                i, score, brand, name, price, orig, pct, disp,
-            )
 
-    # --- 10 highest-scored cut deals (qualified but not selected) ---
-    if cut_deals:
-        cut_deals.sort(key=lambda x: x.get("deal_score", 0), reverse=True)
-        logger.info("")
-        logger.info("  CUT DEALS (scored but not shown) — Top 10 of %d:", len(cut_deals))
-        for i, d in enumerate(cut_deals[:10], 1):
-            name = d.get("name", "?")[:50]
-            brand = d.get("brand") or "?"
-            price = d.get("sale_price") or 0
-            score = d.get("deal_score", 0)
-            cat = d.get("category", "?")
-            disp = d.get("dispensary_id") or d.get("dispensary") or "?"
-            pct = d.get("discount_percent") or 0
-            logger.info(
-                "    %d. [%d pts] %s — %s | $%.0f (%d%% off) [%s] @ %s",
-                i, score, brand, name, price, pct, cat, disp,
-            )
-    else:
-        logger.info("")
-        logger.info("  No cut deals (all scored deals were selected)")
+def _replay_init(dry_run: bool, detection: DetectionConfig) -> None:
+    """Worker setup: the parent's write mode and detection snapshot."""
+    global DRY_RUN, _replay_detection
+    DRY_RUN = dry_run
+    _replay_detection = detection
 
-    logger.info("")
-    logger.info("=" * 60)
+
+def _replay_site(task: tuple[dict[str, Any], str, dict[str, Any]]) -> dict[str, Any]:
+    """Run one archived capture through ``_process_site``."""
+    dispensary, data_path, entry = task
+    site_start = time.time()
+    try:
+        raw_products = read_member(data_path, entry)
+        result = _process_site(
+            dispensary, raw_products, detection=_replay_detection, keep_outputs=True,
+        )
+    except Exception as exc:
+        logger.error("[%s] Replay failed: %s", dispensary["slug"], exc)
+        return {"slug": dispensary["slug"], "error": str(exc)}
+    # Only counts and the snapshot travel back to the parent.
+    return {
+        "slug": result["slug"],
+        "error": None,
+        "raw": len(raw_products),
+        "products": result["products"],
+        "deals": result["deals"],
+        "seconds": time.time() - site_start,
+        "_outputs": result["_outputs"],
+    }
+
+
+def replay(argv: list[str]) -> int:
+    """Reprocess archived raw products through the scrape pipeline.
+
+    Returns the process exit status: 1 when there is nothing to replay
+    or a site failed, 2 for a non-empty diff under ``--fail-on-diff``.
+    """
+    args = build_replay_parser().parse_args(argv)
+    start = time.time()
+    runs = select_runs(root=args.archive_dir, date=args.date, region=args.region, runs=args.run)
+    tasks = replay_tasks(runs, slugs=args.sites.split(",") if args.sites else None)
+    if not tasks:
+        logger.error("Nothing to replay (%d archived runs matched)", len(runs))
+        return 1
+    dry_run = DRY_RUN or not args.write
+    logger.info(
+        "Replaying %d sites from %d archived runs (%s)",
+        len(tasks), len(runs), "dry run" if dry_run else "writing to DB",
+    )
+
+    # Same rule inputs as a live run, fixed before the workers start.
+    try:
+        load_dynamic_caps(db)
+    except Exception as exc:
+        logger.debug("Dynamic price cap loading skipped: %s", exc)
+    try:
+        load_approved_brands(db)
+    except Exception as exc:
+        logger.debug("Approved brand loading skipped: %s", exc)
+    detection = DetectionConfig()
+    get_parse_cache()
+
+    baseline = OutputSnapshot.load(args.diff) if args.diff else None
+    diff = ReplayDiff() if baseline is not None else None
+    outputs = OutputSnapshot() if args.output else None
+    failed: list[str] = []
+    raw_total = product_total = deal_total = 0
+    for result in run_tasks(
+        tasks, _replay_site, workers=args.workers,
+        initializer=_replay_init, initargs=(dry_run, detection),
+    ):
+        slug = result["slug"]
+        if result["error"]:
+            failed.append(slug)
+            continue
+        raw_total += result["raw"]
+        product_total += result["products"]
+        deal_total += result["deals"]
+        if outputs is not None:
+            outputs.add(slug, result["_outputs"])
+        if diff is not None:
+            diff.compare(slug, baseline.get(slug), result["_outputs"])
+
+    elapsed = time.time() - start
+    logger.info(
+        "Replayed %d sites in %.1fs: %d raw → %d products, %d deals (%.0f products/s)%s",
+        len(tasks) - len(failed), elapsed, raw_total, product_total, deal_total,
+        raw_total / elapsed if elapsed else 0,
+        f", {len(failed)} failed: {', '.join(failed[:10])}" if failed else "",
+    )
+    if outputs is not None:
+        outputs.save(args.output)
+        logger.info("Replay outputs written to %s", args.output)
+    if diff is not None:
+        # Baseline sites this replay lacks — unless it was narrowed down.
+        if not (args.sites or args.region):
+            replayed = {task[0]["slug"] for task in tasks}
+            for slug in baseline:
+                if slug not in replayed:
+                    diff.compare(slug, baseline.get(slug), None)
+        for line in diff.lines():
+            logger.info(line)
+        if args.fail_on_diff and diff.changed:
+            return 2
+    return 1 if failed else 0
+
+
+def _log_deal_report(report: RunReport) -> None:
+    """Log a detailed deal report: top 3 per category + 10 cut deals."""
+    for line in report.deal_report_lines():
+        logger.info(line)
 
 
 def _log_scrape_summary(
-    site_reports: list[dict[str, Any]],
-    all_top_deals: list[dict[str, Any]],
-    all_cut_deals: list[dict[str, Any]],
+    report: RunReport,
     *,
     sites_failed: list[dict[str, str]],
     total_products: int,
     total_deals: int,
     elapsed_sec: float,
+    asset_stats: dict[str, Any] | None = None,
+    parse_stats: dict[str, Any] | None = None,
+    region_feed: list[dict[str, Any]] | None = None,
 ) -> None:
     """Write a comprehensive, plain-language scrape summary.
 
@@ -2412,273 +1864,54 @@ def _log_scrape_summary(
       - What deals were selected per store
       - Which brands dominated, which categories are under/over-filled
       - What good deals were cut (and why they were cut)
-    """
-    from collections import Counter, defaultdict
-
-    lines: list[str] = []
-
-    def _w(text: str = "") -> None:
-        lines.append(text)
-
-    _w("=" * 80)
-    _w("SCRAPE SUMMARY")
-    _w("=" * 80)
-    _w(f"  Sites scraped: {sum(1 for s in site_reports if not s.get('error'))}/{len(site_reports)}")
-    _w(f"  Total products: {total_products}")
-    _w(f"  Deals selected: {total_deals}")
-    _w(f"  Runtime: {elapsed_sec / 60:.1f} min")
-    _w()
-
-    # ── 1. FAILED SITES ──────────────────────────────────────────────
-    if sites_failed:
-        _w("-" * 80)
-        _w("FAILED SITES")
-        _w("-" * 80)
-        for f in sites_failed:
-            _w(f"  {f['slug']}: {f['error']}")
-        _w()
-
-    # ── 2. PER-DISPENSARY BREAKDOWN ───────────────────────────────────
-    _w("-" * 80)
-    _w("DEALS BY DISPENSARY")
-    _w("-" * 80)
-
-    # Build a lookup: dispensary_slug → list of selected deals
-    deals_by_disp: dict[str, list[dict[str, Any]]] = defaultdict(list)
-    for d in all_top_deals:
-        disp_id = d.get("dispensary_id") or "unknown"
-        deals_by_disp[disp_id].append(d)
-
-    # Also build cut-deals lookup for per-site "best deal that didn't make it"
-    cut_by_disp: dict[str, list[dict[str, Any]]] = defaultdict(list)
-    for d in all_cut_deals:
-        disp_id = d.get("dispensary_id") or "unknown"
-        cut_by_disp[disp_id].append(d)
-
-    cat_order = ["flower", "vape", "disposable", "edible", "concentrate", "preroll"]
-
-    for sr in sorted(site_reports, key=lambda s: s["name"]):
-        slug = sr["slug"]
-        name = sr["name"]
-        platform = sr["platform"]
-        error = sr.get("error")
-        products = sr.get("products", 0)
-        rd = sr.get("_report_data", {})
-        selected_count = len(deals_by_disp.get(slug, []))
-        passed_hard = rd.get("passed_hard_filter", 0)
-        total_prods = rd.get("total_products", products)
-
-        # Header line
-        if error:
-            _w(f"  {name} ({platform}) — ERROR: {error}")
-            _w()
-            continue
-
-        if selected_count == 0 and products == 0:
-            _w(f"  {name} ({platform}) — 0 products scraped (site may be down or blocked)")
-            _w()
-            continue
-
-        if selected_count == 0:
-            # Explain WHY zero deals were selected
-            reason = _explain_zero_deals(rd, products)
-            _w(f"  {name} ({platform}) — {products} products, 0 deals ({reason})")
-            # Show best cut deal if one exists
-            site_cuts = sorted(
-                cut_by_disp.get(slug, []),
-                key=lambda x: x.get("deal_score", 0),
-                reverse=True,
-            )
-            if site_cuts:
-                best = site_cuts[0]
-                _w(f"    Best cut: ${best.get('sale_price', 0):.0f} "
-                   f"{best.get('brand', '?')} {best.get('name', '?')[:40]} "
-                   f"[{best.get('category', '?')}] score={best.get('deal_score', 0)}")
-            _w()
-            continue
 
-        _w(f"  {name} ({platform}) — {products} products, {selected_count} deals:")
-        # Group this dispensary's deals by category, show top deal per cat
-        site_deals = deals_by_disp[slug]
-        by_cat: dict[str, list[dict[str, Any]]] = defaultdict(list)
-        for d in site_deals:
-            c = d.get("category", "other")
-            if c == "vape" and d.get("product_subtype") == "disposable":
-                c = "disposable"
-            by_cat[c].append(d)
-
-        for cat in cat_order:
-            cat_deals = by_cat.get(cat)
-            if not cat_deals:
-                continue
-            cat_deals.sort(key=lambda x: x.get("deal_score", 0), reverse=True)
-            top = cat_deals[0]
-            brand = top.get("brand") or "?"
-            price = top.get("sale_price") or 0
-            weight = top.get("weight_value") or ""
-            wunit = top.get("weight_unit") or ""
-            weight_str = f" {weight}{wunit}" if weight else ""
-            pct = top.get("discount_percent") or 0
-            source = top.get("source_platform", "")
-            pct_str = f" ({pct:.0f}% off)" if pct else (" (Deal)" if source == "jane" else "")
-            extra = f" +{len(cat_deals) - 1} more" if len(cat_deals) > 1 else ""
-            _w(f"    {cat:12s}: ${price:<6.2f} {brand} {weight_str}{pct_str}{extra}")
-
-        # Show best cut deal for this site
-        site_cuts = sorted(
-            cut_by_disp.get(slug, []),
-            key=lambda x: x.get("deal_score", 0),
-            reverse=True,
-        )
-        if site_cuts:
-            best = site_cuts[0]
-            _w(f"    (best cut): ${best.get('sale_price', 0):.0f} "
-               f"{best.get('brand', '?')} [{best.get('category', '?')}] "
-               f"score={best.get('deal_score', 0)}")
-
-        _w()
-
-    # ── 3. BRAND LEADERBOARD ──────────────────────────────────────────
-    _w("-" * 80)
-    _w("BRAND LEADERBOARD (top 15 by selected deals)")
-    _w("-" * 80)
-    brand_counter: Counter[str] = Counter()
-    brand_disps: dict[str, set[str]] = defaultdict(set)
-    for d in all_top_deals:
-        brand = d.get("brand") or "Unknown"
-        brand_counter[brand] += 1
-        brand_disps[brand].add(d.get("dispensary_id") or "?")
-
-    for brand, count in brand_counter.most_common(15):
-        disp_count = len(brand_disps[brand])
-        _w(f"  {brand:25s}  {count:3d} deals across {disp_count} stores")
-    _w()
-
-    # ── 4. CATEGORY DISTRIBUTION ──────────────────────────────────────
-    from deal_detector import CATEGORY_TARGETS, CATEGORY_MINIMUMS
-
-    _w("-" * 80)
-    _w("CATEGORY DISTRIBUTION (selected vs target)")
-    _w("-" * 80)
-    cat_counter: Counter[str] = Counter()
-    for d in all_top_deals:
-        c = d.get("category", "other")
-        if c == "vape" and d.get("product_subtype") == "disposable":
-            c = "disposable"
-        cat_counter[c] += 1
-
-    for cat in cat_order:
-        actual = cat_counter.get(cat, 0)
-        target = CATEGORY_TARGETS.get(cat, 0)
-        minimum = CATEGORY_MINIMUMS.get(cat, 0)
-        bar = "#" * min(actual, 60)
-        flag = " !! UNDER MIN" if actual < minimum else ""
-        _w(f"  {cat:12s}: {actual:3d}/{target:3d} target  (min {minimum}){flag}  {bar}")
-    other = cat_counter.get("other", 0)
-    if other:
-        _w(f"  {'other':12s}: {other:3d}")
-    _w()
-
-    # ── 4b. VAPE SUBTYPE BREAKDOWN ──────────────────────────────────────
-    # Diagnostic: show how vape products are classified by subtype so we can
-    # catch regressions in disposable detection early.
-    vape_deals = [d for d in all_top_deals if d.get("category") == "vape" or
-                  (d.get("category") == "vape" and d.get("product_subtype") == "disposable")]
-    disp_deals = [d for d in all_top_deals
-                  if d.get("category") == "vape" and d.get("product_subtype") == "disposable"]
-    if vape_deals or disp_deals:
-        _w("  VAPE SUBTYPE BREAKDOWN:")
-        vape_sub_counter: Counter[str] = Counter()
-        for d in all_top_deals:
-            if d.get("category") == "vape":
-                sub = d.get("product_subtype") or "unclassified"
-                vape_sub_counter[sub] += 1
-        for sub, cnt in vape_sub_counter.most_common():
-            _w(f"    {sub:20s}: {cnt:3d}")
-        # Also show how many disposable deals are in the actual selected set
-        selected_disposables = cat_counter.get("disposable", 0)
-        _w(f"    disposable (selected): {selected_disposables:3d} (target: {CATEGORY_TARGETS.get('disposable', 0)})")
-        _w()
-
-    # ── 5. TOP CUT DEALS (almost made it) ─────────────────────────────
-    if all_cut_deals:
-        all_cut_sorted = sorted(all_cut_deals, key=lambda x: x.get("deal_score", 0), reverse=True)
-        _w("-" * 80)
-        _w(f"TOP CUT DEALS ({len(all_cut_deals)} total scored but not shown)")
-        _w("-" * 80)
-        for i, d in enumerate(all_cut_sorted[:10], 1):
-            name = d.get("name", "?")[:45]
-            brand = d.get("brand") or "?"
-            price = d.get("sale_price") or 0
-            score = d.get("deal_score", 0)
-            cat = d.get("category", "?")
-            disp = d.get("dispensary_id") or "?"
-            pct = d.get("discount_percent") or 0
-            pct_str = f" {pct:.0f}% off" if pct else ""
-            _w(f"  {i:2d}. [{score:2d} pts] ${price:.0f}{pct_str} {brand} — {name} [{cat}] @ {disp}")
-        _w()
-
-    # ── 6. PLATFORM SUMMARY ───────────────────────────────────────────
-    _w("-" * 80)
-    _w("PLATFORM SUMMARY")
-    _w("-" * 80)
-    platform_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"sites": 0, "ok": 0, "products": 0, "deals": 0})
-    for sr in site_reports:
-        p = sr["platform"]
-        platform_stats[p]["sites"] += 1
-        if not sr.get("error"):
-            platform_stats[p]["ok"] += 1
-            platform_stats[p]["products"] += sr.get("products", 0)
-            platform_stats[p]["deals"] += sr.get("deals", 0)
-    for p, stats in sorted(platform_stats.items()):
-        _w(f"  {p:10s}: {stats['ok']}/{stats['sites']} sites OK, "
-           f"{stats['products']} products, {stats['deals']} deals")
-    _w()
-    _w("=" * 80)
-
-    # Log to Python logger
-    for line in lines:
-        logger.info(line)
-
-    # Write to file for GitHub Actions step summary ($GITHUB_STEP_SUMMARY)
+    Lines are streamed from ``report`` to the log and both summary
+    files as they are produced, never held all at once.
+    """
+    step_summary = summary_file = None
     summary_path = os.environ.get("GITHUB_STEP_SUMMARY")
     if summary_path:
         try:
-            with open(summary_path, "a") as f:
-                f.write("\n```\n")
-                f.write("\n".join(lines))
-                f.write("\n```\n")
-            logger.info("Scrape summary written to $GITHUB_STEP_SUMMARY")
+            step_summary = open(summary_path, "a")
+            step_summary.write("\n```\n")
         except Exception as exc:
             logger.warning("Failed to write step summary: %s", exc)
-
-    # Also write to a standalone file in case GITHUB_STEP_SUMMARY isn't set
+    # Also write a standalone file in case GITHUB_STEP_SUMMARY isn't set
     try:
-        summary_file = Path("scrape_summary.txt")
-        summary_file.write_text("\n".join(lines), encoding="utf-8")
-        logger.info("Scrape summary written to %s", summary_file)
+        summary_file = open("scrape_summary.txt", "w", encoding="utf-8")
     except Exception as exc:
         logger.warning("Failed to write scrape_summary.txt: %s", exc)
+    outputs = [fh for fh in (step_summary, summary_file) if fh is not None]
 
+    try:
+        lines = report.summary_lines(
+            sites_failed=sites_failed,
+            total_products=total_products,
+            total_deals=total_deals,
+            elapsed_sec=elapsed_sec,
+            asset_stats=asset_stats,
+            parse_stats=parse_stats,
+            region_feed=region_feed,
+        )
+        for i, line in enumerate(lines):
+            logger.info(line)
+            for fh in outputs:
+                fh.write(f"\n{line}" if i else line)
+    finally:
+        if step_summary is not None:
+            step_summary.write("\n```\n")
+        for fh in outputs:
+            fh.close()
 
-def _explain_zero_deals(report_data: dict[str, Any], products: int) -> str:
-    """Return a short plain-language reason why a site produced zero deals."""
-    if products == 0:
-        return "0 products scraped"
-
-    total = report_data.get("total_products", products)
-    passed = report_data.get("passed_hard_filter", 0)
-    scored = report_data.get("scored", 0)
-
-    if passed == 0:
-        return f"all {total} failed hard filters (price/discount/brand)"
-    if scored == 0:
-        return f"{passed} passed filters but all failed quality gate"
-    # Deals existed but were all deduped or cut during selection
-    return f"{scored} scored but all cut during selection/dedup"
+    if step_summary is not None:
+        logger.info("Scrape summary written to $GITHUB_STEP_SUMMARY")
+    if summary_file is not None:
+        logger.info("Scrape summary written to %s", summary_file.name)
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["--replay"]:
+        sys.exit(replay(sys.argv[2:]))
     slug_arg = sys.argv[1] if len(sys.argv) > 1 else None
     try:
         asyncio.run(run(slug_arg))
@@ -8,22 +8,79 @@ These metrics power the /api/health endpoint and detect regressions
 Usage from main.py:
     from metrics_collector import collect_daily_metrics
     collect_daily_metrics(db, top_deals, run_id=run_id, ...)
+
+``top_deals`` may be the deal list itself or a ``DealTally`` — the
+running counts main.py keeps while sites finish, so the run never has
+to hold every deal until the end.
 """
 
 from __future__ import annotations
 
 import logging
-import statistics
 from collections import Counter
 from datetime import date
-from typing import Any
+from typing import Any, Iterable, Mapping
 
 logger = logging.getLogger("metrics")
 
 
+class DealTally:
+    """Running counts over a curated deal set.
+
+    Holds a score histogram, the category counts and the distinct
+    brands / dispensaries — everything ``collect_daily_metrics`` reads
+    — so deals can be counted as they arrive and then dropped.
+    """
+
+    __slots__ = ("count", "scores", "categories", "brands", "dispensaries")
+
+    def __init__(self, deals: Iterable[Mapping[str, Any]] = ()) -> None:
+        self.count = 0
+        self.scores: Counter[Any] = Counter()
+        self.categories: Counter[Any] = Counter()
+        self.brands: set[str] = set()
+        self.dispensaries: set[str] = set()
+        for deal in deals:
+            self.add(deal)
+
+    def add(self, deal: Mapping[str, Any]) -> None:
+        self.count += 1
+        self.scores[deal.get("deal_score", 0)] += 1
+        self.categories[deal.get("category", "other")] += 1
+        if deal.get("brand"):
+            self.brands.add(deal["brand"])
+        if deal.get("dispensary_id"):
+            self.dispensaries.add(deal["dispensary_id"])
+
+    def mean_score(self) -> float:
+        return sum(s * n for s, n in self.scores.items()) / self.count if self.count else 0
+
+    def median_score(self) -> float:
+        """Median as ``statistics.median`` would give it over the scores."""
+        if not self.count:
+            return 0
+        lo, hi = (self.count - 1) // 2, self.count // 2
+        seen = 0
+        low = None
+        for score in sorted(self.scores):
+            seen += self.scores[score]
+            if low is None and seen > lo:
+                low = score
+            if seen > hi:
+                return low if lo == hi else (low + score) / 2
+        return 0
+
+    def count_between(self, low: float, high: float | None = None) -> int:
+        """Deals scoring at least *low* and below *high*."""
+        return sum(
+            n for s, n in self.scores.items()
+            if s >= low and (high is None or s < high)
+        )
+
+
 def collect_daily_metrics(
     db: Any,
-    top_deals: list[dict[str, Any]],
+    top_deals: list[dict[str, Any]] | DealTally,
     *,
     run_id: str | None = None,
     region: str = "all",
@@ -41,10 +98,9 @@ def collect_daily_metrics(
     Returns the metrics dict (useful for logging / tests) regardless
     of whether DB write succeeds.
     """
-    scores = [d.get("deal_score", 0) for d in top_deals]
-    categories = Counter(d.get("category", "other") for d in top_deals)
-    brands = {d.get("brand") for d in top_deals if d.get("brand")}
-    dispensaries = {d.get("dispensary_id") for d in top_deals if d.get("dispensary_id")}
+    tally = top_deals if isinstance(top_deals, DealTally) else DealTally(top_deals)
+    scores = tally.scores
+    categories = tally.categories
 
     # Brand detection rate: percentage of total products that got a brand match
     brand_detected = total_products - brand_null_count
@@ -61,7 +117,7 @@ def collect_daily_metrics(
         "run_date": date.today().isoformat(),
         "region": region,
         "total_products": total_products,
-        "qualifying_deals": len(top_deals),
+        "qualifying_deals": tally.count,
 
         # Category breakdown
         "flower_count": categories.get("flower", 0),
@@ -71,19 +127,19 @@ def collect_daily_metrics(
         "preroll_count": categories.get("preroll", 0),
 
         # Diversity
-        "unique_brands": len(brands),
-        "unique_dispensaries": len(dispensaries),
+        "unique_brands": len(tally.brands),
+        "unique_dispensaries": len(tally.dispensaries),
 
         # Score distribution
-        "avg_deal_score": round(statistics.mean(scores), 2) if scores else 0,
-        "median_deal_score": int(statistics.median(scores)) if scores else 0,
+        "avg_deal_score": round(tally.mean_score(), 2) if scores else 0,
+        "median_deal_score": int(tally.median_score()) if scores else 0,
         "min_deal_score": min(scores) if scores else 0,
         "max_deal_score": max(scores) if scores else 0,
 
         # Badge counts (thresholds from deal_detector)
-        "steal_count": sum(1 for s in scores if s >= 85),
-        "fire_count": sum(1 for s in scores if 70 <= s < 85),
-        "solid_count": sum(1 for s in scores if 50 <= s < 70),
+        "steal_count": tally.count_between(85),
+        "fire_count": tally.count_between(70, 85),
+        "solid_count": tally.count_between(50, 70),
 
         # Scrape health
         "sites_scraped": sites_scraped,
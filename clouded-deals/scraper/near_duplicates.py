@@ -0,0 +1,119 @@
+"""
+MinHash / LSH grouping of near-identical product names.
+
+The exact dedup passes in ``deal_detector`` only merge listings whose
+normalized names are equal, so "Kobe 1g Cart" and "CSF Kobe Cartridge"
+(normalized "kobe 1g" and "kobe") both reach the feed.
+``NearDuplicateIndex`` compares names as sets of character trigrams
+over their sorted words, with weight tokens ("1g", "100mg") dropped —
+the caller keeps different sizes apart through the block key — and
+reports a name as a duplicate when its Jaccard similarity to a name
+already kept reaches the threshold.
+
+Names are only compared within a block (the caller uses brand,
+category and weight).  While a block holds few names each new name is
+compared with all of them; past ``exact_limit`` the block switches to
+locality-sensitive hashing: a MinHash signature of ``bands * rows``
+deterministic hash permutations, split into bands, and only names
+sharing a whole band with the query are compared.  Every reported
+duplicate is verified against the real Jaccard similarity, so LSH can
+only miss a pair (probability falls steeply above the threshold), never
+invent one.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Hashable
+
+_WEIGHT_TOKEN_RE = re.compile(r"\b\d*\.?\d+\s*(?:mg|g|gram|grams|oz|ml)\b")
+_MERSENNE = (1 << 61) - 1
+
+
+def shingles(name: str) -> frozenset[str]:
+    """Character trigrams of *name*'s sorted words, weight tokens dropped."""
+    words = sorted(_WEIGHT_TOKEN_RE.sub(" ", name).split())
+    text = f" {' '.join(words)} "
+    if len(text) < 3:
+        return frozenset((text,))
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """Blocks of kept names, each the representative of its near-duplicates.
+
+    Callers offer names best-first: ``add`` either reports the first
+    kept name the new one duplicates, or keeps the new one.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        bands: int = 8,
+        rows: int = 4,
+        exact_limit: int = 32,
+        seed: int = 1,
+    ) -> None:
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.exact_limit = exact_limit
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE), rng.randrange(_MERSENNE))
+            for _ in range(bands * rows)
+        ]
+        self._blocks: dict[Hashable, list[tuple[frozenset[str], Any]]] = defaultdict(list)
+        self._buckets: dict[tuple, list[int]] = defaultdict(list)
+        self._hashed: set[Hashable] = set()
+        self.comparisons = 0
+
+    def signature(self, grams: frozenset[str]) -> list[int]:
+        """MinHash of *grams* under the index's permutations."""
+        hashes = [zlib.crc32(g.encode()) for g in grams] or [0]
+        return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, block: Hashable, grams: frozenset[str]) -> list[tuple]:
+        sig = self.signature(grams)
+        r = self.rows
+        return [(block, band, tuple(sig[band * r:(band + 1) * r])) for band in range(self.bands)]
+
+    def add(self, block: Hashable, name: str, payload: Any) -> Any:
+        """Payload of the first kept name in *block* similar to *name*.
+
+        Returns ``None`` — and keeps *name*, to be reported as *payload*
+        — when there is none.
+        """
+        grams = shingles(name)
+        members = self._blocks[block]
+        hashed = block in self._hashed
+        if hashed:
+            band_keys = self._band_keys(block, grams)
+            ids = sorted({m for key in band_keys for m in self._buckets.get(key, ())})
+        else:
+            ids = range(len(members))
+        for member_id in ids:
+            kept, kept_payload = members[member_id]
+            self.comparisons += 1
+            if jaccard(grams, kept) >= self.threshold:
+                return kept_payload
+
+        members.append((grams, payload))
+        if hashed:
+            for key in band_keys:
+                self._buckets[key].append(len(members) - 1)
+        elif len(members) > self.exact_limit:
+            self._hashed.add(block)
+            for member_id, (kept, _) in enumerate(members):
+                for key in self._band_keys(block, kept):
+                    self._buckets[key].append(member_id)
+        return None
@@ -0,0 +1,423 @@
+"""
+Recorded-page fixtures: a site's network traffic, replayable offline.
+
+Extraction speed and correctness could only be checked against live
+sites (``test_site_diagnostics.py``, ``test_platform_recon.py``), so a
+slower ``DutchieScraper`` or a broken Jane selector showed up in the
+nightly run, not on a laptop.  A fixture bundle is everything the
+browser fetched while a scraper ran against one dispensary::
+
+    PAGE_FIXTURE_DIR/<slug>/bundle.json        dispensary + request log
+    PAGE_FIXTURE_DIR/<slug>/bodies/<sha256>.gz response bodies
+    PAGE_FIXTURE_DIR/<slug>/products.jsonl.gz  what the scraper returned
+
+Recording (needs network)::
+
+    python page_fixtures.py --sites oasis-cannabis,planet13
+    python page_fixtures.py --platform jane --limit 3
+
+``PageRecorder`` routes every request of the scraper's context through
+``route.fetch`` and logs the response.  ``PageReplayer`` later answers
+the same requests from the bundle and aborts anything it has no
+recording for, so a replayed scrape never touches the network.
+``benchmarks/bench_extraction.py`` runs every platform's scraper over
+the bundles and reports wall time, protocol calls and products.
+
+Requests are matched by method, URL and a digest of the POST body.  A
+request seen several times during recording (pagination, polling) is
+answered with its recordings in order, then the last one again.  When
+nothing matches exactly, the same method and URL without its query
+string is tried, which absorbs cache-busting parameters.
+
+Both ends run with a throwaway ``SCRAPER_CACHE_DIR`` and no asset
+cache, so a restored session or a cached bundle never makes the
+recorded and replayed scrapes take different paths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger("page_fixtures")
+
+PAGE_FIXTURE_DIR = Path(os.getenv("PAGE_FIXTURE_DIR", "page_fixtures"))
+
+BUNDLE_VERSION = 1
+
+# Headers that describe the wire encoding, not the decoded body we store.
+_DROPPED_HEADERS = frozenset((
+    "content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+))
+
+# Playwright's abort reason for requests the bundle cannot answer.
+_OFFLINE_ERROR = "internetdisconnected"
+
+
+def _post_digest(post_data: bytes | None) -> str | None:
+    return hashlib.sha256(post_data).hexdigest()[:16] if post_data else None
+
+
+def _strip_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+# =====================================================================
+# Bundles
+# =====================================================================
+
+
+class FixtureBundle:
+    """One site's recorded responses and the products scraped from them."""
+
+    def __init__(self, dispensary: dict[str, Any]) -> None:
+        self.dispensary = dispensary
+        self.recorded_at: str | None = None
+        self.entries: list[dict[str, Any]] = []
+        self.products: list[dict[str, Any]] = []
+        self._bodies: dict[str, bytes] = {}
+        self._directory: Path | None = None
+
+    @property
+    def slug(self) -> str:
+        return self.dispensary["slug"]
+
+    @property
+    def platform(self) -> str:
+        return self.dispensary["platform"]
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        post_data: bytes | None,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        resource_type: str | None = None,
+    ) -> None:
+        """Log one response; bodies are stored once per content digest."""
+        digest = hashlib.sha256(body).hexdigest() if body else None
+        if digest is not None:
+            self._bodies.setdefault(digest, body)
+        self.entries.append({
+            "method": method,
+            "url": url,
+            "post": _post_digest(post_data),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS},
+            "body": digest,
+            "type": resource_type,
+        })
+
+    def body(self, digest: str | None) -> bytes:
+        if digest is None:
+            return b""
+        body = self._bodies.get(digest)
+        if body is None:
+            assert self._directory is not None, f"body {digest} not recorded"
+            body = self._bodies[digest] = gzip.decompress(
+                (self._directory / "bodies" / f"{digest}.gz").read_bytes()
+            )
+        return body
+
+    def preload(self) -> None:
+        """Read every body now, so replay never waits on the disk."""
+        for entry in self.entries:
+            self.body(entry["body"])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": len(self.entries),
+            "bodies": len({e["body"] for e in self.entries if e["body"]}),
+            "bytes": sum(len(self.body(d)) for d in {e["body"] for e in self.entries if e["body"]}),
+            "products": len(self.products),
+        }
+
+    # -- persistence -----------------------------------------------------
+
+    def save(self, directory: Path | str) -> Path:
+        directory = Path(directory)
+        bodies = directory / "bodies"
+        bodies.mkdir(parents=True, exist_ok=True)
+        for digest in {e["body"] for e in self.entries if e["body"]}:
+            path = bodies / f"{digest}.gz"
+            if not path.exists():
+                path.write_bytes(gzip.compress(self.body(digest), mtime=0))
+        with gzip.open(directory / "products.jsonl.gz", "wt", encoding="utf-8") as fh:
+            for product in self.products:
+                fh.write(json.dumps(product, ensure_ascii=False, default=str) + "\n")
+        manifest = {
+            "version": BUNDLE_VERSION,
+            "dispensary": self.dispensary,
+            "recorded_at": self.recorded_at or datetime.now(timezone.utc).isoformat(),
+            "products": len(self.products),
+            "entries": self.entries,
+        }
+        tmp = directory / "bundle.tmp"
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, directory / "bundle.json")
+        self._directory = directory
+        return directory
+
+    @classmethod
+    def load(cls, directory: Path | str) -> FixtureBundle:
+        """Read a bundle's manifest and products; bodies load on first use."""
+        directory = Path(directory)
+        manifest = json.loads((directory / "bundle.json").read_text(encoding="utf-8"))
+        bundle = cls(manifest["dispensary"])
+        bundle.recorded_at = manifest.get("recorded_at")
+        bundle.entries = manifest["entries"]
+        bundle._directory = directory
+        products_path = directory / "products.jsonl.gz"
+        if products_path.exists():
+            with gzip.open(products_path, "rt", encoding="utf-8") as fh:
+                bundle.products = [json.loads(line) for line in fh]
+        return bundle
+
+
+def list_bundles(
+    root: Path | str = PAGE_FIXTURE_DIR,
+    *,
+    platforms: Iterable[str] = (),
+    slugs: Iterable[str] = (),
+) -> list[Path]:
+    """Bundle directories under *root*, by slug, optionally filtered."""
+    wanted_platforms, wanted_slugs = set(platforms), set(slugs)
+    found = []
+    for manifest in sorted(Path(root).glob("*/bundle.json")):
+        if wanted_slugs and manifest.parent.name not in wanted_slugs:
+            continue
+        if wanted_platforms:
+            dispensary = json.loads(manifest.read_text(encoding="utf-8"))["dispensary"]
+            if dispensary.get("platform") not in wanted_platforms:
+                continue
+        found.append(manifest.parent)
+    return found
+
+
+# =====================================================================
+# Recording and replay (Playwright route handlers)
+# =====================================================================
+
+
+class PageRecorder:
+    """Route handler that fetches every request and logs its response.
+
+    Redirects are recorded as they arrive (``max_redirects=0``) so the
+    browser follows them itself, exactly as it will on replay.
+    """
+
+    def __init__(self, bundle: FixtureBundle) -> None:
+        self.bundle = bundle
+        self.failed = 0
+
+    async def attach(self, context: Any) -> None:
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route: Any) -> None:
+        request = route.request
+        try:
+            response = await route.fetch(max_redirects=0)
+            body = await response.body()
+        except Exception as exc:
+            self.failed += 1
+            logger.debug("Not recorded %s: %s", request.url[:120], exc)
+            await route.continue_()
+            return
+        self.bundle.add(
+            request.method, request.url, request.post_data_buffer,
+            response.status, response.headers, body, request.resource_type,
+        )
+        await route.fulfill(response=response, body=body)
+
+
+class PageReplayer:
+    """Route handler answering every request from a bundle, offline."""
+
+    def __init__(self, bundle: FixtureBundle) -> None:
+        self.bundle = bundle
+        bundle.preload()
+        self._exact: dict[tuple[Any, ...], list[dict[str, Any]]] = defaultdict(list)
+        self._loose: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+        for entry in bundle.entries:
+            self._exact[(entry["method"], entry["url"], entry["post"])].append(entry)
+            self._loose[(entry["method"], _strip_query(entry["url"]))].append(entry)
+        self._served: Counter[tuple[Any, ...]] = Counter()
+        self.matched = 0
+        self.loose = 0
+        self.missed: list[str] = []
+
+    async def attach(self, context: Any) -> None:
+        await context.route("**/*", self.handle)
+
+    def match(self, method: str, url: str, post_data: bytes | None) -> dict[str, Any] | None:
+        """The recording to answer this request with, or None."""
+        key: tuple[Any, ...] = (method, url, _post_digest(post_data))
+        entries = self._exact.get(key)
+        if entries:
+            self.matched += 1
+        else:
+            key = (method, _strip_query(url))
+            entries = self._loose.get(key)
+            if not entries:
+                self.missed.append(f"{method} {url}")
+                return None
+            self.loose += 1
+        served = self._served[key]
+        self._served[key] += 1
+        return entries[min(served, len(entries) - 1)]
+
+    async def handle(self, route: Any) -> None:
+        request = route.request
+        entry = self.match(request.method, request.url, request.post_data_buffer)
+        if entry is None:
+            await route.abort(_OFFLINE_ERROR)
+            return
+        await route.fulfill(
+            status=entry["status"],
+            headers=entry["headers"],
+            body=self.bundle.body(entry["body"]),
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {"matched": self.matched, "loose": self.loose, "missed": len(self.missed)}
+
+
+# =====================================================================
+# Running a scraper against a page
+# =====================================================================
+
+
+def isolate_caches() -> str:
+    """Point the scraper caches at an empty directory, asset cache off.
+
+    Must run before ``platforms`` is imported (the cache modules read
+    their settings at import).
+    """
+    cache_dir = tempfile.mkdtemp(prefix="page-fixtures-")
+    os.environ["SCRAPER_CACHE_DIR"] = cache_dir
+    os.environ["ASSET_CACHE"] = "false"
+    return cache_dir
+
+
+def scraper_class(platform: str) -> type:
+    import platforms
+
+    return {
+        "dutchie": platforms.DutchieScraper,
+        "curaleaf": platforms.CuraleafScraper,
+        "jane": platforms.JaneScraper,
+        "rise": platforms.RiseScraper,
+        "carrot": platforms.CarrotScraper,
+        "aiq": platforms.AIQScraper,
+    }[platform]
+
+
+async def scrape_routed(
+    dispensary: dict[str, Any],
+    browser: Any,
+    handler: PageRecorder | PageReplayer,
+) -> tuple[list[dict[str, Any]], float]:
+    """``(raw_products, seconds)`` for one scrape with *handler* routing.
+
+    The route is added once the scraper's context exists and before it
+    navigates; the time covers ``scrape()`` only, not context setup.
+    """
+    async with scraper_class(dispensary["platform"])(dispensary, browser=browser) as scraper:
+        await handler.attach(scraper.page.context)
+        start = time.perf_counter()
+        products = await scraper.scrape()
+        return products, time.perf_counter() - start
+
+
+async def record(
+    dispensaries: list[dict[str, Any]],
+    root: Path | str = PAGE_FIXTURE_DIR,
+) -> list[dict[str, Any]]:
+    """Record one bundle per dispensary under *root*; returns per-site stats."""
+    from playwright.async_api import async_playwright
+
+    from platforms import launch_stealth_browser
+
+    results = []
+    async with async_playwright() as pw:
+        browser = await launch_stealth_browser(pw)
+        try:
+            for dispensary in dispensaries:
+                bundle = FixtureBundle(dispensary)
+                recorder = PageRecorder(bundle)
+                try:
+                    bundle.products, seconds = await scrape_routed(dispensary, browser, recorder)
+                except Exception as exc:
+                    logger.error("[%s] Recording failed: %s", dispensary["slug"], exc)
+                    results.append({"slug": dispensary["slug"], "error": str(exc)})
+                    continue
+                bundle.save(Path(root) / dispensary["slug"])
+                results.append({
+                    "slug": dispensary["slug"], "seconds": round(seconds, 1),
+                    "unrecorded": recorder.failed, **bundle.stats(),
+                })
+        finally:
+            await browser.close()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Record dispensary page traffic into offline fixture bundles (needs network).",
+    )
+    parser.add_argument("--sites", help="Comma-separated slugs to record")
+    parser.add_argument("--platform", action="append", default=[], help="Record this platform's sites")
+    parser.add_argument("--limit", type=int, default=None, help="At most this many sites per platform")
+    parser.add_argument("--output", type=Path, default=PAGE_FIXTURE_DIR)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    from config.dispensaries import DISPENSARIES
+
+    slugs = set(args.sites.split(",")) if args.sites else set()
+    per_platform: Counter[str] = Counter()
+    chosen = []
+    for dispensary in DISPENSARIES:
+        if slugs and dispensary["slug"] not in slugs:
+            continue
+        if not slugs and not dispensary.get("is_active", True):
+            continue
+        if args.platform and dispensary["platform"] not in args.platform:
+            continue
+        if args.limit is not None and per_platform[dispensary["platform"]] >= args.limit:
+            continue
+        per_platform[dispensary["platform"]] += 1
+        chosen.append(dispensary)
+    if not chosen:
+        parser.error("no dispensaries match --sites / --platform")
+
+    isolate_caches()
+    results = asyncio.run(record(chosen, args.output))
+    for r in results:
+        if "error" in r:
+            print(f"  {r['slug']:30s} FAILED {r['error']}")
+        else:
+            print(
+                f"  {r['slug']:30s} {r['products']:5d} products  {r['requests']:4d} requests  "
+                f"{r['bytes'] / 1024:8.0f} KB  {r['seconds']:5.1f}s"
+            )
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
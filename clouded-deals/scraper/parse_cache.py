@@ -0,0 +1,171 @@
+"""
+Content-addressed cache of normalized product output.
+
+Most of a dispensary's menu is unchanged from one day to the next, and
+chain locations list the same products under the same names — yet every
+run re-ran ``parse_product``, the brand cascade, category detection,
+display-name cleaning and ``classify_product`` for every raw product.
+
+``product_normalizer.normalize_products`` looks each raw product up
+here first.  The key hashes the inputs the normalization actually reads
+(``name``, ``raw_text``, ``price``, scraped brand / category, product
+URL); the value is the normalized fields it produced.  The dispensary itself is
+not part of the key — chain locations share entries.
+
+The whole cache is tied to a *rules version*: a hash of the parsing
+modules' source (``RULE_SOURCES``) plus the runtime brand tables.  Edit
+``product_normalizer.py``, ``clouded_logic.py`` or
+``product_classifier.py``, or approve a new brand, and the next run
+starts from an empty cache.
+
+Entries live in ``SCRAPER_CACHE_DIR/parse_cache.json``; beyond
+``PARSE_CACHE_MAX_ENTRIES`` (default 100k) the least recently used are
+dropped on flush.  Disable with ``PARSE_CACHE=false``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("parse_cache")
+
+PARSE_CACHE_PATH = Path(os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache")) / "parse_cache.json"
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "100000"))
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE", "true").lower() not in ("0", "false", "no")
+
+# Modules whose logic determines the normalized output.
+_HERE = Path(__file__).resolve().parent
+RULE_SOURCES = (
+    "product_normalizer.py",
+    "clouded_logic.py",
+    "product_classifier.py",
+    "brand_automaton.py",
+    "fuzzy_index.py",
+    "product_lexer.py",
+)
+
+# Raw-product fields read by the normalizer.
+_KEY_FIELDS = ("name", "raw_text", "price", "scraped_brand", "scraped_category", "product_url")
+
+
+def product_cache_key(rp: dict[str, Any]) -> str:
+    """Return the cache key for raw product *rp*."""
+    payload = json.dumps([rp.get(f) for f in _KEY_FIELDS], default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def rules_version() -> str:
+    """Hash of the parsing sources and the current brand tables.
+
+    Call after ``load_approved_brands`` so approved brands count.
+    """
+    from clouded_logic import BRAND_ALIASES, BRANDS_LOWER, _BRAND_VARIATION_MAP
+
+    digest = hashlib.sha256()
+    for name in RULE_SOURCES:
+        try:
+            digest.update((_HERE / name).read_bytes())
+        except OSError:
+            digest.update(name.encode())
+    for table in (BRANDS_LOWER, BRAND_ALIASES, _BRAND_VARIATION_MAP):
+        digest.update(json.dumps(sorted(table.items())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ParseCache:
+    """Rules-versioned LRU cache of normalized product fields."""
+
+    def __init__(
+        self,
+        path: Path = PARSE_CACHE_PATH,
+        version: str = "",
+        max_entries: int = PARSE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self._entries: dict[str, list[Any]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable parse cache %s: %s", self.path, exc)
+            return
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            logger.info("Parse rules changed — starting with an empty parse cache")
+            self._dirty = True
+            return
+        entries = data.get("entries")
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return ``(found, value)``; *value* may legitimately be None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        entry[0] = int(time.time())
+        self._dirty = True
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = [int(time.time()), value]
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Evict past ``max_entries`` (least recently used) and write to disk."""
+        if not self._dirty:
+            return
+        if len(self._entries) > self.max_entries:
+            newest = sorted(self._entries.items(), key=lambda kv: kv[1][0], reverse=True)
+            self._entries = dict(newest[: self.max_entries])
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": self.version, "entries": self._entries}))
+            tmp.replace(self.path)
+            self._dirty = False
+        except OSError as exc:
+            logger.warning("Could not write parse cache: %s", exc)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_shared: ParseCache | None = None
+
+
+def get_parse_cache() -> ParseCache | None:
+    """Return the process-wide cache, or None when disabled.
+
+    The rules version is fixed when the cache is first requested, i.e.
+    after the run has loaded its approved brands.
+    """
+    global _shared
+    if not PARSE_CACHE_ENABLED:
+        return None
+    if _shared is None:
+        _shared = ParseCache(version=rules_version())
+    return _shared
@@ -14,68 +14,66 @@ from __future__ import annotations
 import re
 from typing import Any
 
+from product_lexer import (
+    Token,
+    decimal_tail,
+    is_percent,
+    is_price,
+    percent_tail,
+    price_amount,
+    tokenize,
+)
+
 # =====================================================================
 # 1. Price extraction
 # =====================================================================
 
-# "was $45.00 now $30.00" / "Was $45 Now $30"
-_RE_WAS_NOW = re.compile(
-    r"was\s+\$\s*(?P<original>[\d]+(?:\.[\d]{1,2})?)"
-    r"\s+now\s+\$\s*(?P<sale>[\d]+(?:\.[\d]{1,2})?)",
-    re.IGNORECASE,
-)
-
-# "was $15 now $7 off" — the "now" amount is a discount, not a sale price.
-_RE_WAS_NOW_OFF = re.compile(
-    r"was\s+\$\s*(?P<original>[\d]+(?:\.[\d]{1,2})?)"
-    r"\s+now\s+\$\s*(?P<discount>[\d]+(?:\.[\d]{1,2})?)"
-    r"\s*(?:off|save|discount)\b",
-    re.IGNORECASE,
-)
-
-# Any standalone "$XX.XX" token.
-_RE_DOLLAR = re.compile(r"\$\s*(?P<amt>[\d]+(?:\.[\d]{1,2})?)")
-
-# Dollar amounts followed by "off" / "save" — these are discount labels, not prices.
-_RE_DISCOUNT_LABEL = re.compile(
-    r"\$\s*[\d]+(?:\.[\d]{1,2})?\s*(?:off|save|discount)\b",
-    re.IGNORECASE,
-)
-
-# "from $X" / "starting at $X" — lowest-weight starting prices, not the actual sale price.
+# All price rules read the token stream from ``product_lexer.tokenize``;
+# see that module for the token layout.  The rules, by strategy:
+#
+#   1a  "was $15 now $7 off" — the "now" amount is a discount, not a sale price
+#   1b  "was $45.00 now $30.00" / "Was $45 Now $30"
+#   2   bundle with inline tier price: "2/$55 $35" (qty/bundle_total tier_price)
+#   3   bundle: "2 / $60" or "3/$60" (no inline tier price)
+#   4   BOGO (buy one get one)
+#   5   any other "$XX.XX" amounts, ignoring discount labels ("$8 off",
+#       "$5 save") and "from $X" / "starting at $X" starting prices.
+#
 # Curaleaf cards show "from $20.00" alongside the real prices ($24.00 / $40.00);
 # without filtering, Strategy 5 picks min($20, $24, $40) = $20 → wrong sale price.
-_RE_FROM_PRICE = re.compile(
-    r"(?:from|starting\s+at)\s+\$\s*[\d]+(?:\.[\d]{1,2})?",
-    re.IGNORECASE,
-)
-
-# Bundle deal with inline tier price: "2/$55 $35" (qty/bundle_total tier_price)
-_RE_BUNDLE_TIER = re.compile(
-    r"(?P<qty>[2-9])\s*/\s*\$\s*(?P<total>[\d]+(?:\.[\d]{1,2})?)"
-    r"\s+\$\s*(?P<tier>[\d]+(?:\.[\d]{1,2})?)",
-)
 
-# Bundle deal: "2 / $60" or "3/$60" (no inline tier price)
-_RE_BUNDLE = re.compile(
-    r"(?P<qty>[2-9])\s*/\s*\$\s*(?P<total>[\d]+(?:\.[\d]{1,2})?)",
-)
+# Bundle quantities are a single digit 2–9: "2/$60", but never "1/$60".
+_BUNDLE_QTY = frozenset("23456789")
 
-# BOGO (buy one get one)
 _RE_BOGO = re.compile(r"\bBOGO\b", re.IGNORECASE)
 
 
-def extract_prices(text: str) -> dict[str, Any]:
+def _was_now(tokens: list[Token], discount: bool) -> tuple[float, float] | None:
+    """First "was $X now $Y" (with "off" after $Y when *discount*)."""
+    for i, (_, word, _, num, spaced, unit, _) in enumerate(tokens):
+        if word != "was" or unit != "now" or not spaced or not is_price(num):
+            continue
+        later = tokens[i + 1][3]
+        if discount and not (tokens[i + 1][5] == "off" and is_price(later)):
+            continue
+        return float(num), float(price_amount(later))
+    return None
+
+
+def extract_prices(text: str, tokens: list[Token] | None = None) -> dict[str, Any]:
     """Return ``original_price``, ``sale_price``, and ``discount_percent``.
 
     Handles bundle deals (``2/$60``), tier pricing (``2/$55 $35``), BOGO,
-    explicit was/now, and plain multi-price lines.
+    explicit was/now, and plain multi-price lines.  Pass *tokens* when
+    the caller has already tokenized *text*.
 
     >>> extract_prices("was $50.00 now $35.00")
     {'original_price': 50.0, 'sale_price': 35.0, 'discount_percent': 30.0}
     >>> extract_prices("$25")
     {'original_price': None, 'sale_price': 25.0, 'discount_percent': None}
     """
+    if tokens is None:
+        tokens = tokenize(text)
     result: dict[str, Any] = {
         "original_price": None,
         "sale_price": None,
@@ -83,10 +81,10 @@ def extract_prices(text: str) -> dict[str, Any]:
     }
 
     # Strategy 1a — "was $15 now $7 off" (discount amount, NOT sale price).
-    m = _RE_WAS_NOW_OFF.search(text)
+    # Only the first such phrase counts, as with a regex search.
+    m = _was_now(tokens, discount=True)
     if m:
-        orig = float(m.group("original"))
-        disc_amt = float(m.group("discount"))
+        orig, disc_amt = m
         inferred_sale = round(orig - disc_amt, 2)
         if inferred_sale > 3:
             result["original_price"] = orig
@@ -95,45 +93,48 @@ def extract_prices(text: str) -> dict[str, Any]:
             return result
 
     # Strategy 1b — explicit "was / now" wording.
-    m = _RE_WAS_NOW.search(text)
+    m = _was_now(tokens, discount=False)
     if m:
-        result["original_price"] = float(m.group("original"))
-        result["sale_price"] = float(m.group("sale"))
+        result["original_price"], result["sale_price"] = m
         result["discount_percent"] = _calc_discount(
             result["original_price"], result["sale_price"]
         )
         return result
 
+    bundles = [
+        i for i, tok in enumerate(tokens)
+        if tok[5] == "/$" and tok[3][-1] in _BUNDLE_QTY
+    ]
+
     # Strategy 2 — Bundle with inline tier price: "2/$55 $35"
     # The tier price on the same line IS the sale price; bundle total is
     # treated as the original (regular) price.
-    m = _RE_BUNDLE_TIER.search(text)
-    if m:
-        bundle_total = float(m.group("total"))
-        tier_price = float(m.group("tier"))
-        original = max(bundle_total, tier_price)
-        sale = min(bundle_total, tier_price)
-        result["original_price"] = original
-        result["sale_price"] = sale
-        result["discount_percent"] = _calc_discount(original, sale)
-        return result
+    for i in bundles:
+        _, _, _, total, spaced, unit, _ = tokens[i + 1]
+        if unit == "$" and spaced and is_price(total):
+            bundle_total = float(total)
+            tier_price = float(price_amount(tokens[i + 2][3]))
+            original = max(bundle_total, tier_price)
+            sale = min(bundle_total, tier_price)
+            result["original_price"] = original
+            result["sale_price"] = sale
+            result["discount_percent"] = _calc_discount(original, sale)
+            return result
 
     # Strategy 3 — Bundle deal without tier: "N / $X" with separate unit price.
     # The unit price (standalone "$XX.00") is the original; per-unit bundle
     # price (total / qty) is the sale price.
-    m = _RE_BUNDLE.search(text)
-    if m:
-        qty = int(m.group("qty"))
-        bundle_total = float(m.group("total"))
+    if bundles:
+        i = bundles[0]
+        qty = int(tokens[i][3][-1])
+        bundle_total = float(price_amount(tokens[i + 1][3]))
         per_unit = round(bundle_total / qty, 2)
 
-        # Find dollar amounts NOT inside the bundle match.
-        bundle_start = m.start()
-        bundle_end = m.end()
+        # Dollar amounts other than the bundle total.
         unit_prices = [
-            float(x.group("amt"))
-            for x in _RE_DOLLAR.finditer(text)
-            if not (bundle_start <= x.start() < bundle_end)
+            float(price_amount(tok[3]))
+            for j, tok in enumerate(tokens)
+            if tok[2] and j != i + 1
         ]
 
         if unit_prices:
@@ -149,7 +150,7 @@ def extract_prices(text: str) -> dict[str, Any]:
 
     # Strategy 4 — BOGO: buy one get one free → 50% off.
     if _RE_BOGO.search(text):
-        amounts = [float(x.group("amt")) for x in _RE_DOLLAR.finditer(text)]
+        amounts = [float(price_amount(tok[3])) for tok in tokens if tok[2]]
         if amounts:
             unit_price = amounts[-1]
             result["original_price"] = unit_price
@@ -161,27 +162,16 @@ def extract_prices(text: str) -> dict[str, Any]:
     # CRITICAL: Filter out dollar amounts that are part of discount labels
     # like "$8.00 off" or "from $X" starting-price indicators — these are NOT
     # actual sale/original prices.
-    discount_label_spans = [
-        (m.start(), m.end()) for m in _RE_DISCOUNT_LABEL.finditer(text)
-    ]
-    from_price_spans = [
-        (m.start(), m.end()) for m in _RE_FROM_PRICE.finditer(text)
-    ]
-    excluded_spans = discount_label_spans + from_price_spans
-    # Capture discount amounts from labels (e.g. "$7 off" → 7.0)
-    discount_label_amounts = [
-        float(dm.group("amt"))
-        for dm in _RE_DOLLAR.finditer(text)
-        if any(start <= dm.start() < end for start, end in discount_label_spans)
-    ]
     amounts = []
-    for m in _RE_DOLLAR.finditer(text):
-        # Skip this dollar amount if it falls inside a discount label or "from $X"
-        in_excluded = any(
-            start <= m.start() < end for start, end in excluded_spans
-        )
-        if not in_excluded:
-            amounts.append(float(m.group("amt")))
+    # Capture discount amounts from labels (e.g. "$7 off" → 7.0)
+    discount_label_amounts = []
+    for _, word, cur, num, _, unit, _ in tokens:
+        if not cur:
+            continue
+        if unit == "off" and is_price(num):
+            discount_label_amounts.append(float(num))
+        elif word != "from":
+            amounts.append(float(price_amount(num)))
 
     if len(amounts) >= 2:
         # Prices: highest = original, lowest = sale (more robust than positional)
@@ -256,14 +246,6 @@ def validate_prices(parsed: dict[str, Any]) -> dict[str, Any]:
 # 2. Weight extraction
 # =====================================================================
 
-# Matches: 3.5g, 0.5g, .5g, 100mg, 1oz, etc.
-# CRITICAL: mg must appear before g in the alternation so that "850mg"
-# is not partially matched as "85" + "0g".
-# The qty group handles optional leading digit for ".5g" → 0.5
-_RE_WEIGHT_METRIC = re.compile(
-    r"(?P<qty>\d*\.?\d+)\s*(?P<unit>mg|g|oz)\b", re.IGNORECASE,
-)
-
 # Common fractional / shorthand names → grams.
 _WEIGHT_ALIASES: dict[str, float] = {
     "1/8":     3.5,
@@ -272,11 +254,9 @@ _WEIGHT_ALIASES: dict[str, float] = {
     "half":    14.0,
 }
 
-# Fractional-oz patterns: "1/8", "1/8oz", "1/4oz", "1/2oz" (optional space
-# before "oz").  MUST be checked BEFORE _RE_WEIGHT_METRIC because that regex
-# would incorrectly match the denominator alone (e.g. "8oz" from "1/8oz").
-_RE_FRAC_OZ = re.compile(r"\b(1/[248])\s*(?:oz)?\b", re.IGNORECASE)
-
+# Fractional-oz tokens: "1/8", "1/8oz", "1/4oz", "1/2oz" (optional space
+# before "oz").  MUST be checked BEFORE metric weights because the
+# denominator alone carries the unit (e.g. "8oz" from "1/8oz").
 _FRAC_TO_GRAMS: dict[str, float] = {
     "1/8": 3.5,
     "1/4": 7.0,
@@ -292,7 +272,21 @@ _BEVERAGE_KEYWORDS_RE = re.compile(
 )
 
 
-def extract_weight(text: str) -> dict[str, Any]:
+# Metric weights are tokens with an "mg" / "g" / "oz" unit: 3.5g, 0.5g,
+# .5g, 100mg, 1oz.  The quantity is the longest "\d*\.?\d+" ending right
+# before the unit, so ".5g" → 0.5 and "850mg" is never read as "85" + "0g".
+
+def _first_weight(tokens: list[Token], units: tuple[str, ...]) -> tuple[str, str] | None:
+    """``(qty, unit)`` of the first metric weight in one of *units*."""
+    for tok in tokens:
+        if tok[5] in units:
+            qty = decimal_tail(tok[3])
+            if qty is not None:
+                return qty, tok[5]
+    return None
+
+
+def extract_weight(text: str, tokens: list[Token] | None = None) -> dict[str, Any]:
     """Return ``weight_value`` and ``weight_unit`` parsed from *text*.
 
     >>> extract_weight("Blue Dream 3.5g")
@@ -304,34 +298,31 @@ def extract_weight(text: str) -> dict[str, Any]:
     """
     result: dict[str, Any] = {"weight_value": None, "weight_unit": None}
 
+    if tokens is None:
+        tokens = tokenize(text)
+
     # Fractional-oz patterns FIRST: "1/8", "1/8oz", "1/4oz", "1/2oz".
-    # MUST check before _RE_WEIGHT_METRIC which incorrectly matches the
-    # denominator as a standalone number (e.g. "8oz" from "1/8oz").
-    frac_m = _RE_FRAC_OZ.search(text)
-    if frac_m:
-        frac = frac_m.group(1)
-        grams = _FRAC_TO_GRAMS.get(frac)
+    for tok in tokens:
+        grams = _FRAC_TO_GRAMS.get(tok[5])
         if grams is not None:
             result["weight_value"] = grams
             result["weight_unit"] = "g"
             return result
 
     # Explicit numeric weight (3.5g, 100mg, 1oz).
-    m = _RE_WEIGHT_METRIC.search(text)
+    m = _first_weight(tokens, ("mg", "g", "oz"))
     if m:
-        value = float(m.group("qty"))
-        unit = m.group("unit").lower()
+        value = float(m[0])
+        unit = m[1]
 
         # Beverage fix: "oz" on a drink is liquid volume, NOT weight.
         # E.g. "Uncle Arnie's Iced Tea 8oz 100mg" — "8oz" is the bottle
         # size, "100mg" is the THC potency.  Skip the oz match and
-        # re-scan for mg when beverage keywords are present.
+        # look for mg when beverage keywords are present.
         if unit == "oz" and _BEVERAGE_KEYWORDS_RE.search(text):
-            mg_match = re.search(
-                r"(?P<qty>\d*\.?\d+)\s*mg\b", text, re.IGNORECASE,
-            )
+            mg_match = _first_weight(tokens, ("mg",))
             if mg_match:
-                result["weight_value"] = float(mg_match.group("qty"))
+                result["weight_value"] = float(mg_match[0])
                 result["weight_unit"] = "mg"
             # No mg found — return empty (oz volume is meaningless)
             return result
@@ -359,7 +350,7 @@ def extract_weight(text: str) -> dict[str, Any]:
     lower = text.lower()
     for alias, grams in _WEIGHT_ALIASES.items():
         if alias == "1/8":
-            continue  # already handled by _RE_FRAC_OZ above
+            continue  # already handled by the fractional-oz tokens above
         if re.search(rf"\b{alias}\b", lower):
             result["weight_value"] = grams
             result["weight_unit"] = "g"
@@ -668,41 +659,33 @@ def detect_brand(text: str) -> str | None:
 # 5. THC / CBD extraction
 # =====================================================================
 
-# "25.4% THC", "THC: 25.4%", "THC 25.4%"
-_RE_THC = re.compile(
-    r"(?:(?P<pct1>[\d]+(?:\.[\d]+)?)\s*%\s*THC)"
-    r"|(?:THC\s*:?\s*(?P<pct2>[\d]+(?:\.[\d]+)?)\s*%)",
-    re.IGNORECASE,
-)
-
-_RE_CBD = re.compile(
-    r"(?:(?P<pct1>[\d]+(?:\.[\d]+)?)\s*%\s*CBD)"
-    r"|(?:CBD\s*:?\s*(?P<pct2>[\d]+(?:\.[\d]+)?)\s*%)",
-    re.IGNORECASE,
-)
+def _first_percent(tokens: list[Token], name: str) -> float | None:
+    """First "25.4% THC", "THC: 25.4%" or "THC 25.4%" value for *name*."""
+    for _, word, _, num, _, unit, _ in tokens:
+        # "THC: 25.4%" starts at the keyword, before "25.4% THC" would.
+        if word[:3] == name and unit[:1] == "%" and is_percent(num):
+            return float(num)
+        if unit == "%" + name:
+            raw = percent_tail(num)
+            if raw is not None:
+                return float(raw)
+    return None
 
 
-def extract_cannabinoids(text: str) -> dict[str, float | None]:
+def extract_cannabinoids(text: str, tokens: list[Token] | None = None) -> dict[str, float | None]:
     """Return ``thc_percent`` and ``cbd_percent`` from *text*.
 
-    >>> extract_cannabinoids("THC: 28.5% CBD: 0.1%")
+    >>> extract_cannabinoids("THC: 28.5%, CBD: 0.1%")
     {'thc_percent': 28.5, 'cbd_percent': 0.1}
     >>> extract_cannabinoids("no info")
     {'thc_percent': None, 'cbd_percent': None}
     """
-    result: dict[str, float | None] = {"thc_percent": None, "cbd_percent": None}
-
-    m = _RE_THC.search(text)
-    if m:
-        raw = m.group("pct1") or m.group("pct2")
-        result["thc_percent"] = float(raw)
-
-    m = _RE_CBD.search(text)
-    if m:
-        raw = m.group("pct1") or m.group("pct2")
-        result["cbd_percent"] = float(raw)
-
-    return result
+    if tokens is None:
+        tokens = tokenize(text)
+    return {
+        "thc_percent": _first_percent(tokens, "thc"),
+        "cbd_percent": _first_percent(tokens, "cbd"),
+    }
 
 
 # =====================================================================
@@ -718,11 +701,13 @@ def parse_product(raw: dict[str, Any]) -> dict[str, Any]:
     """
     text = f"{raw.get('name', '')} {raw.get('raw_text', '')} {raw.get('price', '')}"
 
+    tokens = tokenize(text)
+
     parsed = {**raw}
-    parsed.update(extract_prices(text))
+    parsed.update(extract_prices(text, tokens))
     parsed = validate_prices(parsed)
-    parsed.update(extract_weight(text))
-    parsed.update(extract_cannabinoids(text))
+    parsed.update(extract_weight(text, tokens))
+    parsed.update(extract_cannabinoids(text, tokens))
     parsed["brand"] = detect_brand(text)
 
     # Category detection is handled by CloudedLogic.detect_category()
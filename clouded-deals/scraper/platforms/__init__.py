@@ -1,6 +1,7 @@
 from .aiq import AIQScraper
-from .base import BaseScraper, launch_stealth_browser
+from .base import BaseScraper, launch_stealth_browser, new_stealth_context
 from .carrot import CarrotScraper
+from .context_pool import ContextPool
 from .curaleaf import CuraleafScraper
 from .dutchie import DutchieScraper
 from .jane import JaneScraper
@@ -10,9 +11,11 @@ __all__ = [
     "AIQScraper",
     "BaseScraper",
     "CarrotScraper",
+    "ContextPool",
     "CuraleafScraper",
     "DutchieScraper",
     "JaneScraper",
     "RiseScraper",
     "launch_stealth_browser",
+    "new_stealth_context",
 ]
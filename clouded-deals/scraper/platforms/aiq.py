@@ -39,7 +39,7 @@ from typing import Any, Union
 from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout
 
 from config.dispensaries import PLATFORM_DEFAULTS, is_expansion_region
-from handlers import dismiss_age_gate
+from handlers import dismiss_age_gate, race_selectors
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -621,14 +621,12 @@ class AIQScraper(BaseScraper):
         """Fallback: extract via CSS selector cascade."""
         products: list[dict[str, Any]] = []
 
-        for selector in _PRODUCT_SELECTORS:
-            try:
-                await target.locator(selector).first.wait_for(
-                    state="attached", timeout=8_000,
-                )
-            except PlaywrightTimeout:
-                continue
+        # One 8 s race across every selector (was 8 s per selector).
+        winner, _ = await race_selectors(target, _PRODUCT_SELECTORS, timeout_ms=8_000)
+        if winner is None:
+            return products
 
+        for selector in _PRODUCT_SELECTORS[_PRODUCT_SELECTORS.index(winner):]:
             elements = await target.locator(selector).all()
             if not elements:
                 continue
@@ -16,15 +16,27 @@ Stealth stack (applied to every scraper):
   3. Analytics domain blocking — prevents third-party scripts that trigger
      bot detection and slow page loads.
   4. Randomized viewport + User-Agent rotation per context.
+
+Asset cache: content-hashed JS/CSS from the platform CDNs is served from
+a shared disk cache (``asset_cache``) via context routing.
+
+Context pool: with a shared browser, scrapers can take pre-warmed
+contexts (fingerprint + stealth already applied) from ``ContextPool``.
+
+Session reuse: contexts start from the cookies/localStorage saved after
+the domain's last successful scrape (``session_cache``), so age gates
+and store pickers are usually already satisfied.
 """
 
 from __future__ import annotations
 
 import abc
+import asyncio
+import json
 import logging
 import os
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from playwright.async_api import (
     async_playwright,
@@ -33,6 +45,7 @@ from playwright.async_api import (
     Frame,
     Page,
     Playwright,
+    Route,
 )
 
 from config.dispensaries import (
@@ -40,8 +53,13 @@ from config.dispensaries import (
     STEALTH_INIT_SCRIPT, USER_AGENT, VIEWPORT, WAIT_UNTIL,
     get_context_fingerprint, get_user_agent, get_viewport,
 )
+import session_cache
+from asset_cache import get_asset_cache, is_cacheable_asset
 from handlers import dismiss_age_gate
 
+if TYPE_CHECKING:
+    from .context_pool import ContextPool
+
 DEBUG_DIR = Path(os.getenv("DEBUG_DIR", "debug_screenshots"))
 
 logger = logging.getLogger(__name__)
@@ -109,6 +127,88 @@ _BLOCKED_ANALYTICS_PATTERNS = [
 ]
 
 
+async def _serve_cached_asset(route: Route) -> None:
+    """Route handler: serve immutable platform bundles from ``asset_cache``.
+
+    Hits are read from disk off the event loop.  Misses are fetched from
+    the network, handed to the page, then stored (also off the event
+    loop) for every later context.
+    """
+    cache = get_asset_cache()
+    request = route.request
+    if cache is None or request.method != "GET":
+        await route.continue_()
+        return
+
+    cached = await asyncio.to_thread(cache.get, request.url)
+    if cached is not None:
+        body, headers = cached
+        await route.fulfill(status=200, headers=headers, body=body)
+        return
+
+    try:
+        response = await route.fetch()
+        body = await response.body()
+    except Exception:
+        await route.continue_()
+        return
+    await route.fulfill(response=response, body=body)
+    if response.status == 200:
+        await asyncio.to_thread(cache.put, request.url, body, response.headers)
+
+
+async def new_stealth_context(
+    browser: Browser,
+    fp: dict[str, Any],
+    *,
+    storage_state: dict[str, Any] | None = None,
+) -> BrowserContext:
+    """Create a context for fingerprint *fp* with the full stealth layer.
+
+    Used by ``BaseScraper`` directly and by ``ContextPool`` when it builds
+    contexts ahead of demand, so both paths get identical setup.
+    """
+    context = await browser.new_context(
+        viewport=fp["viewport"],
+        user_agent=fp["user_agent"],
+        locale=fp["locale"],
+        timezone_id=fp["timezone_id"],
+        storage_state=storage_state,
+    )
+
+    # --- Stealth layer ---
+    if _HAS_STEALTH_PKG:
+        # playwright-stealth 2.0: patches 30+ detection vectors via
+        # init scripts injected into the context.  Covers webdriver,
+        # chrome.runtime, plugins, languages, permissions, WebGL,
+        # canvas, AudioContext, CDP detection, and more.
+        await _STEALTH.apply_stealth_async(context)
+    else:
+        # Legacy fallback: hand-rolled script covering ~5 vectors.
+        await context.add_init_script(STEALTH_INIT_SCRIPT)
+
+    # Hashed JS/CSS bundles from the platform CDNs come from the shared
+    # disk cache instead of being re-downloaded by every context.
+    if get_asset_cache() is not None:
+        await context.route(is_cacheable_asset, _serve_cached_asset)
+    return context
+
+
+# JS run before any page script on a pooled context that restores a saved
+# session: replays one origin's localStorage (``storage_state`` can only be
+# passed at context creation).
+_RESTORE_LOCAL_STORAGE_JS = """
+([origin, items]) => {
+    if (location.origin !== origin) return;
+    try {
+        for (const [name, value] of items) {
+            if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+        }
+    } catch (e) {}
+}
+"""
+
+
 # ---------------------------------------------------------------------------
 # Browser launch helper — shared between standalone and main.py
 # ---------------------------------------------------------------------------
@@ -168,13 +268,20 @@ class BaseScraper(abc.ABC):
         browser = await launch_stealth_browser(pw)
         async with DutchieScraper(dispensary_cfg, browser=browser) as scraper:
             products = await scraper.scrape()
+            await scraper.persist_session(success=bool(products))
     """
 
+    # Cookies / localStorage are cached per domain by default.  Scrapers
+    # whose session holds a per-store choice (store picker, state
+    # selection) use "site" so stores sharing a domain stay separate.
+    session_scope: str = "domain"
+
     def __init__(
         self,
         dispensary: dict[str, Any],
         *,
         browser: Browser | None = None,
+        context_pool: ContextPool | None = None,
     ) -> None:
         self.dispensary = dispensary
         self.name: str = dispensary["name"]
@@ -184,12 +291,21 @@ class BaseScraper(abc.ABC):
 
         # External browser = shared mode (parallel scraping)
         self._shared_browser = browser
+        # Optional pool of pre-warmed contexts on the shared browser
+        self._context_pool = context_pool
 
         # Set by __aenter__
         self._pw: Playwright | None = None
         self._browser: Browser | None = None
         self._context: BrowserContext | None = None
         self._page: Page | None = None
+        self._session_key: str | None = None
+        self._pooled = False
+        self.session_restored = False
+        # Set when the scrape shows signs the fingerprint may be flagged
+        # (Cloudflare challenge, zero products) — a pooled context is
+        # then destroyed instead of being handed to the next site.
+        self.contaminated = False
 
     # ------------------------------------------------------------------
     # Async context manager — browser lifecycle
@@ -208,48 +324,63 @@ class BaseScraper(abc.ABC):
         # and timezone are all randomised per-session.  The timezone matches
         # the dispensary's region so JS Date / Intl output looks realistic.
         region = self.dispensary.get("region")
-        fp = get_context_fingerprint(region)
-        self._context = await self._browser.new_context(
-            viewport=fp["viewport"],
-            user_agent=fp["user_agent"],
-            locale=fp["locale"],
-            timezone_id=fp["timezone_id"],
-        )
 
-        # --- Stealth layer ---
-        if _HAS_STEALTH_PKG:
-            # playwright-stealth 2.0: patches 30+ detection vectors via
-            # init scripts injected into the context.  Covers webdriver,
-            # chrome.runtime, plugins, languages, permissions, WebGL,
-            # canvas, AudioContext, CDP detection, and more.
-            await _STEALTH.apply_stealth_async(self._context)
-            stealth_mode = "playwright-stealth"
+        # Restore cookies + localStorage from the last successful scrape of
+        # this domain so age gates / store pickers are already satisfied.
+        self._session_key = session_cache.session_key(self.url, self.slug, self.session_scope)
+        storage_state = session_cache.load_state(self._session_key)
+        self.session_restored = storage_state is not None
+
+        self._pooled = self._context_pool is not None and self._shared_browser is not None
+        if self._pooled:
+            # Pre-warmed context: fingerprint, stealth and asset routing
+            # were applied ahead of time by the pool.
+            self._context, fp = await self._context_pool.acquire(region)
+            if storage_state is not None:
+                await self._restore_into_pooled_context(storage_state)
         else:
-            # Legacy fallback: hand-rolled script covering ~5 vectors.
-            await self._context.add_init_script(STEALTH_INIT_SCRIPT)
-            stealth_mode = "legacy-js"
+            fp = get_context_fingerprint(region)
+            self._context = await new_stealth_context(
+                self._browser, fp, storage_state=storage_state,
+            )
 
         self._page = await self._context.new_page()
 
         logger.info(
-            "[%s] Browser ready (shared=%s, tz=%s, locale=%s, viewport=%sx%s)",
-            self.slug, bool(self._shared_browser),
+            "[%s] Browser ready (shared=%s, pooled=%s, tz=%s, locale=%s, viewport=%sx%s, session=%s)",
+            self.slug, bool(self._shared_browser), self._pooled,
             fp["timezone_id"], fp["locale"],
             fp["viewport"]["width"], fp["viewport"]["height"],
+            "restored" if self.session_restored else "fresh",
         )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        # Always close page and context (we own them).
+        # A scrape that crashed or timed out after starting from a cached
+        # session may have been poisoned by it — start the retry fresh.
+        if exc_type is not None and self.session_restored and self._session_key:
+            session_cache.invalidate(self._session_key, f"scrape raised {exc_type.__name__}")
+
+        # Always close page and context (we own them) — pooled contexts
+        # go back to the pool, which wipes or destroys them.
         # Use BaseException to also catch CancelledError (a BaseException
         # subclass in Python 3.9+) — asyncio.wait_for cancellation must
         # not leak page/context handles in the shared browser.
-        for obj in (self._page, self._context):
+        owned = (self._page,) if self._pooled else (self._page, self._context)
+        for obj in owned:
             if obj:
                 try:
                     await obj.close()
                 except BaseException:
                     pass
+        if self._pooled and self._context is not None:
+            try:
+                await self._context_pool.release(
+                    self._context,
+                    contaminated=self.contaminated or exc_type is not None,
+                )
+            except BaseException:
+                pass
         # Only close browser + playwright if we own them (standalone mode)
         if not self._shared_browser:
             if self._browser:
@@ -268,6 +399,40 @@ class BaseScraper(abc.ABC):
     # Shared helpers
     # ------------------------------------------------------------------
 
+    async def persist_session(self, *, success: bool) -> None:
+        """Save this context's storage state after a successful scrape.
+
+        On failure, a session that was restored from cache is discarded so
+        the next attempt starts clean.
+        """
+        if self._session_key is None or self._context is None:
+            return
+        if not success:
+            self.contaminated = True
+            if self.session_restored:
+                session_cache.invalidate(self._session_key, "scrape returned 0 products")
+            return
+        try:
+            state = await self._context.storage_state()
+        except Exception as exc:
+            logger.debug("[%s] Could not read storage state: %s", self.slug, exc)
+            return
+        session_cache.save_state(self._session_key, state)
+
+    async def _restore_into_pooled_context(self, state: dict[str, Any]) -> None:
+        """Apply a saved session to an already-created (pooled) context."""
+        if state.get("cookies"):
+            await self._context.add_cookies(state["cookies"])
+        for origin in state.get("origins", []):
+            items = [[i["name"], i["value"]] for i in origin.get("localStorage", [])]
+            if items:
+                await self._context.add_init_script(
+                    script=f"({_RESTORE_LOCAL_STORAGE_JS})({json.dumps([origin['origin'], items])})",
+                )
+                # Init scripts can't be removed — keep this site's
+                # storage from leaking into the next one.
+                self._context_pool.mark_single_use(self._context)
+
     @property
     def page(self) -> Page:
         assert self._page is not None, "BaseScraper must be used as an async context manager"
@@ -311,6 +476,7 @@ class BaseScraper(abc.ABC):
             """)
             if result:
                 logger.warning("[%s] Cloudflare challenge detected — page is blocked", self.slug)
+                self.contaminated = True
             return bool(result)
         except Exception:
             return False
@@ -0,0 +1,227 @@
+"""
+Pool of pre-warmed browser contexts for the shared browser.
+
+Creating a context is not free: ``new_context`` with a fresh fingerprint,
+the playwright-stealth init scripts, and the asset-cache route all run
+before a scraper can navigate.  Done per site, that setup sits on every
+site's critical path.  ``ContextPool`` builds contexts ahead of demand —
+in the background while other sites are scraping — and hands a ready one
+to each ``BaseScraper``.
+
+Contexts are grouped by region: every context carries the fingerprint
+``get_context_fingerprint(region)`` produced for it (region timezone,
+locale, viewport, UA), so a scraper always gets a timezone matching its
+dispensary.
+
+A released context goes back to the pool only if it is clean:
+  - it has served fewer than ``CONTEXT_POOL_MAX_USES`` sites (default 3),
+  - the scrape did not raise, hit a Cloudflare challenge, or return zero
+    products (any sign the fingerprint may be flagged), and
+  - its cookies and per-origin storage were wiped successfully.
+Anything else is closed and replaced by a fresh context.
+
+Disable with ``CONTEXT_POOL=false``; ``CONTEXT_POOL_WARM`` (default 2)
+sets how many idle contexts are kept ready per region.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any
+
+from playwright.async_api import Browser, BrowserContext
+
+from config.dispensaries import get_context_fingerprint
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_POOL_ENABLED = os.getenv("CONTEXT_POOL", "true").lower() not in ("0", "false", "no")
+CONTEXT_POOL_MAX_USES = max(1, int(os.getenv("CONTEXT_POOL_MAX_USES", "3")))
+CONTEXT_POOL_WARM = max(0, int(os.getenv("CONTEXT_POOL_WARM", "2")))
+
+
+class ContextPool:
+    """Region-keyed pool of stealth-configured contexts on one browser.
+
+    ``factory(browser, fingerprint)`` must return a ready context — the
+    same setup ``BaseScraper`` applies to contexts it creates itself.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        factory,
+        *,
+        warm: int = CONTEXT_POOL_WARM,
+        max_uses: int = CONTEXT_POOL_MAX_USES,
+    ) -> None:
+        self._browser = browser
+        self._factory = factory
+        self.warm = warm
+        self.max_uses = max_uses
+        self._idle: dict[str, list[BrowserContext]] = {}
+        # context → {"region", "fp", "uses", "reusable"} for every context
+        # the pool created and has not yet closed (idle or checked out).
+        self._meta: dict[BrowserContext, dict[str, Any]] = {}
+        self._refills: dict[str, asyncio.Task] = {}
+        self._closed = False
+        self.created = 0
+        self.warm_hits = 0
+        self.cold_misses = 0
+        self.reused = 0
+        self.destroyed = 0
+
+    # ------------------------------------------------------------------
+    # Creation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(region: str | None) -> str:
+        return region or "default"
+
+    async def _create(self, region: str | None) -> BrowserContext:
+        fp = get_context_fingerprint(region)
+        context = await self._factory(self._browser, fp)
+        self._meta[context] = {"region": region, "fp": fp, "uses": 0, "reusable": True}
+        self.created += 1
+        return context
+
+    async def _refill(self, region: str | None) -> None:
+        key = self._key(region)
+        try:
+            while not self._closed and len(self._idle.get(key, [])) < self.warm:
+                context = await self._create(region)
+                if self._closed:
+                    await self._destroy(context)
+                    return
+                self._idle.setdefault(key, []).append(context)
+        except Exception as exc:
+            # The next acquire() falls back to creating on demand.
+            logger.debug("Context pool refill for %s failed: %s", key, exc)
+        finally:
+            self._refills.pop(key, None)
+
+    def prewarm(self, regions) -> None:
+        """Start building idle contexts for *regions* in the background."""
+        for region in dict.fromkeys(regions):
+            self._schedule_refill(region)
+
+    def _schedule_refill(self, region: str | None) -> None:
+        key = self._key(region)
+        if self._closed or self.warm == 0 or key in self._refills:
+            return
+        self._refills[key] = asyncio.create_task(self._refill(region))
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+
+    async def acquire(self, region: str | None) -> tuple[BrowserContext, dict[str, Any]]:
+        """Return ``(context, fingerprint)`` for a scrape in *region*.
+
+        Hands out a warm context when one is idle, otherwise creates one
+        on the spot; either way a background refill keeps the region's
+        idle count at ``warm``.
+        """
+        idle = self._idle.get(self._key(region))
+        if idle:
+            context = idle.pop()
+            self.warm_hits += 1
+        else:
+            context = await self._create(region)
+            self.cold_misses += 1
+        self._schedule_refill(region)
+        meta = self._meta[context]
+        if meta["uses"]:
+            self.reused += 1
+        return context, meta["fp"]
+
+    def mark_single_use(self, context: BrowserContext) -> None:
+        """Never return *context* to the pool (e.g. it got per-site init scripts)."""
+        meta = self._meta.get(context)
+        if meta is not None:
+            meta["reusable"] = False
+
+    async def release(self, context: BrowserContext, *, contaminated: bool = False) -> None:
+        """Return *context* after a scrape, or close it if it can't be reused."""
+        meta = self._meta.get(context)
+        if meta is None:
+            await _close_quietly(context)
+            return
+        meta["uses"] += 1
+        key = self._key(meta["region"])
+        reusable = (
+            not self._closed
+            and not contaminated
+            and meta["reusable"]
+            and meta["uses"] < self.max_uses
+        )
+        if reusable and await self._reset(context):
+            self._idle.setdefault(key, []).append(context)
+            return
+        await self._destroy(context)
+        self._schedule_refill(meta["region"])
+
+    async def _reset(self, context: BrowserContext) -> bool:
+        """Wipe cookies, storage and pages so the next site starts clean."""
+        try:
+            for page in list(context.pages):
+                await page.close()
+            await context.clear_cookies()
+            state = await context.storage_state()
+            origins = [o["origin"] for o in state.get("origins", [])]
+            if origins:
+                page = await context.new_page()
+                try:
+                    cdp = await context.new_cdp_session(page)
+                    for origin in origins:
+                        await cdp.send(
+                            "Storage.clearDataForOrigin",
+                            {"origin": origin, "storageTypes": "all"},
+                        )
+                finally:
+                    await page.close()
+                state = await context.storage_state()
+            return not state.get("cookies") and not state.get("origins")
+        except Exception as exc:
+            logger.debug("Context reset failed — discarding: %s", exc)
+            return False
+
+    async def _destroy(self, context: BrowserContext) -> None:
+        self._meta.pop(context, None)
+        self.destroyed += 1
+        await _close_quietly(context)
+
+    # ------------------------------------------------------------------
+    # Shutdown / reporting
+    # ------------------------------------------------------------------
+
+    async def close(self) -> None:
+        """Stop refills and close every context the pool still owns."""
+        self._closed = True
+        for task in list(self._refills.values()):
+            task.cancel()
+        await asyncio.gather(*self._refills.values(), return_exceptions=True)
+        self._refills.clear()
+        for context in list(self._meta):
+            await self._destroy(context)
+        self._idle.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "created": self.created,
+            "warm_hits": self.warm_hits,
+            "cold_misses": self.cold_misses,
+            "reused": self.reused,
+            "destroyed": self.destroyed,
+        }
+
+
+async def _close_quietly(context: BrowserContext) -> None:
+    # BaseException: a cancelled scrape must not leak the context.
+    try:
+        await context.close()
+    except BaseException:
+        pass
@@ -26,7 +26,7 @@ from playwright.async_api import TimeoutError as PlaywrightTimeout
 
 from clouded_logic import CONSECUTIVE_EMPTY_MAX
 from config.dispensaries import PLATFORM_DEFAULTS, is_expansion_region
-from handlers import dismiss_age_gate, navigate_curaleaf_page
+from handlers import dismiss_age_gate, navigate_curaleaf_page, race_selectors
 from handlers.pagination import _JS_DISMISS_OVERLAYS
 from .base import BaseScraper
 
@@ -211,6 +211,10 @@ def _infer_state(url: str, dispensary: dict[str, Any]) -> tuple[str, str]:
 class CuraleafScraper(BaseScraper):
     """Scraper for Curaleaf direct-page dispensary menus."""
 
+    # The age-gate cookie carries the selected state, and Curaleaf stores
+    # in different states share curaleaf.com — never share sessions.
+    session_scope = "site"
+
     async def scrape(self) -> list[dict[str, Any]]:
         await self.goto()
         logger.info("[%s] After navigation, URL is: %s", self.slug, self.page.url)
@@ -402,10 +406,18 @@ class CuraleafScraper(BaseScraper):
             '[role="combobox"]',
         ]
 
-        for selector in state_selectors:
+        # Race all state pickers under one 5 s timeout, then try the
+        # visible ones in priority order without further waiting.
+        winner, _ = await race_selectors(
+            self.page, state_selectors, timeout_ms=5_000, state="visible",
+        )
+        state_candidates = state_selectors[state_selectors.index(winner):] if winner else []
+
+        for selector in state_candidates:
             try:
                 locator = self.page.locator(selector).first
-                await locator.wait_for(state="visible", timeout=5_000)
+                if not await locator.is_visible():
+                    continue
                 tag = await locator.evaluate("el => el.tagName.toLowerCase()")
                 if tag == "select":
                     await locator.select_option(label=state_name)
@@ -454,15 +466,17 @@ class CuraleafScraper(BaseScraper):
             'a:has-text("Enter")',
         ]
 
-        for selector in submit_selectors:
+        winner, elapsed = await race_selectors(
+            self.page, submit_selectors, timeout_ms=5_000, state="visible",
+        )
+        if winner is not None:
             try:
-                locator = self.page.locator(selector).first
-                await locator.wait_for(state="visible", timeout=5_000)
-                await locator.click()
-                logger.info("[%s] Clicked age gate submit via %r", self.slug, selector)
-                break
+                await self.page.locator(winner).first.click()
+                logger.info(
+                    "[%s] Clicked age gate submit via %r (%.1fs)", self.slug, winner, elapsed,
+                )
             except PlaywrightTimeout:
-                continue
+                logger.warning("[%s] Age gate submit %r matched but click timed out", self.slug, winner)
 
         # Wait for redirect back to store page.
         # Curaleaf uses multiple URL patterns and may redirect between them:
@@ -500,14 +514,12 @@ class CuraleafScraper(BaseScraper):
         """Extract product cards from the current Curaleaf page."""
         products: list[dict[str, Any]] = []
 
-        for selector in _PRODUCT_SELECTORS:
-            try:
-                await self.page.locator(selector).first.wait_for(
-                    state="attached", timeout=3_000,
-                )
-            except PlaywrightTimeout:
-                continue
+        # One 3 s race across every selector (was 3 s per selector).
+        winner, _ = await race_selectors(self.page, _PRODUCT_SELECTORS, timeout_ms=3_000)
+        if winner is None:
+            return products
 
+        for selector in _PRODUCT_SELECTORS[_PRODUCT_SELECTORS.index(winner):]:
             elements = await self.page.locator(selector).all()
             if not elements:
                 continue
@@ -18,6 +18,10 @@ Flow:
   8. Click through category tabs (Flower, Edibles, Concentrates, etc.)
      and paginate each to capture the FULL product catalog.
   9. If specials returned 0 products, fall back to the base menu URL.
+
+Learned embeds: once an iframe scrape succeeds, its URL is stored in
+``embed_cache``.  Later runs load that URL directly (steps 1-5 skipped)
+and only fall back to the host-page flow if it stops working.
 """
 
 from __future__ import annotations
@@ -31,9 +35,13 @@ from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
 from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout, Error as PlaywrightError
 
+import embed_cache
 from clouded_logic import CONSECUTIVE_EMPTY_MAX
 from config.dispensaries import PLATFORM_DEFAULTS, is_expansion_region
-from handlers import dismiss_age_gate, force_remove_age_gate, find_dutchie_content, navigate_dutchie_page
+from handlers import (
+    dismiss_age_gate, force_remove_age_gate, find_dutchie_content,
+    navigate_dutchie_page, race_selectors,
+)
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -598,6 +606,12 @@ _JS_FIND_CATEGORY_TABS = """
 class DutchieScraper(BaseScraper):
     """Scraper for sites powered by the Dutchie embedded iframe menu."""
 
+    @property
+    def session_scope(self) -> str:
+        # Planet 13 and Medizin share planet13.com but need different
+        # store-picker selections — keep their sessions separate.
+        return "site" if self.slug in _P13_STORE_MAP else "domain"
+
     async def scrape(self) -> list[dict[str, Any]]:
         # Read per-site embed_type hint (e.g. "js_embed" for TD sites)
         # so we skip detection phases that won't match.
@@ -612,6 +626,17 @@ class DutchieScraper(BaseScraper):
             embed_hint = "direct"
             logger.info("[%s] Auto-detected embed_type='direct' for %s URL", self.slug, url_host)
 
+        # --- Learned embed fast path ------------------------------------------
+        # If a previous run found this site's menu iframe, load the iframe
+        # URL directly and skip the host page, its age gate, and the embed
+        # injection wait.  Falls through to the full flow on any failure.
+        learned_url = None if embed_hint == "direct" else embed_cache.get_embed_url(self.slug, self.url)
+        if learned_url:
+            products = await self._scrape_learned_embed(learned_url)
+            if products:
+                return products
+            logger.info("[%s] Learned embed failed — falling back to host page", self.slug)
+
         # --- Navigate with wait_until='load' (scripts fully execute) ------
         await self.goto()
 
@@ -722,7 +747,10 @@ class DutchieScraper(BaseScraper):
                     "[%s] Using about:blank iframe src as dynamic fallback: %s",
                     self.slug, dynamic_fb,
                 )
-                return await self._scrape_with_fallback(dynamic_fb, "direct")
+                products = await self._scrape_with_fallback(dynamic_fb, "direct")
+                if products:
+                    embed_cache.record_embed_url(self.slug, self.url, dynamic_fb)
+                return products
 
             # --- Fast-path: skip reload+retry when fallback URL exists ----
             # The reload+retry cycle costs ~300s (navigation + smart-wait +
@@ -797,6 +825,31 @@ class DutchieScraper(BaseScraper):
             await self.save_debug_info("no_dutchie_content")
             return []
 
+        products = await self._scrape_target(target, embed_type, embed_hint)
+
+        # Remember the iframe URL so the next run can skip the host page.
+        if products and embed_type == "iframe":
+            embed_cache.record_embed_url(self.slug, self.url, target.url)
+        return products
+
+    # ------------------------------------------------------------------
+    # Extraction from a resolved menu target
+    # ------------------------------------------------------------------
+
+    async def _scrape_target(
+        self,
+        target: Union[Page, Frame],
+        embed_type: str,
+        embed_hint: str | None,
+        *,
+        allow_fallback: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Scroll, paginate, and walk category tabs on a resolved *target*.
+
+        *target* is whatever ``find_dutchie_content`` (or the learned-embed
+        fast path) returned.  When *allow_fallback* is true and nothing was
+        extracted, the configured ``fallback_url`` is tried inline.
+        """
         logger.info("[%s] Dutchie content found via %s", self.slug, embed_type)
 
         # Also try age gate inside an iframe (some sites double-gate).
@@ -897,7 +950,7 @@ class DutchieScraper(BaseScraper):
                 )
 
         # --- Fallback URL from config (e.g. Jardin switched from AIQ to Dutchie) ---
-        if not all_products:
+        if not all_products and allow_fallback:
             fallback_url = self.dispensary.get("fallback_url")
             if fallback_url and fallback_url != self.url:
                 logger.warning(
@@ -958,6 +1011,54 @@ class DutchieScraper(BaseScraper):
         logger.info("[%s] Scrape complete — %d products (%s mode)", self.slug, len(all_products), embed_type)
         return all_products
 
+    # ------------------------------------------------------------------
+    # Learned embed URL (skips the host page)
+    # ------------------------------------------------------------------
+
+    async def _scrape_learned_embed(self, embed_url: str) -> list[dict[str, Any]]:
+        """Navigate straight to a previously learned iframe URL and scrape it.
+
+        The embed is loaded as a top-level page, so there is no host-page
+        age gate to click and no injection to wait for.  The learned URL is
+        invalidated (and ``[]`` returned) if navigation fails, the page
+        redirects to a different store, or no product cards render.
+        """
+        logger.info("[%s] Trying learned embed URL: %s", self.slug, embed_url)
+        try:
+            await self.goto(embed_url)
+        except PlaywrightTimeout:
+            embed_cache.invalidate(self.slug, "navigation timed out")
+            return []
+        except PlaywrightError as exc:
+            embed_cache.invalidate(self.slug, f"navigation failed: {exc}")
+            return []
+
+        if await self.detect_cloudflare_challenge():
+            embed_cache.invalidate(self.slug, "Cloudflare challenge")
+            return []
+        if not embed_cache.verify_embed_page(embed_url, self.page.url):
+            embed_cache.invalidate(self.slug, f"redirected to {self.page.url[:120]}")
+            return []
+
+        # Embeds can carry their own age gate — dismiss it, but there is
+        # no injection callback to wait for here.
+        await self.page.evaluate(_AGE_GATE_COOKIE_JS)
+        await self.handle_age_gate(post_wait_sec=1)
+        await force_remove_age_gate(self.page)
+
+        if not await _wait_for_product_cards(self.page, self.slug, timeout_ms=_SMART_WAIT_DIRECT_MS):
+            embed_cache.invalidate(self.slug, "no product cards rendered")
+            return []
+
+        products = await self._scrape_target(
+            self.page, "learned_embed", "direct", allow_fallback=False,
+        )
+        if products:
+            embed_cache.record_embed_url(self.slug, self.url, embed_url)
+        else:
+            embed_cache.invalidate(self.slug, "0 products extracted")
+        return products
+
     # ------------------------------------------------------------------
     # Fallback URL scraping
     # ------------------------------------------------------------------
@@ -1365,21 +1466,21 @@ class DutchieScraper(BaseScraper):
         """
         products: list[dict[str, Any]] = []
 
-        # Try each selector until one yields results
+        # Race all selectors under one 10 s timeout (was 10 s *each*),
+        # then take the highest-priority selector that yields results.
         elements = []
-        for selector in _PRODUCT_SELECTORS:
-            try:
-                await frame.locator(selector).first.wait_for(
-                    state="attached", timeout=10_000,
-                )
-            except PlaywrightTimeout:
-                logger.debug("No products found with selector %s", selector)
-                continue
-            except PlaywrightError:
-                # Page/context/browser closed (TargetClosedError) — no point
-                # trying more selectors against a dead page.
-                logger.warning("[%s] Page closed while waiting for products", self.slug)
-                return products
+        try:
+            winner, elapsed = await race_selectors(frame, _PRODUCT_SELECTORS, timeout_ms=10_000)
+        except PlaywrightError:
+            # Page/context/browser closed (TargetClosedError) — no point
+            # trying more selectors against a dead page.
+            logger.warning("[%s] Page closed while waiting for products", self.slug)
+            return products
+        if winner is None:
+            logger.debug("No products found with any of %d selectors", len(_PRODUCT_SELECTORS))
+            return products
+
+        for selector in _PRODUCT_SELECTORS[_PRODUCT_SELECTORS.index(winner):]:
             elements = await frame.locator(selector).all()
             if elements:
                 logger.debug("Dutchie products matched via %r (%d)", selector, len(elements))
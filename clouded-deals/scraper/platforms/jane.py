@@ -12,6 +12,9 @@ Flow:
      switch into it.
   5. Use the "View More" button to progressively load all products
      (max 10 clicks).
+
+When products come from an iframe, its URL is stored in ``embed_cache``
+and later runs load it directly, skipping the host page entirely.
 """
 
 from __future__ import annotations
@@ -23,8 +26,9 @@ from typing import Any
 
 from playwright.async_api import Page, Frame, TimeoutError as PlaywrightTimeout, Error as PlaywrightError
 
+import embed_cache
 from config.dispensaries import PLATFORM_DEFAULTS, is_expansion_region
-from handlers import dismiss_age_gate, get_iframe, handle_jane_view_more
+from handlers import dismiss_age_gate, get_iframe, handle_jane_view_more, race_selectors
 from handlers.pagination import _JANE_MAX_LOAD_MORE_EXPANSION
 from .base import BaseScraper
 
@@ -118,11 +122,28 @@ _JANE_IFRAME_SELECTORS = [
 ]
 
 
+def _outermost_frame(frame: Frame) -> Frame:
+    """The ancestor of *frame* embedded directly in the top-level page."""
+    while frame.parent_frame is not None and frame.parent_frame.parent_frame is not None:
+        frame = frame.parent_frame
+    return frame
+
+
 class JaneScraper(BaseScraper):
     """Scraper for Jane hybrid iframe / direct-page menus."""
 
     async def scrape(self) -> list[dict[str, Any]]:
-        products = await self._scrape_url(self.url)
+        # --- Learned embed fast path: load the iframe URL found by a
+        # previous run as a top-level page, skipping the host site.
+        learned_url = embed_cache.get_embed_url(self.slug, self.url)
+        if learned_url:
+            products = await self._scrape_learned_embed(learned_url)
+            if products:
+                logger.info("[%s] Scrape complete — %d products (learned embed)", self.slug, len(products))
+                return products
+            logger.info("[%s] Learned embed failed — falling back to host page", self.slug)
+
+        products = await self._scrape_url(self.url, learn=True)
 
         # --- Fallback URL: if primary URL yielded 0 products, try the
         # fallback (e.g. dispensary's own site when primary is iheartjane,
@@ -134,13 +155,17 @@ class JaneScraper(BaseScraper):
                     "[%s] Primary URL yielded 0 products — trying fallback: %s",
                     self.slug, fallback_url,
                 )
-                products = await self._scrape_url(fallback_url)
+                products = await self._scrape_url(fallback_url, learn=True)
 
         logger.info("[%s] Scrape complete — %d products", self.slug, len(products))
         return products
 
-    async def _scrape_url(self, url: str) -> list[dict[str, Any]]:
-        """Scrape a single URL using direct page → iframe → View More cascade."""
+    async def _scrape_url(self, url: str, *, learn: bool = False) -> list[dict[str, Any]]:
+        """Scrape a single URL using direct page → iframe → View More cascade.
+
+        With *learn*, an iframe that yields products is remembered in
+        ``embed_cache`` (its outermost embedding frame, like Dutchie).
+        """
         await self.goto(url)
         await self.handle_age_gate(
             post_wait_sec=_JANE_CFG["wait_after_age_gate_sec"],
@@ -164,6 +189,8 @@ class JaneScraper(BaseScraper):
                 logger.info(
                     "[%s] Found %d products inside iframe", self.slug, len(products),
                 )
+                if products and learn:
+                    embed_cache.record_embed_url(self.slug, self.url, _outermost_frame(frame).url)
             else:
                 logger.warning("[%s] No iframe found either — 0 products", self.slug)
                 await self.save_debug_info("no_products_no_iframe")
@@ -235,6 +262,30 @@ class JaneScraper(BaseScraper):
 
         return products
 
+    async def _scrape_learned_embed(self, embed_url: str) -> list[dict[str, Any]]:
+        """Scrape a previously learned iframe URL as a top-level page.
+
+        Products are discarded and the learned URL invalidated if the page
+        ends up on a different store or yields nothing.
+        """
+        logger.info("[%s] Trying learned embed URL: %s", self.slug, embed_url)
+        try:
+            products = await self._scrape_url(embed_url)
+        except PlaywrightError as exc:
+            embed_cache.invalidate(self.slug, f"navigation failed: {exc}")
+            return []
+
+        if not embed_cache.verify_embed_page(embed_url, self.page.url):
+            embed_cache.invalidate(self.slug, f"redirected to {self.page.url[:120]}")
+            return []
+        if products:
+            # Keep the learned URL itself — products may have come from a
+            # frame nested inside it, which has no grid of its own.
+            embed_cache.record_embed_url(self.slug, self.url, embed_url)
+        else:
+            embed_cache.invalidate(self.slug, "0 products extracted")
+        return products
+
     # ------------------------------------------------------------------
     # Infinite scroll (expansion states only)
     # ------------------------------------------------------------------
@@ -332,10 +383,18 @@ class JaneScraper(BaseScraper):
 
     async def _find_jane_iframe(self) -> Frame | None:
         """Try Jane-specific iframe selectors, then fall back to generic."""
-        for selector in _JANE_IFRAME_SELECTORS:
+        try:
+            winner, _ = await race_selectors(self.page, _JANE_IFRAME_SELECTORS, timeout_ms=10_000)
+        except PlaywrightError:
+            logger.warning("[%s] Page closed while finding iframe", self.slug)
+            return None
+        candidates = _JANE_IFRAME_SELECTORS[_JANE_IFRAME_SELECTORS.index(winner):] if winner else []
+
+        for selector in candidates:
             try:
                 locator = self.page.locator(selector).first
-                await locator.wait_for(state="attached", timeout=10_000)
+                if await locator.count() == 0:
+                    continue
                 element = await locator.element_handle()
                 if element is None:
                     continue
@@ -365,18 +424,21 @@ class JaneScraper(BaseScraper):
 
     async def _try_extract(self, target: Page | Frame) -> list[dict[str, Any]]:
         """Try each product selector against *target* and return the first
-        set of results that yields products."""
-        for selector in _PRODUCT_SELECTORS:
-            try:
-                await target.locator(selector).first.wait_for(
-                    state="attached", timeout=5_000,
-                )
-            except PlaywrightTimeout:
-                continue
-            except PlaywrightError:
-                logger.warning("[%s] Page closed while waiting for products", self.slug)
-                return []
+        set of results that yields products.
 
+        All selectors are raced under one 5 s timeout; once any matches,
+        selectors are walked in priority order without further waits.
+        """
+        try:
+            winner, elapsed = await race_selectors(target, _PRODUCT_SELECTORS, timeout_ms=5_000)
+        except PlaywrightError:
+            logger.warning("[%s] Page closed while waiting for products", self.slug)
+            return []
+        if winner is None:
+            return []
+        logger.debug("[%s] Product selector %r matched after %.1fs", self.slug, winner, elapsed)
+
+        for selector in _PRODUCT_SELECTORS[_PRODUCT_SELECTORS.index(winner):]:
             elements = await target.locator(selector).all()
             if not elements:
                 continue
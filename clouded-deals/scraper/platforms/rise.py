@@ -32,7 +32,7 @@ from typing import Any
 from playwright.async_api import TimeoutError as PlaywrightTimeout
 
 from config.dispensaries import GOTO_TIMEOUT_MS, PLATFORM_DEFAULTS
-from handlers import dismiss_age_gate
+from handlers import dismiss_age_gate, race_selectors
 from .base import BaseScraper
 
 logger = logging.getLogger(__name__)
@@ -291,14 +291,12 @@ class RiseScraper(BaseScraper):
         """
         products: list[dict[str, Any]] = []
 
-        for selector in _PRODUCT_SELECTORS:
-            try:
-                await self.page.locator(selector).first.wait_for(
-                    state="attached", timeout=8_000,
-                )
-            except PlaywrightTimeout:
-                continue
+        # One 8 s race across every selector (was 8 s per selector).
+        winner, _ = await race_selectors(self.page, _PRODUCT_SELECTORS, timeout_ms=8_000)
+        if winner is None:
+            return products
 
+        for selector in _PRODUCT_SELECTORS[_PRODUCT_SELECTORS.index(winner):]:
             elements = await self.page.locator(selector).all()
             if not elements:
                 continue
@@ -42,6 +42,34 @@ import re
 
 logger = logging.getLogger(__name__)
 
+
+def _any_of(patterns: list[re.Pattern]) -> re.Pattern:
+    """Combine *patterns* into one that matches wherever any of them does.
+
+    Each pattern keeps its own case sensitivity, so
+    ``_any_of(ps).search(s)`` is true exactly when
+    ``any(p.search(s) for p in ps)`` is — in a single scan.  Patterns
+    starting with ``\\b`` (and without alternation of their own) share
+    one leading ``\\b``, which lets the scan skip mid-word positions
+    without trying every alternative there.
+    """
+    bounded, other = [], []
+    for p in patterns:
+        if p.flags & ~(re.IGNORECASE | re.UNICODE):
+            raise ValueError(f"unsupported flags on {p.pattern!r}")
+        body = p.pattern
+        target = other
+        if body.startswith(r"\b") and "|" not in body:
+            body, target = body[2:], bounded
+        target.append(f"(?i:{body})" if p.flags & re.IGNORECASE else f"(?:{body})")
+    parts = ([r"\b(?:" + "|".join(bounded) + ")"] if bounded else []) + other
+    return re.compile("|".join(parts))
+
+
+def _any_substring(words: tuple[str, ...]) -> re.Pattern:
+    """One pattern finding any of *words* as a plain substring."""
+    return re.compile("|".join(re.escape(w) for w in words))
+
 # =====================================================================
 # Infused detection
 # =====================================================================
@@ -75,6 +103,9 @@ _INFUSED_BRAND_LINES: dict[str, list[re.Pattern]] = {
     "heavy hitters": [re.compile(r"\bdiamond\b", re.IGNORECASE)],
 }
 
+_INFUSED_RE = _any_of(_INFUSED_INDICATORS)
+_INFUSED_BRAND_LINE_RES = {b: _any_of(ps) for b, ps in _INFUSED_BRAND_LINES.items()}
+
 # =====================================================================
 # Vape subtype detection — multi-layer strategy
 # =====================================================================
@@ -247,6 +278,13 @@ _VAPE_POD_INDICATORS = [
     re.compile(r"\bpod\b", re.IGNORECASE),
 ]
 
+_VAPE_DISPOSABLE_RE = _any_of(_VAPE_DISPOSABLE_INDICATORS)
+_DISPOSABLE_BRAND_LINE_RES = {b: _any_of(ps) for b, ps in _DISPOSABLE_BRAND_LINES.items()}
+_NOT_DISPOSABLE_RE = _any_of(_NOT_DISPOSABLE_INDICATORS)
+_VAPE_CARTRIDGE_RE = _any_of(_VAPE_CARTRIDGE_INDICATORS)
+_VAPE_POD_RE = _any_of(_VAPE_POD_INDICATORS)
+_PEN_RE = re.compile(r"\bpen\b")
+
 # Brands whose vapes default to pod (proprietary systems).
 # Disposable brand lines (Step 2) take priority over this fallback (Step 4).
 _POD_BRANDS = {"pax", "plug play", "stiiizy", "airopro", "airo"}
@@ -266,22 +304,20 @@ def _classify_vape_subtype(name_lower: str, brand_lower: str) -> str | None:
       4. Brand-based pod/cart fallback (only for brands not in disposable lines)
       5. "pen" heuristic → disposable (with NOT-disposable guard)
     """
-    has_not_disposable = any(p.search(name_lower) for p in _NOT_DISPOSABLE_INDICATORS)
-
     # 1. Explicit disposable keywords override everything (even NOT-disposable)
-    if any(p.search(name_lower) for p in _VAPE_DISPOSABLE_INDICATORS):
+    if _VAPE_DISPOSABLE_RE.search(name_lower):
         return "disposable"
 
     # 2. Brand-specific disposable product lines
-    if brand_lower in _DISPOSABLE_BRAND_LINES:
-        if any(p.search(name_lower) for p in _DISPOSABLE_BRAND_LINES[brand_lower]):
-            if not has_not_disposable:
-                return "disposable"
+    brand_lines = _DISPOSABLE_BRAND_LINE_RES.get(brand_lower)
+    if brand_lines is not None and brand_lines.search(name_lower):
+        if not _NOT_DISPOSABLE_RE.search(name_lower):
+            return "disposable"
 
     # 3. Explicit pod/cartridge keywords in product name
-    if any(p.search(name_lower) for p in _VAPE_POD_INDICATORS):
+    if _VAPE_POD_RE.search(name_lower):
         return "pod"
-    if any(p.search(name_lower) for p in _VAPE_CARTRIDGE_INDICATORS):
+    if _VAPE_CARTRIDGE_RE.search(name_lower):
         return "cartridge"
 
     # 4. Brand-based fallback (only if not in disposable brand lines)
@@ -291,8 +327,8 @@ def _classify_vape_subtype(name_lower: str, brand_lower: str) -> str | None:
         return "cartridge"
 
     # 5. "pen" heuristic — vape pens are typically disposable/AIO
-    if re.search(r"\bpen\b", name_lower):
-        if not has_not_disposable:
+    if _PEN_RE.search(name_lower):
+        if not _NOT_DISPOSABLE_RE.search(name_lower):
             return "disposable"
 
     return None
@@ -302,18 +338,47 @@ def _classify_vape_subtype(name_lower: str, brand_lower: str) -> str | None:
 # Pack detection
 # =====================================================================
 
+# Numbers open with (?<!\d) so long digit runs are scanned once — see the
+# note at the top of product_normalizer.py.
 _PACK_INDICATORS = [
-    re.compile(r"\d+\s*-?\s*pack\b", re.IGNORECASE),
-    re.compile(r"\d+\s*pk\b", re.IGNORECASE),
+    re.compile(r"(?<!\d)\d+\s*(?:-\s*)?pack\b", re.IGNORECASE),
+    re.compile(r"(?<!\d)\d+\s*pk\b", re.IGNORECASE),
     re.compile(r"\bmulti[- ]?pack\b", re.IGNORECASE),
     re.compile(r"\bvariety[- ]?pack\b", re.IGNORECASE),
     # "Xg/Npk" pattern (e.g. "2g/4pk", "2.5g/5pk") — preroll packs
-    re.compile(r"\d+\.?\d*\s*g\s*/\s*\d+\s*pk\b", re.IGNORECASE),
+    re.compile(r"(?<!\d)\d+(?:\.\d*)?\s*g\s*/\s*\d+\s*pk\b", re.IGNORECASE),
 ]
 
+_PACK_RE = _any_of(_PACK_INDICATORS)
+
 # Brands whose products are ALWAYS packs (never singles)
 _PACK_BRANDS = {"dogwalkers"}
 
+# Pack detection is skipped for edibles/gummies: "Gummies 10pk" or
+# "Edible 5-pack" are NOT preroll packs.
+_EDIBLE_INDICATORS = ("edible", "gummy", "gummies", "chocolate", "candy",
+                      "brownie", "chew", "lozenge", "mint", "cookie",
+                      "beverage", "drink", "bar", "caramel", "tincture",
+                      "capsule", "tablet", "tea", "honey", "butter",
+                      "multipack", "pieces", "softgel", "melatonin")
+# Non-cannabis accessories that should never be reclassified as prerolls
+_ACCESSORY_INDICATORS = ("screen", "screens", "papers", "rolling paper",
+                         "tips", "filter", "grinder", "lighter", "tray",
+                         "stash", "storage", "pipe", "bong", "rig",
+                         "torch", "dab tool", "nail",
+                         "hemp wrap", "hemp wraps", "wrapper")
+# Empty cones (RAW, Pop Cones, etc.) are rolling papers, not prerolls
+_CONE_ACCESSORY_BRANDS = ("raw", "pop cones", "elements", "ocb", "zig zag",
+                          "zig-zag", "hemper", "king palm")
+
+_EDIBLE_CONTEXT_RE = _any_substring(_EDIBLE_INDICATORS)
+_ACCESSORY_RE = _any_substring(_ACCESSORY_INDICATORS)
+_CONE_INFUSED_RE = _any_substring(("infused", "thc", "live resin"))
+# A cone accessory brand, or a pack count ("6 pack", "3pk")
+_CONE_ACCESSORY_RE = re.compile(
+    _any_substring(_CONE_ACCESSORY_BRANDS).pattern + r"|(?<!\d)\d+\s*(?:-\s*)?pack\b|(?<!\d)\d+\s*pk\b"
+)
+
 
 # =====================================================================
 # Concentrate subtype detection
@@ -403,14 +468,13 @@ def classify_product(
     corrected_category: str | None = None
 
     # --- Infused detection ---
-    if any(pattern.search(name_lower) for pattern in _INFUSED_INDICATORS):
+    if _INFUSED_RE.search(name_lower):
         is_infused = True
 
     # Brand-specific infused lines
-    if brand_lower in _INFUSED_BRAND_LINES:
-        patterns = _INFUSED_BRAND_LINES[brand_lower]
-        if any(p.search(name_lower) for p in patterns):
-            is_infused = True
+    brand_lines = _INFUSED_BRAND_LINE_RES.get(brand_lower)
+    if brand_lines is not None and brand_lines.search(name_lower):
+        is_infused = True
 
     if is_infused:
         subtype = "infused_preroll"
@@ -423,41 +487,25 @@ def classify_product(
             )
 
     # --- Pack detection (only if NOT infused) ---
-    # CRITICAL: Skip pack detection for edibles/gummies.  Edible products
-    # like "Gummies 10pk" or "Edible 5-pack" are NOT preroll packs.
-    _EDIBLE_INDICATORS = ("edible", "gummy", "gummies", "chocolate", "candy",
-                          "brownie", "chew", "lozenge", "mint", "cookie",
-                          "beverage", "drink", "bar", "caramel", "tincture",
-                          "capsule", "tablet", "tea", "honey", "butter",
-                          "multipack", "pieces", "softgel", "melatonin")
-    # Non-cannabis accessories that should never be reclassified as prerolls
-    _ACCESSORY_INDICATORS = ("screen", "screens", "papers", "rolling paper",
-                             "tips", "filter", "grinder", "lighter", "tray",
-                             "stash", "storage", "pipe", "bong", "rig",
-                             "torch", "dab tool", "nail",
-                             "hemp wrap", "hemp wraps", "wrapper")
-    # Empty cones (RAW, Pop Cones, etc.) are rolling papers, not prerolls
-    _CONE_ACCESSORY_BRANDS = ("raw", "pop cones", "elements", "ocb", "zig zag",
-                              "zig-zag", "hemper", "king palm")
+    # CRITICAL: Skip pack detection for edibles/gummies and accessories.
     is_edible_context = (
         cat in ("edible",)
-        or any(kw in name_lower for kw in _EDIBLE_INDICATORS)
+        or bool(_EDIBLE_CONTEXT_RE.search(name_lower))
     )
     # Cone accessory: brand-based OR any "cone(s)" + pack pattern without
     # infused/thc indicators (infused cones ARE cannabis products).
     _is_cone_accessory = (
         "cone" in name_lower
-        and not any(kw in name_lower for kw in ("infused", "thc", "live resin"))
-        and (any(b in name_lower for b in _CONE_ACCESSORY_BRANDS)
-             or bool(re.search(r'\d+\s*-?\s*pack\b|\d+\s*pk\b', name_lower)))
+        and not _CONE_INFUSED_RE.search(name_lower)
+        and bool(_CONE_ACCESSORY_RE.search(name_lower))
     )
     is_accessory = (
-        any(kw in name_lower for kw in _ACCESSORY_INDICATORS)
+        bool(_ACCESSORY_RE.search(name_lower))
         or _is_cone_accessory
     )
     is_concentrate_context = cat in ("concentrate", "vape")
     if not is_infused and not is_edible_context and not is_accessory and not is_concentrate_context:
-        is_pack = any(p.search(name_lower) for p in _PACK_INDICATORS)
+        is_pack = bool(_PACK_RE.search(name_lower))
         is_pack_brand = brand_lower in _PACK_BRANDS
 
         if is_pack or is_pack_brand:
@@ -506,7 +554,7 @@ def classify_product(
     # name are vapes even if detect_category got it wrong (e.g. "flower"
     # because the mg weight or keyword wasn't matched correctly).
     if cat not in ("vape",) and subtype is None:
-        if any(p.search(name_lower) for p in _VAPE_DISPOSABLE_INDICATORS):
+        if _VAPE_DISPOSABLE_RE.search(name_lower):
             corrected_category = "vape"
             subtype = "disposable"
             logger.info(
@@ -519,14 +567,14 @@ def classify_product(
     # not flower.  E.g. "3 for $50 Trendi Cartridges" miscategorized as
     # flower because "3" matched flower weight patterns.
     if cat not in ("vape",) and subtype is None and corrected_category != "vape":
-        if any(p.search(name_lower) for p in _VAPE_CARTRIDGE_INDICATORS):
+        if _VAPE_CARTRIDGE_RE.search(name_lower):
             corrected_category = "vape"
             subtype = "cartridge"
             logger.info(
                 "[CLASSIFY] %r recategorized: %s → vape (cartridge indicator)",
                 name[:60], cat,
             )
-        elif any(p.search(name_lower) for p in _VAPE_POD_INDICATORS):
+        elif _VAPE_POD_RE.search(name_lower):
             corrected_category = "vape"
             subtype = "pod"
             logger.info(
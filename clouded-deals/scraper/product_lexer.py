@@ -0,0 +1,223 @@
+"""
+Single-pass lexer for the numbers in product text.
+
+Price, weight and cannabinoid extraction used to run a dozen separate
+regexes over the same text in ``parser.parse_product`` — was/now,
+bundle, bundle-with-tier, every ``$`` amount, "$X off" labels, "from
+$X", fractional ounces, metric weights, THC and CBD.  Every one of
+those patterns is anchored on a run of digits, so ``tokenize`` scans
+the text once and returns one token per digit run, annotated with what
+the text says immediately around it::
+
+    (start, word, cur, num, spaced, unit, end)
+
+``num``
+    the maximal run of digits and dots (``"3.5"``, ``"40.00"``,
+    ``"1.2.5"``) starting at ``start``.  Each rule applies its own
+    number grammar to it with the helpers below.
+``word``
+    keyword directly before the number: ``"was"`` / ``"from"`` (also
+    "starting at") followed by whitespace and ``$``, or ``"thc"`` /
+    ``"cbd"`` (``"thc:"`` / ``"cbd:"`` when a colon follows the word
+    directly); else ``""``.
+``cur``
+    ``"$"`` when a dollar sign directly precedes the number, ``"$ "``
+    when whitespace separates them, else ``""``.
+``unit``
+    what follows the number after optional whitespace (``spaced`` says
+    whether there was any):
+    ``"%"`` / ``"%thc"`` / ``"%cbd"`` / ``"%off"``, ``"mg"`` / ``"g"`` /
+    ``"oz"``, ``"off"`` (also "save" / "discount"), ``"now"`` before
+    another price, ``"/$"`` for a bundle quantity (``2/$60``),
+    ``"1/2"`` / ``"1/4"`` / ``"1/8"`` for a fractional ounce, ``"$"``
+    when another price follows, else ``""``.
+``end``
+    end of the unit word for weight and "off" units (so
+    ``text[start:end]`` is e.g. ``"100 mg"``), else end of ``num``.
+
+The text after a number is read with a lookahead and the keyword before
+it by looking back, so a token never swallows the start of another:
+``"2/$55 $35"`` yields ``2`` (unit ``/$``), ``$55`` (unit ``$``) and
+``$35``.  Matches keep the case-insensitivity, ``\\b`` and
+Unicode-digit semantics of the patterns they replace; the reference
+implementations in ``benchmarks/bench_lexer.py`` pin that down.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Every token starts at a digit, a dot or "$", so the scan can skip
+# ahead on that character class; keyword context is checked backwards
+# from the few candidates it finds.
+_LEX_RE = re.compile(
+    r"""
+    [\d.$]
+    (?:
+        (?<=\$) (?P<sp>\s*) (?=\d) (?P<cnum>[\d.]+)
+      | (?<=[\d.]) (?P<rest>[\d.]*)
+    )
+    (?:(?=
+        (?P<gap>\s*)
+        (?:
+            (?P<pct>%)\s*(?P<pctword>thc|cbd|off)?
+          | (?P<wunit>mg|g|oz)\b
+          | (?P<off>off|save|discount)\b
+          | (?P<now>now)\s+\$\s*\d
+          | /(?:(?P<bundle>)\s*\$\s*\d|(?P<den>[248])\s*(?:oz)?\b)
+          | (?P<nxt>\$)\s*\d
+        )
+    ))?
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Keywords are matched the way the old patterns matched them: with
+# IGNORECASE, and without a word boundary on the left.
+_WAS_RE = re.compile("was", re.IGNORECASE)
+_FROM_RE = re.compile("from", re.IGNORECASE)
+_AT_RE = re.compile("at", re.IGNORECASE)
+_STARTING_RE = re.compile("starting", re.IGNORECASE)
+_THC_RE = re.compile("thc", re.IGNORECASE)
+_CBD_RE = re.compile("cbd", re.IGNORECASE)
+
+Token = tuple[int, str, str, str, bool, str, int]
+
+
+def _skip_space_back(text: str, i: int) -> int:
+    while i and text[i - 1].isspace():
+        i -= 1
+    return i
+
+
+def _price_word(text: str, i: int) -> str:
+    """``"was"`` / ``"from"`` when *text* has it, then whitespace, before index *i*."""
+    j = _skip_space_back(text, i)
+    if j == i or text[j - 1] not in "sSmMtTſ":
+        return ""
+    if _WAS_RE.fullmatch(text, j - 3, j):
+        return "was"
+    if _FROM_RE.fullmatch(text, j - 4, j):
+        return "from"
+    if _AT_RE.fullmatch(text, j - 2, j):
+        k = _skip_space_back(text, j - 2)
+        if k < j - 2 and _STARTING_RE.fullmatch(text, k - 8, k):
+            return "from"
+    return ""
+
+
+def _cannabinoid_word(text: str, i: int) -> str:
+    """``"thc"`` / ``"cbd"`` (``"thc:"`` / ``"cbd:"`` when a colon follows
+    the word directly) when *text* has it, then ``\\s*:?\\s*``, before *i*."""
+    j = _skip_space_back(text, i)
+    colon = ""
+    if j and text[j - 1] == ":":
+        k = j - 1
+        j = _skip_space_back(text, k)
+        colon = ":" if j == k else ""
+    if not j or text[j - 1] not in "cCdD":
+        return ""
+    if _THC_RE.fullmatch(text, j - 3, j):
+        return "thc" + colon
+    if _CBD_RE.fullmatch(text, j - 3, j):
+        return "cbd" + colon
+    return ""
+
+
+def tokenize(text: str) -> list[Token]:
+    """Return the number tokens of *text* in order of position."""
+    tokens: list[Token] = []
+    for m in _LEX_RE.finditer(text):
+        (sp, cnum, rest, gap, pct, pctword, wunit, off, now,
+         bundle, den, nxt) = m.groups()
+        first = m.start()
+        if cnum is not None:
+            num = cnum
+            end = m.end(2)
+            start = end - len(num)
+            cur = "$ " if sp else "$"
+            # "was" / "from" need whitespace before the "$".
+            word = _price_word(text, first) if first and text[first - 1].isspace() else ""
+        else:
+            start = first
+            end = m.end(3)
+            num = text[start:end]
+            cur = ""
+            prev = text[start - 1] if start else ""
+            word = _cannabinoid_word(text, start) if prev and (prev in "cCdD:" or prev.isspace()) else ""
+
+        if pct is not None:
+            # First letters only: IGNORECASE also matches e.g. "ſ" for
+            # "s", which str.lower() would not map back.
+            unit = "%" + ({"t": "thc", "c": "cbd", "o": "off"}[pctword[0].lower()] if pctword else "")
+        elif wunit is not None:
+            unit = wunit.lower()
+            end = m.end(7)
+        elif off is not None:
+            unit = "off"
+            end = m.end(8)
+        elif now is not None:
+            unit = "now"
+        elif bundle is not None:
+            unit = "/$"
+        elif den is not None:
+            # "1/8" needs a word boundary before the "1" and nothing
+            # between it and the slash.
+            unit = ""
+            if not gap and num[-1] == "1":
+                if len(num) > 1:
+                    bounded = num[-2] == "."
+                else:
+                    before = text[start - 1] if start else " "
+                    bounded = not (before.isalnum() or before == "_")
+                if bounded:
+                    unit = "1/" + den
+        elif nxt is not None:
+            unit = "$"
+        else:
+            unit = ""
+
+        tokens.append((start, word, cur, num, bool(gap), unit, end))
+    return tokens
+
+
+# ---------------------------------------------------------------------
+# Number grammars.  ``num`` is a run of digits and dots; each helper
+# returns the part a given pattern would capture, or None.
+# ---------------------------------------------------------------------
+
+
+def price_amount(num: str) -> str:
+    r"""Leading ``\d+(?:\.\d{1,2})?`` of a run that starts with a digit."""
+    whole, dot, rest = num.partition(".")
+    cents = rest.partition(".")[0][:2]
+    return f"{whole}.{cents}" if dot and cents else whole
+
+
+def is_price(num: str) -> bool:
+    r"""Whether the whole run is ``\d+(?:\.\d{1,2})?``."""
+    whole, dot, cents = num.partition(".")
+    return bool(whole) and (not dot or 0 < len(cents) <= 2 and "." not in cents)
+
+
+def decimal_tail(num: str) -> str | None:
+    r"""Leftmost ``\d*\.?\d+`` ending at the end of the run."""
+    head, dot, last = num.rpartition(".")
+    if not last:
+        return None
+    return head.rpartition(".")[2] + dot + last
+
+
+def percent_tail(num: str) -> str | None:
+    r"""Leftmost ``\d+(?:\.\d+)?`` ending at the end of the run."""
+    head, dot, last = num.rpartition(".")
+    if not last:
+        return None
+    whole = head.rpartition(".")[2]
+    return f"{whole}.{last}" if whole else last
+
+
+def is_percent(num: str) -> bool:
+    r"""Whether the whole run is ``\d+(?:\.\d+)?``."""
+    whole, dot, frac = num.partition(".")
+    return bool(whole) and (not dot or bool(frac) and "." not in frac)
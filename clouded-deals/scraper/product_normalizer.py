@@ -0,0 +1,955 @@
+"""
+Raw scraped product → normalized DB fields.
+
+Everything between "a scraper returned some cards" and "detect_deals
+gets a list of products" lives here: brand detection (scraped label →
+URL → raw_text label → name → clean text), category detection and its
+corrections, ``parse_product`` for price / weight / THC, display-name
+cleaning and ``classify_product``.  It used to be inlined in
+``main._scrape_site_inner``; as a standalone module it can be tested
+and benchmarked without a browser, Supabase or the scraper runtime.
+
+``normalize_products(raw_products, dispensary)`` is the batch entry
+point.  It does not mutate its input and does no I/O apart from the
+optional parse cache passed in by the caller.  Within a batch:
+  - each product's ``raw_text`` is split into lines and lowercased once,
+    and that view is shared by the raw_text brand-label scan (run up to
+    twice per product) and the strain fallback;
+  - ``detect_brand`` results for raw_text lines are memoized — chain
+    menus repeat the same brand labels on hundreds of cards;
+  - per-brand "strip the brand from the name" patterns are compiled
+    once per process instead of once per product.
+
+``raw_text`` is cut to ``RAW_TEXT_MAX_CHARS`` — what ``main.py`` stores —
+before any pattern sees it, so one runaway card cannot stall the batch.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import Any
+
+from clouded_logic import BRANDS_LOWER, CloudedLogic
+from parse_cache import ParseCache, product_cache_key
+from product_classifier import classify_product
+from product_record import ProductRecord, parsed_record
+
+# Longest raw_text parsed (and stored by main._upsert_products).
+RAW_TEXT_MAX_CHARS = 4000
+
+# Patterns that open with \s* (or a number) start with (?<!\s) (or
+# (?<!\d)): a match can only begin where the run begins, and retrying
+# from every later position of a long run made sub() quadratic.  Not
+# for patterns that can end in whitespace — the next match may start
+# right there.  Two separators in a row are written "\s*(?:\|\s*)?"
+# rather than "\s*\|?\s*", and numbers "\d+(?:\.\d*)?" rather than
+# "\d+\.?\d*", so a run is not split two ways on backtracking.
+# benchmarks/fuzz_patterns.py finds new offenders.
+
+# Regex to strip junk from product names before storing / dedup
+_RE_NAME_JUNK = re.compile(
+    r"(Add to (cart|bag)|Remove|View details|Out of stock|"
+    r"Sale!|New!|Limited|Sold out|In stock|"
+    r"\bQty\b.*$|\bQuantity\b.*$)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Strip inline bundle/promo text that bleeds into product names from Dutchie
+# "Special Offers" DOM.  Matches patterns like "3 For $50 …", "2/$60 …",
+# "Buy 2 Get 1 …" and removes everything from the match to end of string.
+_RE_BUNDLE_PROMO = re.compile(
+    r"(?<!\s)\s*\b\d+\s+[Ff]or\s+\$\d+.*$"      # "3 For $50 …"
+    r"|(?<!\s)\s*\b\d+/\$\d+.*$"                # "2/$60 …"
+    r"|(?<!\s)\s*\bBuy\s+\d+\s+Get\s.*$"        # "Buy 2 Get 1 …"
+    r"|(?<!\s)\s*\bSpecial Offers?\b.*$"        # "Special Offers (1) …"
+    r"|(?<!\s)\s*\b\d+\s+(?:Half\s+)?(?:Ounces?|OZ)\s*[-–]?\s*\$\d+.*$"  # "2 Half Ounces - $99 …"
+    r"|(?<!\s)\s*\b\d+\s+PR'?s?\s*[-–]?\s*\$\d+.*$"  # "10 PR's - $50 …"
+    r"|(?<!\s)\s*[-–]\s*Delivery\s*$",          # "- Delivery" trailing text
+    re.IGNORECASE,
+)
+
+# Marketing tier labels that brands use (e.g., STIIIZY Black/Gold/Silver Label)
+_RE_MARKETING_TIER = re.compile(
+    r"(?<!\s)\s*(?:\|\s*)?\b(Black|Gold|Silver|Blue|White|Red|Green|Purple|Diamond|Platinum)\s+Label\b",
+    re.IGNORECASE,
+)
+
+# "Prepack", "Whole Flower", "Flower Prepack" — dispensary marketing terms
+_RE_PREPACK = re.compile(
+    r"\b(?:Flower\s+)?Prepack\b|\bWhole\s+Flower\b",
+    re.IGNORECASE,
+)
+_RE_TRAILING_STRAIN = re.compile(r"(?<!\s)\s*(Indica|Sativa|Hybrid)\s*$", re.IGNORECASE)
+
+# Brand abbreviations that appear in product names instead of the full brand
+_BRAND_ABBREVIATIONS: dict[str, list[str]] = {
+    "Circle S Farms": ["CSF"],
+    "Sauce Essentials": ["Sauce"],
+    "Vlasic Labs": ["Vlasic"],
+    "Tyson 2.0": ["Tyson"],
+    "Tsunami Labs": ["Tsunami"],
+    # NV abbreviation brands — full names appear in product text
+    "AMA": ["Alternative Medicine Association", "Alternative Medical Association"],
+    "HSH": ["High Sierra Holistics"],
+}
+
+# Weight prefix patterns: "3.5g |", "1g |", ".5g |"
+_RE_WEIGHT_PREFIX = re.compile(r"^\.?\d+(?:\.\d*)?\s*g\s*\|\s*", re.IGNORECASE)
+
+# Bundle quantity text: "3 Eighths", "5 Pack", "2 Quarters"
+_RE_BUNDLE_QTY = re.compile(
+    r"\b\d+\s+(?:Eighths?|Quarters?|Halves|Half)\b\s*",
+    re.IGNORECASE,
+)
+
+# Strain type anywhere in name (not just trailing)
+_RE_STRAIN_TYPE = re.compile(r"\b(?:Indica|Sativa|Hybrid)\b", re.IGNORECASE)
+
+# Redundant vape category words in display name.
+# NOTE: "Disposable" is intentionally excluded — it's the primary signal for
+# disposable subtype classification in product_classifier.py.  Stripping it
+# here destroyed the keyword before classify_product() could see it, causing
+# disposable vapes to fall into the generic "vape" bucket (2/30 target).
+_RE_VAPE_WORDS = re.compile(
+    r"\b(?:Cartridges?|Carts?|Distillate|Pod|Vape)\b",
+    re.IGNORECASE,
+)
+
+# Marketing junk names that don't add useful info to a product name
+_RE_MARKETING_JUNK = re.compile(
+    r"\bHigh\s+Octane\b|\bX(?:treme|XX)\b",
+    re.IGNORECASE,
+)
+
+# Concentrate format descriptors — redundant when category is already "concentrate"
+_RE_CONCENTRATE_FORMAT = re.compile(
+    r"\b(?:(?:Diamond|Live|Cured)\s+)?(?:Badder|Batter|Budder|Shatter|Wax|"
+    r"Sauce|Sugar|Crumble|Rosin|Resin|Diamonds?)\b",
+    re.IGNORECASE,
+)
+
+# Concentrate keywords for raw_name–based category correction
+_CONCENTRATE_NAME_KEYWORDS = re.compile(
+    r"\b(?:badder|batter|budder|shatter|wax|sauce|sugar|crumble|"
+    r"rosin|diamonds?|live\s+resin|cured\s+resin)\b",
+    re.IGNORECASE,
+)
+_VAPE_NAME_KEYWORDS = re.compile(
+    r"\b(?:cart|cartridge|pod|disposable|vape|pen|all-in-one)\b",
+    re.IGNORECASE,
+)
+
+# Standalone weight values redundant with the weight field
+_RE_INLINE_WEIGHT = re.compile(
+    r"\b(?:\d+(?:\.\d+)?|\.\d+)\s*g\b",
+    re.IGNORECASE,
+)
+
+# Bracket-enclosed weight: "[.95g]", "[1g]", "[3.5g]"
+_RE_BRACKET_WEIGHT = re.compile(
+    r"\s*\[\.?\d+(?:\.\d*)?\s*g\]\s*",
+    re.IGNORECASE,
+)
+
+# Promotional bundle text embedded in product names:
+# "Gummies 2 For $35 All Dispensary", "Elixir 3 For $20 Sips, HaHa, "
+_RE_PROMO_BUNDLE = re.compile(
+    r"(?<!\s)\s*(?<!\d)\d+\s+For\s+\$\d+\.?\d*\b.*$",
+    re.IGNORECASE,
+)
+
+# Trailing pipe-delimited weight/metadata for edibles:
+# "Drink Loud | Cucumber Haze | 100mg" → keep up to the strain segment
+# "Blue Razz | 100mg" → strip "| 100mg"
+# "Dreamberry | 100mg 2:1 [THC:CBN]" → strip "| 100mg 2:1 [THC:CBN]"
+_RE_TRAILING_PIPE_WEIGHT = re.compile(
+    r"(?<!\s)\s*\|\s*\d+(?:\.\d*)?\s*m?g\b.*$",
+    re.IGNORECASE,
+)
+
+# THC:CBD ratio brackets: "[THC:CBN]", "[1:1]", "[2:1]".  The inner \s*
+# only follows a bracket or ratio, so it never splits the leading one.
+_RE_RATIO_BRACKET = re.compile(
+    r"\s*(?:\[?(?:\d*:)?\d*(?<=[\[\d:])\s*)?(?:THC|CBD|CBN|CBG)\s*(?::\s*(?:THC|CBD|CBN|CBG))?\]?",
+    re.IGNORECASE,
+)
+
+
+# ── Offer/bundle text isolation for brand detection ──────────────────
+# When Dutchie product cards include "Special Offers" sections, those
+# sections mention OTHER brands from bundle deals (e.g. "2/$40 Power
+# Pack || KYND 3.5g Flower & HAZE 1g Live Resin ||").  Running brand
+# detection on this text causes brand contamination — the wrong brand
+# gets picked up.  We strip offer text BEFORE brand detection fallback.
+_RE_OFFER_SECTION = re.compile(
+    r"(?:Special Offers?\s*\(?.*$)"            # "Special Offers (1) …" to end
+    r"|(?:\d+/\$\d+\s+.*(?:Power Pack|Bundle).*$)"  # "2/$40 Power Pack || …"
+    r"|(?:\bShop Offer\b.*$)"                  # "Shop Offer" link text
+    r"|(?:\bOffer\b.*\bShop\b.*$)"             # variant "Offer … Shop"
+    r"|(?:\bselect\s+\$\d+.*$)"               # "select $20 eighths 2/$30 …" promo
+    r"|(?:\bIncluded?\s+(?:in|with)\b.*$)"     # "Included in: 2/$40 Concentrates…"
+    r"|(?:\bPart\s+of\b.*$)"                   # "Part of: Mix & Match…"
+    r"|(?:\bMix\s*(?:&|and|n)\s*Match\b.*$)"   # "Mix & Match 2/$40…"
+    r"|(?:\d+\s+for\s+\$\d+.*$)"              # "2 for $40 Rove, AMA…"
+    r"|(?:\bBOGO\b.*$)"                        # "BOGO on select brands…"
+    r"|(?:\bBundle\b.*$)"                       # "Bundle deal: …"
+    r"|(?:\bDeal\s*:.*$)"                       # "Deal: 2/$60 …"
+    r"|(?:\bPromo\s*:.*$)"                      # "Promo: …"
+    r"|(?:\bAlso\s+(?:included?|available)\b.*$)"  # "Also included: Rove, Reserve…"
+    # Bundle pricing with fractional oz — "$35 1/4 oz", "$55 1/2 oz (Select Strains)"
+    # This is deal copy describing a bundle promotion, NOT the product's own weight.
+    # Without stripping, "1/4" is parsed as 7g and "$35" as the price.
+    r"|(?:\$\d+\.?\d*\s+1/[248]\s*(?:oz\.?)?\b.*$)"  # "$35 1/4 oz …" to end
+    r"|(?:any\s+(?:two|2|three|3)\b.*$)"       # "any two 3.5g for $35 …"
+    r"|(?:\bget\s+any\b.*$)",                   # "get any 2 eighths …"
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _strip_offer_text(raw_text: str) -> str:
+    """Remove Special Offers / bundle deal sections from raw_text.
+
+    This prevents brand names mentioned in offer text (e.g. "KYND 3.5g
+    Flower & HAZE 1g Live Resin") from contaminating brand detection,
+    AND prevents bundle deal pricing/weight (e.g. "$35 1/4 oz Select
+    Strains") from polluting the weight and price parsers.
+    """
+    if not raw_text:
+        return ""
+    return _RE_OFFER_SECTION.sub("", raw_text).strip()
+
+
+# ── URL-based brand extraction ─────────────────────────────────────────
+# Product URLs often contain the brand slug (e.g. "/brands/rove/...",
+# "/rove-featured-farms-1g", "brand=rove").  This is a high-confidence
+# signal that avoids false positives from product name parsing.
+#
+# IMPORTANT: Only search in product-identifying URL segments to avoid
+# matching dispensary names in the store path.  For example, Curaleaf URLs
+# always contain "/curaleaf-las-vegas-western/" — without this guard,
+# every product at every Curaleaf location would be tagged as brand
+# "Curaleaf" regardless of the actual brand (AMA, Matrix, etc.).
+
+def _extract_brand_from_url(url: str) -> str | None:
+    """Return canonical brand name if found in the product URL.
+
+    Only searches product-identifying URL segments:
+      - After /product/ or /products/ (the product slug)
+      - After /brands/ (brand directory pages)
+      - Query parameters (brand=rove)
+    """
+    if not url:
+        return None
+    url_lower = url.lower()
+
+    # Build the search text from product-identifying segments only.
+    # This prevents matching dispensary names in the store path
+    # (e.g. "/curaleaf-las-vegas-western/" → NOT brand "Curaleaf").
+    search_parts: list[str] = []
+
+    for marker in ("/product/", "/products/"):
+        idx = url_lower.find(marker)
+        if idx >= 0:
+            search_parts.append(url_lower[idx:])
+
+    brands_idx = url_lower.find("/brands/")
+    if brands_idx >= 0:
+        search_parts.append(url_lower[brands_idx:])
+
+    query_idx = url_lower.find("?")
+    if query_idx >= 0:
+        search_parts.append(url_lower[query_idx:])
+
+    if not search_parts:
+        return None
+
+    search_text = " ".join(search_parts)
+
+    # Known brands appearing as a path segment or query param value;
+    # longest brand wins (e.g. "raw garden" over "raw").
+    names, slugs, canonicals = _url_brand_tables()
+    best = len(canonicals)
+    n = len(search_text)
+    for i in range(1, n):
+        prev = search_text[i - 1]
+        if prev != "/" and prev != "-":
+            continue
+        for j in range(i + 1, n):
+            end = search_text[j]
+            if prev == "/":
+                # "/{brand}/", "/{brand}?", "/{slug}/", "/{slug}-"
+                if end == "/" or end == "?":
+                    best = min(best, names.get(search_text[i:j], best))
+                if end == "/" or end == "-":
+                    best = min(best, slugs.get(search_text[i:j], best))
+            elif end == "-":
+                # "-{slug}-"
+                best = min(best, slugs.get(search_text[i:j], best))
+    # "brand={brand}" — a prefix of whatever follows
+    i = search_text.find("brand=")
+    while i >= 0:
+        for j in range(i + 7, n + 1):
+            best = min(best, names.get(search_text[i + 6:j], best))
+        i = search_text.find("brand=", i + 1)
+    return canonicals[best] if best < len(canonicals) else None
+
+
+_url_tables: tuple[dict[str, int], dict[str, int], list[str]] = ({}, {}, [])
+_url_tables_size = -1
+
+
+def _url_brand_tables() -> tuple[dict[str, int], dict[str, int], list[str]]:
+    """Brand and slug → rank lookups for ``_extract_brand_from_url``.
+
+    Ranks follow the longest-brand-first order the URL check has always
+    used, so the lowest rank found in a URL is the brand the old linear
+    scan returned first — without sorting and probing every brand per
+    product.  Rebuilt when ``load_approved_brands`` grows the table.
+    """
+    global _url_tables, _url_tables_size
+    if _url_tables_size != len(BRANDS_LOWER):
+        names: dict[str, int] = {}
+        slugs: dict[str, int] = {}
+        canonicals: list[str] = []
+        for rank, (brand_lower, canonical) in enumerate(sorted(
+            BRANDS_LOWER.items(), key=lambda x: len(x[0]), reverse=True
+        )):
+            names.setdefault(brand_lower, rank)
+            slugs.setdefault(brand_lower.replace(" ", "-"), rank)
+            canonicals.append(canonical)
+        _url_tables, _url_tables_size = (names, slugs, canonicals), len(BRANDS_LOWER)
+    return _url_tables
+
+
+@functools.lru_cache(maxsize=None)
+def _brand_strip_pattern(brand: str) -> re.Pattern:
+    """Pattern removing *brand* (plus a trailing ``-``/``:``/``|``) from a name.
+
+    There is one per brand and abbreviation — far more than ``re``'s
+    internal pattern cache holds — so they are kept here instead.
+    """
+    return re.compile(rf'\b{re.escape(brand)}\b\s*[-:|]?\s*', re.IGNORECASE)
+
+
+def _split_lines(raw_text: str) -> list[tuple[str, str]]:
+    """``raw_text`` as ``(stripped line, lowercased line)`` pairs."""
+    lines = []
+    for line in raw_text.split("\n"):
+        stripped = line.strip()
+        lines.append((stripped, stripped.lower()))
+    return lines
+
+
+def _detect_brand_from_raw_text_lines(
+    lines: list[tuple[str, str]], current_brand: str | None, detect_brand,
+) -> str | None:
+    """Check raw_text lines for a standalone brand label.
+
+    Returns a brand if found on its own line in raw_text AND it differs
+    from *current_brand*.  This catches DOM structures where the brand is
+    a separate element (e.g. ``<span>AMA</span>``) distinct from the
+    product name heading.  Only matches lines where the ENTIRE line
+    (after stripping punctuation) equals a known brand name.
+
+    *lines* comes from ``_split_lines``; *detect_brand* is
+    ``CloudedLogic.detect_brand`` or a memoized wrapper of it.
+    """
+    current_lower = current_brand.lower() if current_brand else ""
+    for line, line_lower in lines:
+        candidate = line.strip(".,;:-|")
+        if not candidate or len(candidate) > 30:
+            continue
+        candidate_lower = line_lower.strip(".,;:-|")
+        if candidate_lower == current_lower:
+            continue
+        detected = detect_brand(candidate)
+        if detected and detected.lower() != current_lower and candidate_lower == detected.lower():
+            return detected
+    return None
+
+
+# Leading strain-type prefix (e.g. "Indica OG Kush" → "OG Kush")
+_RE_LEADING_STRAIN = re.compile(
+    r"^(Indica|Sativa|Hybrid)\s*[-:|]?\s*", re.IGNORECASE,
+)
+
+
+# Lines in raw_text that are NOT useful strain/product names.
+_JUNK_LINE_PATTERNS = re.compile(
+    r"^(?:"
+    r"\$[\d.]+"                              # price line
+    r"|[\d.]+\s*(?:g|mg|oz)\b"               # weight line
+    r"|(?:Indica|Sativa|Hybrid)$"            # strain type
+    r"|(?:THC|CBD|CBN)\s*:?\s*[\d.]+\s*%?"   # cannabinoid
+    r"|Add to (?:cart|bag)"                   # CTA
+    r"|(?:Pre[-\s]?Rolls?|Prerolls?|Flower|Vapes?|Cartridges?|Concentrates?|Edibles?)$"  # category label
+    r"|(?:Sale!?|New!?|Limited|Sold out|In stock|Staff Pick|Local Love|New Arrival)"
+    r"|\d+%\s*off"
+    r"|Special Offers?"
+    r"|\s*$"
+    r")",
+    re.IGNORECASE,
+)
+
+
+def _extract_strain_from_raw_text(
+    lines: list[tuple[str, str]], brand: str, fallback: str,
+) -> str:
+    """Try to find a meaningful strain/product name in raw_text lines.
+
+    When the scraped product name equals the brand (e.g. a Dutchie card
+    whose heading is just "Cookies"), the real strain name often appears
+    as a separate line in the card text (e.g. "Headband", "Gary Payton").
+    This function scans those lines and returns the first candidate that
+    isn't the brand, a price, a weight, a category label, or junk text.
+
+    Falls back to *fallback* (usually the raw_name) if nothing better
+    is found.
+    """
+    brand_lower = brand.lower() if brand else ""
+    for candidate, candidate_lower in lines:
+        if not candidate or len(candidate) < 3:
+            continue
+        # Skip if it's the brand name itself
+        if candidate_lower == brand_lower:
+            continue
+        # Skip if it starts with the brand (e.g. "Cookies | Flower")
+        if brand_lower and candidate_lower.startswith(brand_lower):
+            continue
+        # Skip junk lines (prices, weights, strain types, category labels, etc.)
+        if _JUNK_LINE_PATTERNS.match(candidate):
+            continue
+        # Good candidate — strip brand prefix if present
+        result = _brand_strip_pattern(brand).sub('', candidate).strip()
+        if len(result) >= 3:
+            return result
+    return fallback
+
+
+def _deduplicate_name(name: str) -> str:
+    """Remove repeated word sequences in a product name.
+
+    Example: "Big Dogs Casino Kush Preroll Big Dogs Casino Kush"
+           → "Big Dogs Casino Kush Preroll"
+    """
+    words = name.split()
+    if len(words) < 4:
+        return name
+
+    # Try chunk sizes from half the word count downward
+    for chunk_size in range(len(words) // 2, 1, -1):
+        first_chunk = " ".join(words[:chunk_size])
+        remaining = " ".join(words[chunk_size:])
+        if remaining.startswith(first_chunk):
+            unique_trailing = remaining[len(first_chunk):].strip()
+            return f"{first_chunk} {unique_trailing}".strip() if unique_trailing else first_chunk
+        if first_chunk.endswith(remaining) and len(remaining) > 8:
+            return first_chunk
+
+    return name
+
+
+# Inline fragments stripped by _clean_product_name, in application order.
+_RE_CANNABINOID_CONTENT = re.compile(
+    r"\b(?:THC|CBD|CBN|CBG|CBC)\s*:\s*[\d.]+\s*(?:mg|%)", re.IGNORECASE,
+)
+_RE_MGMG = re.compile(r"(\d+\s*mg)\s*mg\b", re.IGNORECASE)
+_RE_STRAIN_MG = re.compile(r"(Indica|Sativa|Hybrid)\s*mg\b", re.IGNORECASE)
+_RE_BADGE_TAGLINES = (
+    re.compile(r"\bLocal Love!?", re.IGNORECASE),
+    re.compile(r"\bNew Arrival!?", re.IGNORECASE),
+    re.compile(r"\bLimited Time!?", re.IGNORECASE),
+    re.compile(r"\bStaff Pick!?", re.IGNORECASE),
+)
+_RE_WEEKDAY = re.compile(
+    r"\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\b", re.IGNORECASE,
+)
+_RE_STRAIN_CODE = re.compile(r"\s*\(\s*(?:SH?|IH?|H)\s*\)", re.IGNORECASE)
+_RE_LEADING_PRICE = re.compile(r"^\$\d+\.?\d*\s+")
+_RE_INLINE_PRICE = re.compile(
+    r"\s*\$\d+\.?\d*(?:\s+\$\d+\.?\d*)*\s*(?:1/2\s+OZ)?.*$", re.IGNORECASE,
+)
+_RE_MULTI_SPACE = re.compile(r"\s{2,}")
+_RE_EACH = re.compile(r"\s*\(each\)\s*", re.IGNORECASE)
+_RE_TAX_INCLUDED = re.compile(r"\s*\(tax included\)\s*", re.IGNORECASE)
+_RE_SURROUNDING_QUOTES = re.compile(r'^["\']+(.*?)["\']+$')
+_RE_BRACKET_UNIT_WEIGHT = re.compile(r"\s*\[\s*\d+\.?\d*\s*(?:mg|g|oz)\s*\]", re.IGNORECASE)
+_RE_TRAILING_PAREN_GRAMS = re.compile(r"\s*\(\s*\.?\d+\.?\d*\s*g\s*\)\s*$", re.IGNORECASE)
+
+
+def _clean_product_name(name: str) -> str:
+    """Strip junk text, deduplicate, and normalize whitespace in a product name."""
+    if not name:
+        return "Unknown"
+    cleaned = _RE_NAME_JUNK.sub("", name)
+    # Strip bundle/promo text ("3 For $50 …", "2/$60 …") before further cleaning
+    cleaned = _RE_BUNDLE_PROMO.sub("", cleaned)
+    cleaned = _RE_TRAILING_STRAIN.sub("", cleaned)
+    # Strip leading strain-type prefix ("Indica OG Kush" → "OG Kush")
+    cleaned = _RE_LEADING_STRAIN.sub("", cleaned)
+
+    # Strip marketing tier labels ("Black Label", "Gold Label", etc.)
+    cleaned = _RE_MARKETING_TIER.sub("", cleaned)
+
+    # Strip "Prepack", "Whole Flower", "Flower Prepack"
+    cleaned = _RE_PREPACK.sub("", cleaned)
+
+    # Strip inline cannabinoid content that leaks from Dutchie product cards
+    # e.g. "THC: 101.52 mg", "CBD: 25.0 mg", "CBN: 5 mg"
+    cleaned = _RE_CANNABINOID_CONTENT.sub("", cleaned)
+
+    # Fix "mgmg" doubling artifact — "100mgmg" → "100mg"
+    cleaned = _RE_MGMG.sub(r"\1", cleaned)
+
+    # Strip standalone "mg" that remains after cannabinoid cleanup
+    # e.g. "Sativamg" → "Sativa", "Hybridmg" → "Hybrid"
+    cleaned = _RE_STRAIN_MG.sub(r"\1", cleaned)
+
+    # Strip promotional taglines that leak from Dutchie product badges/ribbons
+    for pattern in _RE_BADGE_TAGLINES:
+        cleaned = pattern.sub("", cleaned)
+    # Day-of-week promo labels: "Remedy Wednesday", "Mojo Monday"
+    cleaned = _RE_WEEKDAY.sub("", cleaned)
+
+    # Strip parenthetical strain codes: "(SH)", "(I)", "(S)", "(H)", "(IH)", "(SH)"
+    cleaned = _RE_STRAIN_CODE.sub("", cleaned)
+
+    # Strip leading price prefix from product names that begin with "$XX"
+    # e.g. "$55 VYBZ Pre-packaged" → "VYBZ Pre-packaged"
+    #       "$23 Dab Oil Applicators" → "Dab Oil Applicators"
+    cleaned = _RE_LEADING_PRICE.sub("", cleaned)
+
+    # Strip inline price/deal text fragments that slip into product names
+    # e.g. "$99 $45 1/2 OZ" or "1/2 OZ" at end of name
+    cleaned = _RE_INLINE_PRICE.sub("", cleaned)
+
+    cleaned = _RE_MULTI_SPACE.sub(" ", cleaned).strip()
+    cleaned = cleaned.strip(".,;:-|")
+
+    # Remove common scraped artifacts
+    cleaned = _RE_EACH.sub(" ", cleaned)
+    cleaned = _RE_TAX_INCLUDED.sub(" ", cleaned)
+    cleaned = _RE_SURROUNDING_QUOTES.sub(r"\1", cleaned)  # surrounding quotes
+
+    # Strip bracketed weight artifacts: "[1g]", "[3.5g]", "[100mg]"
+    cleaned = _RE_BRACKET_UNIT_WEIGHT.sub("", cleaned)
+
+    # Strip redundant weight+category suffixes that repeat weight info already
+    # captured separately (e.g. ".5g Shatter (.5g)" → ".5g Shatter")
+    cleaned = _RE_TRAILING_PAREN_GRAMS.sub("", cleaned)
+
+    # Deduplicate repeated word sequences
+    cleaned = _deduplicate_name(cleaned)
+
+    cleaned = _RE_MULTI_SPACE.sub(" ", cleaned).strip()
+    return cleaned if len(cleaned) >= 3 else name.strip()
+
+
+# Display-name and subtype patterns used by _normalize_product.
+_RE_NAME_SEGMENT_SPLIT = re.compile(r'\s*[-|–—]\s*')
+_RE_PREROLL_WORDS = re.compile(r"\s*\b(?:Pre[-\s]?Rolls?|Prerolls?)\b", re.IGNORECASE)
+_RE_FLOWER_WORDS = re.compile(r"\b(?:Flower|Bud)\b", re.IGNORECASE)
+_RE_PAREN_MG = re.compile(r"\s*\(\s*\d+\s*mg\s*\)", re.IGNORECASE)
+_RE_PAREN_STRAIN_CODE = re.compile(r"\s*\(\s*[ISH]\s*\)", re.IGNORECASE)
+_RE_STANDALONE_MG = re.compile(r"\b\d+\.?\d*\s*mg\b", re.IGNORECASE)
+_RE_STRAIN_PAIR = re.compile(r"\s*(?:\(\s*)?[ISH]\s*/\s*[ISH]\s*\)?\s*")
+_RE_EMPTY_PARENS = re.compile(r"\s*\(\s*\)\s*")
+_RE_DISPOSABLE_SIGNAL = re.compile(
+    r"\b(?:disposable|all[- ]?in[- ]?one|aio|rtu|"
+    r"ready[- ]?to[- ]?use|draw[- ]?activated|"
+    r"built[- ]?in[- ]?battery)\b"
+)
+_RE_CARTRIDGE_SIGNAL = re.compile(r"\bcartridges?\b|\bcarts?\b|\b510\b")
+_RE_POD_SIGNAL = re.compile(r"\bpods?\b")
+
+
+def _split_weight(weight_str: str | None) -> tuple[float | None, str | None]:
+    """Split CloudedLogic weight string into (value, unit) for DB schema.
+
+    '3.5g' → (3.5, 'g'),  '100mg' → (100.0, 'mg'),  None → (None, None)
+    """
+    if not weight_str:
+        return None, None
+    for unit in ("mg", "g"):
+        if weight_str.lower().endswith(unit):
+            try:
+                return float(weight_str[: -len(unit)]), unit
+            except ValueError:
+                pass
+    return None, None
+
+
+def _normalize_product(
+    rp: dict[str, Any],
+    logic: CloudedLogic,
+    dispensary_name: str,
+    detect_label=None,
+) -> tuple[dict[str, Any] | None, str | None]:
+    """Normalize one raw scraped product into DB fields.
+
+    Returns ``(fields, unmatched)``.  *fields* is None when
+    ``parse_product`` rejects the product.  *unmatched* is None when a
+    brand was found, otherwise the brand-like prefix of the name ("" if
+    too short) for the unmatched-brand metrics.
+
+    Depends only on the raw product's text fields (see
+    ``parse_cache.product_cache_key``) so results can be cached.
+    *detect_label* is the ``detect_brand`` used on raw_text lines —
+    ``normalize_products`` passes one memoized across the batch.
+    """
+    detect_label = detect_label or logic.detect_brand
+    # Clean raw inputs before CloudedLogic parsing
+    raw_name = _clean_product_name(rp.get("name", ""))
+    raw_text = rp.get("raw_text", "")
+    if raw_text:
+        raw_text = raw_text[:RAW_TEXT_MAX_CHARS]
+    price_text = rp.get("price", "")
+
+    # ── OFFER-CLEAN TEXT for brand & category detection ─────────
+    # Bundle/offer text in raw_text and price_text can mention OTHER
+    # brands (e.g. "3/$60 grassroots, &shine, haze") and OTHER
+    # category keywords (e.g. "3/$60 1g Carts & Wax" — "Carts"
+    # triggers vape detection, blocking concentrates).
+    # We detect brand and category on CLEAN text first, then let
+    # parse_product handle price/weight on the full text.
+    stripped_raw = _strip_offer_text(raw_text)
+    clean_text = f"{raw_name} {stripped_raw}"
+    raw_lines = _split_lines(raw_text) if raw_text else []
+
+    # Brand priority: scraped element > URL > raw_text label > product name > clean text
+    # Some scrapers (Dutchie) extract brand from a dedicated card element
+    # (e.g. "ROVE" label above the product title) — highest confidence.
+    scraped_brand = rp.get("scraped_brand", "")
+    brand = logic.detect_brand(scraped_brand) if scraped_brand else None
+    if not brand:
+        product_url = rp.get("product_url", "")
+        brand = _extract_brand_from_url(product_url)
+    if not brand:
+        # Check for a standalone brand label in raw_text lines FIRST.
+        # Many platforms (Carrot/ShowGrow) put the brand in a separate
+        # DOM element (<span>AMA</span>) — the full line equals the
+        # brand name.  This is higher-confidence than name-based
+        # detection because it avoids brand/strain confusion (e.g.
+        # "Runtz" is a strain in "AMA Runtz Cured Resin", not the
+        # Runtz brand).
+        label_brand = _detect_brand_from_raw_text_lines(raw_lines, None, detect_label)
+        if label_brand:
+            brand = label_brand
+    if not brand:
+        brand = logic.detect_brand(raw_name)
+    if not brand:
+        brand = logic.detect_brand(clean_text)
+    # Brand conflict resolution: if brand was detected from the product
+    # name and a DIFFERENT brand appears as a standalone label in the
+    # raw_text, prefer the raw_text brand.  This handles the case where
+    # the product name starts with a strain that's also a brand name
+    # (e.g. "Runtz Cured Resin" where Runtz is a strain sold by AMA).
+    if brand and not scraped_brand:
+        label_brand = _detect_brand_from_raw_text_lines(raw_lines, brand, detect_label)
+        if label_brand:
+            brand = label_brand
+
+    # Track unmatched brands for data enrichment metrics
+    unmatched = None
+    if not brand:
+        # Capture the raw name for frequency analysis — the first
+        # word(s) before a dash/pipe are often the brand name that
+        # our brand DB is missing.
+        candidate = _RE_NAME_SEGMENT_SPLIT.split(raw_name, maxsplit=1)[0].strip()
+        unmatched = candidate if candidate and len(candidate) > 2 else ""
+
+    # Category: detect from clean text (no offer keyword pollution)
+    category = logic.detect_category(clean_text)
+
+    # Scraped category override: when the platform scraper extracted
+    # a category label directly from the product card (e.g. Dutchie
+    # cards show "Pre-Roll", "Flower", etc.), trust it over text-based
+    # detection — it's the dispensary's own classification.
+    # Only override when text detection gave a DIFFERENT answer or
+    # landed on "other" (meaning no keywords matched).
+    scraped_category = rp.get("scraped_category", "")
+    if scraped_category and scraped_category != category:
+        # If text detection found a specific category AND the scraped
+        # category disagrees, the scraped label wins — it's directly
+        # from the dispensary's structured data.
+        if category in ("other", "skip"):
+            category = scraped_category
+        elif scraped_category == "preroll" and category == "flower":
+            # Common misclassification: dispensary lists a preroll
+            # product but text detection picks up "flower" from
+            # stray text.  Trust the scraped label.
+            category = "preroll"
+        elif scraped_category != "other":
+            category = scraped_category
+
+    # Concentrate correction: if category landed on "vape" but the
+    # product text has concentrate format keywords (badder, wax, live
+    # resin…) and no vape keywords (cart, pod…), it's a concentrate.
+    # Check both raw_name and clean_text so surrounding scraped text
+    # with concentrate keywords also triggers reclassification.
+    if category == "vape":
+        check_text = clean_text or raw_name or ""
+        if (
+            _CONCENTRATE_NAME_KEYWORDS.search(check_text)
+            and not _VAPE_NAME_KEYWORDS.search(check_text)
+        ):
+            category = "concentrate"
+        # If the product name itself has NO vape keywords, the "vape"
+        # classification likely came from page-context text (navigation,
+        # other products on the page, etc.).  Re-detect category from
+        # just the product name for a more accurate result.
+        elif not _VAPE_NAME_KEYWORDS.search(raw_name):
+            name_category = logic.detect_category(raw_name)
+            if name_category not in ("other", "vape"):
+                category = name_category
+
+
+    # Parse combined text for price, weight, THC.
+    # IMPORTANT: Strip offer/bundle text from raw_text to prevent deal
+    # copy (e.g. "$35 1/4 oz. Select Strains") from polluting weight
+    # and price parsing.  The offer text mentions bundle pricing and
+    # fractional-oz weights that belong to the PROMOTION, not the
+    # actual product.  Without stripping, "1/4" gets parsed as 7g
+    # and "$35" gets parsed as the original price — both wrong.
+    text = f"{raw_name} {stripped_raw} {price_text}"
+    product = logic.parse_product(text, dispensary_name)
+    if product is None:
+        return None, unmatched
+
+    # Override parse_product's brand and category with our clean results
+    if brand:
+        product["brand"] = brand
+    if category and category != 'other':
+        product["category"] = category
+
+    weight_value, weight_unit = _split_weight(product.get("weight"))
+
+    # "Other" → flower fallback: products with flower-typical weights
+    # (3.5g, 7g, 14g, 28g) that didn't match any category keyword are
+    # almost certainly flower.  "Golden State Banana 3.5g" has no
+    # keyword but the weight is unambiguously flower.
+    if category == "other" and weight_value is not None:
+        try:
+            wv = float(weight_value)
+            if wv in (3.5, 7.0, 14.0, 28.0):
+                category = "flower"
+                product["category"] = "flower"
+        except (ValueError, TypeError):
+            pass
+
+    # ── Flower @ 1g → preroll heuristic ────────────────────────
+    # In cannabis retail, 1g flower is almost never sold — it's
+    # the standard weight for a single preroll.  When category
+    # is "flower" and weight is exactly 1g, reclassify as preroll
+    # UNLESS the product name explicitly contains "flower" or
+    # "bud" (confirming it really is flower).
+    if category == "flower" and weight_unit == "g":
+        try:
+            wv = float(weight_value) if weight_value is not None else None
+            if wv == 1.0 and not _RE_FLOWER_WORDS.search(raw_name):
+                category = "preroll"
+                product["category"] = "preroll"
+        except (ValueError, TypeError):
+            pass
+
+    # Normalize mg → g for vape/concentrate (physical weight, not THC)
+    # "1000mg" vape cart → 1.0g, "850mg" pod → 0.85g
+    effective_cat = category if (category and category != 'other') else product.get("category")
+    if (
+        weight_unit == "mg"
+        and weight_value is not None
+        and effective_cat in ("vape", "concentrate")
+    ):
+        weight_value = round(weight_value / 1000, 3)
+        weight_unit = "g"
+
+    # --- Build a clean display name from the scraper's raw_name ------
+    # CloudedLogic's product_name is derived from the full combined text
+    # blob (name + raw_text + price), which is often messy and causes
+    # brand name duplication.  Instead, use raw_name as the base and
+    # strip clutter (brand, weight prefix, strain type, bundle text,
+    # redundant category words, marketing junk) to leave just the
+    # strain/product name.
+    brand = product.get("brand")
+    display_name = raw_name
+
+    # 1. Strip weight prefix: "3.5g | Blue Maui" → "Blue Maui"
+    if display_name:
+        display_name = _RE_WEIGHT_PREFIX.sub("", display_name).strip()
+
+    # 2. Strip brand name from ANYWHERE in the name (not just prefix)
+    if brand and display_name:
+        display_name = _brand_strip_pattern(brand).sub('', display_name).strip()
+        # Also strip known abbreviations for this brand
+        for abbr in _BRAND_ABBREVIATIONS.get(brand, []):
+            display_name = _brand_strip_pattern(abbr).sub('', display_name).strip()
+        if len(display_name) < 3:
+            # The product name was essentially just the brand (e.g.
+            # "Cookies" when the card heading is the brand label).
+            # Try to extract a meaningful strain/product name from
+            # the raw_text lines instead of falling back to the brand.
+            display_name = _extract_strain_from_raw_text(
+                raw_lines, brand, raw_name,
+            )
+
+    display_name = display_name or raw_name or "Unknown"
+
+    # 3. Strip strain type from anywhere: "Blue Maui Sativa" → "Blue Maui"
+    display_name = _RE_STRAIN_TYPE.sub("", display_name).strip()
+
+    # 4. Strip bundle quantity text: "3 Eighths" → ""
+    display_name = _RE_BUNDLE_QTY.sub("", display_name).strip()
+
+    # 5. Strip redundant category words from display name
+    effective_cat = category if (category and category != 'other') else product.get("category")
+    if effective_cat == "preroll":
+        display_name = _RE_PREROLL_WORDS.sub("", display_name).strip()
+    if effective_cat == "vape":
+        display_name = _RE_VAPE_WORDS.sub("", display_name).strip()
+    if effective_cat == "concentrate":
+        display_name = _RE_CONCENTRATE_FORMAT.sub("", display_name).strip()
+    if effective_cat == "flower":
+        display_name = _RE_FLOWER_WORDS.sub("", display_name).strip()
+
+    # 6. Strip promotional bundle text: "Gummies 2 For $35 All Dis…"
+    display_name = _RE_PROMO_BUNDLE.sub("", display_name).strip()
+
+    # 7. Strip trailing pipe + weight for edibles: "Drink Loud | Cucumber Haze | 100mg"
+    display_name = _RE_TRAILING_PIPE_WEIGHT.sub("", display_name).strip()
+
+    # 8. Strip inline weight values redundant with the weight field
+    display_name = _RE_BRACKET_WEIGHT.sub("", display_name).strip()
+    display_name = _RE_INLINE_WEIGHT.sub("", display_name).strip()
+
+    # 9. Strip marketing junk: "High Octane Xtreme" etc.
+    display_name = _RE_MARKETING_JUNK.sub("", display_name).strip()
+
+    # 10. Strip parenthetical weight and strain-type indicators
+    # "(100mg)" duplicates the weight field; "(I)"/"(S)"/"(H)" are
+    # strain-type shorthand already captured in the strain_type field.
+    display_name = _RE_PAREN_MG.sub("", display_name)
+    display_name = _RE_PAREN_STRAIN_CODE.sub("", display_name)
+
+    # 11. Strip standalone "mg" weight: "100mg", "200mg"
+    display_name = _RE_STANDALONE_MG.sub("", display_name).strip()
+
+    # 12. Strip THC:CBD ratio text: "2:1", "[THC:CBN]"
+    display_name = _RE_RATIO_BRACKET.sub("", display_name).strip()
+
+    # 13. Strip inline strain-type indicators: "I/H", "I/S", "S/H",
+    # "(I/H)", standalone "I", "S", "H" at end of name.  These are
+    # abbreviations for Indica/Sativa/Hybrid that leak from product
+    # card DOM elements (common on Carrot/ShowGrow menus).
+    display_name = _RE_STRAIN_PAIR.sub(" ", display_name).strip()
+
+    # 14. Strip empty parentheses "()" left after weight/content stripping
+    display_name = _RE_EMPTY_PARENS.sub(" ", display_name).strip()
+
+    display_name = _RE_MULTI_SPACE.sub(" ", display_name).strip()
+    display_name = display_name.strip(" -–—|/") or raw_name or "Unknown"
+
+    # Run product classifier early so category corrections (e.g.
+    # "All-In-One" reclassified from concentrate → vape) are applied
+    # BEFORE deal detection scoring.  Without this, the deal detector
+    # uses the wrong category for price caps and scoring.
+    classification = classify_product(display_name, brand, effective_cat, weight_value=weight_value)
+    if classification["corrected_category"]:
+        category = classification["corrected_category"]
+        effective_cat = category
+
+    # Disposable subtype fallback: if the product is "vape" but no subtype
+    # was detected from the cleaned display_name, check the original
+    # raw_name and raw_text for disposable signals.  This catches products
+    # listed under "Disposable" tabs whose cleaned names are generic
+    # (e.g. "Brand Strain 0.5g" from a Dutchie "Disposable" category).
+    if (
+        effective_cat == "vape"
+        and classification["product_subtype"] is None
+    ):
+        _raw_check = f"{raw_name} {raw_text}".lower()
+        if _RE_DISPOSABLE_SIGNAL.search(_raw_check):
+            classification["product_subtype"] = "disposable"
+        elif _RE_CARTRIDGE_SIGNAL.search(_raw_check):
+            classification["product_subtype"] = "cartridge"
+        elif _RE_POD_SIGNAL.search(_raw_check):
+            classification["product_subtype"] = "pod"
+
+    # Map CloudedLogic output to the DB schema expected by _upsert_products
+    fields = {
+        "name": display_name,
+        "brand": brand,
+        "category": category if category and category != "other" else product.get("category"),
+        "original_price": product.get("original_price"),
+        "sale_price": product.get("deal_price"),
+        "discount_percent": product.get("discount_percent"),
+        "weight_value": weight_value,
+        "weight_unit": weight_unit,
+        "thc_percent": product.get("thc_percent"),
+        "cbd_percent": None,
+        "is_infused": classification["is_infused"],
+        "product_subtype": classification["product_subtype"],
+    }
+    return fields, unmatched
+
+
+def normalize_products(
+    raw_products: list[dict[str, Any]],
+    dispensary: dict[str, Any],
+    *,
+    cache: ParseCache | None = None,
+) -> tuple[list[ProductRecord], int, list[str]]:
+    """Normalize one site's raw scraped products.
+
+    Returns ``(parsed, brand_null_count, unmatched_brand_names)``:
+    *parsed* holds the products ``parse_product`` accepted, each a
+    ``ProductRecord`` of the raw product merged with its normalized
+    fields plus ``dispensary_id`` and ``source_platform`` (the
+    dispensary's platform unless the scraper set one), without the
+    parser-only inputs and with ``raw_text`` cut to
+    ``RAW_TEXT_MAX_CHARS``.  Products seen before under the same rules
+    come from *cache*.  *raw_products* is not modified.
+    """
+    slug = dispensary["slug"]
+    platform = dispensary["platform"]
+    dispensary_name = dispensary["name"]
+    logic = CloudedLogic()
+    label_brands: dict[str, str | None] = {}
+
+    def detect_label(line: str) -> str | None:
+        if line not in label_brands:
+            label_brands[line] = logic.detect_brand(line)
+        return label_brands[line]
+
+    parsed: list[ProductRecord] = []
+    brand_null_count = 0
+    unmatched_brand_names: list[str] = []
+
+    for rp in raw_products:
+        if cache is not None:
+            cache_key = product_cache_key(rp)
+            found, cached = cache.get(cache_key)
+            if found:
+                fields, unmatched = cached
+            else:
+                fields, unmatched = _normalize_product(rp, logic, dispensary_name, detect_label)
+                cache.put(cache_key, [fields, unmatched])
+        else:
+            fields, unmatched = _normalize_product(rp, logic, dispensary_name, detect_label)
+
+        if unmatched is not None:
+            brand_null_count += 1
+            if unmatched:
+                unmatched_brand_names.append(unmatched)
+        if fields is None:
+            continue
+
+        # Jane sets source_platform itself; other scrapers rely on the
+        # dispensary config.
+        parsed.append(parsed_record(
+            rp, fields,
+            dispensary_id=slug, source_platform=platform,
+            raw_text_limit=RAW_TEXT_MAX_CHARS,
+        ))
+
+    return parsed, brand_null_count, unmatched_brand_names
@@ -0,0 +1,189 @@
+"""
+Compact product records for the scrape pipeline.
+
+A parsed product used to be the raw scraper dict spread together with
+the normalized fields — twenty-odd keys, the parser-only inputs
+(``price``, ``scraped_brand``, ``scraped_category``) and the whole
+``raw_text`` — and deal detection copied it again for every scored
+deal.  ``ProductRecord`` keeps the pipeline's fields in ``__slots__``,
+interns the enum-like strings (category, subtype, brand, dispensary,
+platform, region) so every record shares one copy, and keeps anything
+else in a small overflow dict.
+
+Records behave like the dicts they replace — ``get``, ``[]``, ``in``,
+``pop``, ``copy``, ``{**record}`` — so detection, reporting and the
+upsert code read them unchanged; ``to_dict`` builds a plain dict where
+one has to leave the process (DB rows, JSON).
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Iterator, Mapping
+
+FIELDS = (
+    "name", "brand", "category", "product_subtype", "is_infused", "strain_type",
+    "sale_price", "current_price", "original_price", "discount_percent",
+    "weight_value", "weight_unit", "thc_percent", "cbd_percent", "deal_score",
+    "dispensary_id", "source_platform", "region", "product_url", "raw_text",
+)
+
+# Raw scraper keys that only feed the parser (see parse_cache._KEY_FIELDS).
+PARSER_INPUTS = frozenset(("price", "scraped_brand", "scraped_category"))
+
+_FIELD_SET = frozenset(FIELDS)
+_INTERNED = frozenset((
+    "brand", "category", "product_subtype", "strain_type", "weight_unit",
+    "dispensary_id", "source_platform", "region",
+))
+_MISSING = object()
+
+
+class ProductRecord:
+    """One product as the pipeline carries it between parsing and the DB.
+
+    Unset fields are absent, as missing keys were: ``get`` returns the
+    default and ``keys`` skips them.
+    """
+
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, fields: Mapping[str, Any] | None = None, **more: Any) -> None:
+        self._extra: dict[str, Any] | None = None
+        if fields:
+            self.update(fields)
+        if more:
+            self.update(more)
+
+    # -- mapping protocol ----------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key, _MISSING)
+        else:
+            value = self._extra.get(key, _MISSING) if self._extra else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELD_SET:
+            if key in _INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)  # type: ignore[arg-type]
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ProductRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ProductRecord({self.to_dict()!r})"
+
+    def __getstate__(self) -> dict[str, Any]:
+        return self.to_dict()
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._extra = None
+        self.update(state)
+
+    def keys(self) -> list[str]:
+        keys = [f for f in FIELDS if hasattr(self, f)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self) -> list[Any]:
+        return [self[k] for k in self.keys()]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(k, self[k]) for k in self.keys()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return value
+
+    def update(self, fields: Mapping[str, Any]) -> None:
+        for key, value in fields.items():
+            self[key] = value
+
+    def copy(self) -> ProductRecord:
+        """Shallow copy: a new record sharing the field values."""
+        clone = ProductRecord.__new__(ProductRecord)
+        for f in FIELDS:
+            value = getattr(self, f, _MISSING)
+            if value is not _MISSING:
+                setattr(clone, f, value)
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    def to_dict(self) -> dict[str, Any]:
+        """Plain dict of the set fields (for DB rows and JSON)."""
+        return dict(self.items())
+
+
+def parsed_record(
+    raw: Mapping[str, Any],
+    fields: Mapping[str, Any],
+    *,
+    dispensary_id: str,
+    source_platform: str,
+    raw_text_limit: int,
+) -> ProductRecord:
+    """Record for a parsed product: *raw* overlaid with the parsed *fields*.
+
+    Parser-only inputs are dropped and ``raw_text`` is cut to
+    *raw_text_limit* (what the products table stores).  The scraper's
+    own ``source_platform`` wins over the dispensary's.
+    """
+    record = ProductRecord(source_platform=source_platform)
+    for key, value in raw.items():
+        if key not in PARSER_INPUTS:
+            record[key] = value
+    record.update(fields)
+    record.raw_text = (raw.get("raw_text") or "")[:raw_text_limit]
+    record.dispensary_id = sys.intern(dispensary_id)
+    return record
@@ -0,0 +1,244 @@
+"""
+Archive of what the scrapers actually returned, one file per run.
+
+``_scrape_site_inner`` parses ``raw_products`` and drops them, so
+checking why a product parsed the way it did used to need a live
+re-scrape.  ``RawArchive`` keeps every site's raw product dicts, with
+a little page metadata, under::
+
+    RAW_ARCHIVE_DIR/<YYYY-MM-DD>/<region>/<HHMMSS>_<run_id>.jsonl.gz
+    RAW_ARCHIVE_DIR/<YYYY-MM-DD>/<region>/<HHMMSS>_<run_id>.index.json
+
+Each site is one independent gzip member (its products as JSON lines)
+appended to the run file, so the whole file still reads as one gzip
+stream.  The index records each member's byte offset and length, so
+``read_site`` decompresses one site without touching the rest.  A site
+captured more than once (a retry) keeps every capture; readers take
+the last.
+
+Serialising and compressing happen on a background thread: the scrape
+only queues the list it already holds.  The index is rewritten after
+every site, so a run that dies mid-way still leaves a readable
+archive.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger("raw_archive")
+
+RAW_ARCHIVE_DIR = Path(os.getenv("RAW_ARCHIVE_DIR", "raw_archive"))
+RAW_ARCHIVE_ENABLED = os.getenv("RAW_ARCHIVE", "true").lower() not in ("0", "false", "no")
+RAW_ARCHIVE_LEVEL = int(os.getenv("RAW_ARCHIVE_LEVEL", "6"))
+
+ARCHIVE_VERSION = 1
+_STOP = object()
+
+
+class _RunFile:
+    """One region's data file and its index within a run."""
+
+    __slots__ = ("data_path", "index_path", "index", "offset")
+
+    def __init__(self, directory: Path, stem: str, header: dict[str, Any]) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = directory / f"{stem}.jsonl.gz"
+        self.index_path = directory / f"{stem}.index.json"
+        self.index = {**header, "data": self.data_path.name, "sites": []}
+        self.offset = self.data_path.stat().st_size if self.data_path.exists() else 0
+
+    def append(self, member: bytes, entry: dict[str, Any]) -> None:
+        with open(self.data_path, "ab") as fh:
+            fh.write(member)
+        entry["offset"] = self.offset
+        entry["length"] = len(member)
+        self.offset += len(member)
+        self.index["sites"].append(entry)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+class RawArchive:
+    """Writes a run's raw captures from a background thread.
+
+    ``add`` never blocks on I/O; ``close`` waits for the queue to drain.
+    Write failures are logged and never reach the scrape.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        *,
+        root: Path | str = RAW_ARCHIVE_DIR,
+        level: int = RAW_ARCHIVE_LEVEL,
+        started: datetime | None = None,
+    ) -> None:
+        self.run_id = run_id
+        self.root = Path(root)
+        self.level = level
+        self.started = started or datetime.now(timezone.utc)
+        self.sites = 0
+        self.products = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self._files: dict[str, _RunFile] = {}
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, name="raw-archive", daemon=True)
+        self._thread.start()
+
+    def add(
+        self,
+        dispensary: dict[str, Any],
+        raw_products: list[dict[str, Any]],
+        **meta: Any,
+    ) -> None:
+        """Queue one site's capture; *meta* is stored in its index entry."""
+        self._queue.put((dispensary, raw_products, meta, time.time()))
+
+    def close(self) -> dict[str, Any]:
+        """Finish writing and return the archive stats."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        return self.stats()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sites": self.sites,
+            "products": self.products,
+            "bytes_raw": self.bytes_raw,
+            "bytes_written": self.bytes_written,
+            "errors": self.errors,
+            "files": [str(f.data_path) for f in self._files.values()],
+        }
+
+    # -- writer thread ---------------------------------------------------
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._write(*item)
+            except Exception as exc:
+                self.errors += 1
+                logger.warning("Raw archive write failed for %s: %s", item[0].get("slug"), exc)
+
+    def _run_file(self, region: str) -> _RunFile:
+        run_file = self._files.get(region)
+        if run_file is None:
+            day = self.started.strftime("%Y-%m-%d")
+            stem = f"{self.started:%H%M%S}_{_safe(self.run_id)}"
+            run_file = self._files[region] = _RunFile(
+                self.root / day / _safe(region), stem,
+                {
+                    "version": ARCHIVE_VERSION,
+                    "run_id": self.run_id,
+                    "date": day,
+                    "region": region,
+                    "started_at": self.started.isoformat(),
+                },
+            )
+        return run_file
+
+    def _write(
+        self,
+        dispensary: dict[str, Any],
+        raw_products: list[dict[str, Any]],
+        meta: dict[str, Any],
+        captured: float,
+    ) -> None:
+        payload = "".join(
+            json.dumps(p, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+            for p in raw_products
+        ).encode("utf-8")
+        member = gzip.compress(payload, compresslevel=self.level, mtime=0)
+        entry = {
+            "slug": dispensary["slug"],
+            "name": dispensary.get("name"),
+            "platform": dispensary.get("platform"),
+            "url": dispensary.get("url"),
+            "captured_at": datetime.fromtimestamp(captured, timezone.utc).isoformat(),
+            "products": len(raw_products),
+            "raw_bytes": len(payload),
+            **meta,
+        }
+        self._run_file(dispensary.get("region") or "unknown").append(member, entry)
+        self.sites += 1
+        self.products += len(raw_products)
+        self.bytes_raw += len(payload)
+        self.bytes_written += len(member)
+
+
+def _safe(part: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "-" for c in str(part))
+
+
+# =====================================================================
+# Reading archives back
+# =====================================================================
+
+
+def list_runs(
+    root: Path | str = RAW_ARCHIVE_DIR,
+    *,
+    date: str | None = None,
+    region: str | None = None,
+) -> list[Path]:
+    """Index files under *root*, oldest first, optionally for one date / region."""
+    pattern = f"{date or '*'}/{_safe(region) if region else '*'}/*.index.json"
+    return sorted(Path(root).glob(pattern))
+
+
+def read_index(index_path: Path | str) -> dict[str, Any]:
+    return json.loads(Path(index_path).read_text(encoding="utf-8"))
+
+
+def site_entries(index: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """The last capture of each site in *index*, by slug, in capture order."""
+    latest: dict[str, dict[str, Any]] = {}
+    for entry in index["sites"]:
+        latest.pop(entry["slug"], None)
+        latest[entry["slug"]] = entry
+    return latest
+
+
+def read_member(data_path: Path | str, entry: dict[str, Any]) -> list[dict[str, Any]]:
+    """Decompress one site's capture given its index *entry*."""
+    with open(data_path, "rb") as fh:
+        fh.seek(entry["offset"])
+        member = fh.read(entry["length"])
+    return [json.loads(line) for line in gzip.decompress(member).decode("utf-8").splitlines()]
+
+
+def read_site(index_path: Path | str, slug: str) -> list[dict[str, Any]]:
+    """One site's raw products from a run (its last capture).
+
+    Raises KeyError when the run has no capture for *slug*.
+    """
+    index_path = Path(index_path)
+    index = read_index(index_path)
+    entry = site_entries(index)[slug]
+    return read_member(index_path.parent / index["data"], entry)
+
+
+def iter_sites(index_path: Path | str) -> Iterator[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """``(entry, raw_products)`` for the last capture of every site in a run."""
+    index_path = Path(index_path)
+    index = read_index(index_path)
+    data_path = index_path.parent / index["data"]
+    for entry in site_entries(index).values():
+        yield entry, read_member(data_path, entry)
@@ -0,0 +1,369 @@
+"""
+Per-pattern regex profiling for a scrape run.
+
+Parsing a product runs it through well over a hundred patterns (sale
+copy and junk filters, brand and variation patterns, category and
+classification rules, the lexer, display-name cleanup).  A normal
+profiler charges all of that to ``re`` itself; this module charges it to
+the pattern.
+
+``install`` swaps every module-level compiled pattern in
+``PROFILED_MODULES`` — including those held in lists, tuples and dicts —
+for a wrapper that times each call, and replaces the modules' ``re``
+with a shim that does the same for inline ``re.search(r"…", …)`` calls.
+Compiled patterns are reported by name (``clouded_logic._SUBGRAM_RE``),
+inline ones by call site (``deal_detector.py:1609``).  Time spent in a
+callable ``sub`` replacement counts towards its pattern.
+
+Enable with ``REGEX_PROFILE=true``: ``main.py`` installs the profile
+before scraping and logs the ``REGEX_PROFILE_TOP`` (default 15) most
+expensive patterns in the run summary.  ``module_patterns`` and
+``inline_patterns`` also give ``benchmarks/fuzz_patterns.py`` its
+pattern inventory.
+"""
+
+from __future__ import annotations
+
+import ast
+import importlib
+import inspect
+import logging
+import os
+import re
+import sys
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+logger = logging.getLogger("regex_profile")
+
+REGEX_PROFILE_ENABLED = os.getenv("REGEX_PROFILE", "false").lower() in ("1", "true", "yes")
+REGEX_PROFILE_TOP = int(os.getenv("REGEX_PROFILE_TOP", "15"))
+
+# Modules whose patterns run on scraped product text.
+PROFILED_MODULES = (
+    "main",
+    "clouded_logic",
+    "parser",
+    "deal_detector",
+    "product_classifier",
+    "product_normalizer",
+    "product_lexer",
+)
+
+_RE_FUNCS = ("search", "match", "fullmatch", "sub", "subn", "findall", "finditer", "split")
+
+
+# ---------------------------------------------------------------------
+# Pattern inventory
+# ---------------------------------------------------------------------
+
+
+def module_patterns(module: Any) -> list[tuple[str, re.Pattern]]:
+    """Compiled patterns held by *module*'s globals, with display names.
+
+    Looks inside lists, tuples and dicts up to two levels deep, e.g.
+    ``_VARIATION_PATTERNS[3][0]`` or ``_BLOCKERS_BY_BRAND['rove'][0]``.
+    """
+    found: list[tuple[str, re.Pattern]] = []
+
+    def walk(name: str, value: Any, depth: int) -> None:
+        if isinstance(value, re.Pattern):
+            found.append((name, value))
+        elif depth < 3 and isinstance(value, (list, tuple)):
+            for i, item in enumerate(value):
+                walk(f"{name}[{i}]", item, depth + 1)
+        elif depth < 3 and isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{name}[{key!r}]", item, depth + 1)
+
+    for attr, value in vars(module).items():
+        if not attr.startswith("__"):
+            walk(f"{module.__name__}.{attr}", value, 0)
+    return found
+
+
+def inline_patterns(module: Any) -> list[tuple[str, re.Pattern]]:
+    """Literal patterns passed straight to ``re.search`` / ``re.sub`` / …
+
+    Parses *module*'s source for ``re.<func>("literal", …)`` calls and
+    compiles each with its literal flags.  Patterns built at runtime
+    (``r"\\b" + re.escape(brand)``) are not included.
+    """
+    try:
+        source = inspect.getsource(module)
+    except (OSError, TypeError):
+        return []
+    filename = os.path.basename(module.__file__ or module.__name__)
+    found: list[tuple[str, re.Pattern]] = []
+    for node in ast.walk(ast.parse(source)):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "re"
+            and node.func.attr in _RE_FUNCS + ("compile",)
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+        ):
+            continue
+        flags_node = next((kw.value for kw in node.keywords if kw.arg == "flags"), None)
+        if flags_node is None:
+            # Positional flags follow the string argument (and the
+            # replacement, for sub / subn).
+            flags_pos = {"compile": 1, "sub": 3, "subn": 3, "split": 3}.get(node.func.attr, 2)
+            flags_node = node.args[flags_pos] if len(node.args) > flags_pos else None
+        try:
+            flags = eval(compile(ast.Expression(flags_node), filename, "eval"), {"re": re}) if flags_node else 0
+            found.append((f"{filename}:{node.lineno}", re.compile(node.args[0].value, flags)))
+        except Exception:  # noqa: BLE001 — flags from a variable, or not a valid pattern
+            continue
+    return found
+
+
+# ---------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------
+
+
+class RegexProfile:
+    """Cumulative calls, seconds and characters scanned per pattern."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, list[float]] = {}
+        self._undo: list[Callable[[], None]] = []
+
+    def record(self, key: str, seconds: float, chars: int) -> None:
+        entry = self._stats.get(key)
+        if entry is None:
+            self._stats[key] = [1, seconds, chars]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += chars
+
+    def top(self, limit: int | None = None) -> list[tuple[str, int, float, int]]:
+        """``(pattern, calls, seconds, chars)`` rows, most expensive first."""
+        rows = sorted(self._stats.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(key, int(c), s, int(n)) for key, (c, s, n) in rows[:limit]]
+
+    def totals(self) -> tuple[int, float, int]:
+        """``(calls, seconds, patterns)`` across the run."""
+        calls = sum(int(entry[0]) for entry in self._stats.values())
+        seconds = sum(entry[1] for entry in self._stats.values())
+        return calls, seconds, len(self._stats)
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    # -- installation ---------------------------------------------------
+
+    def install(self, module_names: tuple[str, ...] = PROFILED_MODULES) -> None:
+        """Wrap the patterns of the already-imported *module_names*."""
+        wrappers: dict[int, _TimedPattern] = {}
+
+        def wrap(name: str, pattern: re.Pattern) -> _TimedPattern:
+            if id(pattern) not in wrappers:
+                wrappers[id(pattern)] = _TimedPattern(pattern, name, self)
+            return wrappers[id(pattern)]
+
+        for module_name in module_names:
+            module = _loaded_module(module_name)
+            if module is None:
+                continue
+            for attr, value in list(vars(module).items()):
+                if attr.startswith("__"):
+                    continue
+                new = self._wrapped(f"{module_name}.{attr}", value, wrap, 0)
+                if new is not value:
+                    self._replace(module, attr, value, new)
+            if getattr(module, "re", None) is re:
+                self._replace(module, "re", re, _TimedRe(module_name, self))
+
+    def uninstall(self) -> None:
+        """Restore every pattern ``install`` replaced."""
+        while self._undo:
+            self._undo.pop()()
+
+    def _wrapped(self, name: str, value: Any, wrap: Callable, depth: int) -> Any:
+        """*value* with its patterns wrapped; lists and dicts change in place."""
+        if isinstance(value, re.Pattern):
+            return wrap(name, value)
+        if depth >= 3:
+            return value
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                new = self._wrapped(f"{name}[{i}]", item, wrap, depth + 1)
+                if new is not item:
+                    self._replace(value, i, item, new)
+        elif isinstance(value, dict):
+            for key, item in list(value.items()):
+                new = self._wrapped(f"{name}[{key!r}]", item, wrap, depth + 1)
+                if new is not item:
+                    self._replace(value, key, item, new)
+        elif isinstance(value, tuple) and not hasattr(value, "_fields"):
+            items = [self._wrapped(f"{name}[{i}]", item, wrap, depth + 1) for i, item in enumerate(value)]
+            if any(new is not old for new, old in zip(items, value)):
+                return tuple(items)
+        return value
+
+    def _replace(self, container: Any, key: Any, old: Any, new: Any) -> None:
+        if isinstance(container, (list, dict)):
+            container[key] = new
+            self._undo.append(lambda: container.__setitem__(key, old))
+        else:
+            setattr(container, key, new)
+            self._undo.append(lambda: setattr(container, key, old))
+
+
+def _loaded_module(name: str) -> Any:
+    """The imported module *name*, including a script run as ``__main__``."""
+    module = sys.modules.get(name)
+    if module is None:
+        script = sys.modules.get("__main__")
+        if os.path.basename(getattr(script, "__file__", None) or "") == f"{name}.py":
+            module = script
+    return module
+
+
+class _TimedPattern:
+    """Compiled pattern proxy that charges each call to *name*."""
+
+    __slots__ = ("_pattern", "_name", "_profile")
+
+    def __init__(self, pattern: re.Pattern, name: str, profile: RegexProfile) -> None:
+        self._pattern = pattern
+        self._name = name
+        self._profile = profile
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._pattern, attr)
+
+    def __repr__(self) -> str:
+        return repr(self._pattern)
+
+    def _call(self, func: str, string: Any, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return getattr(self._pattern, func)(string, *args, **kwargs)
+        finally:
+            self._profile.record(self._name, time.perf_counter() - start, len(string))
+
+    def search(self, string, *args, **kwargs):
+        return self._call("search", string, *args, **kwargs)
+
+    def match(self, string, *args, **kwargs):
+        return self._call("match", string, *args, **kwargs)
+
+    def fullmatch(self, string, *args, **kwargs):
+        return self._call("fullmatch", string, *args, **kwargs)
+
+    def findall(self, string, *args, **kwargs):
+        return self._call("findall", string, *args, **kwargs)
+
+    def split(self, string, *args, **kwargs):
+        return self._call("split", string, *args, **kwargs)
+
+    def sub(self, repl, string, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._pattern.sub(repl, string, *args, **kwargs)
+        finally:
+            self._profile.record(self._name, time.perf_counter() - start, len(string))
+
+    def subn(self, repl, string, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._pattern.subn(repl, string, *args, **kwargs)
+        finally:
+            self._profile.record(self._name, time.perf_counter() - start, len(string))
+
+    def finditer(self, string, *args, **kwargs) -> Iterator[re.Match]:
+        return _timed_iter(self._pattern.finditer(string, *args, **kwargs), self._name, len(string), self._profile)
+
+
+def _timed_iter(it: Iterator[re.Match], name: str, chars: int, profile: RegexProfile) -> Iterator[re.Match]:
+    """*it*, with the time spent finding matches charged to *name*."""
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                m = next(it)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield m
+    finally:
+        profile.record(name, elapsed, chars)
+
+
+class _TimedRe:
+    """Stand-in for a module's ``re`` that charges inline calls to their line."""
+
+    def __init__(self, module_name: str, profile: RegexProfile) -> None:
+        self._file = module_name.rpartition(".")[2] + ".py"
+        self._profile = profile
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(re, attr)
+
+    def _call(self, func: str, pattern: Any, args: tuple, kwargs: dict) -> Any:
+        if isinstance(pattern, _TimedPattern):
+            return getattr(pattern, func)(*args, **kwargs)
+        name = f"{self._file}:{sys._getframe(2).f_lineno}"
+        string = kwargs.get("string", args[1] if func in ("sub", "subn") else args[0] if args else "")
+        if func == "finditer":
+            return _timed_iter(re.finditer(pattern, *args, **kwargs), name, len(string), self._profile)
+        start = time.perf_counter()
+        try:
+            return getattr(re, func)(pattern, *args, **kwargs)
+        finally:
+            self._profile.record(name, time.perf_counter() - start, len(string))
+
+    def search(self, pattern, *args, **kwargs):
+        return self._call("search", pattern, args, kwargs)
+
+    def match(self, pattern, *args, **kwargs):
+        return self._call("match", pattern, args, kwargs)
+
+    def fullmatch(self, pattern, *args, **kwargs):
+        return self._call("fullmatch", pattern, args, kwargs)
+
+    def sub(self, pattern, *args, **kwargs):
+        return self._call("sub", pattern, args, kwargs)
+
+    def subn(self, pattern, *args, **kwargs):
+        return self._call("subn", pattern, args, kwargs)
+
+    def findall(self, pattern, *args, **kwargs):
+        return self._call("findall", pattern, args, kwargs)
+
+    def finditer(self, pattern, *args, **kwargs):
+        return self._call("finditer", pattern, args, kwargs)
+
+    def split(self, pattern, *args, **kwargs):
+        return self._call("split", pattern, args, kwargs)
+
+
+_shared: RegexProfile | None = None
+
+
+def get_regex_profile() -> RegexProfile | None:
+    """Return the process-wide profile, or None when disabled.
+
+    The first call installs it over whichever ``PROFILED_MODULES`` are
+    imported at that point — call it after the parsing modules load.
+    """
+    global _shared
+    if not REGEX_PROFILE_ENABLED:
+        return None
+    if _shared is None:
+        _shared = RegexProfile()
+        for name in PROFILED_MODULES:
+            if name not in sys.modules and name != "main":
+                importlib.import_module(name)
+        _shared.install()
+    return _shared
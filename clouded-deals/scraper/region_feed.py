@@ -0,0 +1,224 @@
+"""
+Region-wide deal feed, built incrementally as sites finish.
+
+``detect_deals`` runs per site, so its dedup passes and the diversity
+caps in ``select_top_deals`` (``MAX_SAME_BRAND_TOTAL``,
+``MAX_SAME_DISPENSARY_TOTAL`` …) only ever see one dispensary.
+``RegionFeed.add`` takes each site's scored candidates — the
+``DetectionResult.candidates`` selection picked from, not the site's
+curated top deals, so per-site caps do not decide what the region sees
+— as the site finishes and keeps, per selection bucket (category, with
+disposables on their own as in ``select_top_deals``), bounded min-heaps
+of candidates:
+
+  - the best ``REGION_FEED_POOL_FACTOR`` × the bucket's
+    ``CATEGORY_TARGETS`` slots,
+  - of which at most ``REGION_FEED_BRAND_DEPTH`` per brand and
+    ``REGION_FEED_DISPENSARY_DEPTH`` per dispensary, tracked with
+    running per-brand / per-dispensary counts.
+
+Memory therefore grows with the feed size, not with the region's
+inventory.  Deals for the same product across dispensaries (same
+``remove_global_name_duplicates`` key, which also covers the
+cross-chain dedup) keep only the best score; the first one seen wins
+ties.
+
+``feed()`` merges the per-bucket heaps in score order and runs
+``select_top_deals`` over that candidate list — the same price
+leaders, diversity caps and interleaving as a site feed, applied to the
+whole region.  Until a heap overflows the result is exactly what the
+batch pipeline would pick from every site's deals at once.  ``save``
+writes the feed and its stats as JSON (``main.run`` writes
+``REGION_FEED_PATH``, uploaded with the run's artifacts).
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+from typing import Any
+
+from deal_detector import (
+    DetectionConfig,
+    _global_name_key,
+    _selection_bucket,
+    select_top_deals,
+)
+
+REGION_FEED_POOL_FACTOR = int(os.getenv("REGION_FEED_POOL_FACTOR", "4"))
+REGION_FEED_BRAND_DEPTH = int(os.getenv("REGION_FEED_BRAND_DEPTH", "16"))
+REGION_FEED_DISPENSARY_DEPTH = int(os.getenv("REGION_FEED_DISPENSARY_DEPTH", "48"))
+
+# Deal fields ``save`` writes for each feed deal.
+REGION_FEED_FIELDS = (
+    "name", "brand", "category", "product_subtype", "weight_value", "weight_unit",
+    "sale_price", "original_price", "discount_percent", "deal_score",
+    "dispensary_id", "source_platform",
+)
+
+
+class _Candidate:
+    """One deal held by the feed, and the heaps it counts against."""
+
+    __slots__ = ("deal", "key", "score", "seq", "pools", "alive")
+
+    def __init__(self, deal: dict[str, Any], key: str, seq: int) -> None:
+        self.deal = deal
+        self.key = key
+        self.score = deal.get("deal_score", 0)
+        self.seq = seq
+        self.pools: list[_Pool] = []
+        self.alive = True
+
+
+class _Pool:
+    """Min-heap of candidates, weakest first, holding at most *capacity* live.
+
+    Candidates dropped through another pool (or replaced by a better
+    duplicate) stay in the heap until they surface; ``live`` counts
+    the rest.
+    """
+
+    __slots__ = ("capacity", "heap", "live")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.heap: list[tuple[Any, int, _Candidate]] = []
+        self.live = 0
+
+    def push(self, cand: _Candidate) -> list[_Candidate]:
+        """Add *cand*; return the live candidates pushed out to stay in capacity."""
+        # Lower score, then later arrival, is weaker.
+        heapq.heappush(self.heap, (cand.score, -cand.seq, cand))
+        self.live += 1
+        evicted = []
+        while self.live > self.capacity:
+            _, _, weakest = heapq.heappop(self.heap)
+            if weakest.alive:
+                _drop(weakest)
+                evicted.append(weakest)
+        if len(self.heap) > 2 * self.live + 32:
+            self.heap = [item for item in self.heap if item[2].alive]
+            heapq.heapify(self.heap)
+        return evicted
+
+    def candidates(self) -> list[_Candidate]:
+        return [item[2] for item in self.heap if item[2].alive]
+
+
+def _drop(cand: _Candidate) -> None:
+    cand.alive = False
+    for pool in cand.pools:
+        pool.live -= 1
+
+
+class RegionFeed:
+    """Incremental region-level feed over per-site scored candidates.
+
+    Bucket targets and the final selection come from *config* (default:
+    a ``DetectionConfig()``).
+    """
+
+    def __init__(
+        self,
+        pool_factor: int = REGION_FEED_POOL_FACTOR,
+        brand_depth: int = REGION_FEED_BRAND_DEPTH,
+        dispensary_depth: int = REGION_FEED_DISPENSARY_DEPTH,
+        config: DetectionConfig | None = None,
+    ) -> None:
+        self.config = config if config is not None else DetectionConfig()
+        self.pool_factor = pool_factor
+        self.brand_depth = brand_depth
+        self.dispensary_depth = dispensary_depth
+        self._best: dict[str, _Candidate] = {}
+        self._buckets: dict[str, _Pool] = {}
+        self._by_brand: dict[tuple[str, str], _Pool] = {}
+        self._by_dispensary: dict[tuple[str, str], _Pool] = {}
+        self._seq = 0
+        self.sites = 0
+        self.ingested = 0
+        self.duplicates = 0
+        self.evicted = 0
+
+    def add(self, deals: list[dict[str, Any]]) -> None:
+        """Ingest one site's scored candidates."""
+        self.sites += 1
+        for deal in deals:
+            self.ingested += 1
+            key = _global_name_key(deal)
+            current = self._best.get(key)
+            if current is not None:
+                self.duplicates += 1
+                if deal.get("deal_score", 0) <= current.score:
+                    continue
+                # Better instance of a product already held: it takes the
+                # place (and the ordering) of the first one seen.
+                _drop(current)
+                cand = _Candidate(deal, key, current.seq)
+            else:
+                self._seq += 1
+                cand = _Candidate(deal, key, self._seq)
+            self._best[key] = cand
+            self._admit(cand)
+
+    def _admit(self, cand: _Candidate) -> None:
+        deal = cand.deal
+        targets = self.config.category_targets
+        bucket = _selection_bucket(deal, targets)
+        brand = deal.get("brand") or "_unknown"
+        dispensary = deal.get("dispensary_id") or ""
+        pools = (
+            self._pool(self._buckets, bucket, self.pool_factor * targets.get(bucket, 10)),
+            self._pool(self._by_brand, (bucket, brand), self.brand_depth),
+            self._pool(self._by_dispensary, (bucket, dispensary), self.dispensary_depth),
+        )
+        for pool in pools:
+            # Only count against pools the candidate has actually entered.
+            cand.pools.append(pool)
+            for dropped in pool.push(cand):
+                self.evicted += 1
+                if self._best.get(dropped.key) is dropped:
+                    del self._best[dropped.key]
+            if not cand.alive:
+                break
+
+    @staticmethod
+    def _pool(pools: dict[Any, _Pool], key: Any, capacity: int) -> _Pool:
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = _Pool(capacity)
+        return pool
+
+    def candidates(self) -> list[dict[str, Any]]:
+        """Held deals, best score first (first seen first on ties)."""
+        ordered = [
+            sorted((-c.score, c.seq, c) for c in pool.candidates())
+            for pool in self._buckets.values()
+        ]
+        return [c.deal for _, _, c in heapq.merge(*ordered)]
+
+    def feed(self) -> list[dict[str, Any]]:
+        """The region's curated feed from everything ingested so far."""
+        return select_top_deals(self.candidates(), self.config)
+
+    def save(self, path: str, region: str | None = None) -> list[dict[str, Any]]:
+        """Write ``feed()`` and ``stats()`` to *path* as JSON; return the feed."""
+        feed = self.feed()
+        deals = [{k: deal[k] for k in REGION_FEED_FIELDS if k in deal} for deal in feed]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"region": region, "stats": self.stats(), "deals": deals}, fh, indent=1)
+        return feed
+
+    def stats(self) -> dict[str, Any]:
+        brands = {key[1] for key, pool in self._by_brand.items() if pool.live}
+        dispensaries = {key[1] for key, pool in self._by_dispensary.items() if pool.live}
+        return {
+            "sites": self.sites,
+            "ingested": self.ingested,
+            "duplicates": self.duplicates,
+            "evicted": self.evicted,
+            "candidates": len(self._best),
+            "brands": len(brands),
+            "dispensaries": len(dispensaries),
+        }
@@ -0,0 +1,287 @@
+"""
+Offline replay of archived raw products (``python main.py --replay``).
+
+A change to ``clouded_logic.py``, ``product_classifier.py`` or
+``deal_detector.py`` used to reach the products table only through a
+full re-scrape.  Replay takes the raw captures ``RawArchive`` kept for
+a day and feeds each site through the same ``main._process_site``
+pipeline the live scrape uses — normalize, classify, detect, upsert —
+with no browser, one site per task across a process pool.
+
+This module holds the browser-free parts: picking the captures to
+replay, running the tasks, and the per-site output snapshots replays
+can be compared by.  A replay saved with ``--output`` is a baseline;
+a later replay run with ``--diff BASELINE`` reports every product whose
+brand, category, subtype, price fields or deal score changed, and
+every deal that appeared or disappeared — a regression check for rule
+changes over a full day of real menus.
+
+By default a replay is a dry run (nothing is written); ``--write``
+upserts as a re-scrape of the same sites would.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from config.dispensaries import DISPENSARIES
+from raw_archive import RAW_ARCHIVE_DIR, list_runs, read_index, site_entries
+
+# Product-row fields a replay snapshot keeps (what rule changes move).
+SNAPSHOT_FIELDS = (
+    "name", "brand", "category", "product_subtype", "is_infused", "strain_type",
+    "original_price", "sale_price", "discount_percent", "weight_value", "weight_unit",
+    "thc_percent", "cbd_percent", "deal_score",
+)
+_KEY_FIELDS = ("name", "weight_value", "sale_price")
+
+_DISPENSARIES_BY_SLUG = {d["slug"]: d for d in DISPENSARIES}
+
+
+# =====================================================================
+# Picking captures
+# =====================================================================
+
+
+def replay_tasks(
+    index_paths: Iterable[Path | str],
+    slugs: Iterable[str] | None = None,
+) -> list[tuple[dict[str, Any], str, dict[str, Any]]]:
+    """``(dispensary, data_path, entry)`` per site, its latest capture.
+
+    *index_paths* are taken oldest first, so a site captured by more
+    than one run (platform groups, re-runs) replays its last capture.
+    The dispensary comes from the config, falling back to the capture's
+    own index entry for stores no longer listed.
+    """
+    wanted = set(slugs) if slugs else None
+    latest: dict[str, tuple[dict[str, Any], str, dict[str, Any]]] = {}
+    for index_path in sorted(Path(p) for p in index_paths):
+        index = read_index(index_path)
+        data_path = str(index_path.parent / index["data"])
+        for slug, entry in site_entries(index).items():
+            if wanted is not None and slug not in wanted:
+                continue
+            dispensary = _DISPENSARIES_BY_SLUG.get(slug) or {
+                "slug": slug,
+                "name": entry.get("name") or slug,
+                "platform": entry.get("platform") or "unknown",
+                "url": entry.get("url") or "",
+                "region": index.get("region"),
+            }
+            latest.pop(slug, None)
+            latest[slug] = (dispensary, data_path, entry)
+    return list(latest.values())
+
+
+def select_runs(
+    *,
+    root: Path | str = RAW_ARCHIVE_DIR,
+    date: str | None = None,
+    region: str | None = None,
+    runs: Iterable[Path | str] = (),
+) -> list[Path]:
+    """Explicit *runs*, or every run archived for *date* (default today, UTC)."""
+    explicit = [Path(p) for p in runs]
+    if explicit:
+        return explicit
+    day = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return list_runs(root, date=day, region=region)
+
+
+def run_tasks(
+    tasks: list[Any],
+    fn: Callable[[Any], dict[str, Any]],
+    *,
+    workers: int | None = None,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple[Any, ...] = (),
+) -> Iterator[dict[str, Any]]:
+    """Results of ``fn(task)`` in task order, over *workers* processes.
+
+    With one worker (or one task) everything runs in this process,
+    after calling *initializer* here.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(fn, tasks)
+        return
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.map(fn, tasks)
+
+
+# =====================================================================
+# Output snapshots and diffs
+# =====================================================================
+
+
+def site_outputs(product_rows: list[dict[str, Any]], deals: list[Any]) -> dict[str, Any]:
+    """What one site's replay produced: its product rows and deals."""
+    return {
+        "products": [{f: row.get(f) for f in SNAPSHOT_FIELDS} for row in product_rows],
+        "deals": [[d.get("name", ""), d.get("sale_price"), d.get("deal_score", 0)] for d in deals],
+    }
+
+
+class OutputSnapshot:
+    """Per-site replay outputs, each held zlib-compressed until read."""
+
+    def __init__(self) -> None:
+        self._sites: dict[str, bytes] = {}
+
+    def add(self, slug: str, outputs: dict[str, Any]) -> None:
+        self._sites[slug] = zlib.compress(json.dumps(outputs).encode("utf-8"))
+
+    def get(self, slug: str) -> dict[str, Any] | None:
+        blob = self._sites.get(slug)
+        return json.loads(zlib.decompress(blob)) if blob is not None else None
+
+    def __contains__(self, slug: object) -> bool:
+        return slug in self._sites
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sites)
+
+    def __len__(self) -> int:
+        return len(self._sites)
+
+    def save(self, path: Path | str) -> None:
+        """gzip JSONL, one ``{"slug": ..., "products": ..., "deals": ...}`` per site."""
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            for slug in self._sites:
+                fh.write(json.dumps({"slug": slug, **self.get(slug)}) + "\n")
+
+    @classmethod
+    def load(cls, path: Path | str) -> OutputSnapshot:
+        snapshot = cls()
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                site = json.loads(line)
+                snapshot.add(site.pop("slug"), site)
+        return snapshot
+
+
+def _product_key(product: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(product.get(f) for f in _KEY_FIELDS)
+
+
+class ReplayDiff:
+    """Differences between two replays' outputs, site by site."""
+
+    def __init__(self, examples: int = 20) -> None:
+        self.sites = 0
+        self.sites_changed: Counter[str] = Counter()
+        self.sites_only_before: list[str] = []
+        self.sites_only_after: list[str] = []
+        self.products_added = 0
+        self.products_removed = 0
+        self.products_changed = 0
+        self.field_changes: Counter[str] = Counter()
+        self.deals_added = 0
+        self.deals_removed = 0
+        self.deal_scores_changed = 0
+        self.examples: list[tuple[str, str, str, Any, Any]] = []
+        self._max_examples = examples
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.sites_changed or self.sites_only_before or self.sites_only_after)
+
+    def compare(self, slug: str, before: dict[str, Any] | None, after: dict[str, Any] | None) -> None:
+        self.sites += 1
+        if before is None or after is None:
+            (self.sites_only_after if before is None else self.sites_only_before).append(slug)
+            return
+        changes = 0
+        old = {_product_key(p): p for p in before["products"]}
+        new = {_product_key(p): p for p in after["products"]}
+        for key in old.keys() - new.keys():
+            self.products_removed += 1
+            changes += 1
+            self._example(slug, old[key]["name"], "(product)", "present", "gone")
+        for key in new.keys() - old.keys():
+            self.products_added += 1
+            changes += 1
+            self._example(slug, new[key]["name"], "(product)", "absent", "new")
+        for key in old.keys() & new.keys():
+            fields = [f for f in SNAPSHOT_FIELDS if old[key].get(f) != new[key].get(f)]
+            if fields:
+                self.products_changed += 1
+                changes += 1
+                self.field_changes.update(fields)
+                for f in fields:
+                    self._example(slug, new[key]["name"], f, old[key].get(f), new[key].get(f))
+        old_deals = {(n, p): s for n, p, s in before["deals"]}
+        new_deals = {(n, p): s for n, p, s in after["deals"]}
+        added = len(new_deals.keys() - old_deals.keys())
+        removed = len(old_deals.keys() - new_deals.keys())
+        rescored = sum(1 for k in old_deals.keys() & new_deals.keys() if old_deals[k] != new_deals[k])
+        self.deals_added += added
+        self.deals_removed += removed
+        self.deal_scores_changed += rescored
+        changes += added + removed + rescored
+        if changes:
+            self.sites_changed[slug] = changes
+
+    def _example(self, slug: str, name: str, field: str, before: Any, after: Any) -> None:
+        if len(self.examples) < self._max_examples:
+            self.examples.append((slug, name, field, before, after))
+
+    def lines(self, top_sites: int = 10) -> Iterator[str]:
+        yield f"Replay diff: {len(self.sites_changed)}/{self.sites} sites changed"
+        if self.sites_only_before:
+            yield f"  Missing from this replay: {', '.join(self.sites_only_before[:20])}"
+        if self.sites_only_after:
+            yield f"  Not in the baseline: {', '.join(self.sites_only_after[:20])}"
+        yield (
+            f"  Products: +{self.products_added} / -{self.products_removed} / "
+            f"{self.products_changed} changed"
+        )
+        if self.field_changes:
+            yield "  Fields changed: " + ", ".join(f"{f}={n}" for f, n in self.field_changes.most_common())
+        yield (
+            f"  Deals: +{self.deals_added} / -{self.deals_removed} / "
+            f"{self.deal_scores_changed} rescored"
+        )
+        for slug, n in self.sites_changed.most_common(top_sites):
+            yield f"    {slug:30s} {n:5d} changes"
+        for slug, name, field, before, after in self.examples:
+            yield f"    [{slug}] {str(name)[:50]} — {field}: {before!r} → {after!r}"
+
+
+# =====================================================================
+# Command line
+# =====================================================================
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py --replay",
+        description="Reprocess archived raw products through the scrape pipeline, without a browser.",
+    )
+    parser.add_argument("--date", help="Archive date to replay (YYYY-MM-DD, default today UTC)")
+    parser.add_argument("--region", help="Only this region's captures")
+    parser.add_argument("--run", action="append", default=[], metavar="INDEX",
+                        help="Replay this run's .index.json (repeatable; overrides --date)")
+    parser.add_argument("--sites", help="Comma-separated slugs to replay")
+    parser.add_argument("--archive-dir", type=Path, default=RAW_ARCHIVE_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--write", action="store_true",
+                        help="Upsert products and deals (default: dry run)")
+    parser.add_argument("--output", type=Path, help="Save this replay's outputs (gzip JSONL)")
+    parser.add_argument("--diff", type=Path, metavar="BASELINE",
+                        help="Compare against an earlier replay's --output")
+    parser.add_argument("--fail-on-diff", action="store_true",
+                        help="Exit with status 2 when the diff is not empty")
+    return parser
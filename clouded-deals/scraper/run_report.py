@@ -0,0 +1,509 @@
+"""
+End-of-run reporting, built while sites finish.
+
+``main.run`` used to keep every site's report data and every top and
+cut deal until the end of the run, then build the deal report, the
+scrape summary and the daily metrics from those lists.  ``RunReport``
+folds each site in as it finishes instead:
+
+  - running counters (categories, vape subtypes, brands and the stores
+    carrying them, platforms, regions) and a ``DealTally`` score
+    histogram for ``collect_daily_metrics``,
+  - bounded top-K heaps for the ranked sections (top 3 per category,
+    top 10 cut deals, top 10 sites by product count),
+  - one compact record per site — counts, the top deal per category,
+    the best cut, the zero-deal reason — spilled to gzip-compressed
+    JSONL runs on disk.
+
+The summary writer streams the site records back in dispensary-name
+order by merging the sorted runs, so memory stays flat however many
+sites a shard covers; only the distinct brands and stores are held.
+
+Sections match what the list-based report printed for the same sites
+in the same order.  Sites are folded as they finish, so ties in the
+ranked sections go to the site that finished first.
+"""
+
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+from deal_detector import CATEGORY_MINIMUMS, CATEGORY_TARGETS
+from metrics_collector import DealTally
+
+REPORT_SPILL_DIR = os.getenv("REPORT_SPILL_DIR") or None
+REPORT_SPILL_RUN_SIZE = int(os.getenv("REPORT_SPILL_RUN_SIZE", "256"))
+
+# Report categories: vape with disposables split out.
+DEAL_REPORT_CATEGORIES = ("flower", "vape", "disposable", "edible", "concentrate", "preroll", "other")
+SITE_CATEGORIES = DEAL_REPORT_CATEGORIES[:-1]
+
+# Deal fields the site records keep (the rest of the deal is not printed).
+_TOP_FIELDS = ("brand", "sale_price", "weight_value", "weight_unit", "discount_percent", "source_platform")
+_CUT_FIELDS = ("name", "brand", "sale_price", "category", "deal_score")
+
+
+def report_category(deal: Mapping[str, Any]) -> str:
+    category = deal.get("category", "other")
+    if category == "vape" and deal.get("product_subtype") == "disposable":
+        return "disposable"
+    return category
+
+
+def explain_zero_deals(report_data: Mapping[str, Any], products: int) -> str:
+    """Return a short plain-language reason why a site produced zero deals."""
+    if products == 0:
+        return "0 products scraped"
+
+    total = report_data.get("total_products", products)
+    passed = report_data.get("passed_hard_filter", 0)
+    scored = report_data.get("scored", 0)
+
+    if passed == 0:
+        return f"all {total} failed hard filters (price/discount/brand)"
+    if scored == 0:
+        return f"{passed} passed filters but all failed quality gate"
+    # Deals existed but were all deduped or cut during selection
+    return f"{scored} scored but all cut during selection/dedup"
+
+
+# =====================================================================
+# Bounded structures
+# =====================================================================
+
+
+class _TopK:
+    """The *k* highest-scored items seen, first seen first on ties."""
+
+    __slots__ = ("k", "heap", "seq")
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.heap: list[tuple[Any, int, Any]] = []
+        self.seq = 0
+
+    def push(self, score: Any, item: Any) -> None:
+        self.seq += 1
+        # Lower score, then later arrival, is weaker.
+        entry = (score, -self.seq, item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def best(self) -> list[Any]:
+        return [item for _, _, item in sorted(self.heap, key=lambda e: (e[0], e[1]), reverse=True)]
+
+
+class SiteSpill:
+    """Per-site records on disk, read back sorted by ``name``.
+
+    Records are buffered up to *run_size*, sorted, and written as one
+    gzip JSONL run; ``sorted_records`` merges the runs.  The spill
+    directory is removed by ``close``.
+    """
+
+    __slots__ = ("directory", "run_size", "_buffer", "_runs", "_seq")
+
+    def __init__(self, directory: str | None = REPORT_SPILL_DIR, run_size: int = REPORT_SPILL_RUN_SIZE) -> None:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix="run-report-", dir=directory))
+        self.run_size = max(1, run_size)
+        self._buffer: list[dict[str, Any]] = []
+        self._runs: list[Path] = []
+        self._seq = 0
+
+    def append(self, record: dict[str, Any]) -> None:
+        record["seq"] = self._seq
+        self._seq += 1
+        self._buffer.append(record)
+        if len(self._buffer) >= self.run_size:
+            self._flush()
+
+    def __len__(self) -> int:
+        return self._seq
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        path = self.directory / f"sites-{len(self._runs):04d}.jsonl.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            for record in sorted(self._buffer, key=_record_order):
+                fh.write(json.dumps(record, default=str))
+                fh.write("\n")
+        self._runs.append(path)
+        self._buffer = []
+
+    def sorted_records(self) -> Iterator[dict[str, Any]]:
+        """Every record appended so far, by name (then arrival)."""
+        self._flush()
+        return heapq.merge(*(_read_run(path) for path in self._runs), key=_record_order)
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _record_order(record: dict[str, Any]) -> tuple[str, int]:
+    return record["name"], record["seq"]
+
+
+def _read_run(path: Path) -> Iterator[dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            yield json.loads(line)
+
+
+def _fields(deal: Mapping[str, Any], keys: tuple[str, ...]) -> dict[str, Any]:
+    # Only the keys the deal has, so .get defaults behave as on the deal.
+    return {k: deal[k] for k in keys if k in deal}
+
+
+# =====================================================================
+# Run report
+# =====================================================================
+
+
+class RunReport:
+    """Streaming aggregates behind the end-of-run report sections."""
+
+    def __init__(self, spill_dir: str | None = REPORT_SPILL_DIR, run_size: int = REPORT_SPILL_RUN_SIZE) -> None:
+        self.sites = 0
+        self.sites_ok = 0
+        self.top = DealTally()
+        self.cut_count = 0
+        self.report_categories: Counter[str] = Counter()
+        self.vape_subtypes: Counter[str] = Counter()
+        self.brand_deals: Counter[str] = Counter()
+        self.brand_stores: dict[str, set[str]] = defaultdict(set)
+        self.platforms: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"sites": 0, "ok": 0, "products": 0, "deals": 0}
+        )
+        self.region_products: Counter[str] = Counter()
+        self.region_sites: Counter[str] = Counter()
+        self._top_by_category: dict[str, _TopK] = defaultdict(lambda: _TopK(3))
+        self._top_cuts = _TopK(10)
+        self._top_sites = _TopK(10)
+        self._spill = SiteSpill(spill_dir, run_size)
+
+    # -- ingest --------------------------------------------------------
+
+    def add_site(self, dispensary: Mapping[str, Any], result: Mapping[str, Any]) -> None:
+        """Fold in one finished site.
+
+        *result* is what ``scrape_site`` returned (or just ``{"error":
+        ...}``); its ``_report_data`` deal lists are read, not kept, so
+        the caller can drop them afterwards.  Deals only count for
+        sites without an error.
+        """
+        slug = result.get("slug", dispensary["slug"])
+        platform = dispensary["platform"]
+        error = result.get("error")
+        products = result.get("products", 0)
+        deals = result.get("deals", 0)
+        rd = result.get("_report_data") or {}
+        top_deals = rd.get("top_deals", []) if not error else []
+        cut_deals = rd.get("cut_deals", []) if not error else []
+
+        self.sites += 1
+        region = dispensary.get("region", "unknown")
+        self.region_products[region] += products
+        self.region_sites[region] += 1
+        stats = self.platforms[platform]
+        stats["sites"] += 1
+        if not error:
+            self.sites_ok += 1
+            stats["ok"] += 1
+            stats["products"] += products
+            stats["deals"] += deals
+        if products > 0:
+            self._top_sites.push(products, (slug, products, platform))
+
+        by_category: dict[str, list[Any]] = {}
+        for d in top_deals:
+            score = d.get("deal_score", 0)
+            category = report_category(d)
+            self.top.add(d)
+            self.report_categories[category] += 1
+            self._top_by_category[category].push(score, d)
+            by_category.setdefault(category, []).append(d)
+            brand = d.get("brand") or "Unknown"
+            self.brand_deals[brand] += 1
+            self.brand_stores[brand].add(d.get("dispensary_id") or "?")
+            if d.get("category") == "vape":
+                self.vape_subtypes[d.get("product_subtype") or "unclassified"] += 1
+        best_cut = None
+        for d in cut_deals:
+            self.cut_count += 1
+            self._top_cuts.push(d.get("deal_score", 0), d)
+            if best_cut is None or d.get("deal_score", 0) > best_cut.get("deal_score", 0):
+                best_cut = d
+
+        site_categories = []
+        for category in SITE_CATEGORIES:
+            cat_deals = by_category.get(category)
+            if cat_deals:
+                best = max(cat_deals, key=lambda x: x.get("deal_score", 0))
+                site_categories.append([category, len(cat_deals), _fields(best, _TOP_FIELDS)])
+        self._spill.append({
+            "slug": slug,
+            "name": dispensary["name"],
+            "platform": platform,
+            "region": region,
+            "error": error,
+            "products": products,
+            "deals": deals,
+            "selected": len(top_deals),
+            "report": {k: v for k, v in rd.items() if not isinstance(v, (list, dict))},
+            "categories": site_categories,
+            "best_cut": _fields(best_cut, _CUT_FIELDS) if best_cut is not None else None,
+            "reason": explain_zero_deals(rd, products) if not top_deals else None,
+        })
+
+    # -- read back -----------------------------------------------------
+
+    def site_records(self) -> Iterator[dict[str, Any]]:
+        """Per-site records by dispensary name, streamed from the spill."""
+        return self._spill.sorted_records()
+
+    def top_sites(self) -> list[tuple[str, int, str]]:
+        """``(slug, products, platform)`` for the 10 sites with most products."""
+        return self._top_sites.best()
+
+    def close(self) -> None:
+        self._spill.close()
+
+    def deal_report_lines(self) -> Iterator[str]:
+        """The deal report: top 3 per category + 10 cut deals."""
+        if not self.top.count and not self.cut_count:
+            return
+
+        yield ""
+        yield "=" * 60
+        yield "DEAL REPORT — Human Review Summary"
+        yield "=" * 60
+
+        for cat in DEAL_REPORT_CATEGORIES:
+            count = self.report_categories.get(cat, 0)
+            if not count:
+                continue
+            yield ""
+            yield "  [%s] %d deals included — Top 3:" % (cat.upper(), count)
+            for i, d in enumerate(self._top_by_category[cat].best(), 1):
+                name = d.get("name", "?")[:50]
+                brand = d.get("brand") or "?"
+                price = d.get("sale_price") or 0
+                orig = d.get("original_price") or 0
+                score = d.get("deal_score", 0)
+                disp = d.get("dispensary_id") or d.get("dispensary") or "?"
+                pct = d.get("discount_percent") or 0
+                yield "    %d. [%d pts] %s — %s | $%.0f (was $%.0f, %d%% off) @ %s" % (
+                    i, score, brand, name, price, orig, pct, disp,
+                )
+
+        if self.cut_count:
+            yield ""
+            yield "  CUT DEALS (scored but not shown) — Top 10 of %d:" % self.cut_count
+            for i, d in enumerate(self._top_cuts.best(), 1):
+                name = d.get("name", "?")[:50]
+                brand = d.get("brand") or "?"
+                price = d.get("sale_price") or 0
+                score = d.get("deal_score", 0)
+                cat = d.get("category", "?")
+                disp = d.get("dispensary_id") or d.get("dispensary") or "?"
+                pct = d.get("discount_percent") or 0
+                yield "    %d. [%d pts] %s — %s | $%.0f (%d%% off) [%s] @ %s" % (
+                    i, score, brand, name, price, pct, cat, disp,
+                )
+        else:
+            yield ""
+            yield "  No cut deals (all scored deals were selected)"
+
+        yield ""
+        yield "=" * 60
+
+    def summary_lines(
+        self,
+        *,
+        sites_failed: list[dict[str, str]],
+        total_products: int,
+        total_deals: int,
+        elapsed_sec: float,
+        asset_stats: dict[str, Any] | None = None,
+        parse_stats: dict[str, Any] | None = None,
+        region_feed: list[Mapping[str, Any]] | None = None,
+    ) -> Iterator[str]:
+        """The plain-language scrape summary, one line at a time.
+
+        *region_feed* is ``RegionFeed.feed()``, in display order.
+        """
+        yield "=" * 80
+        yield "SCRAPE SUMMARY"
+        yield "=" * 80
+        yield f"  Sites scraped: {self.sites_ok}/{self.sites}"
+        yield f"  Total products: {total_products}"
+        yield f"  Deals selected: {total_deals}"
+        yield f"  Runtime: {elapsed_sec / 60:.1f} min"
+        if asset_stats and asset_stats["requests"]:
+            yield (
+                f"  Asset cache: {asset_stats['hit_rate']:.1f}% hits "
+                f"({asset_stats['hits']}/{asset_stats['requests']}), "
+                f"{asset_stats['bytes_saved'] / 1_048_576:.1f} MB saved"
+            )
+        if parse_stats and parse_stats["lookups"]:
+            yield (
+                f"  Parse cache: {parse_stats['hit_rate']:.1f}% hits "
+                f"({parse_stats['hits']}/{parse_stats['lookups']} products)"
+            )
+        yield ""
+
+        # ── 1. FAILED SITES ──────────────────────────────────────────
+        if sites_failed:
+            yield "-" * 80
+            yield "FAILED SITES"
+            yield "-" * 80
+            for f in sites_failed:
+                yield f"  {f['slug']}: {f['error']}"
+            yield ""
+
+        # ── 2. PER-DISPENSARY BREAKDOWN ───────────────────────────────
+        yield "-" * 80
+        yield "DEALS BY DISPENSARY"
+        yield "-" * 80
+        for site in self.site_records():
+            yield from _site_lines(site)
+
+        # ── 3. BRAND LEADERBOARD ──────────────────────────────────────
+        yield "-" * 80
+        yield "BRAND LEADERBOARD (top 15 by selected deals)"
+        yield "-" * 80
+        for brand, count in self.brand_deals.most_common(15):
+            disp_count = len(self.brand_stores[brand])
+            yield f"  {brand:25s}  {count:3d} deals across {disp_count} stores"
+        yield ""
+
+        # ── 4. CATEGORY DISTRIBUTION ──────────────────────────────────
+        yield "-" * 80
+        yield "CATEGORY DISTRIBUTION (selected vs target)"
+        yield "-" * 80
+        for cat in SITE_CATEGORIES:
+            actual = self.report_categories.get(cat, 0)
+            target = CATEGORY_TARGETS.get(cat, 0)
+            minimum = CATEGORY_MINIMUMS.get(cat, 0)
+            bar = "#" * min(actual, 60)
+            flag = " !! UNDER MIN" if actual < minimum else ""
+            yield f"  {cat:12s}: {actual:3d}/{target:3d} target  (min {minimum}){flag}  {bar}"
+        other = self.report_categories.get("other", 0)
+        if other:
+            yield f"  {'other':12s}: {other:3d}"
+        yield ""
+
+        # ── 4b. VAPE SUBTYPE BREAKDOWN ────────────────────────────────
+        # Diagnostic: catch regressions in disposable detection early.
+        if self.vape_subtypes:
+            yield "  VAPE SUBTYPE BREAKDOWN:"
+            for sub, cnt in self.vape_subtypes.most_common():
+                yield f"    {sub:20s}: {cnt:3d}"
+            selected_disposables = self.report_categories.get("disposable", 0)
+            yield (
+                f"    disposable (selected): {selected_disposables:3d} "
+                f"(target: {CATEGORY_TARGETS.get('disposable', 0)})"
+            )
+            yield ""
+
+        # ── 5. TOP CUT DEALS (almost made it) ─────────────────────────
+        if self.cut_count:
+            yield "-" * 80
+            yield f"TOP CUT DEALS ({self.cut_count} total scored but not shown)"
+            yield "-" * 80
+            for i, d in enumerate(self._top_cuts.best(), 1):
+                name = d.get("name", "?")[:45]
+                brand = d.get("brand") or "?"
+                price = d.get("sale_price") or 0
+                score = d.get("deal_score", 0)
+                cat = d.get("category", "?")
+                disp = d.get("dispensary_id") or "?"
+                pct = d.get("discount_percent") or 0
+                pct_str = f" {pct:.0f}% off" if pct else ""
+                yield f"  {i:2d}. [{score:2d} pts] ${price:.0f}{pct_str} {brand} — {name} [{cat}] @ {disp}"
+            yield ""
+
+        # ── 5b. REGION FEED (across every site) ───────────────────────
+        if region_feed:
+            yield "-" * 80
+            yield f"REGION FEED ({len(region_feed)} deals across all sites) — first 10:"
+            yield "-" * 80
+            mix = Counter(report_category(d) for d in region_feed)
+            yield "  " + ", ".join(f"{c} {mix[c]}" for c in DEAL_REPORT_CATEGORIES if mix[c])
+            for i, d in enumerate(region_feed[:10], 1):
+                name = d.get("name", "?")[:45]
+                brand = d.get("brand") or "?"
+                price = d.get("sale_price") or 0
+                score = d.get("deal_score", 0)
+                disp = d.get("dispensary_id") or "?"
+                yield f"  {i:2d}. [{score:2d} pts] ${price:.0f} {brand} — {name} [{report_category(d)}] @ {disp}"
+            yield ""
+
+        # ── 6. PLATFORM SUMMARY ───────────────────────────────────────
+        yield "-" * 80
+        yield "PLATFORM SUMMARY"
+        yield "-" * 80
+        for p, stats in sorted(self.platforms.items()):
+            yield (
+                f"  {p:10s}: {stats['ok']}/{stats['sites']} sites OK, "
+                f"{stats['products']} products, {stats['deals']} deals"
+            )
+        yield ""
+        yield "=" * 80
+
+
+def _site_lines(site: Mapping[str, Any]) -> Iterator[str]:
+    name, platform, products = site["name"], site["platform"], site["products"]
+    if site["error"]:
+        yield f"  {name} ({platform}) — ERROR: {site['error']}"
+        yield ""
+        return
+    if site["selected"] == 0 and products == 0:
+        yield f"  {name} ({platform}) — 0 products scraped (site may be down or blocked)"
+        yield ""
+        return
+
+    best = site["best_cut"]
+    if site["selected"] == 0:
+        yield f"  {name} ({platform}) — {products} products, 0 deals ({site['reason']})"
+        if best is not None:
+            yield (
+                f"    Best cut: ${best.get('sale_price', 0):.0f} "
+                f"{best.get('brand', '?')} {best.get('name', '?')[:40]} "
+                f"[{best.get('category', '?')}] score={best.get('deal_score', 0)}"
+            )
+        yield ""
+        return
+
+    yield f"  {name} ({platform}) — {products} products, {site['selected']} deals:"
+    for cat, count, top in site["categories"]:
+        brand = top.get("brand") or "?"
+        price = top.get("sale_price") or 0
+        weight = top.get("weight_value") or ""
+        wunit = top.get("weight_unit") or ""
+        weight_str = f" {weight}{wunit}" if weight else ""
+        pct = top.get("discount_percent") or 0
+        source = top.get("source_platform", "")
+        pct_str = f" ({pct:.0f}% off)" if pct else (" (Deal)" if source == "jane" else "")
+        extra = f" +{count - 1} more" if count > 1 else ""
+        yield f"    {cat:12s}: ${price:<6.2f} {brand} {weight_str}{pct_str}{extra}"
+    if best is not None:
+        yield (
+            f"    (best cut): ${best.get('sale_price', 0):.0f} "
+            f"{best.get('brand', '?')} [{best.get('category', '?')}] "
+            f"score={best.get('deal_score', 0)}"
+        )
+    yield ""
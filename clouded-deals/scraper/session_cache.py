@@ -0,0 +1,113 @@
+"""
+Per-domain browser session cache (cookies + localStorage).
+
+Every ``BaseScraper`` context used to start empty, so each site repeated
+its age gate, store picker (Planet 13 / Medizin), Curaleaf state
+selection, and any bot-check cookies — every day and again on every
+retry.  After a successful scrape the context's Playwright storage state
+is saved here; new contexts for the same domain start from it, so the
+gate and picker steps find nothing to do.
+
+Keys are the bare domain (``planet13.com``).  Scrapers whose session
+holds a per-store choice use ``scope="site"`` so two stores on one
+domain never inherit each other's selection.
+
+State is dropped when it is older than ``SESSION_STATE_TTL_HOURS``
+(default 48) or when a scrape that started from it fails.  Files live
+under ``SCRAPER_CACHE_DIR/storage_state/`` alongside the learned embed
+URLs (see ``embed_cache``).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger("session_cache")
+
+SESSION_CACHE_DIR = Path(os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache")) / "storage_state"
+SESSION_STATE_TTL_HOURS = float(os.getenv("SESSION_STATE_TTL_HOURS", "48"))
+
+_UNSAFE_CHARS = re.compile(r"[^a-z0-9._-]+")
+
+
+def session_key(url: str, slug: str | None = None, scope: str = "domain") -> str:
+    """Return the cache key for a dispensary URL.
+
+    ``scope="domain"`` shares state across every site on the domain;
+    ``scope="site"`` appends *slug* so each store gets its own state.
+    """
+    host = urlparse(url).netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    key = host or "unknown"
+    if scope == "site" and slug:
+        key = f"{key}__{slug}"
+    return _UNSAFE_CHARS.sub("_", key.lower())
+
+
+def _path(key: str) -> Path:
+    return SESSION_CACHE_DIR / f"{key}.json"
+
+
+def load_state(key: str) -> dict[str, Any] | None:
+    """Return the saved storage state for *key*, or None if absent/stale."""
+    path = _path(key)
+    try:
+        payload = json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Discarding unreadable session state %s: %s", path, exc)
+        invalidate(key)
+        return None
+
+    state = payload.get("state") if isinstance(payload, dict) else None
+    if not isinstance(state, dict):
+        invalidate(key)
+        return None
+    age_hours = (time.time() - payload.get("saved_at", 0)) / 3600
+    if age_hours > SESSION_STATE_TTL_HOURS:
+        logger.info("[%s] Session state expired (%.1fh old)", key, age_hours)
+        invalidate(key)
+        return None
+    return state
+
+
+def save_state(key: str, state: dict[str, Any]) -> bool:
+    """Persist a Playwright ``storage_state()`` dict for *key*."""
+    if not state.get("cookies") and not state.get("origins"):
+        return False
+    path = _path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"saved_at": time.time(), "state": state}))
+        tmp.replace(path)
+    except OSError as exc:
+        logger.warning("Could not write session state %s: %s", path, exc)
+        return False
+    logger.info(
+        "[%s] Saved session state (%d cookies, %d origins)",
+        key, len(state.get("cookies", [])), len(state.get("origins", [])),
+    )
+    return True
+
+
+def invalidate(key: str, reason: str = "") -> None:
+    """Delete the saved state for *key* (expired or the scrape failed)."""
+    try:
+        _path(key).unlink()
+    except FileNotFoundError:
+        return
+    except OSError as exc:
+        logger.warning("Could not delete session state for %s: %s", key, exc)
+        return
+    if reason:
+        logger.info("[%s] Session state invalidated — %s", key, reason)
@@ -0,0 +1,113 @@
+"""Tests for the shared static-asset disk cache."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from asset_cache import AssetCache, is_cacheable_asset
+
+JS = "application/javascript"
+
+
+class TestCacheableAssets:
+    """Only content-hashed static files on platform CDNs are cached."""
+
+    @pytest.mark.parametrize("url", [
+        "https://assets2.dutchie.com/embedded-menu/main.3f9a2c1b.js",
+        "https://dutchie.com/_next/static/chunks/pages/_app.js",
+        "https://www.iheartjane.com/static/js/chunk-5f8e2a1d.css",
+        "https://d1abc.cloudfront.net/fonts/inter.a1b2c3d4e5.woff2",
+        "https://curaleaf.com/_next/static/css/8f1e2d3c4b5a6978.css",
+    ])
+    def test_hashed_platform_assets(self, url):
+        assert is_cacheable_asset(url)
+
+    @pytest.mark.parametrize("url", [
+        "https://dutchie.com/embedded-menu/the-grove/specials",      # HTML page
+        "https://dutchie.com/static/main.js",                         # no content hash
+        "https://dutchie.com/static/main.3f9a2c1b.js?v=2",            # query string
+        "https://example-dispensary.com/wp-content/app.3f9a2c1b.js",  # not a platform CDN
+        "https://evil-dutchie.com/main.3f9a2c1b.js",                  # lookalike host
+        "https://dutchie.com.evil.example/main.3f9a2c1b.js",
+        "https://dutchie.com/api/graphql",
+    ])
+    def test_rejected_urls(self, url):
+        assert not is_cacheable_asset(url)
+
+
+class TestAssetCache:
+    """Content-addressed storage, LRU eviction and run statistics."""
+
+    def test_miss_then_hit(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=10_000)
+        url = "https://dutchie.com/main.3f9a2c1b.js"
+        assert cache.get(url) is None
+        cache.put(url, b"console.log(1)", {"Content-Type": JS, "Content-Encoding": "br"})
+        body, headers = cache.get(url)
+        assert body == b"console.log(1)"
+        assert headers == {"Content-Type": JS}  # encoding header dropped
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 50.0
+        assert stats["bytes_saved"] == len(b"console.log(1)")
+
+    def test_index_persists_across_instances(self, tmp_path):
+        url = "https://dutchie.com/main.3f9a2c1b.js"
+        first = AssetCache(tmp_path, max_bytes=10_000)
+        first.put(url, b"body", {"content-type": JS})
+        first.flush()
+        second = AssetCache(tmp_path, max_bytes=10_000)
+        assert second.get(url)[0] == b"body"
+
+    def test_identical_bodies_share_one_blob(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=10_000)
+        cache.put("https://dutchie.com/a.11111111.js", b"same", {})
+        cache.put("https://dutchie.com/b.22222222.js", b"same", {})
+        assert len(list((tmp_path / "blobs").iterdir())) == 1
+        assert cache.stats()["bytes_stored"] == 4
+
+    def test_lru_eviction(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=400)
+        urls = [f"https://dutchie.com/c.{i:08x}.js" for i in range(4)]
+        for i, url in enumerate(urls):
+            cache.put(url, bytes([i]) * 100, {})
+        cache.get(urls[0])  # touch the oldest so it survives
+        cache.put("https://dutchie.com/d.ffffffff.js", b"x" * 100, {})
+        assert cache.get(urls[0]) is not None
+        assert cache.get(urls[1]) is None
+        assert cache.stats()["size_bytes"] <= 400
+
+    def test_replacing_an_entry_keeps_size_exact(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=10_000)
+        url = "https://dutchie.com/main.3f9a2c1b.js"
+        cache.put(url, b"x" * 100, {})
+        cache.put(url, b"y" * 40, {})
+        cache.put("https://dutchie.com/other.3f9a2c1b.js", b"z" * 10, {})
+        assert cache.stats()["size_bytes"] == 50
+        cache.flush()
+        assert AssetCache(tmp_path, max_bytes=10_000).stats()["size_bytes"] == 50
+
+    def test_oversized_body_not_stored(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=400)
+        cache.put("https://dutchie.com/huge.12345678.js", b"x" * 200, {})
+        assert cache.get("https://dutchie.com/huge.12345678.js") is None
+
+    def test_missing_blob_is_a_miss(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=10_000)
+        url = "https://dutchie.com/main.3f9a2c1b.js"
+        cache.put(url, b"body", {})
+        for blob in (tmp_path / "blobs").iterdir():
+            blob.unlink()
+        assert cache.get(url) is None
+
+    def test_reads_from_worker_threads(self, tmp_path):
+        cache = AssetCache(tmp_path, max_bytes=10_000)
+        url = "https://dutchie.com/main.3f9a2c1b.js"
+        cache.put(url, b"body", {})
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(cache.get, [url, "https://dutchie.com/x.12345678.js"] * 200))
+        assert results.count(None) == 200
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (200, 200, 800)
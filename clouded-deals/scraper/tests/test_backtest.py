@@ -0,0 +1,125 @@
+"""Backtesting: site-run grouping, parameter overrides, parallel replay."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import deal_detector as dd
+from backtest import (
+    build_config,
+    group_site_runs,
+    observation_to_product,
+    parse_grid,
+    replay,
+    run_backtest,
+)
+from benchmarks.bench_backtest import make_history
+from deal_detector import run_deal_detection
+
+
+@pytest.fixture(scope="module")
+def site_runs():
+    return group_site_runs(make_history(dispensaries=4, days=3, products=150, seed=7))
+
+
+class TestSiteRuns:
+    """price_history rows become per-store, per-day product lists."""
+
+    def test_grouped_by_store_and_day(self, site_runs):
+        keys = [(disp_id, day) for disp_id, day, _ in site_runs]
+        assert keys == sorted(keys)
+        assert len(keys) == 12
+        assert {len(products) for _, _, products in site_runs} == {150}
+
+    def test_region_and_platform_from_config(self, site_runs):
+        disp_id, _, products = site_runs[0]
+        assert products[0]["region"] == "southern-nv"
+        assert products[0]["source_platform"]
+        assert all(p["dispensary_id"] == disp_id for p in products)
+
+    def test_row_fields(self):
+        product = observation_to_product(
+            {"name": "Kobe Cart", "sale_price": "18.00", "original_price": "30",
+             "weight_value": "", "observed_date": "2026-09-01",
+             "products": {"product_subtype": "cartridge", "is_infused": False}},
+            {"region": "michigan", "platform": "dutchie"},
+        )
+        assert (product["sale_price"], product["current_price"], product["original_price"]) == (18.0, 18.0, 30.0)
+        assert product["weight_value"] is None
+        assert product["product_subtype"] == "cartridge"
+        assert (product["region"], product["source_platform"]) == ("michigan", "dutchie")
+
+
+class TestParameterSets:
+    """Grid parsing and detection configs built from overrides."""
+
+    def test_grid_is_cartesian_with_baseline_first(self):
+        configs = parse_grid(["TARGET_DEAL_COUNT=100,200", "HARD_FILTERS.min_discount_percent=15,20,25"])
+        assert configs[0] == {"name": "baseline", "overrides": {}}
+        assert len(configs) == 7
+        assert configs[1]["overrides"] == {"TARGET_DEAL_COUNT": 100, "HARD_FILTERS.min_discount_percent": 15}
+
+    def test_grid_rejects_bad_spec(self):
+        with pytest.raises(ValueError):
+            parse_grid(["TARGET_DEAL_COUNT"])
+
+    def test_config_built_and_module_untouched(self):
+        caps = dd.CATEGORY_PRICE_CAPS
+        flower = dict(caps["flower"])
+        config = build_config({"TARGET_DEAL_COUNT": 5, "CATEGORY_PRICE_CAPS.flower.3.5": 1,
+                               "CATEGORY_PRICE_CAPS.vape.1": 9, "_BACKFILL_THRESHOLD": 0.5})
+        assert (config.target_deal_count, config.backfill_threshold) == (5, 0.5)
+        assert config.price_caps["flower"]["3.5"] == 1
+        assert config.price_caps["vape"] == {"1": 9}
+        assert config.dynamic_caps == {}
+        assert dd.TARGET_DEAL_COUNT == 300
+        assert dd.CATEGORY_PRICE_CAPS is caps
+        assert caps["flower"] == flower and caps["vape"] == 25
+        assert build_config({}).price_caps is caps
+
+    def test_unknown_parameter(self):
+        with pytest.raises(KeyError):
+            build_config({"NOT_A_PARAMETER": 1})
+        with pytest.raises(KeyError):
+            build_config({"logger": 1})
+        with pytest.raises(KeyError):
+            build_config({"target_deal_count": 1})
+
+
+class TestReplay:
+    """Replays match direct detection and agree across processes."""
+
+    def test_baseline_matches_direct_detection(self, site_runs):
+        stats = replay(site_runs, "baseline", {})
+        direct = [run_deal_detection(products) for _, _, products in site_runs]
+        assert stats.deals == sum(r.selected for r in direct)
+        assert stats.price_cap_rejects == sum(r.price_cap_rejects for r in direct)
+        assert sum(stats.categories.values()) == stats.deals
+        # Replays leave the history untouched for the next configuration.
+        assert replay(site_runs, "again", {}).summary()["deals"] == stats.deals
+
+    def test_override_takes_effect(self, site_runs):
+        stats = replay(site_runs, "small", {"TARGET_DEAL_COUNT": 5})
+        assert 0 < stats.deals <= 5 * len(site_runs)
+        assert dd.TARGET_DEAL_COUNT == 300
+
+    def test_concurrent_configs_do_not_interfere(self, site_runs):
+        configs = [{"TARGET_DEAL_COUNT": 5}, {}, {"MAX_SAME_BRAND_TOTAL": 2}, {}]
+        expected = [replay(site_runs, str(i), o).summary()["deals"] for i, o in enumerate(configs)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            deals = list(pool.map(lambda o: replay(site_runs, "t", o).summary()["deals"], configs))
+        assert deals == expected
+
+    def test_parallel_matches_serial(self, site_runs):
+        configs = parse_grid(["TARGET_DEAL_COUNT=10,300", "MAX_SAME_BRAND_TOTAL=3"])
+        serial = run_backtest(site_runs, configs, workers=1)
+        parallel = run_backtest(site_runs, configs, workers=2)
+        assert [s.summary() for s in parallel] == [s.summary() for s in serial]
+        assert [s.name for s in serial] == [c["name"] for c in configs]
+
+    def test_score_percentiles(self, site_runs):
+        summary = replay(site_runs, "baseline", {}).summary()
+        assert summary["score_p10"] <= summary["score_p50"] <= summary["score_p90"]
+        assert abs(sum(summary["category_mix"].values()) - 1) < 1e-9
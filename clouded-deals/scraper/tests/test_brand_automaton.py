@@ -0,0 +1,103 @@
+"""Tests for brand_automaton.py — the single-pass brand matcher.
+
+The automaton must report exactly what the per-pattern regex scan in
+``clouded_logic`` reports, so most tests compare the two directly.
+"""
+
+from __future__ import annotations
+
+import ast
+from pathlib import Path
+
+import pytest
+
+import clouded_logic
+from brand_automaton import BRAND, VARIATION, BrandAutomaton
+from clouded_logic import BRANDS, _BRAND_AUTOMATON, _scan_brands_regex
+
+
+def _test_corpus() -> list[str]:
+    """Every short string literal in the test suite (product names etc.)."""
+    strings = set()
+    for path in Path(__file__).parent.glob("test_*.py"):
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                if 0 < len(node.value) < 300:
+                    strings.add(node.value)
+    return sorted(strings)
+
+
+class TestMatchesRegexScan:
+    """Hits, positions and match lengths equal the regex reference."""
+
+    def test_identical_on_test_corpus(self):
+        mismatches = [
+            text for text in _test_corpus()
+            if (_BRAND_AUTOMATON.scan(text) or _scan_brands_regex(text)) != _scan_brands_regex(text)
+        ]
+        assert mismatches == []
+
+    @pytest.mark.parametrize("text", [
+        "&Shine Pre-Roll 1g",               # non-word first char, at start
+        "Best of &Shine 1g",                # …after whitespace (match starts there)
+        "Dazed!Gummies 100mg",              # trailing \b after "!" needs a word char
+        "Dazed! Gummies 100mg",             # …so this one does not match
+        "GRÖN Chocolate Bar",               # non-ASCII brand key
+        "stiizy pod / STIIIZY pod",         # variation and brand in one text
+        "Hazel Nut Flower",                 # no match inside a longer word
+        "Wedding Cake_Cake",                # "_" is a word character
+    ])
+    def test_edge_cases(self, text):
+        assert _BRAND_AUTOMATON.scan(text) == _scan_brands_regex(text)
+
+    @pytest.mark.parametrize("text", ["İndica Haze", "ſtiiizy pod", "\u212aIVA Bar"])
+    def test_special_case_folds_fall_back(self, text):
+        assert _BRAND_AUTOMATON.scan(text) is None
+
+
+class TestBrandAutomaton:
+    """Standalone behaviour of the trie."""
+
+    def test_first_match_only_in_insertion_order(self):
+        automaton = BrandAutomaton()
+        automaton.add("Kiva", "Kiva")
+        automaton.add("kiva lost farm", "Kiva Lost Farm", VARIATION)
+        hits = automaton.scan("kiva lost farm by KIVA")
+        assert hits == [((BRAND, 0), "Kiva", 0, 4), ((VARIATION, 0), "Kiva Lost Farm", 0, 14)]
+
+    def test_incremental_add(self):
+        automaton = BrandAutomaton()
+        automaton.add("Rove", "Rove")
+        assert automaton.scan("Zorbo Gummies") == []
+        automaton.add("Zorbo", "Zorbo")
+        assert automaton.scan("Zorbo Gummies") == [((BRAND, 1), "Zorbo", 0, 5)]
+
+
+class TestLoadApprovedBrandsUpdatesAutomaton:
+    """Approved brands are matched without rebuilding anything."""
+
+    def test_new_brand_detected(self, monkeypatch):
+        class _Result:
+            data = [{"name": "Zorbo Farms", "canonical_name": None}]
+
+        class _Query:
+            def __getattr__(self, name):
+                return lambda *a, **k: self
+
+            def execute(self):
+                return _Result()
+
+        class _DB:
+            def table(self, name):
+                return _Query()
+
+        monkeypatch.setattr(clouded_logic, "BRANDS", list(BRANDS))
+        monkeypatch.setattr(clouded_logic, "BRANDS_LOWER", dict(clouded_logic.BRANDS_LOWER))
+        monkeypatch.setattr(clouded_logic, "_BRAND_PATTERNS", dict(clouded_logic._BRAND_PATTERNS))
+        automaton = BrandAutomaton()
+        for brand in BRANDS:
+            automaton.add(brand, brand)
+        monkeypatch.setattr(clouded_logic, "_BRAND_AUTOMATON", automaton)
+
+        assert clouded_logic.load_approved_brands(_DB()) == 1
+        assert clouded_logic.CloudedLogic().detect_brand("Zorbo Farms Blue Dream 3.5g") == "Zorbo Farms"
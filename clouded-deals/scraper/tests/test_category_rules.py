@@ -0,0 +1,106 @@
+"""Compiled category / classification rules: decisions and pattern merging."""
+
+from __future__ import annotations
+
+import re
+
+import pytest
+
+import product_classifier
+from benchmarks.bench_category_rules import fixture_texts
+from clouded_logic import CloudedLogic
+from product_classifier import _any_of, classify_product
+
+
+_CATEGORIES = {"flower", "preroll", "vape", "concentrate", "edible", "other", "skip"}
+
+_NO_CHANGE = {"is_infused": False, "product_subtype": None, "corrected_category": None}
+
+
+class TestDetectCategoryRules:
+    """detect_category walks its rules in order; each text hits one."""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("", "other"),
+        ("RAW Cones 1 1/4 6 pack", "skip"),
+        ("Elements Cones King Size", "skip"),
+        ("THC Infused Cones 3pk", "other"),  # infused cones are not accessories
+        ("Medizin Cream 3:1 (125mg)", "skip"),
+        ("Cannabis Seltzer 10mg", "edible"),
+        ("Blue Dream Pre-Roll 1g", "preroll"),
+        ("Blue Dream 10 PRs", "preroll"),
+        ("Jeeter 2.5g/5pk", "preroll"),
+        ("Live Resin Badder 1g", "concentrate"),
+        ("Badder", "concentrate"),
+        ("Live Resin Cart 0.5g", "vape"),
+        ("Aspen OG 3.5g", "flower"),  # "pen" inside "Aspen" is not a vape
+        ("Gelato 28g", "flower"),
+        ("STIIIZY Pod 1g", "vape"),
+        ("All In One 0.5g", "vape"),
+        ("Disposable Pen 0.3g", "vape"),
+        ("Indica Flower", "flower"),
+        ("Smalls Eighth", "flower"),
+        ("Wyld Gummies 100mg", "edible"),
+        ("Chocolate Bar", "edible"),
+        ("Thin Mint 100mg", "edible"),
+        ("Thin Mint", "other"),  # short edible words need a mg weight
+        ("Mystery 100mg", "edible"),
+        ("Mystery 0.5g", "concentrate"),
+        ("Mystery Product", "other"),
+    ])
+    def test_rule_order(self, text, expected):
+        assert CloudedLogic().detect_category(text) == expected
+
+    def test_every_fixture_text_classified(self):
+        logic = CloudedLogic()
+        assert {logic.detect_category(t) for t in fixture_texts()} <= _CATEGORIES
+
+
+class TestClassifyProductRules:
+    """classify_product infused, pack, subtype and correction rules."""
+
+    @pytest.mark.parametrize("case,expected", [
+        (("Ice Cream Cake Pre-Roll 1g", None, "preroll", 1.0), {}),
+        (("Hash Infused Pre-Roll 1g", "Jeeter", "concentrate", 1.0),
+         {"is_infused": True, "product_subtype": "infused_preroll", "corrected_category": "preroll"}),
+        (("Baby Jeeter Churros 5pk", "Jeeter", "preroll", 2.5), {"product_subtype": "preroll_pack"}),
+        (("Blue Dream 5 Pack", "Dogwalkers", "flower", 3.5),
+         {"product_subtype": "preroll_pack", "corrected_category": "preroll"}),
+        (("Dogwalkers Mini Dogs", "dogwalkers", "preroll", None), {"product_subtype": "preroll_pack"}),
+        (("Sour Diesel 1g", "Stiiizy", "flower", 1.0), {"corrected_category": "preroll"}),
+        (("Sour Diesel 3.5g", "Stiiizy", "flower", 3.5), {}),
+        (("OG Kush All-In-One 0.5g", "Select", "vape", 0.5), {"product_subtype": "disposable"}),
+        (("OG Kush Cartridge 1g", "Select", "vape", 1.0), {"product_subtype": "cartridge"}),
+        (("Blue Dream Pod 1g", "Stiiizy", "vape", 1.0), {"product_subtype": "pod"}),
+        (("Live Resin Badder 1g", "Cannabiotix", "concentrate", 1.0), {"product_subtype": "live_resin"}),
+        (("Cured Resin Sugar 1g", None, "concentrate", 1.0), {"product_subtype": "cured_resin"}),
+        (("Diamonds 1g", None, "concentrate", 1.0), {"product_subtype": "diamonds"}),
+        (("Watermelon Gummies 100mg", "Wyld", "edible", 100), {"product_subtype": "gummy"}),
+        (("Sour Apple Gummies 10pk", "Wyld", "edible", 100), {"product_subtype": "gummy"}),
+        (("Dark Chocolate Bar 100mg", "Kiva", "edible", 100), {"product_subtype": "chocolate"}),
+        (("Sour Diesel Disposable 0.3g", None, "flower", 0.3),
+         {"product_subtype": "disposable", "corrected_category": "vape"}),
+        (("3 for $50 Trendi Cartridges", None, "flower", None),
+         {"product_subtype": "cartridge", "corrected_category": "vape"}),
+        (("RAW Cones 1 1/4 6 pack", "RAW", "other", None), {}),
+    ])
+    def test_decisions(self, case, expected, monkeypatch):
+        monkeypatch.setattr(product_classifier.logger, "disabled", True)
+        assert classify_product(*case) == {**_NO_CHANGE, **expected}
+
+
+class TestAnyOf:
+    """Combined patterns keep per-pattern flags and alternation."""
+
+    def test_case_sensitivity_preserved(self):
+        combined = _any_of([re.compile(r"\bINFSD\b"), re.compile(r"\bcoated\b", re.IGNORECASE)])
+        assert combined.search("COATED") and combined.search("INFSD")
+        assert not combined.search("infsd")
+
+    def test_alternation_not_factored(self):
+        combined = _any_of([re.compile(r"\bpod|vape"), re.compile(r"\bcart\b")])
+        assert combined.search("xvape") and not combined.search("xpod")
+
+    def test_rejects_other_flags(self):
+        with pytest.raises(ValueError):
+            _any_of([re.compile("a", re.MULTILINE)])
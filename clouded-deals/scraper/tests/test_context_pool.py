@@ -0,0 +1,153 @@
+"""Tests for platforms/context_pool.py — pre-warmed context reuse.
+
+Uses fake browser contexts so the pool's checkout / reset / destroy
+rules can be exercised without Playwright.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+# Same permissive playwright mock as test_pagination.py — only installed
+# when the real package is missing.
+class _PermissiveMock(ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return MagicMock
+
+
+if "playwright" not in sys.modules:
+    _pw = _PermissiveMock("playwright")
+    _pw_async = _PermissiveMock("playwright.async_api")
+    _pw_async.TimeoutError = type("PlaywrightTimeout", (Exception,), {})
+    _pw.async_api = _pw_async
+    sys.modules["playwright"] = _pw
+    sys.modules["playwright.async_api"] = _pw_async
+
+if "playwright_stealth" not in sys.modules:
+    _stealth = _PermissiveMock("playwright_stealth")
+    _stealth.stealth_async = AsyncMock()
+    sys.modules["playwright_stealth"] = _stealth
+
+from platforms.context_pool import ContextPool  # noqa: E402
+
+
+class _FakeContext:
+    def __init__(self, fp: dict):
+        self.fp = fp
+        self.closed = False
+        self.pages: list = []
+        self.cookies = [{"name": "agc"}]
+        self.stuck_cookies = False
+
+    async def clear_cookies(self) -> None:
+        if not self.stuck_cookies:
+            self.cookies = []
+
+    async def storage_state(self) -> dict:
+        return {"cookies": self.cookies, "origins": []}
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def _factory(browser, fp):
+    await asyncio.sleep(0)
+    return _FakeContext(fp)
+
+
+def _run(coro_fn):
+    return asyncio.run(coro_fn())
+
+
+class TestContextPool:
+    """Warm hand-outs, reuse limits and contamination handling."""
+
+    def test_prewarmed_context_is_handed_out(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=2, max_uses=3)
+            pool.prewarm(["southern-nv", "southern-nv"])
+            await asyncio.sleep(0.01)
+            context, fp = await pool.acquire("southern-nv")
+            await pool.close()
+            return pool.stats(), fp
+
+        stats, fp = _run(go)
+        assert stats["warm_hits"] == 1 and stats["cold_misses"] == 0
+        assert fp["timezone_id"] == "America/Los_Angeles"
+
+    def test_cold_acquire_creates_on_demand(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=0)
+            context, _ = await pool.acquire("arizona")
+            await pool.close()
+            return pool.stats(), context
+
+        stats, context = _run(go)
+        assert stats["cold_misses"] == 1
+        assert context.closed  # close() reclaims checked-out contexts
+
+    def test_clean_context_is_reused_after_reset(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=1, max_uses=3)
+            first, _ = await pool.acquire("colorado")
+            await pool.release(first)
+            second, _ = await pool.acquire("colorado")
+            return first, second, pool.stats()
+
+        first, second, stats = _run(go)
+        assert second is first
+        assert not first.closed and first.cookies == []
+        assert stats["reused"] == 1
+
+    def test_destroyed_after_max_uses(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=1, max_uses=2)
+            context, _ = await pool.acquire("colorado")
+            await pool.release(context)
+            again, _ = await pool.acquire("colorado")
+            await pool.release(again)
+            return context
+
+        context = _run(go)
+        assert context.closed
+
+    def test_contaminated_context_destroyed(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=1, max_uses=5)
+            context, _ = await pool.acquire("missouri")
+            await pool.release(context, contaminated=True)
+            replacement, _ = await pool.acquire("missouri")
+            return context, replacement
+
+        context, replacement = _run(go)
+        assert context.closed
+        assert replacement is not context
+
+    def test_failed_reset_destroys_context(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=1, max_uses=5)
+            context, _ = await pool.acquire("illinois")
+            context.stuck_cookies = True
+            await pool.release(context)
+            return context
+
+        assert _run(go).closed
+
+    def test_single_use_context_not_returned(self):
+        async def go():
+            pool = ContextPool(object(), _factory, warm=1, max_uses=5)
+            context, _ = await pool.acquire("illinois")
+            pool.mark_single_use(context)
+            await pool.release(context)
+            return context
+
+        assert _run(go).closed
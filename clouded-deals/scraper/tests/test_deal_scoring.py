@@ -0,0 +1,135 @@
+"""Columnar hard filters and scoring: per-product and batch decisions."""
+
+from __future__ import annotations
+
+import pytest
+
+import deal_detector
+from benchmarks.bench_deal_scoring import columnar_batch, make_products
+from deal_detector import (
+    DetectionConfig,
+    PriceCapTable,
+    ProductColumns,
+    calculate_deal_score,
+    detect_deals,
+    failed_by_price_cap,
+    hard_filter_indices,
+    passes_hard_filters,
+)
+
+
+def _product(name, category, sale, original, weight=None, **extra):
+    discount = round((1 - sale / original) * 100) if original else None
+    return {
+        "name": name, "brand": "Rove", "category": category, "sale_price": sale,
+        "original_price": original, "discount_percent": discount,
+        "weight_value": weight, "dispensary_id": "d1", **extra,
+    }
+
+
+# (product, passes hard filters, failed by price cap, deal score)
+_CASES = [
+    (_product("Blue Dream 3.5g", "flower", 15, 30, 3.5), True, False, 90),
+    (_product("Blue Dream 3.5g", "flower", 25, 40, 3.5), False, True, 60),  # over the $22 eighth cap
+    (_product("OG 7g", "flower", 35, 50, 7), True, False, 60),
+    (_product("Cart 1g", "vape", 20, 35, 1.0, product_subtype="cartridge"), True, False, 72),
+    (_product("Disposable 1g", "vape", 10, 30, 1.0, product_subtype="disposable"), False, False, 100),
+    (_product("Gummies 100mg", "edible", 12, 20, 100), True, False, 68),
+    (_product("Gummies 100mg", "edible", 13, 14.5, 100), False, False, 32),  # 10% off
+    (_product("Badder 1g", "concentrate", 20, 40, 1.0), True, False, 80),
+    (_product("Badder 1g", "concentrate", 30, 45, 1.0), False, True, 56),
+    (_product("Preroll 1g", "preroll", 6, 10, 1.0), True, False, 80),
+    (_product("No original", "flower", 15, None, 3.5), False, False, 49),
+    (_product("Too cheap", "flower", 2, 10, 3.5), False, False, 78),
+    (_product("Fake discount", "flower", 5, 100, 3.5), False, False, 100),
+    (_product("Preroll over ceiling", "preroll", 8, 40, 1.0), False, False, 92),
+    (_product("Logo Hoodie", "other", 15, 30), False, False, 68),
+    (_product("Eighth", "flower", 17, 25, 3.5, region="michigan"), False, True, 61),
+]
+
+_CASE_PRODUCTS = [case[0] for case in _CASES]
+
+
+def _numeric(products):
+    return [p for p in products if not isinstance(p["weight_value"], str)]
+
+
+@pytest.fixture(scope="module")
+def products():
+    return make_products(4000, seed=11)
+
+
+def _fake_dynamic_cap(category, weight_value, region, dynamic_caps=None):
+    if region and region.startswith("michigan") and category == "flower" and weight_value:
+        return 18.0
+    return None
+
+
+class TestSingleProduct:
+    """The public one-product functions over the columnar code."""
+
+    @pytest.mark.parametrize("product,passes,capped,score", _CASES)
+    def test_decisions(self, product, passes, capped, score):
+        assert passes_hard_filters(product) is passes
+        assert failed_by_price_cap(product) is capped
+        assert calculate_deal_score(product) == score
+
+    def test_explicit_region_overrides_product_region(self):
+        product = {
+            "name": "Blue Dream 3.5g", "sale_price": 20, "original_price": 30,
+            "discount_percent": 33, "category": "flower", "weight_value": 3.5,
+            "region": "new-jersey",
+        }
+        assert passes_hard_filters(product)
+        assert not passes_hard_filters(product, region="michigan")
+        assert hard_filter_indices(ProductColumns([product], region="michigan")) == []
+
+
+class TestBatch:
+    """One batch call returns what the per-product calls do."""
+
+    def test_batch_decisions(self):
+        assert columnar_batch(_CASE_PRODUCTS) == (
+            [0, 2, 3, 5, 7, 9], [1, 8, 15], [90, 60, 72, 68, 80, 80],
+        )
+
+    def test_batch_matches_single_product_calls(self, products):
+        batch = _numeric(products)
+        passed, failed, scores = columnar_batch(batch)
+        assert passed == [i for i, p in enumerate(batch) if passes_hard_filters(p)]
+        assert failed == [
+            i for i, p in enumerate(batch)
+            if i not in set(passed) and failed_by_price_cap(p)
+        ]
+        assert scores == [calculate_deal_score(batch[i]) for i in passed]
+
+    def test_dynamic_caps(self, monkeypatch):
+        monkeypatch.setattr(deal_detector, "_get_dynamic_cap", _fake_dynamic_cap)
+        # An $18 Michigan eighth cap lets the $17 eighth through.
+        assert columnar_batch(_CASE_PRODUCTS) == (
+            [0, 2, 3, 5, 7, 9, 15], [1, 8], [90, 60, 72, 68, 80, 80, 61],
+        )
+
+    def test_caps_resolved_once_per_key(self, products, monkeypatch):
+        calls = []
+        resolve = deal_detector._resolve_price_cap
+        monkeypatch.setattr(
+            deal_detector, "_resolve_price_cap",
+            lambda *key: calls.append(key) or resolve(*key),
+        )
+        batch = _numeric(products)
+        hard_filter_indices(ProductColumns(batch), PriceCapTable(DetectionConfig()))
+        assert calls
+        assert len(calls) == len(set(calls))
+
+    def test_detect_deals_does_not_copy_rejects(self):
+        keep = {
+            "name": "Blue Dream 3.5g", "brand": "Rove", "sale_price": 15,
+            "original_price": 30, "discount_percent": 50, "category": "flower",
+            "weight_value": 3.5, "dispensary_id": "d1",
+        }
+        reject = dict(keep, name="Logo Hoodie")
+        deals = detect_deals([keep, reject])
+        assert [d["name"] for d in deals] == ["Blue Dream 3.5g"]
+        assert deals[0]["deal_score"] == calculate_deal_score(keep)
+        assert "deal_score" not in keep
@@ -0,0 +1,143 @@
+"""Fused dedup and the MinHash/LSH near-duplicate layer."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from benchmarks.bench_dedup import make_listings
+from deal_detector import (
+    _normalize_dedup_name,
+    dedup_deals,
+    remove_cross_chain_duplicates,
+    remove_global_name_duplicates,
+    remove_similar_deals,
+)
+from near_duplicates import NearDuplicateIndex, jaccard, shingles
+
+
+def _ids(deals):
+    return [id(d) for d in deals]
+
+
+def _three_passes(deals):
+    return remove_global_name_duplicates(remove_cross_chain_duplicates(remove_similar_deals(deals)))
+
+
+def _listing(name, dispensary, score, brand="Rove", category="vape"):
+    return {"name": name, "brand": brand, "category": category, "weight_value": 1.0,
+            "sale_price": 20.0, "dispensary_id": dispensary, "deal_score": score}
+
+
+class TestFusedDedup:
+    """One pass returns what the three passes do, in the same order."""
+
+    def test_each_policy(self):
+        deals = [
+            _listing("Kobe Cart", "planet-13", 70),
+            _listing("Gelato Cart", "planet-13", 60),
+            _listing("Runtz Cart", "planet-13", 50),
+            _listing("Zkittlez Cart", "planet-13", 40),  # 4th Rove vape at one store
+            _listing("Kobe Cart", "curaleaf-western", 65),  # same chain, lower score
+            _listing("Kobe Cart", "curaleaf-strip", 80),
+            _listing("Rove Kobe Cartridge", "td-gibson", 55),  # normalizes to "kobe"
+            _listing("Raspberry Gummies", "planet-13", 50, brand="Wyld", category="edible"),
+        ]
+        result, removed = dedup_deals(deals, near_duplicates=False)
+        # The Kobe winner sits where the first Kobe listing was.
+        assert [(d["name"], d["dispensary_id"]) for d in result] == [
+            ("Kobe Cart", "curaleaf-strip"),
+            ("Gelato Cart", "planet-13"),
+            ("Runtz Cart", "planet-13"),
+            ("Raspberry Gummies", "planet-13"),
+        ]
+        assert removed == {"similar": 1, "chain": 1, "global": 2, "near": 0}
+
+    @pytest.mark.parametrize("n,seed", [(0, 1), (1, 2), (300, 3), (5000, 4)])
+    def test_matches_three_passes(self, n, seed):
+        deals = make_listings(n, seed)
+        assert _ids(dedup_deals(deals, near_duplicates=False)[0]) == _ids(_three_passes(deals))
+
+    def test_unsorted_input_and_score_ties(self):
+        rng = random.Random(5)
+        deals = make_listings(3000, 5, products=200, dispensaries=6)
+        rng.shuffle(deals)
+        for deal in deals:
+            deal["deal_score"] = rng.randrange(40, 44)
+            if rng.random() < 0.1:
+                deal["brand"] = None
+            if rng.random() < 0.05:
+                deal["dispensary_id"] = None
+        assert _ids(dedup_deals(deals, near_duplicates=False)[0]) == _ids(_three_passes(deals))
+
+    def test_removed_counts(self):
+        deals = make_listings(2000, 6)
+        similar = remove_similar_deals(deals)
+        chain = remove_cross_chain_duplicates(similar)
+        result = remove_global_name_duplicates(chain)
+        _, removed = dedup_deals(deals, near_duplicates=False)
+        assert removed == {
+            "similar": len(deals) - len(similar),
+            "chain": len(similar) - len(chain),
+            "global": len(chain) - len(result),
+            "near": 0,
+        }
+
+    @pytest.mark.parametrize("name,brand,expected", [
+        ("CSF Cartridge Kobe Circle S Farms Indica-Hybrid", "circle s farms", "csf kobe"),
+        (".5g | Gelato", "", "gelato"),
+        ("3.5 g |Runtz", "", "runtz"),
+        ("", "", ""),
+        ("  Pre-Roll  Tahoe OG  ", "", "tahoe og"),
+        ("Wyld (Gummies) Raspberry", "wyld", "raspberry"),
+        ("Blue Dream Sativa 3.5g", "brand 3", "blue dream 35g"),
+        ("C++ Kush", "c++", "c kush"),  # no \b after "+", so the brand stays
+    ])
+    def test_normalization(self, name, brand, expected):
+        assert _normalize_dedup_name(name, brand) == expected
+
+
+class TestNearDuplicates:
+    """Optional layer after the exact passes."""
+
+    def _deal(self, name, score, weight=1.0, dispensary="oasis"):
+        return {"name": name, "brand": "CSF", "category": "vape", "weight_value": weight,
+                "sale_price": 20.0, "dispensary_id": dispensary, "deal_score": score}
+
+    def test_off_by_default(self):
+        deals = [self._deal("Kobe 1g Cart", 70), self._deal("CSF Kobe Cartridge", 60, dispensary="td-gibson")]
+        assert len(dedup_deals(deals)[0]) == 2
+
+    def test_keeps_best_of_near_duplicates(self):
+        deals = [
+            self._deal("CSF Kobe Cartridge", 60, dispensary="td-gibson"),
+            self._deal("Kobe 1g Cart", 70),
+            self._deal("Kobe 0.5g Cart", 65, weight=0.5),
+            self._deal("Gelato Cart", 50),
+        ]
+        result, removed = dedup_deals(deals, near_duplicates=True)
+        assert [d["name"] for d in result] == ["Kobe 1g Cart", "Kobe 0.5g Cart", "Gelato Cart"]
+        assert removed["near"] == 1
+
+    def test_similarity(self):
+        assert shingles("kobe 1g") == shingles("kobe")
+        assert shingles("live resin blue dream") == shingles("blue dream live resin")
+        assert jaccard(shingles("wedding cake"), shingles("wedding pie")) < 0.8
+
+    def test_lsh_block_finds_reordered_names(self):
+        rng = random.Random(8)
+        names = [
+            " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)) for _ in range(3))
+            for _ in range(200)
+        ]
+        exact = NearDuplicateIndex(exact_limit=10**6)
+        hashed = NearDuplicateIndex(exact_limit=4)
+        for i, name in enumerate(names):
+            assert exact.add("b", name, i) is None
+            assert hashed.add("b", name, i) is None
+        for i, name in enumerate(names):
+            reordered = " ".join(reversed(name.split()))
+            assert hashed.add("b", reordered, -1) == exact.add("b", reordered, -1) == i
+        # Only band collisions were compared, not the whole block.
+        assert hashed.comparisons < exact.comparisons / 10
@@ -0,0 +1,143 @@
+"""run_deal_detection: typed result, explicit config, no module state."""
+
+from __future__ import annotations
+
+import copy
+import pickle
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import deal_detector as dd
+from benchmarks.bench_deal_scoring import make_products
+from deal_detector import (
+    DetectionConfig,
+    DetectionResult,
+    detect_deals,
+    get_last_report_data,
+    run_deal_detection,
+)
+
+
+def _summary(deals):
+    return [(d["name"], d.get("sale_price"), d.get("deal_score")) for d in deals]
+
+
+@pytest.fixture(scope="module")
+def products():
+    # Detection takes parsed products: weights are numbers by now.
+    return [p for p in make_products(3000, 31) if not isinstance(p["weight_value"], str)]
+
+
+class TestRunDealDetection:
+    """Same deals and report as the legacy entry point."""
+
+    def test_matches_detect_deals(self, products):
+        legacy = detect_deals(copy.deepcopy(products))
+        report = get_last_report_data()
+        result = run_deal_detection(copy.deepcopy(products))
+        assert isinstance(result, DetectionResult)
+        assert _summary(result.top_deals) == _summary(legacy)
+        data = result.report_data()
+        assert data.keys() == report.keys()
+        for key in ("total_products", "passed_hard_filter", "scored", "selected",
+                    "guaranteed", "price_cap_rejects"):
+            assert data[key] == report[key]
+        assert _summary(data["cut_deals"]) == _summary(report["cut_deals"])
+        assert result.selected == len(legacy)
+
+    def test_candidates_are_selected_plus_cut(self, products):
+        result = run_deal_detection(copy.deepcopy(products))
+        selected = [d for d in result.top_deals if not d.get("_guaranteed")]
+        ids = {id(d) for d in result.candidates}
+        assert {id(d) for d in selected} <= ids
+        assert {id(d) for d in result.cut_deals} <= ids
+        assert len(result.candidates) == result.scored
+        assert result.report_data()["candidates"] is result.candidates
+        scores = [d["deal_score"] for d in result.candidates]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_leaves_module_report_alone(self, products):
+        detect_deals(copy.deepcopy(products[:200]))
+        before = get_last_report_data()
+        run_deal_detection(copy.deepcopy(products))
+        assert get_last_report_data() is before
+
+    def test_concurrent_runs_agree(self, products):
+        config = DetectionConfig()
+        expected = _summary(run_deal_detection(copy.deepcopy(products), config).top_deals)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            runs = list(pool.map(
+                lambda _: _summary(run_deal_detection(copy.deepcopy(products), config).top_deals),
+                range(8),
+            ))
+        assert runs == [expected] * 8
+
+    def test_inputs_left_unchanged(self, products, make_product):
+        one_gram = make_product(name="Blue Dream 1g", category="flower", weight_value=1.0)
+        batch = copy.deepcopy(products[:300]) + [one_gram]
+        before = copy.deepcopy(batch)
+        result = run_deal_detection(batch)
+        assert batch == before
+        assert one_gram["category"] == "flower"
+        assert {d["category"] for d in result.top_deals if d["name"] == "Blue Dream 1g"} <= {"preroll"}
+        assert dd.correct_preroll_categories([one_gram])[0]["category"] == "preroll"
+
+
+class TestDetectionConfig:
+    """Tables and tunables come from the config, not the module globals."""
+
+    def test_snapshot_ignores_later_dynamic_caps(self, monkeypatch):
+        monkeypatch.setattr(dd, "_dynamic_caps", {})
+        config = DetectionConfig()
+        dd._dynamic_caps[("flower", "3.5", "southern-nv")] = 1.0
+        assert config.dynamic_caps == {}
+
+    def test_price_caps_applied(self, make_product):
+        product = make_product(category="vape", weight_value=1.0, sale_price=20.0,
+                               original_price=40.0, discount_percent=50)
+        assert dd.PriceCapTable(DetectionConfig()).cap("vape", 1.0, None) > 20.0
+        strict = DetectionConfig(price_caps={**dd.CATEGORY_PRICE_CAPS, "vape": 10.0})
+        assert dd.PriceCapTable(strict).cap("vape", 1.0, None) == 10.0
+        assert run_deal_detection([dict(product)]).passed_hard_filter == 1
+        result = run_deal_detection([dict(product)], strict)
+        assert (result.passed_hard_filter, result.price_cap_rejects) == (0, 1)
+
+    def test_hard_filter_tunables(self, products):
+        closed = DetectionConfig(hard_filters={**dd.HARD_FILTERS, "max_price_absolute": 1})
+        assert run_deal_detection(products, closed).passed_hard_filter == 0
+        assert run_deal_detection(products).passed_hard_filter > 0
+
+    def test_selection_tunables(self, products):
+        assert run_deal_detection(products).selected > 5
+        assert run_deal_detection(products, DetectionConfig(target_deal_count=5)).selected <= 5
+        tight = DetectionConfig(max_same_brand_total=1, backfill_brand_total=1)
+
+        def most_per_brand(config=None):
+            return max(Counter(d["brand"] for d in run_deal_detection(products, config).top_deals).values())
+
+        assert most_per_brand(tight) < most_per_brand()
+
+    def test_defaults_follow_module_constants(self, monkeypatch):
+        monkeypatch.setattr(dd, "TARGET_DEAL_COUNT", 12)
+        assert DetectionConfig().target_deal_count == 12
+        assert DetectionConfig(target_deal_count=40).target_deal_count == 40
+
+    def test_unknown_tunable_rejected(self):
+        with pytest.raises(TypeError, match="TARGET_DEAL_COUNT"):
+            DetectionConfig(TARGET_DEAL_COUNT=5)
+
+    def test_brand_tiers(self):
+        tiers = {"premium": {"brands": {"nobody"}, "points": 20}}
+        cols = dd.ProductColumns([{"brand": "Nobody"}, {"brand": "Cookies"}])
+        default = dd.deal_scores(cols, [0, 1])
+        custom = dd.deal_scores(cols, [0, 1], DetectionConfig(brand_tiers=tiers))
+        assert custom[0] > default[0]
+        assert custom[1] < default[1]
+
+    def test_pickles(self):
+        config = DetectionConfig(dynamic_caps={("flower", "3.5", "southern-nv"): 30.0})
+        clone = pickle.loads(pickle.dumps(config))
+        assert clone.dynamic_caps == config.dynamic_caps
+        assert clone.brand_tiers == config.brand_tiers
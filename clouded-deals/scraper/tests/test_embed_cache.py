@@ -0,0 +1,103 @@
+"""Tests for the learned embed-URL cache (direct iframe navigation)."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import embed_cache
+
+HOST = "https://thegrovenv.com/lasvegas/"
+EMBED = "https://dutchie.com/embedded-menu/the-grove-las-vegas/specials"
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embed_cache, "EMBED_CACHE_PATH", tmp_path / "embed_urls.json")
+    embed_cache.reset()
+    yield
+    embed_cache.reset()
+
+
+class TestCacheableUrls:
+    """Only real menu embeds on a different host are worth remembering."""
+
+    def test_dutchie_embed_is_cacheable(self):
+        assert embed_cache.is_cacheable_embed_url(EMBED, HOST)
+
+    def test_jane_embed_is_cacheable(self):
+        url = "https://www.iheartjane.com/embed/stores/1234/menu"
+        assert embed_cache.is_cacheable_embed_url(url, HOST)
+
+    @pytest.mark.parametrize("url", [None, "", "about:blank", "javascript:void(0)"])
+    def test_blank_urls_rejected(self, url):
+        assert not embed_cache.is_cacheable_embed_url(url, HOST)
+
+    def test_tracking_iframe_rejected(self):
+        assert not embed_cache.is_cacheable_embed_url("https://doubleclick.net/pixel", HOST)
+
+    def test_same_host_rejected(self):
+        host = "https://dutchie.com/dispensary/foo"
+        assert not embed_cache.is_cacheable_embed_url("https://www.dutchie.com/embedded-menu/foo", host)
+
+
+class TestStoreVerification:
+    """The embed must still render the same store after navigation."""
+
+    def test_store_key_extraction(self):
+        assert embed_cache.embed_store_key(EMBED) == "the-grove-las-vegas"
+        assert embed_cache.embed_store_key(
+            "https://iheartjane.com/embed/stores/1234/menu") == "1234"
+        assert embed_cache.embed_store_key("https://goshango.com/menu") is None
+
+    def test_same_store_verifies(self):
+        assert embed_cache.verify_embed_page(
+            EMBED, "https://dutchie.com/embedded-menu/the-grove-las-vegas/products?page=1")
+
+    def test_redirect_to_other_store_fails(self):
+        assert not embed_cache.verify_embed_page(
+            EMBED, "https://dutchie.com/embedded-menu/the-grove-pahrump/specials")
+
+    def test_redirect_to_other_host_fails(self):
+        assert not embed_cache.verify_embed_page(EMBED, "https://thegrovenv.com/")
+
+    def test_missing_url_fails(self):
+        assert not embed_cache.verify_embed_page(EMBED, None)
+
+
+class TestPersistence:
+    """Record → lookup → invalidate round trip through the JSON file."""
+
+    def test_round_trip_survives_reload(self):
+        assert embed_cache.record_embed_url("the-grove", HOST, EMBED)
+        embed_cache.reset()
+        assert embed_cache.get_embed_url("the-grove", HOST) == EMBED
+
+    def test_unknown_slug_returns_none(self):
+        assert embed_cache.get_embed_url("nowhere", HOST) is None
+
+    def test_host_url_change_drops_entry(self):
+        embed_cache.record_embed_url("the-grove", HOST, EMBED)
+        assert embed_cache.get_embed_url("the-grove", "https://new-site.com/menu") is None
+        assert embed_cache.get_embed_url("the-grove", HOST) is None
+
+    def test_ttl_expiry(self, monkeypatch):
+        embed_cache.record_embed_url("the-grove", HOST, EMBED)
+        future = time.time() + (embed_cache.EMBED_CACHE_TTL_DAYS + 1) * 86400
+        monkeypatch.setattr(embed_cache.time, "time", lambda: future)
+        assert embed_cache.get_embed_url("the-grove", HOST) is None
+
+    def test_invalidate_removes_entry(self):
+        embed_cache.record_embed_url("the-grove", HOST, EMBED)
+        embed_cache.invalidate("the-grove", "test")
+        embed_cache.reset()
+        assert embed_cache.get_embed_url("the-grove", HOST) is None
+
+    def test_uncacheable_url_not_recorded(self):
+        assert not embed_cache.record_embed_url("the-grove", HOST, "about:blank")
+        assert embed_cache.get_embed_url("the-grove", HOST) is None
+
+    def test_corrupt_file_is_ignored(self):
+        embed_cache.EMBED_CACHE_PATH.write_text("{not json")
+        assert embed_cache.get_embed_url("the-grove", HOST) is None
@@ -0,0 +1,53 @@
+"""Tests for fuzzy_index.py — exact candidate pruning for fuzzy matching."""
+
+from __future__ import annotations
+
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from benchmarks.bench_fuzzy_brand import linear_fuzzy_brand_match, make_queries
+from clouded_logic import fuzzy_brand_match
+from fuzzy_index import FuzzyIndex
+
+
+class TestFuzzyIndex:
+    """The index never drops a key whose ratio reaches the threshold."""
+
+    @pytest.mark.parametrize("threshold", [0.6, 0.7, 0.8, 0.85, 0.95])
+    def test_no_false_negatives(self, threshold):
+        rng = random.Random(threshold)
+        alphabet = "abcde "
+        keys = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))) for _ in range(200)]
+        index = FuzzyIndex(keys)
+        for _ in range(100):
+            query = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+            expected = [k for k in keys if SequenceMatcher(None, query, k).ratio() >= threshold]
+            got = [k for k, _, _ in index.candidates(query, threshold)]
+            assert [k for k in got if k in expected] == expected
+
+    def test_bound_is_an_upper_limit(self):
+        index = FuzzyIndex(["stiiizy", "stizy", "kiva", "cannabiotix"])
+        for key, _, bound in index.candidates("stiizy", 0.5):
+            assert SequenceMatcher(None, "stiizy", key).ratio() <= bound
+
+    def test_length_filter_and_payload(self):
+        index = FuzzyIndex()
+        index.add("kiva", "Kiva")
+        index.add("kiva lost farm", "Kiva Lost Farm")
+        got = list(index.candidates("kiwa", 0.5, max_len_diff=3))
+        assert [(k, p) for k, p, _ in got] == [("kiva", "Kiva")]
+
+    def test_insertion_order(self):
+        index = FuzzyIndex(["abcd", "abce", "abcf"])
+        assert [k for k, _, _ in index.candidates("abcx", 0.7)] == ["abcd", "abce", "abcf"]
+
+
+class TestFuzzyBrandMatch:
+    """Indexed fuzzy_brand_match matches the original linear scan."""
+
+    @pytest.mark.parametrize("threshold", [0.70, 0.85])
+    def test_identical_to_linear_scan(self, threshold):
+        for query in make_queries(400, seed=11):
+            assert fuzzy_brand_match(query, threshold) == linear_fuzzy_brand_match(query, threshold)
@@ -0,0 +1,74 @@
+"""Hot-path benchmark suite: synthetic products, a tiny run, baseline checks."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from benchmarks.bench_hot_paths import CASES, Workload, compare, fixture_names, make_raw_products, measure, run
+
+_BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baselines" / "hot_paths.json"
+
+
+def _result(relative, peak_mb=1.0):
+    return {"per_second": relative * 1000, "relative": relative, "peak_mb": peak_mb}
+
+
+class TestSyntheticProducts:
+    """Products are built from the names the tests assert on."""
+
+    def test_fixture_names(self):
+        names = fixture_names()
+        assert "Aspen OG 3.5g" in names
+        assert all("\n" not in n and "$" not in n for n in names)
+
+    def test_raw_products_deterministic(self):
+        products = make_raw_products(300, seed=5)
+        assert products[0] == {
+            "name": "Purple Leaf | Gelato 41 Gummies 100mg",
+            "raw_text": "Purple Leaf\nPurple Leaf | Gelato 41 Gummies 100mg\nTHC: 30.5%\n$80.00\n$40.00",
+            "price": "$80.00 $40.00",
+        }
+        assert products == make_raw_products(300, seed=5)
+        assert products != make_raw_products(300, seed=6)
+        assert all(p["name"] in p["raw_text"] and "$" in p["raw_text"] for p in products)
+
+
+class TestRunAndCompare:
+    """Every case runs; regressions against a baseline are reported."""
+
+    def test_tiny_run_covers_every_case(self):
+        current = run([60], list(CASES), repeat=1, site_size=25, memory=False, min_time=0, log=lambda _: None)
+        # Normalization drops 3 of the 60 cards before classify / detect.
+        assert {key: r["items"] for key, r in current["results"].items()} == {
+            "parse_product/60": 60,
+            "detect_brand/60": 60,
+            "detect_category/60": 60,
+            "classify_product/60": 57,
+            "normalize_products/60": 60,
+            "detect_deals/60": 57,
+        }
+
+    def test_measure_traces_memory(self):
+        result = measure(CASES["detect_brand"], Workload(40, 42, 25), repeat=1, min_time=0)
+        assert result["items"] == 40 and result["peak_mb"] >= 0 and result["relative"] > 0
+
+    def test_regressions_flagged(self):
+        baseline = {"results": {"parse_product/1000": _result(1.0), "detect_deals/1000": _result(1.0, 10.0)}}
+        current = {"results": {"parse_product/1000": _result(0.9), "detect_deals/1000": _result(1.2, 10.5)}}
+        assert compare(current, baseline) == []
+        current["results"]["parse_product/1000"] = _result(0.5)
+        current["results"]["detect_deals/1000"] = _result(1.0, 20.0)
+        regressions = compare(current, baseline)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("parse_product/1000: throughput -50%")
+        assert "peak memory 20.0 MB" in regressions[1]
+
+    def test_small_memory_growth_ignored(self):
+        baseline = {"results": {"detect_brand/1000": _result(1.0, 0.01)}}
+        assert compare({"results": {"detect_brand/1000": _result(1.0, 0.5)}}, baseline) == []
+        assert compare({"results": {}}, baseline) == []
+
+    def test_stored_baseline_matches_cases(self):
+        baseline = json.loads(_BASELINE.read_text())
+        assert {key.split("/")[0] for key in baseline["results"]} == set(CASES)
@@ -0,0 +1,132 @@
+"""Mock dispensary menus for the orchestrator load test.
+
+Talks to the server over real HTTP with the ``Host`` header a browser
+would send, so no browser is needed.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+
+from benchmarks.mock_menus import PAGE_SIZES, MockMenuServer, MockProfile, MockSite
+
+
+def _get(server, host, path, cookie=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    headers = {"Host": f"{host}:{server.port}"}
+    if cookie:
+        headers["Cookie"] = cookie
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, response.getheader("Location"), body
+
+
+def _api(server, host, path):
+    status, _, body = _get(server, host, path)
+    assert status == 200
+    return json.loads(body)
+
+
+class TestCatalogsAndProfiles:
+    """Generated stores and their catalogs are deterministic."""
+
+    def test_catalog_has_distinct_names(self):
+        catalog = MockSite("s", "jane", 250, seed=7).catalog()
+        assert len(catalog) == 250
+        assert len({c["name"] for c in catalog}) == 250
+        assert catalog == MockSite("s", "jane", 250, seed=7).catalog()
+        assert any(line.startswith("$") for line in catalog[0]["lines"])
+
+    def test_profile_mix_and_faults(self):
+        profile = MockProfile(sites=50, mix={"dutchie": 1, "curaleaf": 1}, down=1.0, seed=3)
+        sites = profile.make_sites()
+        assert len({s.slug for s in sites}) == 50
+        assert {s.platform for s in sites} == {"dutchie", "curaleaf"}
+        assert all(s.down for s in sites)
+        assert [s.slug for s in profile.make_sites()] == [s.slug for s in sites]
+
+    def test_dispensary_configs(self):
+        sites = [MockSite("mock-dutchie-001", "dutchie", 10), MockSite("mock-curaleaf-001", "curaleaf", 10),
+                 MockSite("mock-curaleaf-002", "curaleaf", 10)]
+        with MockMenuServer(sites) as server:
+            configs = server.dispensaries("michigan")
+        assert configs[0]["url"] == f"http://mock-dutchie-001.localhost:{server.port}/menu"
+        # Curaleaf stores share one host, as they do live.
+        assert {c["url"].split("/stores/")[0] for c in configs[1:]} == {
+            f"http://curaleaf.com.localhost:{server.port}"
+        }
+        assert all(c["is_active"] and c["region"] == "michigan" for c in configs)
+
+
+class TestMenus:
+    """Pages, menu APIs and age gates per platform."""
+
+    def test_dutchie_pages(self):
+        with MockMenuServer([MockSite("d", "dutchie", 100)]) as server:
+            status, _, html = _get(server, "d.localhost", "/menu")
+            assert status == 200 and b"I am 21 or older" in html and b"embedded-menu/d" in html
+            assert b"go to page" in _get(server, "dutchie.localhost", "/embedded-menu/d/specials")[2]
+            pages = [_api(server, "dutchie.localhost", f"/api/menu/d?page={n}") for n in (1, 2, 3)]
+        assert [len(p["products"]) for p in pages] == [PAGE_SIZES["dutchie"]] * 2 + [4]
+        assert pages[0]["pages"] == 3
+        assert server.products_served["d"] == 100
+
+    def test_jane_view_more(self):
+        with MockMenuServer([MockSite("j", "jane", 40, age_gate=False)]) as server:
+            status, _, html = _get(server, "j.localhost", "/menu")
+            assert status == 200 and b"View More" in html and b'class="age-gate"' not in html
+            first = _api(server, "j.localhost", "/api/products?offset=0")
+            rest = _api(server, "j.localhost", f"/api/products?offset={len(first['products'])}")
+        assert first["more"] and not rest["more"]
+        assert len(first["products"]) + len(rest["products"]) == 40
+
+    def test_curaleaf_age_gate_redirect(self):
+        with MockMenuServer([MockSite("c", "curaleaf", 30)]) as server:
+            status, location, _ = _get(server, "curaleaf.com.localhost", "/stores/c")
+            assert (status, location) == (302, "/age-gate?returnurl=/stores/c")
+            status, _, gate = _get(server, "curaleaf.com.localhost", location)
+            assert status == 200 and b"<select" in gate and b"Nevada" in gate
+            status, _, store = _get(server, "curaleaf.com.localhost", "/stores/c", "age_verified=Nevada")
+            assert status == 200 and b"Go to page" in store
+            last = _api(server, "curaleaf.com.localhost", "/api/stores/c/products?page=2")
+        assert last["pages"] == 2 and len(last["products"]) == 6
+
+
+class TestFaults:
+    """Injected failures and the run-level bookkeeping."""
+
+    def test_down_and_flaky(self):
+        sites = [MockSite("gone", "jane", 10, down=True), MockSite("flaky", "jane", 10, flaky=1.0)]
+        with MockMenuServer(sites) as server:
+            assert _get(server, "gone.localhost", "/menu")[0] == 503
+            assert _get(server, "flaky.localhost", "/api/products")[0] == 500
+            assert _get(server, "nowhere.localhost", "/menu")[0] == 404
+
+    def test_hung_call_released_on_stop(self):
+        server = MockMenuServer([MockSite("h", "jane", 10, hang=True)]).start()
+        statuses = []
+        thread = threading.Thread(target=lambda: statuses.append(_get(server, "h.localhost", "/api/products")[0]))
+        thread.start()
+        thread.join(0.3)
+        assert thread.is_alive()
+        server.stopping.set()
+        thread.join(5)
+        server.stop()
+        assert statuses == [504]
+
+    def test_crash_callback_and_concurrency(self):
+        crashed = threading.Event()
+        sites = [MockSite(f"s{i}", "jane", 10) for i in range(4)]
+        with MockMenuServer(sites, crash_after=[3], on_crash=crashed.set) as server:
+            for i in range(4):
+                _get(server, f"s{i}.localhost", "/menu")
+            assert crashed.wait(5)
+            assert server.crashes == 1
+            # Overlapping visits to two stores count as two in flight.
+            server.first_hit.update(s0=0.0, s1=1.0)
+            server.last_hit.update(s0=5.0, s1=6.0)
+            assert server.peak_concurrency()["jane"] == 2
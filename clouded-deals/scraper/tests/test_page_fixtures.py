@@ -0,0 +1,158 @@
+"""Recorded-page fixtures: bundle storage, request matching, record → replay.
+
+The route handlers are exercised with fake routes, so no browser or
+network is needed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from page_fixtures import FixtureBundle, PageRecorder, PageReplayer, list_bundles
+
+_STORE = {"slug": "oasis", "name": "Oasis", "platform": "dutchie",
+          "url": "https://oasis.example/menu", "region": "southern-nv"}
+
+
+class _FakeRequest:
+    def __init__(self, url, method="GET", post=None):
+        self.url = url
+        self.method = method
+        self.post_data_buffer = post
+        self.resource_type = "fetch"
+
+
+class _FakeResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class _FakeRoute:
+    """Records what the handler did with the request."""
+
+    def __init__(self, request, network=None):
+        self.request = request
+        self._network = network or {}
+        self.outcome = None
+
+    async def fetch(self, max_redirects=None):
+        return self._network[(self.request.method, self.request.url, self.request.post_data_buffer)]
+
+    async def fulfill(self, response=None, status=None, headers=None, body=None):
+        self.outcome = ("fulfill", status if response is None else response.status, body)
+
+    async def abort(self, error_code=None):
+        self.outcome = ("abort", error_code)
+
+    async def continue_(self):
+        self.outcome = ("continue",)
+
+
+def _bundle():
+    bundle = FixtureBundle(_STORE)
+    bundle.add("GET", "https://oasis.example/menu", None, 200,
+               {"content-type": "text/html", "content-encoding": "br"}, b"<html></html>", "document")
+    bundle.add("POST", "https://api.example/graphql", b'{"page":0}', 200, {}, b'{"products":[1]}')
+    bundle.add("POST", "https://api.example/graphql", b'{"page":1}', 200, {}, b'{"products":[2]}')
+    bundle.add("GET", "https://api.example/poll?t=1", None, 200, {}, b"first")
+    bundle.add("GET", "https://api.example/poll?t=2", None, 200, {}, b"second")
+    bundle.products = [{"name": "Kobe 3.5g", "price": "$20"}]
+    return bundle
+
+
+class TestFixtureBundle:
+    """Bundles round-trip through disk with bodies stored once."""
+
+    def test_save_load_round_trip(self, tmp_path):
+        bundle = _bundle()
+        bundle.add("GET", "https://cdn.example/a.js", None, 200, {}, b"<html></html>")
+        bundle.save(tmp_path / "oasis")
+        assert len(list((tmp_path / "oasis" / "bodies").iterdir())) == 5
+
+        loaded = FixtureBundle.load(tmp_path / "oasis")
+        assert loaded.dispensary == _STORE and loaded.products == bundle.products
+        assert loaded.entries == bundle.entries
+        assert "content-encoding" not in loaded.entries[0]["headers"]
+        assert loaded.body(loaded.entries[1]["body"]) == b'{"products":[1]}'
+        assert loaded.stats()["requests"] == 6
+
+    def test_list_bundles_filters(self, tmp_path):
+        _bundle().save(tmp_path / "oasis")
+        jane = FixtureBundle({**_STORE, "slug": "reef", "platform": "jane"})
+        jane.save(tmp_path / "reef")
+        assert [p.name for p in list_bundles(tmp_path)] == ["oasis", "reef"]
+        assert [p.name for p in list_bundles(tmp_path, platforms=["jane"])] == ["reef"]
+        assert [p.name for p in list_bundles(tmp_path, slugs=["oasis"])] == ["oasis"]
+
+
+class TestPageReplayer:
+    """Requests are answered by method, URL and POST body, else aborted."""
+
+    def test_post_bodies_select_the_page(self):
+        replayer = PageReplayer(_bundle())
+        page1 = replayer.match("POST", "https://api.example/graphql", b'{"page":1}')
+        page0 = replayer.match("POST", "https://api.example/graphql", b'{"page":0}')
+        assert replayer.bundle.body(page0["body"]) == b'{"products":[1]}'
+        assert replayer.bundle.body(page1["body"]) == b'{"products":[2]}'
+        assert replayer.stats() == {"matched": 2, "loose": 0, "missed": 0}
+
+    def test_repeats_in_order_then_last(self):
+        replayer = PageReplayer(_bundle())
+        bodies = [
+            replayer.bundle.body(replayer.match("GET", "https://api.example/poll?t=9", None)["body"])
+            for _ in range(3)
+        ]
+        assert bodies == [b"first", b"second", b"second"]
+        assert replayer.stats()["loose"] == 3
+
+    def test_unrecorded_request_aborted(self):
+        replayer = PageReplayer(_bundle())
+        route = _FakeRoute(_FakeRequest("https://tracker.example/pixel.gif"))
+        asyncio.run(replayer.handle(route))
+        assert route.outcome == ("abort", "internetdisconnected")
+        assert replayer.missed == ["GET https://tracker.example/pixel.gif"]
+
+
+class TestRecordThenReplay:
+    """What the recorder fetched is what the replayer serves."""
+
+    def test_round_trip(self, tmp_path):
+        network = {
+            ("GET", "https://oasis.example/menu", None): _FakeResponse(200, {"content-type": "text/html"}, b"<html/>"),
+            ("POST", "https://api.example/graphql", b"q"): _FakeResponse(200, {}, b'{"ok":1}'),
+            ("GET", "https://oasis.example/old", None): _FakeResponse(301, {"location": "/menu"}, b""),
+        }
+        bundle = FixtureBundle(_STORE)
+        recorder = PageRecorder(bundle)
+
+        async def record():
+            for method, url, post in network:
+                route = _FakeRoute(_FakeRequest(url, method, post), network)
+                await recorder.handle(route)
+                assert route.outcome[0] == "fulfill"
+            failing = _FakeRoute(_FakeRequest("https://down.example/"), network)
+            await recorder.handle(failing)
+            assert failing.outcome == ("continue",)
+
+        asyncio.run(record())
+        assert recorder.failed == 1
+        bundle.save(tmp_path / "oasis")
+
+        replayer = PageReplayer(FixtureBundle.load(tmp_path / "oasis"))
+
+        async def replay():
+            outcomes = []
+            for method, url, post in network:
+                route = _FakeRoute(_FakeRequest(url, method, post))
+                await replayer.handle(route)
+                outcomes.append(route.outcome)
+            return outcomes
+
+        assert asyncio.run(replay()) == [
+            ("fulfill", 200, b"<html/>"), ("fulfill", 200, b'{"ok":1}'), ("fulfill", 301, b""),
+        ]
@@ -0,0 +1,102 @@
+"""Tests for the persistent normalized-product parse cache."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import parse_cache
+from parse_cache import ParseCache, product_cache_key
+
+RP = {
+    "name": "STIIIZY Blue Dream Pod 1g",
+    "raw_text": "STIIIZY\nBlue Dream\n1g\n$40.00\n$28.00",
+    "price": "$40.00 $28.00",
+    "scraped_category": "vape",
+}
+FIELDS = {"name": "Blue Dream", "brand": "STIIIZY", "category": "vape", "sale_price": 28.0}
+
+
+class TestProductCacheKey:
+    """Keys depend only on the text the normalizer reads."""
+
+    def test_ignores_dispensary_specific_fields(self):
+        a = {**RP, "dispensary_id": "td-gibson", "source_platform": "dutchie"}
+        b = {**RP, "dispensary_id": "td-decatur"}
+        assert product_cache_key(a) == product_cache_key(b)
+
+    @pytest.mark.parametrize("field,value", [
+        ("name", "STIIIZY Blue Dream Pod 0.5g"),
+        ("raw_text", "changed"),
+        ("price", "$30.00"),
+        ("scraped_brand", "STIIIZY"),
+        ("scraped_category", "concentrate"),
+        ("product_url", "https://example.com/brands/stiiizy"),
+    ])
+    def test_input_fields_change_key(self, field, value):
+        assert product_cache_key({**RP, field: value}) != product_cache_key(RP)
+
+
+class TestParseCache:
+    """Round trip, rules versioning, LRU and statistics."""
+
+    def test_round_trip_across_instances(self, tmp_path):
+        path = tmp_path / "parse_cache.json"
+        first = ParseCache(path, version="v1")
+        first.put("k", [FIELDS, None])
+        first.flush()
+        found, value = ParseCache(path, version="v1").get("k")
+        assert found and value == [FIELDS, None]
+
+    def test_cached_rejection_is_a_hit(self, tmp_path):
+        cache = ParseCache(tmp_path / "p.json", version="v1")
+        cache.put("k", [None, "Unknown Brand"])
+        assert cache.get("k") == (True, [None, "Unknown Brand"])
+
+    def test_rules_change_discards_entries(self, tmp_path):
+        path = tmp_path / "parse_cache.json"
+        old = ParseCache(path, version="v1")
+        old.put("k", [FIELDS, None])
+        old.flush()
+        new = ParseCache(path, version="v2")
+        assert new.get("k") == (False, None)
+        new.flush()
+        assert json.loads(path.read_text())["entries"] == {}
+
+    def test_lru_eviction_on_flush(self, tmp_path, monkeypatch):
+        path = tmp_path / "parse_cache.json"
+        cache = ParseCache(path, version="v1", max_entries=2)
+        for i, key in enumerate(["a", "b", "c"]):
+            monkeypatch.setattr(parse_cache.time, "time", lambda i=i: 1000 + i)
+            cache.put(key, [FIELDS, None])
+        monkeypatch.setattr(parse_cache.time, "time", lambda: 2000)
+        cache.get("a")  # touch the oldest so it survives
+        cache.flush()
+        reloaded = ParseCache(path, version="v1")
+        assert reloaded.get("a")[0] and reloaded.get("c")[0]
+        assert not reloaded.get("b")[0]
+
+    def test_stats(self, tmp_path):
+        cache = ParseCache(tmp_path / "p.json", version="v1")
+        cache.put("k", [FIELDS, None])
+        cache.get("k")
+        cache.get("missing")
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 50.0)
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        path = tmp_path / "parse_cache.json"
+        path.write_text("{oops")
+        assert ParseCache(path, version="v1").get("k") == (False, None)
+
+
+class TestRulesVersion:
+    """The version tracks the brand tables as well as the source files."""
+
+    def test_new_brand_changes_version(self, monkeypatch):
+        import clouded_logic
+
+        before = parse_cache.rules_version()
+        monkeypatch.setitem(clouded_logic.BRANDS_LOWER, "zorbo farms", "Zorbo Farms")
+        assert parse_cache.rules_version() != before
@@ -0,0 +1,130 @@
+"""The parser reads prices, weights and THC from one lexer pass."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.bench_lexer import fuzz_texts, menu_texts
+from parser import extract_cannabinoids, extract_prices, extract_weight
+from product_lexer import (
+    decimal_tail,
+    is_percent,
+    is_price,
+    percent_tail,
+    price_amount,
+    tokenize,
+)
+
+
+def _extract(text):
+    tokens = tokenize(text)
+    return extract_prices(text, tokens), extract_weight(text, tokens), extract_cannabinoids(text, tokens)
+
+
+def _prices(original, sale, pct):
+    return {"original_price": original, "sale_price": sale, "discount_percent": pct}
+
+
+_NO_PRICE = _prices(None, None, None)
+_NO_WEIGHT = {"weight_value": None, "weight_unit": None}
+_NO_CANNABINOIDS = {"thc_percent": None, "cbd_percent": None}
+
+
+class TestExtraction:
+    """Price, weight and THC rules read from one token list."""
+
+    @pytest.mark.parametrize("text,prices", [
+        ("was $45.00 now $30.00", _prices(45.0, 30.0, 33.3)),
+        ("Was $15 now $7 off", _prices(15.0, 8.0, 46.7)),
+        ("2/$55 $35", _prices(55.0, 35.0, 36.4)),
+        ("3/$60", _prices(None, 20.0, None)),
+        ("BOGO Gummies $20", _prices(20.0, 10.0, 50.0)),
+        ("$40 $25 $8 off", _prices(40.0, 25.0, 37.5)),
+        ("from $30 $20", _prices(None, 20.0, None)),
+        ("starting at $25", _NO_PRICE),
+        ("$1.234", _prices(None, 1.23, None)),
+        ("$5.", _prices(None, 5.0, None)),
+    ])
+    def test_prices(self, text, prices):
+        assert _extract(text) == (prices, _NO_WEIGHT, _NO_CANNABINOIDS)
+
+    @pytest.mark.parametrize("text,value,unit", [
+        ("Rove 1/8oz", 3.5, "g"),
+        ("Half oz", 14.0, "g"),
+        ("Gelato 3.5g", 3.5, "g"),
+        ("Cart .5g", 0.5, "g"),
+        ("Gummies 100 MG", 100.0, "mg"),
+        ("Seltzer 12oz 10mg", 10.0, "mg"),
+        ("x1/8", None, None),
+    ])
+    def test_weight(self, text, value, unit):
+        assert _extract(text)[1] == {"weight_value": value, "weight_unit": unit}
+
+    @pytest.mark.parametrize("text,thc,cbd", [
+        ("THC: 28.5%, CBD: 0.1%", 28.5, 0.1),
+        ("THC 22% $40", 22.0, None),
+    ])
+    def test_cannabinoids(self, text, thc, cbd):
+        assert _extract(text)[2] == {"thc_percent": thc, "cbd_percent": cbd}
+
+    def test_fuzzed_text_never_raises(self):
+        for text in menu_texts(300, seed=1) + fuzz_texts(3000, seed=1):
+            prices, weight, cannabinoids = _extract(text)
+            assert set(prices) == set(_NO_PRICE) and set(weight) == set(_NO_WEIGHT)
+
+
+class TestTokenize:
+    """Token layout for the shapes the rules look for."""
+
+    def test_bundle_does_not_swallow_next_price(self):
+        units = [(tok[3], tok[5]) for tok in tokenize("2/$55 $35")]
+        assert units == [("2", "/$"), ("55", "$"), ("35", "")]
+
+    @pytest.mark.parametrize("text,unit", [
+        ("Rove 1/8oz", "1/8"),
+        ("x1/8", ""),
+        ("0.1/4", "1/4"),
+        ("1 /8", ""),
+    ])
+    def test_fraction_needs_boundary(self, text, unit):
+        assert tokenize(text)[-2][5] == unit
+
+    def test_price_words_and_off_label(self):
+        toks = tokenize("was $45 now $30 off")
+        assert [(t[1], t[2], t[5]) for t in toks] == [("was", "$", "now"), ("", "$", "off")]
+        assert "was $45 now $30 off"[toks[1][0]:toks[1][6]] == "30 off"
+
+    def test_cannabinoid_words(self):
+        toks = tokenize("THC: .5%, CBD 2%")
+        assert [(t[1], t[3], t[5]) for t in toks] == [("thc:", ".5", "%"), ("cbd", "2", "%")]
+        # "% CBD" reads as a CBD percent, as the old pattern did.
+        assert tokenize("THC: 28.5% CBD: 0.1%")[0][5] == "%cbd"
+
+    def test_weight_end_covers_unit(self):
+        (tok,) = tokenize("Gummies 100 MG")
+        assert tok[5] == "mg" and tok[4] and "Gummies 100 MG"[tok[0]:tok[6]] == "100 MG"
+
+
+class TestNumberGrammars:
+    """Helpers agree with the regex each rule used to apply."""
+
+    @pytest.mark.parametrize("num,amount,whole", [
+        ("40", "40", True),
+        ("40.00", "40.00", True),
+        ("40.125", "40.12", False),
+        ("40.", "40", False),
+        ("1.2.5", "1.2", False),
+    ])
+    def test_price(self, num, amount, whole):
+        assert price_amount(num) == amount and is_price(num) is whole
+
+    @pytest.mark.parametrize("num,tail", [("3.5", "3.5"), (".5", ".5"), ("1.2.5", "2.5"), ("3.", None)])
+    def test_decimal_tail(self, num, tail):
+        assert decimal_tail(num) == tail
+
+    @pytest.mark.parametrize("num,tail,whole", [("28.5", "28.5", True), (".5", "5", False), ("28.", None, False)])
+    def test_percent(self, num, tail, whole):
+        assert percent_tail(num) == tail and is_percent(num) is whole
+
+    def test_cannabinoid_docstring_example(self):
+        assert extract_cannabinoids("THC: 28.5%, CBD: 0.1%") == {"thc_percent": 28.5, "cbd_percent": 0.1}
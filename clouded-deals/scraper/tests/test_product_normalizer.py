@@ -0,0 +1,118 @@
+"""Tests for product_normalizer.py — the batch normalization API."""
+
+from __future__ import annotations
+
+import copy
+
+import pytest
+
+import product_normalizer
+from parse_cache import ParseCache
+from product_normalizer import (
+    _brand_strip_pattern,
+    _detect_brand_from_raw_text_lines,
+    _extract_brand_from_url,
+    _split_lines,
+    normalize_products,
+)
+
+DISPENSARY = {"slug": "td-gibson", "name": "The Dispensary Gibson", "platform": "dutchie"}
+
+RAW = [
+    {
+        "name": "Runtz Cured Resin 1g",
+        "raw_text": "AMA\nRuntz Cured Resin\n1g\n$40.00\n$20.00",
+        "price": "$40.00 $20.00",
+    },
+    {
+        "name": "STIIIZY",
+        "raw_text": "STIIIZY\nBlue Dream\n1g Pod\n$40.00\n$28.00",
+        "price": "$40.00 $28.00",
+        "scraped_category": "vape",
+        "source_platform": "jane",
+    },
+    {
+        "name": "Zorbly Farms - Blue Dream 3.5g",
+        "raw_text": "Zorbly Farms - Blue Dream\n3.5g\n$50.00\n$25.00",
+        "price": "$50.00 $25.00",
+    },
+]
+
+
+class TestNormalizeProducts:
+    """Batch output, input immutability and cache behaviour."""
+
+    def test_fields_and_dispensary_columns(self):
+        parsed, _, _ = normalize_products(RAW, DISPENSARY)
+        runtz, stiiizy, zorbly = parsed
+        assert (runtz["brand"], runtz["name"], runtz["category"]) == ("AMA", "Runtz", "concentrate")
+        assert stiiizy["brand"] == "STIIIZY" and stiiizy["name"] == "Blue Dream"
+        assert all(p["dispensary_id"] == "td-gibson" for p in parsed)
+        assert [p["source_platform"] for p in parsed] == ["dutchie", "jane", "dutchie"]
+        assert zorbly["sale_price"] == 25.0 and zorbly["weight_value"] == 3.5
+
+    def test_unmatched_brands_counted(self):
+        _, brand_null_count, unmatched = normalize_products(RAW, DISPENSARY)
+        assert brand_null_count == 1
+        assert unmatched == ["Zorbly Farms"]
+
+    def test_input_not_modified(self):
+        raw = copy.deepcopy(RAW)
+        normalize_products(raw, DISPENSARY)
+        assert raw == RAW
+
+    def test_cached_batch_is_identical(self, tmp_path):
+        cache = ParseCache(tmp_path / "parse_cache.json", version="v1")
+        cold = normalize_products(RAW, DISPENSARY, cache=cache)
+        warm = normalize_products(RAW, DISPENSARY, cache=cache)
+        assert warm == cold == normalize_products(RAW, DISPENSARY)
+        assert cache.stats()["hits"] == len(RAW)
+
+    def test_rejected_product_skipped(self):
+        tincture = {
+            "name": "Blueberry Tincture 1000mg",
+            "raw_text": "Blueberry Tincture 1000mg\n$60.00",
+            "price": "$60.00",
+        }
+        parsed, brand_null_count, _ = normalize_products([tincture], DISPENSARY)
+        assert parsed == [] and brand_null_count == 1
+
+
+class TestExtractBrandFromUrl:
+    """URL brand lookup keeps the longest-brand-first precedence."""
+
+    @pytest.mark.parametrize("url,brand", [
+        ("https://x.com/shop/brands/raw-garden/live-resin", "Raw Garden"),
+        ("https://x.com/menu?brand=rove", "Rove"),
+        ("https://x.com/menu/rove/", None),
+        ("https://x.com/curaleaf-las-vegas-western/menu", None),
+        ("", None),
+    ])
+    def test_known_urls(self, url, brand):
+        assert _extract_brand_from_url(url) == brand
+
+    def test_tables_follow_new_brands(self, monkeypatch):
+        url = "https://x.com/products/zorbly-farms-blue-dream"
+        assert _extract_brand_from_url(url) is None
+        monkeypatch.setitem(product_normalizer.BRANDS_LOWER, "zorbly farms", "Zorbly Farms")
+        assert _extract_brand_from_url(url) == "Zorbly Farms"
+
+
+class TestSharedHelpers:
+    """Per-product line view, label memo and per-brand patterns."""
+
+    def test_label_scan_uses_given_detector(self):
+        calls = []
+
+        def detect(line):
+            calls.append(line)
+            return "AMA" if line == "AMA" else None
+
+        lines = _split_lines("  AMA  \nRuntz Cured Resin\n$20")
+        assert _detect_brand_from_raw_text_lines(lines, "Runtz", detect) == "AMA"
+        assert _detect_brand_from_raw_text_lines(lines, "AMA", detect) is None
+        assert calls == ["AMA", "Runtz Cured Resin", "$20"]
+
+    def test_brand_strip_pattern_cached(self):
+        assert _brand_strip_pattern("Tyson 2.0") is _brand_strip_pattern("Tyson 2.0")
+        assert _brand_strip_pattern("Tyson 2.0").sub("", "TYSON 2.0 - Knockout") == "Knockout"
@@ -0,0 +1,87 @@
+"""ProductRecord: a slotted product that reads like the dict it replaced."""
+
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+from benchmarks.bench_normalize import DISPENSARY, make_menu
+from benchmarks.bench_records import reference_normalize_products
+from deal_detector import run_deal_detection
+from parse_cache import ParseCache
+from product_normalizer import RAW_TEXT_MAX_CHARS, normalize_products
+from product_record import ProductRecord, parsed_record
+
+
+class TestMappingProtocol:
+    """get / [] / in / pop / copy / {**record} behave as on a dict."""
+
+    def test_missing_fields_are_absent(self):
+        record = ProductRecord(name="Kobe", sale_price=20.0)
+        assert record.get("brand") is None and record.get("category", "other") == "other"
+        assert "brand" not in record and "name" in record
+        with pytest.raises(KeyError):
+            record["brand"]
+        assert record.keys() == ["name", "sale_price"]
+        assert {**record} == {"name": "Kobe", "sale_price": 20.0} == record
+
+    def test_extra_keys(self):
+        record = ProductRecord(name="Kobe")
+        record["_guaranteed"] = True
+        assert record["_guaranteed"] is True and "_guaranteed" in record
+        assert record.pop("_guaranteed") is True
+        assert record.pop("_guaranteed", None) is None
+        assert record.pop("raw_text", "gone") == "gone"
+
+    def test_copy_shares_values(self):
+        record = ProductRecord(name="Kobe", raw_text="x" * 100, deal_score=0)
+        clone = record.copy()
+        clone["deal_score"] = 70
+        assert record["deal_score"] == 0 and clone["deal_score"] == 70
+        assert clone["raw_text"] is record["raw_text"]
+
+    def test_enum_like_strings_interned(self):
+        a = ProductRecord(category="".join(["fl", "ower"]), brand="".join(["Coo", "kies"]))
+        b = ProductRecord(category="".join(["flo", "wer"]), brand="".join(["Cook", "ies"]))
+        assert a["category"] is b["category"] and a["brand"] is b["brand"]
+
+    def test_pickles(self):
+        record = ProductRecord(name="Kobe", weight_value=1.0)
+        record["_guaranteed"] = True
+        assert pickle.loads(pickle.dumps(record)) == record
+
+
+class TestParsedRecords:
+    """normalize_products keeps what the pipeline reads, nothing more."""
+
+    def test_parser_inputs_dropped_and_raw_text_cut(self):
+        raw = {"name": "Kobe Cart 1g", "raw_text": "Kobe\n" + "x" * (2 * RAW_TEXT_MAX_CHARS),
+               "price": "$20", "scraped_brand": "CSF", "scraped_category": "vape",
+               "source_platform": "jane", "offer_text": "2/$40"}
+        record = parsed_record(raw, {"name": "Kobe", "category": "vape"},
+                               dispensary_id="oasis", source_platform="dutchie",
+                               raw_text_limit=RAW_TEXT_MAX_CHARS)
+        assert not {"price", "scraped_brand", "scraped_category"} & set(record)
+        assert len(record["raw_text"]) == RAW_TEXT_MAX_CHARS
+        assert (record["name"], record["source_platform"], record["offer_text"]) == ("Kobe", "jane", "2/$40")
+
+    def test_same_fields_as_merged_dicts(self, tmp_path):
+        raw = make_menu(300, seed=3)
+        records, _, _ = normalize_products(raw, DISPENSARY)
+        cache = ParseCache(tmp_path / "cache.json", version="v1")
+        dicts = reference_normalize_products(raw, DISPENSARY, cache)
+        assert all(isinstance(r, ProductRecord) for r in records)
+        assert [r.to_dict() for r in records] == [
+            {k: v for k, v in d.items() if k not in ("price", "scraped_brand", "scraped_category")}
+            for d in dicts
+        ]
+
+    def test_detection_keeps_records(self):
+        records, _, _ = normalize_products(make_menu(400, seed=4), DISPENSARY)
+        dicts = [r.to_dict() for r in records]
+        from_records = run_deal_detection(records)
+        from_dicts = run_deal_detection(dicts)
+        assert all(isinstance(d, ProductRecord) for d in from_records.top_deals)
+        assert [d.to_dict() for d in from_records.top_deals] == from_dicts.top_deals
+        assert [d.to_dict() for d in from_records.cut_deals] == from_dicts.cut_deals
@@ -0,0 +1,84 @@
+"""Raw capture archive: per-site gzip members behind a byte-offset index."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.bench_normalize import make_menu
+from raw_archive import (
+    RawArchive,
+    iter_sites,
+    list_runs,
+    read_index,
+    read_site,
+)
+
+_STARTED = datetime(2026, 10, 19, 14, 5, 9, tzinfo=timezone.utc)
+
+
+def _store(slug, region="southern-nv"):
+    return {"slug": slug, "name": slug.title(), "platform": "dutchie",
+            "url": f"https://example.com/{slug}", "region": region}
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    return RawArchive("run-1", root=tmp_path, started=_STARTED)
+
+
+class TestRawArchive:
+    """Writes land under date / region, one gzip member per site."""
+
+    def test_round_trip_one_site(self, archive, tmp_path):
+        menus = {slug: make_menu(40, seed)[:40] for seed, slug in enumerate(("oasis", "reef", "medizin"))}
+        for slug, menu in menus.items():
+            archive.add(_store(slug), menu, page_url=f"https://example.com/{slug}#menu")
+        stats = archive.close()
+        assert (stats["sites"], stats["products"], stats["errors"]) == (3, 120, 0)
+        assert stats["bytes_written"] < stats["bytes_raw"]
+
+        [index_path] = list_runs(tmp_path, date="2026-10-19", region="southern-nv")
+        assert index_path.name == "140509_run-1.index.json"
+        assert read_site(index_path, "reef") == menus["reef"]
+        entry = read_index(index_path)["sites"][1]
+        assert (entry["slug"], entry["products"], entry["page_url"]) == ("reef", 40, "https://example.com/reef#menu")
+
+    def test_whole_file_is_one_gzip_stream(self, archive, tmp_path):
+        archive.add(_store("oasis"), [{"name": "A"}])
+        archive.add(_store("reef"), [{"name": "B"}, {"name": "C"}])
+        archive.close()
+        [index_path] = list_runs(tmp_path)
+        with gzip.open(index_path.parent / read_index(index_path)["data"], "rt") as fh:
+            assert [json.loads(line)["name"] for line in fh] == ["A", "B", "C"]
+
+    def test_regions_get_their_own_files(self, archive, tmp_path):
+        archive.add(_store("oasis"), [{"name": "A"}])
+        archive.add(_store("lume", region="michigan"), [{"name": "B"}])
+        archive.close()
+        assert [p.parent.name for p in list_runs(tmp_path)] == ["michigan", "southern-nv"]
+        assert read_site(list_runs(tmp_path, region="michigan")[0], "lume") == [{"name": "B"}]
+
+    def test_retry_capture_wins(self, archive, tmp_path):
+        archive.add(_store("oasis"), [{"name": "first try"}])
+        archive.add(_store("reef"), [{"name": "B"}])
+        archive.add(_store("oasis"), [{"name": "retry"}])
+        archive.close()
+        [index_path] = list_runs(tmp_path)
+        assert read_site(index_path, "oasis") == [{"name": "retry"}]
+        assert [(e["slug"], p) for e, p in iter_sites(index_path)] == [
+            ("reef", [{"name": "B"}]), ("oasis", [{"name": "retry"}]),
+        ]
+        with pytest.raises(KeyError):
+            read_site(index_path, "planet13")
+
+    def test_unserialisable_values_and_failures_stay_off_the_scrape(self, archive, tmp_path):
+        archive.add(_store("oasis"), [{"name": "A", "seen": _STARTED}])
+        archive.add({"name": "no slug"}, [{"name": "B"}])
+        stats = archive.close()
+        assert (stats["sites"], stats["errors"]) == (1, 1)
+        [index_path] = list_runs(tmp_path)
+        assert read_site(index_path, "oasis") == [{"name": "A", "seen": str(_STARTED)}]
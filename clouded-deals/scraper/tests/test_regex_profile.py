@@ -0,0 +1,137 @@
+"""Regex profiling, the fuzz harness inventory and bounded parser input."""
+
+from __future__ import annotations
+
+import re
+import sys
+import types
+
+import pytest
+
+import deal_detector
+import product_normalizer
+from benchmarks.bench_normalize import DISPENSARY, make_menu
+from benchmarks.fuzz_patterns import pattern_inventory, random_texts, reference_pattern
+from product_normalizer import RAW_TEXT_MAX_CHARS, normalize_products
+from regex_profile import PROFILED_MODULES, RegexProfile, inline_patterns, module_patterns
+
+
+def _module() -> types.ModuleType:
+    mod = types.ModuleType("fake_rules")
+    mod.re = re
+    mod._WORD_RE = re.compile(r"\bword\b")
+    mod._LIST = [re.compile("a"), (re.compile("b"), "label")]
+    mod._BY_KEY = {"c": [re.compile("c")]}
+    return mod
+
+
+class TestRegexProfile:
+    """Install / record / uninstall over module globals."""
+
+    def test_records_compiled_and_inline_calls(self, monkeypatch):
+        mod = _module()
+        monkeypatch.setitem(sys.modules, "fake_rules", mod)
+        profile = RegexProfile()
+        profile.install(("fake_rules",))
+
+        assert mod._WORD_RE.sub("X", "a word") == "a X"
+        assert [m.group() for m in mod._LIST[1][0].finditer("bb")] == ["b", "b"]
+        assert mod._BY_KEY["c"][0].search("xc")
+        assert mod.re.findall(r"\d", "a1b2") == ["1", "2"]
+
+        stats = {name: (calls, chars) for name, calls, _, chars in profile.top()}
+        assert stats["fake_rules._WORD_RE"] == (1, 6)
+        assert stats["fake_rules._LIST[1][0]"] == (1, 2)
+        assert stats["fake_rules._BY_KEY['c'][0]"] == (1, 2)
+        assert [name for name in stats if name.startswith("fake_rules.py:")] != []
+        assert profile.totals()[0] == 4
+
+    def test_uninstall_restores_originals(self, monkeypatch):
+        mod = _module()
+        originals = (mod._WORD_RE, mod._LIST[0], mod._LIST[1], mod._BY_KEY["c"][0])
+        monkeypatch.setitem(sys.modules, "fake_rules", mod)
+        profile = RegexProfile()
+        profile.install(("fake_rules",))
+        assert not isinstance(mod._WORD_RE, re.Pattern)
+        profile.uninstall()
+        assert (mod._WORD_RE, mod._LIST[0], mod._LIST[1], mod._BY_KEY["c"][0]) == originals
+        assert mod.re is re
+
+    def test_normalized_output_unchanged(self):
+        products = make_menu(150, seed=5)
+        expected = normalize_products(products, DISPENSARY)
+        profile = RegexProfile()
+        profile.install()
+        try:
+            profiled = normalize_products(products, DISPENSARY)
+        finally:
+            profile.uninstall()
+        assert profiled == expected
+        names = [name for name, *_ in profile.top()]
+        assert "clouded_logic._PREROLL_RE" in names and "product_normalizer._RE_OFFER_SECTION" in names
+        assert isinstance(product_normalizer._RE_OFFER_SECTION, re.Pattern)
+
+
+class TestPatternInventory:
+    """What the fuzz harness feeds."""
+
+    def test_module_patterns_walk_containers(self):
+        names = dict(module_patterns(_module()))
+        assert set(names) == {
+            "fake_rules._WORD_RE", "fake_rules._LIST[0]",
+            "fake_rules._LIST[1][0]", "fake_rules._BY_KEY['c'][0]",
+        }
+
+    def test_inline_patterns_keep_flags(self):
+        found = {pattern.pattern: pattern for _, pattern in inline_patterns(deal_detector)}
+        strain = found[r"\b(?:indica|sativa|hybrid|indica-hybrid|sativa-hybrid)\b"]
+        assert strain.flags & re.IGNORECASE == 0
+        assert all(label.startswith("deal_detector.py:") for label, _ in inline_patterns(deal_detector))
+
+    def test_inventory_skips_missing_modules(self):
+        patterns, skipped = pattern_inventory(PROFILED_MODULES)
+        assert len(patterns) > 300
+        assert "product_lexer" not in skipped
+
+
+@pytest.fixture(scope="module")
+def rewritten():
+    patterns, _ = pattern_inventory(PROFILED_MODULES)
+    pairs = [(label, p, reference_pattern(p)) for label, p in patterns]
+    return [(label, p, ref) for label, p, ref in pairs if ref is not None]
+
+
+class TestRewrittenPatterns:
+    """Cubic sub-patterns were rewritten without changing what they match."""
+
+    def test_rewrites_found(self, rewritten):
+        labels = {label for label, _, _ in rewritten}
+        assert {"product_normalizer._RE_MARKETING_TIER", "product_classifier._PACK_RE"} <= labels
+
+    def test_same_matches(self, rewritten):
+        texts = random_texts(4000, seed=3)
+        diffs = []
+        for label, pattern, ref in rewritten:
+            for text in texts:
+                m, r = pattern.search(text), ref.search(text)
+                if (
+                    pattern.sub("#", text) != ref.sub("#", text)
+                    or pattern.findall(text) != ref.findall(text)
+                    or (m and (m.span(), m.groups())) != (r and (r.span(), r.groups()))
+                ):
+                    diffs.append((label, text))
+        assert diffs == []
+
+
+class TestRawTextBound:
+    """Parsing sees at most RAW_TEXT_MAX_CHARS of raw_text."""
+
+    def test_long_raw_text_parsed_as_stored(self):
+        product = make_menu(1, seed=9)[0]
+        padded = dict(product, raw_text=product["raw_text"] + "\n" + " " * RAW_TEXT_MAX_CHARS + "$1.00")
+        truncated = dict(padded, raw_text=padded["raw_text"][:RAW_TEXT_MAX_CHARS])
+        (long_row,), _, _ = normalize_products([padded], DISPENSARY)
+        (short_row,), _, _ = normalize_products([truncated], DISPENSARY)
+        long_row.pop("raw_text")
+        short_row.pop("raw_text")
+        assert long_row == short_row
@@ -0,0 +1,166 @@
+"""Incremental region feed over per-site deals."""
+
+from __future__ import annotations
+
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from deal_detector import (
+    CATEGORY_TARGETS,
+    DetectionConfig,
+    TARGET_DEAL_COUNT,
+    _selection_bucket,
+    remove_global_name_duplicates,
+    select_top_deals,
+)
+from region_feed import RegionFeed
+
+_UNBOUNDED = {"pool_factor": 10**6, "brand_depth": 10**6, "dispensary_depth": 10**6}
+
+_BRANDS = ("STIIIZY", "Rove", "Kiva", "Wyld", "Connected", "Jeeter", "Cookies", "AMA", "Virtue", "") + tuple(
+    f"House Brand {i}" for i in range(40)
+)
+_FORMATS = (
+    ("flower", None, 3.5), ("flower", None, 7), ("flower", None, 28),
+    ("vape", "cartridge", 0.5), ("vape", "disposable", 1), ("vape", "pod", 1),
+    ("edible", "gummy", 100), ("concentrate", "live_resin", 1), ("preroll", "preroll_pack", 3.5),
+    ("other", None, None),
+)
+
+
+def _batch(deals):
+    deduped = remove_global_name_duplicates(deals)
+    deduped.sort(key=lambda d: d["deal_score"], reverse=True)
+    return select_top_deals(deduped)
+
+
+@pytest.fixture(scope="module")
+def sites():
+    rng = random.Random(4)
+    chains = ("curaleaf", "td", "planet13", "oasis", "thrive", "rise")
+    result = []
+    for s in range(24):
+        dispensary = f"{chains[s % len(chains)]}-{s}"
+        deals = []
+        for _ in range(60):
+            category, subtype, weight = rng.choice(_FORMATS)
+            brand = rng.choice(_BRANDS)
+            sale = rng.choice((5.0, 8.0, 12.0, 15.0, 20.0, 25.0, 35.0))
+            deals.append({
+                "name": f"{brand} Strain {rng.randrange(40)} {category}",
+                "brand": brand,
+                "category": category,
+                "product_subtype": subtype,
+                "weight_value": weight,
+                "sale_price": sale,
+                "original_price": sale * 2,
+                "dispensary_id": dispensary,
+                "deal_score": rng.randrange(20, 90),
+            })
+        result.append(deals)
+    return result
+
+
+class TestUnboundedFeed:
+    """Without overflow the feed is the batch pipeline over all sites."""
+
+    def test_matches_batch(self, sites):
+        feed = RegionFeed(**_UNBOUNDED)
+        for deals in sites:
+            feed.add(deals)
+        expected = _batch([d for deals in sites for d in deals])
+        assert feed.feed() == expected
+        assert feed.stats()["evicted"] == 0
+        assert len(expected) > TARGET_DEAL_COUNT // 2
+
+    def test_matches_batch_after_each_site(self, sites):
+        feed = RegionFeed(**_UNBOUNDED)
+        for n, deals in enumerate(sites[:6], 1):
+            feed.add(deals)
+            assert feed.feed() == _batch([d for site in sites[:n] for d in site])
+
+
+class TestDuplicates:
+    """Same product at several dispensaries: best score, first on ties."""
+
+    def _deal(self, dispensary, score):
+        return {"name": "Rove Cart Gelato", "brand": "Rove", "category": "vape",
+                "sale_price": 20.0, "dispensary_id": dispensary, "deal_score": score}
+
+    def test_best_score_kept(self):
+        feed = RegionFeed()
+        feed.add([self._deal("a", 40)])
+        feed.add([self._deal("b", 70), self._deal("c", 50)])
+        assert [d["dispensary_id"] for d in feed.candidates()] == ["b"]
+        assert feed.stats()["duplicates"] == 2
+
+    def test_first_seen_wins_ties(self):
+        feed = RegionFeed()
+        feed.add([self._deal("a", 60)])
+        feed.add([self._deal("b", 60)])
+        assert [d["dispensary_id"] for d in feed.candidates()] == ["a"]
+
+
+class TestBoundedPools:
+    """Heaps hold at most their capacity, keeping the best scores."""
+
+    def test_pool_sizes(self, sites):
+        feed = RegionFeed(pool_factor=1, brand_depth=6, dispensary_depth=10)
+        for deals in sites:
+            feed.add(deals)
+        held = feed.candidates()
+        by_bucket = Counter(_selection_bucket(d) for d in held)
+        by_brand = Counter((_selection_bucket(d), d["brand"] or "_unknown") for d in held)
+        by_dispensary = Counter((_selection_bucket(d), d["dispensary_id"]) for d in held)
+        assert all(n <= CATEGORY_TARGETS.get(b, 10) for b, n in by_bucket.items())
+        assert max(by_brand.values()) <= 6
+        assert max(by_dispensary.values()) <= 10
+        assert feed.stats()["evicted"] > 0
+        assert len(feed.feed()) <= TARGET_DEAL_COUNT
+
+    def test_keeps_best_scores(self):
+        feed = RegionFeed(pool_factor=1, brand_depth=10**6, dispensary_depth=10**6)
+        deals = [
+            {"name": f"Edible {i}", "brand": f"B{i}", "category": "edible",
+             "sale_price": 10.0, "dispensary_id": f"d{i % 7}", "deal_score": i % 97}
+            for i in range(500)
+        ]
+        for i in range(0, 500, 50):
+            feed.add(deals[i:i + 50])
+        slots = CATEGORY_TARGETS["edible"]
+        expected = sorted(deals, key=lambda d: d["deal_score"], reverse=True)[:slots]
+        assert feed.candidates() == expected
+
+    def test_held_deals_ordered_best_first(self, sites):
+        feed = RegionFeed(pool_factor=2)
+        for deals in sites:
+            feed.add(deals)
+        scores = [d["deal_score"] for d in feed.candidates()]
+        assert scores == sorted(scores, reverse=True)
+
+
+class TestConfigAndSave:
+    """The feed follows its detection config and is written as JSON."""
+
+    def test_config_targets(self, sites):
+        feed = RegionFeed(config=DetectionConfig(target_deal_count=25))
+        for deals in sites:
+            feed.add(deals)
+        assert len(feed.feed()) <= 25
+
+    def test_save(self, sites, tmp_path):
+        feed = RegionFeed()
+        for deals in sites[:4]:
+            feed.add([dict(d, raw_text="3 for $50") for d in deals])
+        path = tmp_path / "feed.json"
+        saved = feed.save(str(path), "michigan")
+        data = json.loads(path.read_text())
+        assert data["region"] == "michigan"
+        assert data["stats"] == feed.stats()
+        assert [d["name"] for d in data["deals"]] == [d["name"] for d in saved]
+        assert saved == feed.feed()
+        assert "raw_text" not in data["deals"][0]
+        assert data["deals"][0]["deal_score"] == saved[0]["deal_score"]
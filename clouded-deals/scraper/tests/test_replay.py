@@ -0,0 +1,106 @@
+"""Offline replay: capture selection, parallel tasks, output snapshots and diffs."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from config.dispensaries import DISPENSARIES
+from raw_archive import RawArchive, list_runs
+from replay import (
+    OutputSnapshot,
+    ReplayDiff,
+    replay_tasks,
+    run_tasks,
+    select_runs,
+    site_outputs,
+)
+
+_STORES = [d for d in DISPENSARIES if d.get("region") == "southern-nv"][:3]
+
+
+def _archive(root, run_id, hour, captures):
+    archive = RawArchive(run_id, root=root, started=datetime(2026, 10, 19, hour, tzinfo=timezone.utc))
+    for store, products in captures:
+        archive.add(store, products)
+    archive.close()
+
+
+def _row(name, **fields):
+    return {"name": name, "weight_value": 3.5, "sale_price": 20.0, "category": "flower",
+            "brand": "Rove", "deal_score": 0, **fields}
+
+
+def _count_products(task):
+    from raw_archive import read_member
+
+    dispensary, data_path, entry = task
+    return {"slug": dispensary["slug"], "n": len(read_member(data_path, entry))}
+
+
+class TestCaptureSelection:
+    """The latest capture of each site across a day's runs."""
+
+    def test_latest_capture_wins_across_runs(self, tmp_path):
+        a, b, c = _STORES
+        _archive(tmp_path, "morning", 8, [(a, [{"name": "1"}]), (b, [{"name": "2"}])])
+        _archive(tmp_path, "evening", 20, [(a, [{"name": "3"}, {"name": "4"}]), (c, [])])
+        runs = select_runs(root=tmp_path, date="2026-10-19")
+        assert [p.name for p in runs] == ["080000_morning.index.json", "200000_evening.index.json"]
+        tasks = replay_tasks(runs)
+        assert [t[0]["slug"] for t in tasks] == [b["slug"], a["slug"], c["slug"]]
+        assert tasks[1][0] is a and tasks[1][2]["products"] == 2
+        assert [r["n"] for r in run_tasks(tasks, _count_products, workers=1)] == [1, 2, 0]
+        assert [t[0]["slug"] for t in replay_tasks(runs, slugs=[c["slug"]])] == [c["slug"]]
+
+    def test_unlisted_store_uses_index_entry(self, tmp_path):
+        gone = {"slug": "closed-store", "name": "Closed Store", "platform": "jane",
+                "url": "https://example.com/closed", "region": "michigan"}
+        _archive(tmp_path, "r", 9, [(gone, [{"name": "x"}])])
+        [(dispensary, _, entry)] = replay_tasks(list_runs(tmp_path))
+        assert dispensary == gone
+        assert entry["products"] == 1
+
+    def test_parallel_matches_serial(self, tmp_path):
+        _archive(tmp_path, "r", 9, [(s, [{"name": str(i)}] * (i + 1)) for i, s in enumerate(_STORES)])
+        tasks = replay_tasks(list_runs(tmp_path))
+        assert list(run_tasks(tasks, _count_products, workers=2)) == list(
+            run_tasks(tasks, _count_products, workers=1)
+        )
+
+
+class TestSnapshotsAndDiff:
+    """Replay outputs survive a save / load and diff field by field."""
+
+    def test_snapshot_round_trip(self, tmp_path):
+        snapshot = OutputSnapshot()
+        outputs = site_outputs([_row("Kobe", extra="dropped")], [_row("Kobe", deal_score=71)])
+        snapshot.add("oasis", outputs)
+        snapshot.save(tmp_path / "out.jsonl.gz")
+        loaded = OutputSnapshot.load(tmp_path / "out.jsonl.gz")
+        assert list(loaded) == ["oasis"] and loaded.get("oasis") == outputs
+        assert "extra" not in outputs["products"][0]
+        assert outputs["deals"] == [["Kobe", 20.0, 71]]
+
+    def test_identical_outputs_no_diff(self):
+        outputs = site_outputs([_row("Kobe"), _row("Gelato")], [_row("Kobe", deal_score=70)])
+        diff = ReplayDiff()
+        diff.compare("oasis", outputs, outputs)
+        assert not diff.changed
+        assert next(diff.lines()) == "Replay diff: 0/1 sites changed"
+
+    def test_changes_counted(self):
+        before = site_outputs([_row("Kobe"), _row("Gelato"), _row("Runtz")],
+                              [_row("Kobe", deal_score=70), _row("Gelato", deal_score=60)])
+        after = site_outputs([_row("Kobe", category="vape"), _row("Gelato"), _row("Zkittlez")],
+                             [_row("Kobe", deal_score=75), _row("Zkittlez", deal_score=55)])
+        diff = ReplayDiff()
+        diff.compare("oasis", before, after)
+        diff.compare("reef", None, after)
+        diff.compare("medizin", before, None)
+        assert diff.changed
+        assert (diff.products_added, diff.products_removed, diff.products_changed) == (1, 1, 1)
+        assert diff.field_changes == {"category": 1}
+        assert (diff.deals_added, diff.deals_removed, diff.deal_scores_changed) == (1, 1, 1)
+        assert (diff.sites_only_after, diff.sites_only_before) == (["reef"], ["medizin"])
+        assert diff.sites_changed["oasis"] == 6
+        assert any("category: 'flower' → 'vape'" in line for line in diff.lines())
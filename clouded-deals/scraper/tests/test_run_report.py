@@ -0,0 +1,152 @@
+"""Streaming run report: same report text as the deal lists, bounded memory."""
+
+from __future__ import annotations
+
+import gzip
+import statistics
+
+import pytest
+
+from benchmarks.bench_run_report import (
+    reference_deal_report_lines,
+    reference_summary_lines,
+    site_results,
+)
+from metrics_collector import DealTally, collect_daily_metrics
+from run_report import RunReport, SiteSpill
+
+
+@pytest.fixture(scope="module")
+def shard():
+    sites = list(site_results(sites=60, products=150, seed=11, menus=4))
+    # A store whose deals were all cut, to cover the zero-deal lines.
+    disp, result = next((d, r) for d, r in sites if r.get("deals"))
+    cuts = [dict(c, dispensary_id="all-cut") for c in result["_report_data"]["cut_deals"]]
+    rd = dict(result["_report_data"], top_deals=[], cut_deals=cuts, selected=0)
+    sites.append((dict(disp, slug="all-cut", name="All Cut"),
+                  dict(result, slug="all-cut", deals=0, _report_data=rd)))
+    return sites
+
+
+def _lists(shard):
+    """What main.run used to accumulate: site reports and every deal."""
+    site_reports, top, cut, failed = [], [], [], []
+    for disp, result in shard:
+        rd = result.get("_report_data", {})
+        if result.get("error"):
+            failed.append({"slug": result["slug"], "error": result["error"]})
+        else:
+            top.extend(rd.get("top_deals", []))
+            cut.extend(rd.get("cut_deals", []))
+        site_reports.append({
+            "slug": result["slug"], "name": disp["name"], "platform": disp["platform"],
+            "error": result.get("error"), "products": result.get("products", 0),
+            "deals": result.get("deals", 0), "_report_data": rd,
+        })
+    return site_reports, top, cut, failed
+
+
+def _report(shard, tmp_path, run_size=7):
+    report = RunReport(spill_dir=str(tmp_path), run_size=run_size)
+    for disp, result in shard:
+        report.add_site(disp, result)
+    return report
+
+
+class TestReportText:
+    """Every section reads exactly as the list-based report did."""
+
+    def test_summary_matches_lists(self, shard, tmp_path):
+        site_reports, top, cut, failed = _lists(shard)
+        kwargs = {
+            "sites_failed": failed, "total_products": 12345, "total_deals": len(top),
+            "elapsed_sec": 1500.0, "asset_stats": {"requests": 10, "hits": 4, "hit_rate": 40.0, "bytes_saved": 2**21},
+            "parse_stats": {"lookups": 8, "hits": 6, "hit_rate": 75.0},
+        }
+        report = _report(shard, tmp_path)
+        assert failed and cut
+        assert list(report.summary_lines(**kwargs)) == reference_summary_lines(site_reports, top, cut, **kwargs)
+        report.close()
+
+    def test_deal_report_matches_lists(self, shard, tmp_path):
+        _, top, cut, _ = _lists(shard)
+        report = _report(shard, tmp_path)
+        assert list(report.deal_report_lines()) == reference_deal_report_lines(top, cut)
+        report.close()
+
+    def test_region_feed_section(self, shard, tmp_path):
+        _, top, _, _ = _lists(shard)
+        report = _report(shard, tmp_path)
+        kwargs = {"sites_failed": [], "total_products": 1, "total_deals": 1, "elapsed_sec": 1.0}
+        without = list(report.summary_lines(**kwargs))
+        lines = list(report.summary_lines(**kwargs, region_feed=top[:12]))
+        start = lines.index("REGION FEED (12 deals across all sites) — first 10:")
+        assert lines[start + 3].startswith("   1. [")
+        assert lines[start + 12].startswith("  10. [") and lines[start + 13] == ""
+        assert len(lines) == len(without) + 15
+        report.close()
+
+    def test_empty_run(self, tmp_path):
+        report = RunReport(spill_dir=str(tmp_path))
+        assert list(report.deal_report_lines()) == []
+        kwargs = {"sites_failed": [], "total_products": 0, "total_deals": 0, "elapsed_sec": 0.0}
+        assert list(report.summary_lines(**kwargs)) == reference_summary_lines([], [], [], **kwargs)
+        report.close()
+
+    def test_top_sites_and_regions(self, shard, tmp_path):
+        report = _report(shard, tmp_path)
+        expected = sorted(
+            [(r["slug"], r["products"], d["platform"]) for d, r in shard if r.get("products", 0) > 0],
+            key=lambda s: s[1], reverse=True,
+        )[:10]
+        assert report.top_sites() == expected
+        assert sum(report.region_sites.values()) == len(shard)
+        assert sum(report.region_products.values()) == sum(r.get("products", 0) for _, r in shard)
+        report.close()
+
+
+class TestSiteSpill:
+    """Per-site records go to gzip JSONL runs and come back by name."""
+
+    def test_merged_runs_sorted_by_name_then_arrival(self, tmp_path):
+        spill = SiteSpill(str(tmp_path), run_size=3)
+        names = ["Reef", "Oasis", "Planet 13", "Oasis", "Medizin", "Reef", "Cookies"]
+        for i, name in enumerate(names):
+            spill.append({"name": name, "i": i})
+        runs = sorted(spill.directory.glob("sites-*.jsonl.gz"))
+        assert len(runs) == 2
+        with gzip.open(runs[0], "rt") as fh:
+            assert len(fh.readlines()) == 3
+        out = [(r["name"], r["i"]) for r in spill.sorted_records()]
+        assert out == sorted(((n, i) for i, n in enumerate(names)))
+        # The unflushed tail is included, and reading twice works.
+        assert len(list(spill.sorted_records())) == len(spill) == 7
+        spill.close()
+        assert not spill.directory.exists()
+
+    def test_site_records_keep_no_deal_lists(self, shard, tmp_path):
+        report = _report(shard, tmp_path, run_size=1000)
+        for site in report.site_records():
+            assert not any(isinstance(v, list) for v in site["report"].values())
+            for _, _, top in site["categories"]:
+                assert set(top) <= {"brand", "sale_price", "weight_value", "weight_unit",
+                                    "discount_percent", "source_platform"}
+        report.close()
+
+
+class TestDealTally:
+    """Metrics from the running tally equal metrics from the deal list."""
+
+    def test_metrics_match_list(self, shard, tmp_path):
+        _, top, _, _ = _lists(shard)
+        report = _report(shard, tmp_path)
+        from_list = collect_daily_metrics(None, top, total_products=5000, dry_run=True)
+        from_tally = collect_daily_metrics(None, report.top, total_products=5000, dry_run=True)
+        assert from_tally == from_list
+        report.close()
+
+    @pytest.mark.parametrize("scores", [[70], [55, 90], [40, 40, 85, 60], [50, 71, 71, 99, 12]])
+    def test_median_and_mean(self, scores):
+        tally = DealTally({"deal_score": s} for s in scores)
+        assert tally.median_score() == statistics.median(scores)
+        assert tally.mean_score() == statistics.mean(scores)
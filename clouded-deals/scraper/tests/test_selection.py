@@ -0,0 +1,158 @@
+"""Census-driven diversity selection: leaders, passes, caps and backfill."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+from benchmarks.bench_selection import make_deals
+from deal_detector import (
+    DetectionConfig,
+    _pick_disposable_price_leaders,
+    _pick_flower_price_leaders,
+    _pick_subtype_leaders,
+    _pick_vape_price_leaders,
+    _select_category_picks,
+    _selection_bucket,
+    select_top_deals,
+)
+
+
+def _deal(name, brand, price, score, dispensary="d1", category="edible", weight=100, subtype=None):
+    return {
+        "name": name, "brand": brand, "category": category, "product_subtype": subtype,
+        "weight_value": weight, "sale_price": price, "dispensary_id": dispensary,
+        "deal_score": score,
+    }
+
+
+def _names(deals):
+    return [d["name"] for d in deals]
+
+
+# One edible pool, every deal in the same weight tier.  Price order puts
+# A1, A1 (again, at d5) and A2 first; the rest follow by score.
+_POOL = [
+    _deal("A1", "A", 8, 50), _deal("A2", "A", 9, 90), _deal("A3", "A", 20, 95),
+    _deal("B1", "B", 10, 40, "d2"), _deal("B2", "B", 30, 85, "d2"),
+    _deal("C1", "C", 25, 80, "d3"), _deal("C2", "C", 25, 70, "d3"),
+    _deal("U1", "", 12, 75, "d4"), _deal("U2", "", 14, 74, "d4"),
+    _deal("A1", "A", 8, 60, "d5"),
+    _deal("E1", "E", 40, 30), _deal("E2", "E", 40, 20),
+]
+
+
+def _pool_config(backfill_threshold):
+    return DetectionConfig(
+        target_deal_count=8, category_targets={"edible": 8},
+        max_same_brand_total=2, max_same_brand_per_category=2,
+        max_same_dispensary_total=2, max_unknown_brand_total=1,
+        backfill_threshold=backfill_threshold,
+    )
+
+
+class TestCategoryPicks:
+    """Steps 1–2b: the three passes, the caps and the backfill round."""
+
+    def test_passes_and_caps(self):
+        picks, target, round1 = _select_category_picks(_POOL, _pool_config(0.0))
+        # Pass 1 takes A1 and closes the one weight tier; pass 2 takes one
+        # per brand; pass 3 fills up to the caps.  A2 and E2 hit the d1
+        # cap, A1 at d5 repeats a picked (name, price), U2 the unknown cap.
+        assert _names(picks["edible"]) == ["A1", "B2", "C1", "U1", "E1", "C2", "B1"]
+        assert (target, round1) == (8, 7)
+
+    def test_backfill_relaxes_caps(self):
+        picks, target, round1 = _select_category_picks(_POOL, _pool_config(1.0))
+        # Backfill allows 24 per dispensary but no unknown brands.
+        assert _names(picks["edible"]) == ["A1", "B2", "C1", "U1", "E1", "C2", "B1", "A2", "E2", "A3"]
+        assert (target, round1) == (8, 7)
+        assert _names(select_top_deals(_POOL, _pool_config(1.0))) == [
+            "A1", "B2", "C1", "U1", "E1", "C2", "B1", "A2",
+        ]
+
+    @pytest.mark.parametrize("n,seed,brands,dispensaries", [
+        (300, 2, 400, 60), (20000, 4, 400, 60), (3000, 5, 6, 3),
+    ])
+    def test_round_one_within_caps(self, n, seed, brands, dispensaries):
+        config = DetectionConfig(backfill_threshold=0.0)
+        picks, target, round1 = _select_category_picks(
+            make_deals(n, seed, brands=brands, dispensaries=dispensaries), config,
+        )
+        chosen = [d for deals in picks.values() for d in deals]
+        assert len(chosen) == round1 <= target
+        brands_seen = Counter(d["brand"] or "_unknown" for d in chosen)
+        assert brands_seen.pop("_unknown", 0) <= config.max_unknown_brand_total
+        assert max(brands_seen.values()) <= config.max_same_brand_total + 3
+        per_category = Counter((cat, d["brand"]) for cat, deals in picks.items() for d in deals if d["brand"])
+        assert max(per_category.values()) <= config.max_same_brand_per_category + 1
+        assert max(Counter(d["dispensary_id"] for d in chosen).values()) <= config.max_same_dispensary_total
+        assert len({(d["name"], d["sale_price"]) for d in chosen}) == len(chosen)
+        assert all(len(picks[c]) <= int(t * 1.5) for c, t in config.category_targets.items() if c in picks)
+
+    def test_odd_weights(self):
+        deals = make_deals(1500, 8)
+        for i, deal in enumerate(deals[::7]):
+            deal["weight_value"] = ("3.5", "1g", "", None, 0)[i % 5]
+        picks, _, _ = _select_category_picks(deals, DetectionConfig())
+        assert 0 < sum(len(p) for p in picks.values())
+
+
+class TestFeed:
+    """The whole feed is deterministic and never exceeds the target."""
+
+    @pytest.mark.parametrize("n,seed", [(300, 11), (5000, 12)])
+    def test_deterministic(self, n, seed):
+        deals = make_deals(n, seed)
+        feed = select_top_deals(deals)
+        assert 0 < len(feed) <= DetectionConfig().target_deal_count
+        assert feed == select_top_deals(make_deals(n, seed))
+
+
+class TestLeaders:
+    """Cheapest deal per weight tier or subtype, backfilled by price."""
+
+    def test_disposable_tiers(self):
+        pool = [
+            _deal("s1", "", 20, 0, weight=0.3), _deal("s2", "", 18, 0, weight=0.5),
+            _deal("m1", "", 25, 0, weight=0.6), _deal("l1", "", 30, 0, weight=1.0),
+            _deal("l2", "", 28, 0, weight="1g"), _deal("u1", "", 15, 0, weight=None),
+        ]
+        assert _names(_pick_disposable_price_leaders(pool)) == ["s2", "m1", "l2"]
+        # One tier stocked: the other two slots go to the next cheapest.
+        assert _names(_pick_disposable_price_leaders([pool[0], pool[1], pool[5]])) == ["u1", "s2", "s1"]
+
+    def test_flower_tiers(self):
+        pool = [
+            _deal("e1", "", 20, 0, weight=3.5), _deal("e2", "", 15, 0, weight=3.5),
+            _deal("q1", "", 35, 0, weight=7), _deal("h1", "", 55, 0, weight=14),
+            _deal("o1", "", 90, 0, weight=28), _deal("o2", "", 80, 0, weight=28),
+            _deal("u", "", 10, 0, weight=0),
+        ]
+        assert _names(_pick_flower_price_leaders(pool)) == ["e2", "q1", "h1", "o2"]
+        # Price ties go to the first listed.
+        e3 = _deal("e3", "", 15, 0, weight="3.5g")
+        assert _names(_pick_flower_price_leaders([pool[0], pool[1], e3, pool[2]])) == ["e2", "e3", "e1", "q1"]
+
+    def test_vape_tiers(self):
+        pool = [
+            _deal("h1", "", 20, 0, weight=0.5), _deal("h2", "", 18, 0, weight=0.5),
+            _deal("f1", "", 30, 0, weight=1.0), _deal("f2", "", 32, 0, weight=0.85),
+        ]
+        assert _names(_pick_vape_price_leaders(pool)) == ["h2", "f1"]
+        f3 = _deal("f3", "", 28, 0, weight=1)
+        assert _names(_pick_vape_price_leaders([pool[2], pool[3], f3])) == ["f3", "f1"]
+
+    def test_subtypes(self):
+        pool = [
+            _deal("r1", "", 30, 0, subtype="rosin"), _deal("r2", "", 25, 0, subtype="rosin"),
+            _deal("lr", "", 28, 0, subtype="live_resin"), _deal("n", "", 5, 0),
+            _deal("sh", "", 25, 0, subtype="shatter"),
+        ]
+        assert _names(_pick_subtype_leaders(pool)) == ["r2", "sh", "lr"]
+
+    def test_selection_bucket(self):
+        assert _selection_bucket(_deal("d", "", 1, 0, category="vape", subtype="disposable")) == "disposable"
+        assert _selection_bucket(_deal("c", "", 1, 0, category="vape", subtype="cartridge")) == "vape"
+        assert _selection_bucket(_deal("x", "", 1, 0, category="topical")) == "other"
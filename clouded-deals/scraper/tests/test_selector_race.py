@@ -0,0 +1,157 @@
+"""Tests for handlers/selector_race.py — concurrent selector waits.
+
+Uses fake Page/Frame objects whose selectors "appear" after a configured
+delay, so races run in milliseconds without a browser.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+# Same permissive playwright mock as test_pagination.py — only installed
+# when the real package is missing.
+class _PermissiveMock(ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return MagicMock
+
+
+if "playwright" not in sys.modules:
+    _pw = _PermissiveMock("playwright")
+    _pw_async = _PermissiveMock("playwright.async_api")
+    _pw_async.TimeoutError = type("PlaywrightTimeout", (Exception,), {})
+    _pw.async_api = _pw_async
+    sys.modules["playwright"] = _pw
+    sys.modules["playwright.async_api"] = _pw_async
+
+if "playwright_stealth" not in sys.modules:
+    _stealth = _PermissiveMock("playwright_stealth")
+    _stealth.stealth_async = AsyncMock()
+    sys.modules["playwright_stealth"] = _stealth
+
+from handlers import selector_race  # noqa: E402
+from handlers.selector_race import race_selectors  # noqa: E402
+
+PlaywrightTimeout = selector_race.PlaywrightTimeout
+
+
+class _FakeLocator:
+    def __init__(self, target: "_FakeTarget", selector: str):
+        self._target = target
+        self._selector = selector
+
+    @property
+    def first(self) -> "_FakeLocator":
+        return self
+
+    def _appears_at(self) -> float | None:
+        return self._target.appear_after.get(self._selector)
+
+    async def wait_for(self, *, state: str, timeout: int) -> None:
+        delay = self._appears_at()
+        if self._selector in self._target.broken:
+            raise RuntimeError("Target page, context or browser has been closed")
+        if delay is None or delay * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise PlaywrightTimeout(f"Timeout {timeout}ms exceeded")
+        await asyncio.sleep(delay)
+
+    async def count(self) -> int:
+        delay = self._appears_at()
+        elapsed = time.monotonic() - self._target.started
+        return 1 if delay is not None and elapsed >= delay else 0
+
+    async def is_visible(self) -> bool:
+        return await self.count() > 0
+
+
+class _FakeTarget:
+    """Selector → seconds until it appears (missing = never)."""
+
+    def __init__(self, appear_after: dict[str, float], *, js_after: dict[str, float] | None = None,
+                 broken: set[str] | None = None):
+        self.appear_after = appear_after
+        self.js_after = js_after or {}
+        self.broken = broken or set()
+        self.started = time.monotonic()
+
+    def locator(self, selector: str) -> _FakeLocator:
+        return _FakeLocator(self, selector)
+
+    async def wait_for_function(self, js: str, *, timeout: int) -> bool:
+        delay = self.js_after.get(js)
+        if delay is None or delay * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise PlaywrightTimeout(f"Timeout {timeout}ms exceeded")
+        await asyncio.sleep(delay)
+        return True
+
+
+class TestRaceSelectors:
+    """Concurrent waits return the first match under one shared timeout."""
+
+    def test_returns_first_to_appear(self):
+        target = _FakeTarget({"a": 0.2, "b": 0.02, "c": 0.1})
+        winner, elapsed = asyncio.run(
+            race_selectors(target, ["a", "b", "c"], timeout_ms=1_000, prefer_order=False)
+        )
+        assert winner == "b"
+        assert elapsed < 0.15
+
+    def test_worst_case_is_one_timeout_not_n(self):
+        target = _FakeTarget({})
+        winner, elapsed = asyncio.run(
+            race_selectors(target, ["a", "b", "c", "d", "e"], timeout_ms=100)
+        )
+        assert winner is None
+        assert elapsed < 0.3  # sequential waits would take 0.5 s
+
+    def test_prefers_earlier_selector_when_both_present(self):
+        # Both exist immediately — list order decides, not which waiter
+        # happened to resolve first.
+        target = _FakeTarget({"specific": 0.0, "generic": 0.0})
+        winner, _ = asyncio.run(
+            race_selectors(target, ["specific", "generic"], timeout_ms=500)
+        )
+        assert winner == "specific"
+
+    def test_later_selector_wins_when_earlier_absent(self):
+        target = _FakeTarget({"generic": 0.01})
+        winner, _ = asyncio.run(
+            race_selectors(target, ["specific", "generic"], timeout_ms=500)
+        )
+        assert winner == "generic"
+
+    def test_js_predicate_can_win(self):
+        js = "() => document.querySelectorAll('.card').length >= 3"
+        target = _FakeTarget({}, js_after={js: 0.01})
+        winner, _ = asyncio.run(
+            race_selectors(target, ["a"], js_predicates=[js], timeout_ms=500)
+        )
+        assert winner == js
+
+    def test_empty_candidates(self):
+        winner, elapsed = asyncio.run(race_selectors(_FakeTarget({}), [], timeout_ms=500))
+        assert winner is None
+        assert elapsed == 0.0
+
+    def test_non_timeout_error_raised_when_nothing_matches(self):
+        target = _FakeTarget({}, broken={"a", "b"})
+        with pytest.raises(RuntimeError, match="closed"):
+            asyncio.run(race_selectors(target, ["a", "b"], timeout_ms=100))
+
+    def test_match_beats_error_on_other_candidate(self):
+        target = _FakeTarget({"b": 0.01}, broken={"a"})
+        winner, _ = asyncio.run(race_selectors(target, ["a", "b"], timeout_ms=500))
+        assert winner == "b"
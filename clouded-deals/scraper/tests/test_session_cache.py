@@ -0,0 +1,77 @@
+"""Tests for the per-domain browser session cache."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import session_cache
+
+STATE = {
+    "cookies": [{"name": "agc", "value": "1", "domain": ".planet13.com", "path": "/"}],
+    "origins": [{"origin": "https://planet13.com", "localStorage": [{"name": "store", "value": "p13"}]}],
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolated_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_cache, "SESSION_CACHE_DIR", tmp_path / "storage_state")
+
+
+class TestSessionKey:
+    """Keys group by bare domain unless the scraper asks for site scope."""
+
+    def test_domain_scope_strips_www(self):
+        assert session_cache.session_key("https://www.planet13.com/menu", "planet13") == "planet13.com"
+
+    def test_domain_scope_shared_across_slugs(self):
+        a = session_cache.session_key("https://thrivenevada.com/a", "thrive-sahara")
+        b = session_cache.session_key("https://thrivenevada.com/b", "thrive-cheyenne")
+        assert a == b
+
+    def test_site_scope_separates_slugs(self):
+        a = session_cache.session_key("https://planet13.com/", "planet13", scope="site")
+        b = session_cache.session_key("https://planet13.com/", "medizin", scope="site")
+        assert a != b
+        assert a.startswith("planet13.com")
+
+    def test_key_is_filesystem_safe(self):
+        key = session_cache.session_key("https://shop.example.com:8443/x", "a/b c", scope="site")
+        assert "/" not in key and " " not in key and ":" not in key
+
+
+class TestPersistence:
+    """Save → load → invalidate round trip."""
+
+    def test_round_trip(self):
+        assert session_cache.save_state("planet13.com", STATE)
+        assert session_cache.load_state("planet13.com") == STATE
+
+    def test_missing_returns_none(self):
+        assert session_cache.load_state("nowhere.com") is None
+
+    def test_empty_state_not_saved(self):
+        assert not session_cache.save_state("planet13.com", {"cookies": [], "origins": []})
+        assert session_cache.load_state("planet13.com") is None
+
+    def test_ttl_expiry_deletes_file(self, monkeypatch):
+        session_cache.save_state("planet13.com", STATE)
+        future = time.time() + (session_cache.SESSION_STATE_TTL_HOURS + 1) * 3600
+        monkeypatch.setattr(session_cache.time, "time", lambda: future)
+        assert session_cache.load_state("planet13.com") is None
+        assert not (session_cache.SESSION_CACHE_DIR / "planet13.com.json").exists()
+
+    def test_invalidate(self):
+        session_cache.save_state("planet13.com", STATE)
+        session_cache.invalidate("planet13.com", "scrape failed")
+        assert session_cache.load_state("planet13.com") is None
+
+    def test_invalidate_missing_is_noop(self):
+        session_cache.invalidate("nowhere.com")
+
+    def test_corrupt_file_discarded(self):
+        session_cache.SESSION_CACHE_DIR.mkdir(parents=True)
+        (session_cache.SESSION_CACHE_DIR / "planet13.com.json").write_text("{oops")
+        assert session_cache.load_state("planet13.com") is None
+        assert not (session_cache.SESSION_CACHE_DIR / "planet13.com.json").exists()